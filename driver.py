@@ -1,4 +1,5 @@
 import argparse
+import atexit
 import json
 import os
 import re
@@ -16,12 +17,16 @@ except ImportError:  # pragma: no cover - resource not on Windows
 
 import yaml
 
-from modules.common.utils import ensure_dir, ProgressLogger, append_jsonl, read_jsonl, save_json
+from modules.common.utils import (
+    ensure_dir, ProgressLogger, append_jsonl, read_jsonl, save_json,
+    artifact_format, artifact_base_name, with_artifact_format, write_artifact_preview,
+)
 from modules.common.patch_handler import (
     discover_patch_file, copy_patch_file_to_run, load_patches, apply_patch,
     get_suppressed_warnings, should_suppress_warning
 )
-from modules.common.run_registry import record_run_health, record_run_manifest
+from modules.common.run_registry import record_run_health, record_run_manifest, resolve_output_root
+from modules.common import blob_store, cost_model, llm_cache, profiling, sharding, stream
 from validate_artifact import SCHEMA_MAP
 from modules.common.utils import save_jsonl
 from schemas import RunConfig
@@ -42,13 +47,19 @@ DEFAULT_OUTPUTS = {
     "enrich": "portions_enriched.jsonl",
 }
 
-def cleanup_artifact(artifact_path: str, force: bool):
+# instrumentation_call_v1 flags for calls answered without a provider request (see modules/common/llm_cache.py).
+REUSE_FLAGS = ("cached", "deduped", "coalesced")
+
+def cleanup_artifact(artifact_path: str, force: bool) -> bool:
     """
     Delete existing artifact when forcing a rerun to avoid duplicate appends.
+    Returns True when an artifact was removed.
     """
     if force and os.path.exists(artifact_path):
         os.remove(artifact_path)
         print(f"[force-clean] removed existing {artifact_path}")
+        return True
+    return False
 
 def _artifact_name_for_stage(stage_id: str, stage_type: str, outputs_map: Dict[str, str], stage_conf: Dict[str, Any] = None) -> str:
     # 1. Use stage-level out from recipe if provided
@@ -119,6 +130,24 @@ def _preload_artifacts_from_state(state_path: str) -> Dict[str, Dict[str, str]]:
     return artifacts
 
 
+def _completed_stages(state_path: str) -> set:
+    """
+    Stage ids whose artifact an earlier attempt in this run directory produced: `done`, or `skipped`
+    by --skip-done/the force guard because that artifact was already present.
+    """
+    if not os.path.exists(state_path):
+        return set()
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except Exception:
+        return set()
+    return {
+        sid for sid, st in (state.get("stages") or {}).items()
+        if st.get("status") in ("done", "skipped") and st.get("artifact") and os.path.exists(st["artifact"])
+    }
+
+
 def _invalidate_downstream_outputs(run_dir: str, plan: Dict[str, Any], start_from: str,
                                    keep_downstream: bool, state_path: str,
                                    logger: "ProgressLogger") -> None:
@@ -193,6 +222,10 @@ def _render_instrumentation_md(run_data: Dict[str, Any], path: str):
     lines.append(f"- Run ended: {run_data.get('ended_at')}")
     lines.append(f"- Wall time: {totals.get('wall_seconds') or run_data.get('wall_seconds') or 'n/a'} seconds")
     lines.append(f"- Total cost: {totals.get('cost', 0):.6f} {currency}")
+    reused = {flag: totals.get(f"{flag}_calls", 0) for flag in REUSE_FLAGS}
+    if any(reused.values()):
+        lines.append("- Calls answered without a provider request: "
+                     + ", ".join(f"{count} {flag}" for flag, count in reused.items()))
     lines.append("")
     lines.append("## Per-model cost")
     per_model = totals.get("per_model", {})
@@ -215,6 +248,65 @@ def _render_instrumentation_md(run_data: Dict[str, Any], path: str):
             f"{lt.get('cost',0):.6f} | {lt.get('calls',0)} |"
         )
     lines.append("")
+    forecasted = [st for st in run_data.get("stages", []) if (st.get("extra") or {}).get("forecast")]
+    if forecasted:
+        forecast = run_data.get("forecast") or {}
+        lines.append("## Forecast vs actual")
+        lines.append(f"- Pages: {forecast.get('pages')}; history runs: {forecast.get('history_runs')}")
+        if forecast.get("critical_path"):
+            lines.append(f"- Critical path ({forecast.get('critical_path_seconds', 0):.0f}s): {' -> '.join(forecast['critical_path'])}")
+        lines.append("")
+        lines.append("| stage | forecast_s | actual_s | error_% | forecast_calls | actual_calls | forecast_cost | actual_cost |")
+        lines.append("|---|---:|---:|---:|---:|---:|---:|---:|")
+        for st in forecasted:
+            fc = st["extra"]["forecast"]
+            lt = st.get("llm_totals", {})
+            err = (st["extra"].get("forecast_error") or {}).get("wall_seconds_pct")
+            lines.append(
+                f"| {st.get('id')} | {fc.get('wall_seconds', 0):.1f} | {st.get('wall_seconds') or 0:.1f} | "
+                f"{'' if err is None else err} | {fc.get('calls', 0):.0f} | {lt.get('calls', 0)} | "
+                f"{fc.get('cost', 0):.6f} | {lt.get('cost', 0):.6f} |"
+            )
+        lines.append("")
+    profiled = [st for st in run_data.get("stages", []) if (st.get("extra") or {}).get("profile")]
+    if profiled:
+        lines.append("## Stage profiles")
+        for st in profiled:
+            prof = st["extra"]["profile"]
+            lines.append("")
+            lines.append(f"### {st.get('id')} ({prof.get('profiler')}, run {prof.get('run_id')})")
+            if prof.get("prof_path"):
+                lines.append(f"- pstats: `{prof['prof_path']}`")
+            if prof.get("collapsed_path"):
+                lines.append(f"- collapsed stacks: `{prof['collapsed_path']}`")
+            top = prof.get("top_functions") or []
+            if not top:
+                lines.append("_no profile data captured_")
+                continue
+            lines.append("")
+            lines.append("| function | self_s | cumulative_s |")
+            lines.append("|---|---:|---:|")
+            for row in top:
+                lines.append(f"| `{row.get('function')}` | {row.get('self_seconds', 0):.3f} | {row.get('cumulative_seconds', 0):.3f} |")
+        lines.append("")
+    looped = [st for st in run_data.get("stages", []) if (st.get("extra") or {}).get("loop_attempts")]
+    if looped:
+        lines.append("## Loop attempts")
+        for st in looped:
+            lines.append("")
+            lines.append(f"### {st.get('id')}")
+            lines.append("")
+            lines.append("| attempt | wall_s | steps | dirty | remaining |")
+            lines.append("|---:|---:|---|---|---:|")
+            for ev in st["extra"]["loop_attempts"]:
+                steps = ", ".join(f"{k} {v:.2f}s" for k, v in (ev.get("step_seconds") or {}).items())
+                dirty = ", ".join(f"{k}={v}" for k, v in (ev.get("dirty") or {}).items())
+                remaining = ev.get("remaining")
+                lines.append(
+                    f"| {ev.get('attempt')} | {ev.get('wall_seconds', 0):.2f} | {steps} | {dirty} | "
+                    f"{'' if remaining is None else remaining} |"
+                )
+        lines.append("")
     with open(path, "w", encoding="utf-8") as f:
         f.write("\n".join(lines))
 
@@ -444,6 +536,12 @@ def build_plan(recipe: Dict[str, Any], registry: Dict[str, Any]) -> Dict[str, An
                 params_for_validation[key] = inputs.get("inputs")
         _validate_params(params_for_validation, entry.get("param_schema"), stage_id, module_id)
         artifact_name = _artifact_name_for_stage(stage_id, stage_type, outputs_map, conf)
+        # Optional compressed/columnar storage for JSONL artifacts (recipe default, per-stage override).
+        storage_format = conf.get("artifact_format") or recipe.get("artifact_format")
+        try:
+            artifact_name = with_artifact_format(artifact_name, storage_format)
+        except ValueError as e:
+            raise SystemExit(f"Stage '{stage_id}': {e}")
         description = conf.get("description") or entry.get("notes") or entry.get("description")
         output_schema = entry.get("output_schema") or params.get("schema_version")
         nodes[stage_id] = {
@@ -459,6 +557,24 @@ def build_plan(recipe: Dict[str, Any], registry: Dict[str, Any]) -> Dict[str, An
             "output_schema": output_schema,
             "description": description,
         }
+        shard_conf = sharding.normalize_shard_conf(conf.get("shard"), stage_id)
+        if shard_conf:
+            nodes[stage_id]["shard"] = shard_conf
+        stream_from = conf.get("stream")
+        if stream_from:
+            if stream_from is True:
+                stream_from = list(needs)
+            elif isinstance(stream_from, str):
+                stream_from = [stream_from]
+            unknown = [d for d in stream_from if d not in needs]
+            if unknown:
+                raise SystemExit(f"Stage '{stage_id}': stream lists {unknown}, which are not in needs")
+            if not entry.get("streaming_input"):
+                raise SystemExit(f"Stage '{stage_id}': module {module_id} does not read streamed input "
+                                 "(streaming_input is not set in its module.yaml)")
+            if shard_conf:
+                raise SystemExit(f"Stage '{stage_id}': a sharded stage cannot stream its input")
+            nodes[stage_id]["stream_from"] = list(stream_from)
         prior_id = stage_id if linear else prior_id
 
     # validate needs references
@@ -466,6 +582,11 @@ def build_plan(recipe: Dict[str, Any], registry: Dict[str, Any]) -> Dict[str, An
         for dep in node["needs"]:
             if dep not in nodes:
                 raise SystemExit(f"Stage {node['id']} needs unknown stage '{dep}'")
+        for dep in node.get("stream_from", []):
+            producer = nodes[dep]
+            if artifact_format(producer["artifact_name"]) != "jsonl" or producer.get("shard"):
+                raise SystemExit(f"Stage {node['id']} cannot stream from {dep}: "
+                                 "only unsharded stages with plain .jsonl artifacts can be streamed")
 
     graph = {sid: set(n["needs"]) for sid, n in nodes.items()}
     topo = _toposort(graph) if graph else []
@@ -1162,28 +1283,32 @@ def stamp_artifact(artifact_path: str, schema_name: str, module_id: str, run_id:
                 extra = set(row.keys()) - allowed_keys
                 if extra:
                     dropped_keys.update(extra)
-            row.setdefault("schema_version", schema_name)
-            if not row.get("module_id"):
-                row["module_id"] = module_id
-            if not row.get("run_id"):
-                row["run_id"] = run_id
-            if not row.get("created_at"):
-                row["created_at"] = datetime.utcnow().isoformat() + "Z"
-            rows.append(model_cls(**row).dict())
+            rows.append(stream.stamp_row(row, schema_name, module_id, run_id))
         except Exception as e:
             print(f"[stamp-skip] skipping row due to validation error: {e}")
-    save_jsonl(artifact_path, rows)
+    # Write aside and rename: a streaming consumer may still be reading the unstamped file.
+    tmp_path = os.path.join(os.path.dirname(artifact_path), ".stamping." + os.path.basename(artifact_path))
+    save_jsonl(tmp_path, rows)
+    os.replace(tmp_path, artifact_path)
     print(f"[stamp] {artifact_path} stamped with {schema_name} ({len(rows)} rows)")
     if dropped_keys:
         dropped_list = ", ".join(sorted(dropped_keys))
         print(f"[stamp-warning] {artifact_path} dropped unknown fields not in schema {schema_name}: {dropped_list}")
 
 
-def copy_key_artifact_to_root(artifact_path: str, run_dir: str, artifact_name: str, artifact_index: Dict[str, Any] = None) -> None:
+def copy_key_artifact_to_root(artifact_path: str, run_dir: str, artifact_name: str, artifact_index: Dict[str, Any] = None,
+                              blob_output_root: Optional[str] = None, run_id: Optional[str] = None) -> None:
     """
     Copy key intermediate artifacts to root for visibility.
     Key artifacts are major pipeline milestones that should be visible in root.
+    When blob_output_root is set, the root copy is a reflink/hardlink into the shared blob store.
     """
+    def _copy(src: str, dst: str) -> None:
+        if blob_output_root:
+            blob_store.link_into(src, dst, blob_output_root, run_id=run_id)
+        else:
+            shutil.copy2(src, dst)
+
     # List of key artifact names that should be copied to root
     key_artifacts = {
         "pagelines_final.jsonl",
@@ -1196,11 +1321,12 @@ def copy_key_artifact_to_root(artifact_path: str, run_dir: str, artifact_name: s
         return
     
     # Check if this is a primary artifact that should be copied
-    if artifact_name in key_artifacts:
+    # (compare format-agnostic names so pagelines_final.jsonl.zst still qualifies)
+    if artifact_base_name(artifact_name) in key_artifacts:
         root_path = os.path.join(run_dir, artifact_name)
         try:
             if os.path.exists(artifact_path):
-                shutil.copy2(artifact_path, root_path)
+                _copy(artifact_path, root_path)
                 print(f"[copy-to-root] {artifact_name} -> {root_path}")
         except Exception as e:
             # Non-fatal - log but don't fail
@@ -1216,12 +1342,66 @@ def copy_key_artifact_to_root(artifact_path: str, run_dir: str, artifact_name: s
         if os.path.exists(pagelines_final_path):
             root_path = os.path.join(run_dir, "pagelines_final.jsonl")
             try:
-                shutil.copy2(pagelines_final_path, root_path)
+                _copy(pagelines_final_path, root_path)
                 print(f"[copy-to-root] pagelines_final.jsonl -> {root_path}")
             except Exception as e:
                 print(f"[copy-to-root-warning] Failed to copy pagelines_final.jsonl to root: {e}")
 
 
+def run_sharded_stage(stage_id: str, module_id: str, cmd: List[str], cwd: str, env: Dict[str, str],
+                      shard_conf: Dict[str, Any], artifact_inputs: Dict[str, Any], artifact_path: str,
+                      state_path: str, progress_path: str, logger: ProgressLogger,
+                      force: bool = False, tick=None) -> subprocess.CompletedProcess:
+    """
+    Run a page-local stage as concurrent page-range shards and merge their outputs into
+    artifact_path. Shards finished by an earlier attempt (same input) are reused.
+    """
+    module_dir = os.path.dirname(artifact_path)
+    shard_root = os.path.join(module_dir, "shards")
+    if force and os.path.isdir(shard_root):
+        shutil.rmtree(shard_root)
+    input_path = sharding.select_shard_input(artifact_inputs, shard_conf.get("input"), stage_id)
+    shards = sharding.plan_shards(input_path, shard_root, shard_conf["size"], os.path.basename(artifact_path))
+    pending = [s for s in shards if not sharding.shard_done(s)]
+    print(f"[shard] {stage_id}: {len(shards)} shards of {shard_conf['size']} pages "
+          f"({len(shards) - len(pending)} reused, {shard_conf['workers']} workers)")
+
+    def build_shard_cmd(shard):
+        return sharding.shard_command(cmd, {
+            input_path: shard["input"],
+            artifact_path: shard["output"],
+            module_dir: shard["outdir"],
+            state_path: os.path.join(shard["dir"], "pipeline_state.json"),
+            progress_path: os.path.join(shard["dir"], "pipeline_events.jsonl"),
+        })
+
+    finished = len(shards) - len(pending)
+
+    def on_done(shard, rc):
+        nonlocal finished
+        pages = f"pages {shard['first_page']}-{shard['last_page']}"
+        if rc != 0:
+            logger.log(stage_id, "running", module_id=module_id,
+                       message=f"shard {shard['index']}/{len(shards)} ({pages}) failed with code {rc}",
+                       extra={"shard": shard["index"], "exit_code": rc})
+            return
+        sharding.complete_shard(shard, module_dir)
+        finished += 1
+        logger.log(stage_id, "running", current=finished, total=len(shards), module_id=module_id,
+                   message=f"shard {shard['index']}/{len(shards)} ({pages}) done",
+                   extra={"shard": shard["index"]})
+
+    codes = sharding.run_shards(pending, build_shard_cmd, cwd, env, shard_conf["workers"],
+                                on_done=on_done, tick=tick)
+    failed = sorted(idx for idx, rc in codes.items() if rc != 0)
+    if failed:
+        print(f"[shard] {stage_id}: shards {failed} failed; rerun resumes from them")
+        return subprocess.CompletedProcess(cmd, codes[failed[0]])
+    rows = sharding.merge_shard_outputs(shards, artifact_path, module_dir)
+    print(f"[shard] {stage_id}: merged {rows} rows from {len(shards)} shards -> {artifact_path}")
+    return subprocess.CompletedProcess(cmd, 0)
+
+
 def mock_clean(pages_path: str, out_path: str, module_id: str, run_id: str):
     rows = []
     for row in read_jsonl(pages_path):
@@ -1335,6 +1515,10 @@ def main():
     parser.add_argument("--keep-downstream", action="store_true",
                         help="When resuming with --start-from, keep downstream artifacts instead of invalidating them (not recommended)")
     parser.add_argument("--end-at", dest="end_at", help="Stop after executing this stage id (inclusive)")
+    parser.add_argument("--blob-store", action="store_true",
+                        help="Deduplicate page images and root artifact copies into output/blobs (reflink/hardlink)")
+    parser.add_argument("--profile-stages", dest="profile_stages",
+                        help="Comma-separated stage ids (or 'all') to run under a CPU profiler (py-spy if installed, else cProfile); implies --instrument")
     args = parser.parse_args()
 
     # Load from config if provided
@@ -1361,9 +1545,11 @@ def main():
         args.no_validate = args.no_validate or config.options.no_validate
         args.allow_run_id_reuse = args.allow_run_id_reuse or config.options.allow_run_id_reuse
         args.dump_plan = args.dump_plan or config.options.dump_plan
+        args.blob_store = args.blob_store or config.options.blob_store
         
         args.instrument = args.instrument or config.instrumentation.enabled
         args.price_table = args.price_table or config.instrumentation.price_table
+        args.profile_stages = args.profile_stages or config.instrumentation.profile_stages
         
 
     if not args.recipe:
@@ -1394,7 +1580,8 @@ def main():
         recipe["input"]["pdf"] = args.input_pdf_override
 
     instr_conf = recipe.get("instrumentation", {}) or {}
-    instrument_enabled = bool(instr_conf.get("enabled") or args.instrument)
+    profile_spec = args.profile_stages or instr_conf.get("profile_stages")
+    instrument_enabled = bool(instr_conf.get("enabled") or args.instrument or profile_spec)
     price_table_path = args.price_table or instr_conf.get("price_table")
     if instrument_enabled and not price_table_path:
         price_table_path = "configs/pricing.default.yaml"
@@ -1486,9 +1673,26 @@ def main():
         if start_idx > end_idx:
             raise SystemExit("--start-from must precede or equal --end-at")
 
+    profile_stage_ids = profiling.parse_profile_stages(profile_spec, plan["topo"])
+
+    forecast = None
+    if args.dry_run or args.dump_plan or instrument_enabled:
+        forecast_ids = plan["topo"]
+        if args.start_from:
+            forecast_ids = forecast_ids[forecast_ids.index(args.start_from):]
+        if args.end_at:
+            forecast_ids = forecast_ids[:forecast_ids.index(args.end_at) + 1]
+        forecast = cost_model.forecast_run(
+            plan, recipe.get("input") or {},
+            runs_root=os.path.join(resolve_output_root(run_dir=run_dir), "runs"),
+            exclude_run_dir=run_dir, stage_ids=forecast_ids,
+        )
+
     if args.dump_plan:
-        print(json.dumps({"topo": plan["topo"], "nodes": plan["nodes"]}, indent=2))
+        print(json.dumps({"topo": plan["topo"], "nodes": plan["nodes"], "forecast": forecast}, indent=2))
         return
+    if args.dry_run:
+        print(cost_model.render_forecast(forecast))
 
     if args.start_from and args.force:
         print("⚠️  --force ignored because --start-from is set (resume mode).", file=sys.stderr)
@@ -1534,6 +1738,9 @@ def main():
     progress_path = os.path.join(run_dir, "pipeline_events.jsonl")
     logger = ProgressLogger(state_path=state_path, progress_path=progress_path, run_id=run_id)
 
+    # Stages that already completed in this run directory. Running one again (--start-from, a rerun
+    # without --skip-done) asks the model afresh instead of replaying its replies from the run memo.
+    completed_before = _completed_stages(state_path)
     _invalidate_downstream_outputs(run_dir, plan, args.start_from, args.keep_downstream, state_path, logger)
 
     settings_path = args.settings or recipe.get("settings") or recipe.get("settings_path")
@@ -1577,6 +1784,10 @@ def main():
     else:
         patch_file_path = os.path.join(run_dir, "patch.json")
 
+    blob_output_root = resolve_output_root(run_dir=run_dir) if (args.blob_store or recipe.get("blob_store")) else None
+    # Identical LLM requests made again later in the run are answered from this memo (`llm_memo: false` disables it).
+    llm_memo_dir = None if recipe.get("llm_memo") is False else os.path.join(run_dir, "llm_memo")
+
     run_started_at = datetime.utcnow().isoformat() + "Z"
     run_wall_start = time.perf_counter()
     run_cpu_start = _get_cpu_times()
@@ -1588,6 +1799,8 @@ def main():
         os.remove(sink_path)
     sink_offset = 0
     stage_call_map: Dict[str, List[Dict[str, Any]]] = {}
+    stage_attempt_map: Dict[str, List[Dict[str, Any]]] = {}
+    stage_profiles: Dict[str, Dict[str, Any]] = {}
     run_validation_failed = False
 
     run_totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0, "per_model": {}, "wall_seconds": 0.0}
@@ -1603,6 +1816,8 @@ def main():
             "stages": [],
             "totals": run_totals,
             "env": {"python_version": sys.version, "platform": sys.platform},
+            "units": {"pages": forecast["pages"] if forecast else None},
+            "forecast": forecast,
         }
 
     def ingest_sink_events():
@@ -1623,7 +1838,11 @@ def main():
             except Exception:
                 continue
             sid = ev.get("stage_id")
-            if sid:
+            if not sid:
+                continue
+            if ev.get("schema_version") == "instrumentation_attempt_v1":
+                stage_attempt_map.setdefault(sid, []).append(ev)
+            else:
                 stage_call_map.setdefault(sid, []).append(ev)
 
     def _compute_llm_totals(calls: List[Dict[str, Any]]):
@@ -1648,6 +1867,8 @@ def main():
             "completion_tokens": completion_tokens,
             "cost": round(cost_total, 6),
         }
+        for flag in REUSE_FLAGS:
+            llm_totals[f"{flag}_calls"] = sum(1 for c in calls if c.get(flag))
         return llm_totals, per_model
 
     def _resolve_stage_calls(stage_id: str, module_id: str):
@@ -1691,6 +1912,8 @@ def main():
             "llm_totals": llm_totals,
             "extra": {"per_model": per_model, "calls_stage_id": call_stage_id if call_stage_id != stage_id else None},
         }
+        if stage_attempt_map.get(stage_id):
+            stage_entry["extra"]["loop_attempts"] = list(stage_attempt_map[stage_id])
         instrumentation_run["stages"].append(stage_entry)
 
         # Compute live totals (completed stages + current running)
@@ -1748,6 +1971,16 @@ def main():
             "llm_totals": llm_totals,
             "extra": {"per_model": per_model, "calls_stage_id": call_stage_id if call_stage_id != stage_id else None},
         }
+        if stage_id in stage_profiles:
+            stage_entry["extra"]["profile"] = stage_profiles[stage_id]
+        predicted = (forecast or {}).get("stages", {}).get(stage_id)
+        if predicted and status == "done":  # skipped and failed stages say nothing about the forecast
+            stage_entry["extra"]["forecast"] = predicted
+            stage_entry["extra"]["forecast_error"] = cost_model.forecast_error(
+                predicted, {"wall_seconds": wall_seconds, **llm_totals})
+        loop_attempts = stage_attempt_map.pop(stage_id, None)
+        if loop_attempts:
+            stage_entry["extra"]["loop_attempts"] = loop_attempts
         # Remove any running entry for this stage before appending final entry.
         instrumentation_run["stages"] = [
             s for s in instrumentation_run["stages"]
@@ -1758,6 +1991,8 @@ def main():
         run_totals["prompt_tokens"] += llm_totals["prompt_tokens"]
         run_totals["completion_tokens"] += llm_totals["completion_tokens"]
         run_totals["cost"] = round(run_totals["cost"] + llm_totals["cost"], 6)
+        for flag in REUSE_FLAGS:
+            run_totals[f"{flag}_calls"] = run_totals.get(f"{flag}_calls", 0) + llm_totals[f"{flag}_calls"]
         for model, stats in per_model.items():
             agg = run_totals["per_model"].setdefault(model, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0})
             agg["calls"] += stats["calls"]
@@ -1776,88 +2011,97 @@ def main():
 
     start_gate_reached = not bool(args.start_from)
     stage_timings = {}
-    for stage_id in plan["topo"]:
-        if args.start_from and not start_gate_reached:
-            if stage_id == args.start_from:
-                start_gate_reached = True
-            else:
-                # Only require artifacts for stages that are direct dependencies of stages we're running
-                # Don't fail if an upstream stage has no artifact - it might not be needed
-                if stage_id not in artifact_index:
-                    # Check if this stage is actually needed by any stage we're running
-                    # For now, just warn and continue - the stage will fail later if it's actually needed
-                    print(f"[skip-start] {stage_id} skipped due to --start-from (no artifact found, may fail if needed)")
-                else:
-                    print(f"[skip-start] {stage_id} skipped due to --start-from (artifact reused)")
-                # Ensure artifact_index is populated even for skipped stages (it should already be from _preload_artifacts_from_state, but verify)
-                if stage_id in artifact_index:
-                    continue
-                # Fallback: try to load from state if not already in artifact_index
-                try:
-                    with open(state_path, "r", encoding="utf-8") as f:
-                        state = json.load(f)
-                    st = state.get("stages", {}).get(stage_id)
-                    if st and st.get("status") == "done" and st.get("artifact") and os.path.exists(st.get("artifact")):
-                        artifact_index[stage_id] = {"path": st.get("artifact"), "schema": st.get("schema_version")}
-                except Exception:
-                    pass
+
+    # Streaming edges: consumer stages started while their producer is still writing.
+    stream_consumers: Dict[str, List[str]] = {}
+    for sid in plan["topo"]:
+        for dep in plan["nodes"][sid].get("stream_from", []):
+            stream_consumers.setdefault(dep, []).append(sid)
+    stream_consumers_running: Dict[str, Dict[str, Any]] = {}
+    streaming_producers: Dict[str, Dict[str, Any]] = {}
+
+    def stream_eligible(consumer_id: str) -> bool:
+        """Start a consumer early only if the main loop would run it (not skipped, mocked or patched)."""
+        cnode = plan["nodes"][consumer_id]
+        if args.dry_run or (args.mock and cnode["stage"] in {"clean", "portionize", "consensus"}):
+            return False
+        if args.end_at and plan["topo"].index(consumer_id) > plan["topo"].index(args.end_at):
+            return False
+        for dep in cnode["needs"]:
+            if dep in streaming_producers:
+                if dep not in cnode["stream_from"]:
+                    return False
+            elif dep not in artifact_index:
+                return False
+        try:
+            if (args.skip_done or args.force) and os.path.exists(state_path):
+                with open(state_path, "r", encoding="utf-8") as f:
+                    st = json.load(f).get("stages", {}).get(consumer_id)
+                if st and st.get("status") == "done" and os.path.exists(st.get("artifact", "")):
+                    return False
+            if patch_file_path and os.path.exists(patch_file_path):
+                patches = load_patches(patch_file_path).get("patches", [])
+                producer_modules = {plan["nodes"][d]["module"] for d in cnode["stream_from"]}
+                if any(p.get("apply_before") == cnode["module"] or p.get("apply_after") in producer_modules
+                       for p in patches):
+                    return False
+        except Exception:
+            return False
+        return True
+
+    def launch_stream_consumers(producer_id: str, producer_path: str) -> None:
+        pnode = plan["nodes"][producer_id]
+        for consumer_id in stream_consumers.get(producer_id, []):
+            if consumer_id in stream_consumers_running:
+                continue
+            streaming_producers.setdefault(producer_id, {
+                "path": os.path.abspath(producer_path),
+                "schema": pnode.get("output_schema"),
+                "module_id": pnode["module"],
+                "run_id": run_id,
+            })
+            if not stream_eligible(consumer_id):
                 continue
+            artifact_index.setdefault(producer_id, {"path": producer_path, "schema": pnode.get("output_schema")})
+            cnode = plan["nodes"][consumer_id]
+            started = (datetime.utcnow().isoformat() + "Z", time.perf_counter(), _get_cpu_times())
+            prepared = prepare_stage(consumer_id)
+            consumer_path = prepared[1]
+            # Its own consumers tail this file, so never let them see a previous attempt's rows.
+            for stale in (consumer_path, stream.complete_marker_path(consumer_path)):
+                if os.path.exists(stale):
+                    os.remove(stale)
+            if blob_output_root:
+                blob_store.detach_tree(os.path.dirname(consumer_path))
+            env_c = stage_env(consumer_id, cnode["module"], fresh=consumer_id in completed_before)
+            env_c[stream.STREAM_ENV] = json.dumps({
+                streaming_producers[d]["path"]: {k: v for k, v in streaming_producers[d].items() if k != "path"}
+                for d in cnode["stream_from"] if d in streaming_producers
+            })
+            logger.log(consumer_id, "running", artifact=consumer_path, module_id=cnode["module"],
+                       message=f"started (streaming from {producer_id})",
+                       stage_description=cnode.get("description"))
+            print(f"[stream] {consumer_id} ({cnode['module']}) started on rows from {producer_id}")
+            proc = subprocess.Popen(prepared[2], cwd=prepared[3], env=env_c)
+            stream_consumers_running[consumer_id] = {"proc": proc, "prepared": prepared, "started": started}
+            launch_stream_consumers(consumer_id, consumer_path)
+        if not stream_consumers_running.keys() & set(stream_consumers.get(producer_id, [])):
+            streaming_producers.pop(producer_id, None)
+
+    def stop_stream_consumers() -> None:
+        for entry in stream_consumers_running.values():
+            if entry["proc"].poll() is None:
+                entry["proc"].terminate()
+
+    atexit.register(stop_stream_consumers)
+
+    def prepare_stage(stage_id: str):
+        """Resolve a stage's input artifacts and build its command: (artifact_inputs, artifact_path, cmd, cwd)."""
         node = plan["nodes"][stage_id]
         stage = node["stage"]
         module_id = node["module"]
         entrypoint = node["entrypoint"]
         out_schema = node.get("output_schema")
-        stage_description = node.get("description")
-        stage_started_at = datetime.utcnow().isoformat() + "Z"
-        stage_wall_start = time.perf_counter()
-        stage_cpu_start = _get_cpu_times()
-
-        # Guard: Prevent --force from re-running expensive stages unnecessarily
-        # Expensive stages: extract (OCR), escalate_vision (GPT-4V), intake (OCR ensemble)
-        if args.force and not args.dry_run and os.path.exists(state_path):
-            try:
-                with open(state_path, "r", encoding="utf-8") as f:
-                    state = json.load(f)
-                st = state.get("stages", {}).get(stage_id)
-                if st and st.get("status") == "done" and os.path.exists(st.get("artifact", "")):
-                    expensive_stages = {"extract", "intake", "escalate_vision"}
-                    if stage in expensive_stages or any(exp in stage_id.lower() for exp in ["ocr", "extract", "escalate", "intake"]):
-                        print(f"[force-guard] Skipping expensive stage {stage_id} (already done). Use --skip-done --start-from <stage> to resume from a specific stage instead.")
-                        logger.log(stage_id, "skipped", artifact=st.get("artifact"), module_id=module_id,
-                                   message="Skipped due to force-guard (expensive stage already done)", stage_description=stage_description)
-                        artifact_index[stage_id] = {"path": st.get("artifact"), "schema": st.get("schema_version")}
-                        record_stage_instrumentation(stage_id, module_id, "skipped", st.get("artifact"), st.get("schema_version"),
-                                                     stage_started_at, stage_wall_start, stage_cpu_start)
-                        continue
-            except Exception:
-                pass
-
-        # Skip if already done and skip-done requested (state + artifact exists)
-        # Exception: initialize_output_v1 should always run to ensure output folder is up to date
-        always_run_modules = {"initialize_output_v1"}
-        if args.skip_done and os.path.exists(state_path) and module_id not in always_run_modules:
-            try:
-                with open(state_path, "r", encoding="utf-8") as f:
-                    state = json.load(f)
-                st = state.get("stages", {}).get(stage_id)
-                if st and st.get("status") == "done" and os.path.exists(st.get("artifact", "")) and not args.force:
-                    schema_ok = True
-                    if out_schema:
-                        recorded = st.get("schema_version")
-                        file_match = artifact_schema_matches(st.get("artifact", ""), out_schema)
-                        schema_ok = (recorded == out_schema) and file_match
-                    if schema_ok:
-                        print(f"[skip] {stage_id} already done per state and artifact present")
-                        logger.log(stage_id, "skipped", artifact=st.get("artifact"), module_id=module_id,
-                                   message="Skipped due to --skip-done", stage_description=stage_description)
-                        artifact_index[stage_id] = {"path": st.get("artifact"), "schema": st.get("schema_version")}
-                        record_stage_instrumentation(stage_id, module_id, "skipped", st.get("artifact"), st.get("schema_version"),
-                                                     stage_started_at, stage_wall_start, stage_cpu_start)
-                        continue
-                    else:
-                        print(f"[redo] {stage_id} redo due to schema mismatch or unreadable artifact")
-            except Exception:
-                pass
 
         # Input resolution
         artifact_inputs: Dict[str, str] = {}
@@ -2064,17 +2308,146 @@ def main():
         artifact_path, cmd, cwd = build_command(entrypoint, node["params"], node, run_dir,
                                                 recipe.get("input", {}), state_path, progress_path, run_id,
                                                 artifact_inputs, artifact_index, stage_ordinal_map)
-        
+        return artifact_inputs, artifact_path, cmd, cwd
+
+    def stage_env(stage_id: str, module_id: str, fresh: bool = False) -> Dict[str, str]:
+        """Environment for a stage process; `fresh` (a stage run again in this run directory) bypasses the LLM run memo and cache."""
+        env = llm_cache.fresh_env() if fresh else os.environ.copy()
+        if instrument_enabled:
+            env["INSTRUMENT_SINK"] = sink_path
+            env["INSTRUMENT_STAGE"] = stage_id
+            env["RUN_ID"] = run_id or ""
+            env["INSTRUMENT_ENABLED"] = "1"
+        env["PIPELINE_STAGE_ID"] = stage_id
+        if llm_memo_dir:
+            env.setdefault(llm_cache.RUN_MEMO_ENV, llm_memo_dir)
+        # Mitigate libomp SHM failures for EasyOCR/torch by forcing file-backed registration.
+        if module_id == "extract_ocr_ensemble_v1":
+            env.setdefault("KMP_USE_SHMEM", "0")
+            env.setdefault("KMP_CREATE_SHMEM", "FALSE")
+            # Some libomp builds use alternate env var names.
+            env.setdefault("KMP_USE_SHM", "0")
+            env.setdefault("KMP_CREATE_SHM", "0")
+            env.setdefault("KMP_DISABLE_SHM", "1")
+            env.setdefault("OMP_NUM_THREADS", "1")
+            env.setdefault("KMP_AFFINITY", "disabled")
+            env.setdefault("KMP_INIT_AT_FORK", "FALSE")
+        return env
+
+    for stage_id in plan["topo"]:
+        if args.start_from and not start_gate_reached:
+            if stage_id == args.start_from:
+                start_gate_reached = True
+            else:
+                # Only require artifacts for stages that are direct dependencies of stages we're running
+                # Don't fail if an upstream stage has no artifact - it might not be needed
+                if stage_id not in artifact_index:
+                    # Check if this stage is actually needed by any stage we're running
+                    # For now, just warn and continue - the stage will fail later if it's actually needed
+                    print(f"[skip-start] {stage_id} skipped due to --start-from (no artifact found, may fail if needed)")
+                else:
+                    print(f"[skip-start] {stage_id} skipped due to --start-from (artifact reused)")
+                # Ensure artifact_index is populated even for skipped stages (it should already be from _preload_artifacts_from_state, but verify)
+                if stage_id in artifact_index:
+                    continue
+                # Fallback: try to load from state if not already in artifact_index
+                try:
+                    with open(state_path, "r", encoding="utf-8") as f:
+                        state = json.load(f)
+                    st = state.get("stages", {}).get(stage_id)
+                    if st and st.get("status") == "done" and st.get("artifact") and os.path.exists(st.get("artifact")):
+                        artifact_index[stage_id] = {"path": st.get("artifact"), "schema": st.get("schema_version")}
+                except Exception:
+                    pass
+                continue
+        node = plan["nodes"][stage_id]
+        stage = node["stage"]
+        module_id = node["module"]
+        out_schema = node.get("output_schema")
+        stage_description = node.get("description")
+        stage_started_at = datetime.utcnow().isoformat() + "Z"
+        stage_wall_start = time.perf_counter()
+        stage_cpu_start = _get_cpu_times()
+        # Started early by launch_stream_consumers; it is already running on its producer's rows.
+        streamed = stream_consumers_running.pop(stage_id, None)
+        if streamed:
+            stage_started_at, stage_wall_start, stage_cpu_start = streamed["started"]
+
+        # Guard: Prevent --force from re-running expensive stages unnecessarily
+        # Expensive stages: extract (OCR), escalate_vision (GPT-4V), intake (OCR ensemble)
+        if args.force and not args.dry_run and not streamed and os.path.exists(state_path):
+            try:
+                with open(state_path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+                st = state.get("stages", {}).get(stage_id)
+                if st and st.get("status") == "done" and os.path.exists(st.get("artifact", "")):
+                    expensive_stages = {"extract", "intake", "escalate_vision"}
+                    if stage in expensive_stages or any(exp in stage_id.lower() for exp in ["ocr", "extract", "escalate", "intake"]):
+                        print(f"[force-guard] Skipping expensive stage {stage_id} (already done). Use --skip-done --start-from <stage> to resume from a specific stage instead.")
+                        logger.log(stage_id, "skipped", artifact=st.get("artifact"), module_id=module_id,
+                                   message="Skipped due to force-guard (expensive stage already done)", stage_description=stage_description)
+                        artifact_index[stage_id] = {"path": st.get("artifact"), "schema": st.get("schema_version")}
+                        record_stage_instrumentation(stage_id, module_id, "skipped", st.get("artifact"), st.get("schema_version"),
+                                                     stage_started_at, stage_wall_start, stage_cpu_start)
+                        continue
+            except Exception:
+                pass
+
+        # Skip if already done and skip-done requested (state + artifact exists)
+        # Exception: initialize_output_v1 should always run to ensure output folder is up to date
+        always_run_modules = {"initialize_output_v1"}
+        if args.skip_done and not streamed and os.path.exists(state_path) and module_id not in always_run_modules:
+            try:
+                with open(state_path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+                st = state.get("stages", {}).get(stage_id)
+                if st and st.get("status") == "done" and os.path.exists(st.get("artifact", "")) and not args.force:
+                    schema_ok = True
+                    if out_schema:
+                        recorded = st.get("schema_version")
+                        file_match = artifact_schema_matches(st.get("artifact", ""), out_schema)
+                        schema_ok = (recorded == out_schema) and file_match
+                    if schema_ok:
+                        print(f"[skip] {stage_id} already done per state and artifact present")
+                        logger.log(stage_id, "skipped", artifact=st.get("artifact"), module_id=module_id,
+                                   message="Skipped due to --skip-done", stage_description=stage_description)
+                        artifact_index[stage_id] = {"path": st.get("artifact"), "schema": st.get("schema_version")}
+                        record_stage_instrumentation(stage_id, module_id, "skipped", st.get("artifact"), st.get("schema_version"),
+                                                     stage_started_at, stage_wall_start, stage_cpu_start)
+                        continue
+                    else:
+                        print(f"[redo] {stage_id} redo due to schema mismatch or unreadable artifact")
+            except Exception:
+                pass
+
+        needs = node.get("needs", [])
+        artifact_inputs, artifact_path, cmd, cwd = streamed["prepared"] if streamed else prepare_stage(stage_id)
+        shard_conf = node.get("shard")
+        profile_meta = None
+        if stage_id in profile_stage_ids and shard_conf:
+            print(f"[profile] {stage_id} skipped: sharded stages run one process per shard")
+        elif stage_id in profile_stage_ids:
+            profile_dir = os.path.join(run_dir, f"{stage_ordinal_map[stage_id]:02d}_{module_id}")
+            cmd, profile_meta = profiling.wrap_command(cmd, profile_dir, run_id, stage_id)
 
         if args.dry_run:
-            print(f"[dry-run] {stage_id} -> {' '.join(cmd)}")
+            shard_note = f" [sharded by {shard_conf['by']}, size {shard_conf['size']}]" if shard_conf else ""
+            if node.get("stream_from"):
+                shard_note += f" [streams from {', '.join(node['stream_from'])}]"
+            print(f"[dry-run] {stage_id} -> {' '.join(cmd)}{shard_note}")
             artifact_index[stage_id] = {"path": artifact_path, "schema": out_schema}
             continue
 
-        cleanup_artifact(artifact_path, args.force)
+        redo = stage_id in completed_before
+        if not streamed:
+            redo = cleanup_artifact(artifact_path, args.force) or redo
+            stage_module_dir = os.path.join(run_dir, f"{stage_ordinal_map[stage_id]:02d}_{module_id}")
+            if blob_output_root:
+                # Reruns may rewrite files in place; never let that reach shared blobs.
+                blob_store.detach_tree(stage_module_dir)
 
-        logger.log(stage_id, "running", artifact=artifact_path, module_id=module_id,
-                   message="started", stage_description=stage_description)
+            logger.log(stage_id, "running", artifact=artifact_path, module_id=module_id,
+                       message="started", stage_description=stage_description)
 
         # Mock shortcuts for expensive stages
         if args.mock and stage == "clean":
@@ -2159,26 +2532,24 @@ def main():
                 print(f"⚠️  Error applying patches (before {module_id}): {e}", file=sys.stderr)
 
         print(f"[run] {stage_id} ({module_id})")
-        env = os.environ.copy()
-        if instrument_enabled:
-            env["INSTRUMENT_SINK"] = sink_path
-            env["INSTRUMENT_STAGE"] = stage_id
-            env["RUN_ID"] = run_id or ""
-            env["INSTRUMENT_ENABLED"] = "1"
-        env["PIPELINE_STAGE_ID"] = stage_id
-        # Mitigate libomp SHM failures for EasyOCR/torch by forcing file-backed registration.
-        if module_id == "extract_ocr_ensemble_v1":
-            env.setdefault("KMP_USE_SHMEM", "0")
-            env.setdefault("KMP_CREATE_SHMEM", "FALSE")
-            # Some libomp builds use alternate env var names.
-            env.setdefault("KMP_USE_SHM", "0")
-            env.setdefault("KMP_CREATE_SHM", "0")
-            env.setdefault("KMP_DISABLE_SHM", "1")
-            env.setdefault("OMP_NUM_THREADS", "1")
-            env.setdefault("KMP_AFFINITY", "disabled")
-            env.setdefault("KMP_INIT_AT_FORK", "FALSE")
-        if instrument_enabled:
-            proc = subprocess.Popen(cmd, cwd=cwd, env=env)
+        env = stage_env(stage_id, module_id, fresh=redo)
+        if shard_conf:
+            def live_update():
+                update_live_instrumentation(stage_id, module_id, stage_description,
+                                            stage_started_at, stage_wall_start, stage_cpu_start)
+            result = run_sharded_stage(stage_id, module_id, cmd, cwd, env, shard_conf, artifact_inputs,
+                                       artifact_path, state_path, progress_path, logger,
+                                       force=args.force, tick=live_update if instrument_enabled else None)
+        elif instrument_enabled or streamed or stream_consumers.get(stage_id):
+            if streamed:
+                proc = streamed["proc"]
+            else:
+                # Consumers may tail the artifact only if this attempt writes it from scratch.
+                fresh_output = not os.path.exists(artifact_path)
+                stream.clear_complete(artifact_path)
+                proc = subprocess.Popen(cmd, cwd=cwd, env=env)
+                if fresh_output:
+                    launch_stream_consumers(stage_id, artifact_path)
             last_live_update = 0.0
             while True:
                 rc = proc.poll()
@@ -2186,13 +2557,20 @@ def main():
                     result = subprocess.CompletedProcess(cmd, rc)
                     break
                 now = time.time()
-                if now - last_live_update >= 2.0:
+                if instrument_enabled and now - last_live_update >= 2.0:
                     update_live_instrumentation(stage_id, module_id, stage_description,
                                                 stage_started_at, stage_wall_start, stage_cpu_start)
                     last_live_update = now
                 time.sleep(0.2)
+            if streaming_producers.pop(stage_id, None):
+                # Written before stamping: consumers drain what the module wrote, then stop.
+                stream.mark_complete(artifact_path, "done" if result.returncode == 0 else "failed",
+                                     returncode=result.returncode)
         else:
             result = subprocess.run(cmd, cwd=cwd, env=env)
+        if profile_meta:
+            stage_profiles[stage_id] = profiling.finalize_profile(profile_meta)
+            print(f"[profile] {stage_id} ({profile_meta['profiler']}) -> {profile_meta['paths']['summary']}")
         if result.returncode != 0:
             # Treat validation failure as a successful stage completion for game-ready checks.
             if module_id == "validate_game_ready_v1" and result.returncode == 1:
@@ -2252,6 +2630,7 @@ def main():
         # Stamp and validate if schema known
         if out_schema:
             stamp_artifact(artifact_path, out_schema, module_id, run_id)
+            write_artifact_preview(artifact_path)
             if not args.no_validate:
                 model_cls = SCHEMA_MAP.get(out_schema)
                 if model_cls:
@@ -2323,7 +2702,16 @@ def main():
         
         # Copy key intermediate artifacts to root for visibility
         artifact_name = node.get("artifact_name", os.path.basename(artifact_path))
-        copy_key_artifact_to_root(artifact_path, run_dir, artifact_name, artifact_index)
+        copy_key_artifact_to_root(artifact_path, run_dir, artifact_name, artifact_index,
+                                  blob_output_root=blob_output_root, run_id=run_id)
+        if blob_output_root:
+            try:
+                dedupe = blob_store.dedupe_tree(stage_module_dir, blob_output_root, run_id=run_id)
+                if dedupe["files"]:
+                    print(f"[blob-store] {stage_id}: {dedupe['files']} files linked "
+                          f"({dedupe['saved_bytes']} bytes shared) {dedupe['methods']}")
+            except Exception as e:
+                print(f"[blob-store-warning] {stage_id}: dedupe failed: {e}")
         
         record_stage_instrumentation(stage_id, module_id, "done", artifact_path, out_schema,
                                      stage_started_at, stage_wall_start, stage_cpu_start)
@@ -2339,6 +2727,9 @@ def main():
     if instrument_enabled and instrumentation_run:
         instrumentation_run["ended_at"] = datetime.utcnow().isoformat() + "Z"
         instrumentation_run["wall_seconds"] = round(time.perf_counter() - run_wall_start, 6)
+        if forecast and forecast["stages"]:
+            instrumentation_run["forecast_error"] = cost_model.run_forecast_error(
+                forecast, instrumentation_run["stages"])
         if run_cpu_start:
             end_cpu_run = _get_cpu_times()
             if end_cpu_run:
@@ -2421,8 +2812,11 @@ def main():
             if node["stage"] in ("intake", "extract"):
                 art_path = artifact_index.get(sid, {}).get("path")
                 if art_path and os.path.exists(art_path):
-                    with open(art_path, "r", encoding="utf-8") as f:
-                        pages = sum(1 for _ in f if _.strip())
+                    if artifact_format(art_path) == "jsonl":
+                        with open(art_path, "r", encoding="utf-8") as f:
+                            pages = sum(1 for _ in f if _.strip())
+                    else:
+                        pages = sum(1 for _ in read_jsonl(art_path, fields=()))
                     if pages and sid in timing_summary and timing_summary[sid]["wall_seconds"] > 0:
                         minutes = timing_summary[sid]["wall_seconds"] / 60.0
                         timing_summary[sid]["pages"] = pages
@@ -2,6 +2,13 @@
 """
 Detect and drop near-duplicate pages using whole-page text similarity.
 Intended for early pipeline use (pre-section parsing).
+
+Candidate search:
+- max_lookback > 0: compare against the last N kept pages (legacy sliding window).
+- max_lookback <= 0: MinHash/LSH over every kept page in the book, so rescanned or
+  reordered spreads far apart are still found in near-linear time.
+Candidates are always verified with the exact `_similarity` score; max_page_gap <= 0
+disables the page-distance constraint.
 """
 import argparse
 import json
@@ -11,8 +18,13 @@ from difflib import SequenceMatcher
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
-from modules.common.utils import read_jsonl, save_jsonl, ensure_dir, ProgressLogger
+from modules.common import stream
+from modules.common.utils import read_jsonl, ensure_dir, ProgressLogger
 from modules.common.html_utils import html_to_text
+from modules.common.minhash import LSHIndex, MinHasher
+
+LSH_NUM_PERM = 128
+LSH_BANDS = 32
 
 
 def _utc() -> str:
@@ -52,7 +64,14 @@ def _tokenize(text: str) -> List[str]:
     return tokens
 
 
-def _similarity(tokens_a: List[str], tokens_b: List[str], text_a: str, text_b: str) -> float:
+def _similarity(tokens_a: List[str], tokens_b: List[str], text_a: str, text_b: str,
+                floor: float = -1.0) -> float:
+    """
+    max(token Jaccard, character SequenceMatcher ratio).
+    When the result cannot exceed `floor` (the caller's current best), the quadratic
+    SequenceMatcher pass is skipped using its cheap upper bounds; the value returned is then
+    only guaranteed to be <= floor.
+    """
     if not tokens_a or not tokens_b:
         return 0.0
     set_a = set(tokens_a)
@@ -60,8 +79,13 @@ def _similarity(tokens_a: List[str], tokens_b: List[str], text_a: str, text_b: s
     inter = len(set_a & set_b)
     union = len(set_a | set_b)
     jaccard = inter / max(1, union)
-    seq_ratio = SequenceMatcher(None, text_a, text_b).ratio() if text_a and text_b else 0.0
-    return max(jaccard, seq_ratio)
+    if not text_a or not text_b:
+        return jaccard
+    matcher = SequenceMatcher(None, text_a, text_b)
+    bar = max(jaccard, floor)
+    if matcher.real_quick_ratio() <= bar or matcher.quick_ratio() <= bar:
+        return jaccard
+    return max(jaccard, matcher.ratio())
 
 
 def _page_key(page: Dict[str, Any]) -> Tuple[int, int]:
@@ -101,10 +125,10 @@ def main() -> None:
     parser.add_argument("--similarity_threshold", dest="similarity_threshold", type=float, default=0.95)
     parser.add_argument("--min-tokens", dest="min_tokens", type=int, default=120)
     parser.add_argument("--min_tokens", dest="min_tokens", type=int, default=120)
-    parser.add_argument("--max-lookback", dest="max_lookback", type=int, default=3)
-    parser.add_argument("--max_lookback", dest="max_lookback", type=int, default=3)
-    parser.add_argument("--max-page-gap", dest="max_page_gap", type=int, default=3)
-    parser.add_argument("--max_page_gap", dest="max_page_gap", type=int, default=3)
+    parser.add_argument("--max-lookback", dest="max_lookback", type=int, default=0)
+    parser.add_argument("--max_lookback", dest="max_lookback", type=int, default=0)
+    parser.add_argument("--max-page-gap", dest="max_page_gap", type=int, default=0)
+    parser.add_argument("--max_page_gap", dest="max_page_gap", type=int, default=0)
     parser.add_argument("--header-overlap-threshold", dest="header_overlap_threshold", type=float, default=0.88)
     parser.add_argument("--header_overlap_threshold", dest="header_overlap_threshold", type=float, default=0.88)
     parser.add_argument("--require-header-overlap", dest="require_header_overlap", action="store_true")
@@ -121,7 +145,7 @@ def main() -> None:
     pages_path = args.pages or (args.inputs[0] if args.inputs else None)
     if not pages_path:
         raise SystemExit("Missing --pages or --inputs")
-    if not os.path.exists(pages_path):
+    if not os.path.exists(pages_path) and not stream.is_streamed(pages_path):
         raise SystemExit(f"Missing pages file: {pages_path}")
 
     out_path = os.path.abspath(args.out)
@@ -131,8 +155,11 @@ def main() -> None:
     if not os.path.isabs(report_path):
         report_path = os.path.join(out_dir, report_path)
 
-    pages = list(read_jsonl(pages_path))
-    if not pages:
+    # Decisions only look at earlier pages, so a streamed input can be consumed as it is written.
+    streaming = stream.is_streamed(pages_path)
+    pages = stream.iter_rows(pages_path) if streaming else list(read_jsonl(pages_path))
+    total = None if streaming else len(pages)
+    if total == 0:
         raise SystemExit(f"Input is empty: {pages_path}")
 
     logger = ProgressLogger(state_path=args.state_file, progress_path=args.progress_file, run_id=args.run_id)
@@ -140,18 +167,24 @@ def main() -> None:
         "adapter",
         "running",
         current=0,
-        total=len(pages),
+        total=total,
         message="Detecting duplicate pages",
         artifact=out_path,
         module_id="detect_duplicate_pages_v1",
         schema_version="page_html_v1",
     )
 
-    kept_pages: List[Dict[str, Any]] = []
+    kept_pages = stream.RowWriter(out_path)
+    pages_count = 0
     kept_texts: List[Dict[str, Any]] = []
     duplicates: List[Dict[str, Any]] = []
+    use_lsh = args.max_lookback <= 0
+    hasher = MinHasher(num_perm=LSH_NUM_PERM) if use_lsh else None
+    lsh = LSHIndex(num_perm=LSH_NUM_PERM, bands=LSH_BANDS) if use_lsh else None
+    lsh_candidates_checked = 0
 
     for idx, page in enumerate(pages, start=1):
+        pages_count = idx
         text = _build_page_text(page)
         tokens = _tokenize(text)
         headers = _extract_header_numbers(page.get("html") or "")
@@ -159,12 +192,24 @@ def main() -> None:
         best_match: Optional[Dict[str, Any]] = None
         best_score = 0.0
 
-        # Compare to recent kept pages only.
-        for prev in kept_texts[-args.max_lookback:]:
+        signature = None
+        if use_lsh:
+            # Pages under min_tokens can never be flagged or matched, so keep them out of the index.
+            if len(tokens) >= args.min_tokens:
+                signature = hasher.signature(tokens)
+                candidates = [kept_texts[i] for i in sorted(lsh.query(signature))]
+                lsh_candidates_checked += len(candidates)
+            else:
+                candidates = []
+        else:
+            # Compare to recent kept pages only.
+            candidates = kept_texts[-args.max_lookback:]
+
+        for prev in candidates:
             gap = abs(prev["page_number"] - page.get("page_number", 0))
-            if gap > args.max_page_gap:
+            if args.max_page_gap > 0 and gap > args.max_page_gap:
                 continue
-            score = _similarity(tokens, prev["tokens"], text, prev["text"])
+            score = _similarity(tokens, prev["tokens"], text, prev["text"], floor=best_score)
             header_overlap = bool(set(headers) & set(prev["headers"]))
             if score > best_score:
                 best_score = score
@@ -203,7 +248,9 @@ def main() -> None:
             })
             continue
 
-        kept_pages.append(page)
+        if signature is not None:
+            lsh.insert(len(kept_texts), signature)
+        kept_pages.write(page)
         kept_texts.append({
             "page_number": page.get("page_number"),
             "original_page_number": page.get("original_page_number"),
@@ -216,28 +263,32 @@ def main() -> None:
             "adapter",
             "running",
             current=idx,
-            total=len(pages),
+            total=total,
             message=f"Processed page {page.get('page_number')}",
             artifact=out_path,
             module_id="detect_duplicate_pages_v1",
             schema_version="page_html_v1",
         )
 
-    save_jsonl(out_path, kept_pages)
+    kept_pages.close()
+    if pages_count == 0:
+        raise SystemExit(f"Input is empty: {pages_path}")
     with open(report_path, "w", encoding="utf-8") as f:
         json.dump({
             "schema_version": "duplicate_page_report_v1",
-            "total_pages": len(pages),
-            "kept_pages": len(kept_pages),
+            "total_pages": pages_count,
+            "kept_pages": kept_pages.count,
             "duplicate_pages": len(duplicates),
+            "candidate_mode": "lsh" if use_lsh else "window",
+            "lsh_candidates_checked": lsh_candidates_checked if use_lsh else None,
             "duplicates": duplicates,
         }, f, ensure_ascii=True, indent=2)
 
     logger.log(
         "adapter",
         "done",
-        current=len(kept_pages),
-        total=len(pages),
+        current=kept_pages.count,
+        total=pages_count,
         message=f"Deduped pages: {len(duplicates)} dropped",
         artifact=out_path,
         module_id="detect_duplicate_pages_v1",
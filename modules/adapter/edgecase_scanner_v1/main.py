@@ -9,6 +9,7 @@ from typing import Any, Dict, List, Optional, Tuple
 
 from modules.common.utils import ensure_dir, ProgressLogger
 from modules.common.html_utils import html_to_text
+from modules.common.pattern_scanner import PatternScanner, ScanPattern
 
 
 def _utc() -> str:
@@ -77,6 +78,44 @@ def _add_issue(
     })
 
 
+EDGECASE_SCANNER = PatternScanner([
+    ScanPattern("test_your_luck", re.compile(r"\btest your luck\b"), ("test your luck",), lower=True),
+    ScanPattern("one_at_a_time", re.compile(r"\bone at a time\b"), ("one at a time",), lower=True),
+    ScanPattern("roll_die", re.compile(r"\broll\b.{0,40}\b(die|dice)\b"), ("roll", ("die", "dice")), lower=True),
+    ScanPattern("multi_item_both", re.compile(r"\bif you have both\b.{0,140}?\bturn to\b"),
+                ("if you have both", "turn to"), lower=True),
+    ScanPattern("multi_item_and", re.compile(r"\bif you have\b[^.]{0,80}\band\b[^.]{0,80}\bturn to\b"),
+                ("if you have", "turn to"), lower=True),
+    ScanPattern("if_you_have", re.compile(r"\bif you have\b"), ("if you have",), lower=True),
+    ScanPattern(
+        "alive",
+        re.compile(r"\bif you (?:are|re) still alive\b|\bif you survive\b|\bif you are alive\b|\bif you are still alive\b|\bif you're alive\b"),
+        ("if you", ("alive", "survive")),
+        lower=True,
+    ),
+    ScanPattern("damage", re.compile(r"\b(lose|reduce|deduct|subtract)\b.{0,40}\bstamina\b"),
+                ("stamina", ("lose", "reduce", "deduct", "subtract")), lower=True),
+    ScanPattern(
+        "pos_branch",
+        re.compile(r"\bif you (?:do(?!\s+not)|choose|decide|wish|want|agree|take|drink|eat|attack|fight|enter|open|pull|push|climb|run)\b.{0,140}?\bturn to\b\s*(\d+)"),
+        ("if you", "turn to"),
+        lower=True,
+    ),
+    ScanPattern(
+        "neg_branch",
+        re.compile(r"\bif you (?:do not|don't|refuse|decline|would rather not|do not wish)\b.{0,140}?\bturn to\b\s*(\d+)"),
+        ("if you", "turn to"),
+        lower=True,
+    ),
+    ScanPattern("has_item", re.compile(r"\bif you (?:have|possess|carry)\b.{0,140}?\bturn to\b\s*(\d+)"),
+                ("if you", "turn to"), lower=True),
+    ScanPattern("missing_item", re.compile(r"\bif you (?:do not have|don't have|do not possess|lack)\b.{0,140}?\bturn to\b\s*(\d+)"),
+                ("if you", "turn to"), lower=True),
+    ScanPattern("state_check", re.compile(r"\bhave you (?:previously |ever )?(?:read|seen|visited)\b.{0,140}?\bturn to\b\s*(\d+)"),
+                ("have you", "turn to"), lower=True),
+])
+
+
 def _scan_text(
     section_id: str,
     text: str,
@@ -88,7 +127,7 @@ def _scan_text(
     issues: List[Dict[str, Any]] = []
     if not text:
         return issues
-    lower = text.lower()
+    scan = EDGECASE_SCANNER.scan(text)
     kinds = sequence_kinds or set()
 
     def has_any_kind(candidates: Tuple[str, ...]) -> bool:
@@ -118,16 +157,16 @@ def _scan_text(
         complexity_score += 1
         complexity_signals.append("damage")
 
-    if re.search(r"\btest your luck\b", lower):
+    if scan.search("test_your_luck"):
         complexity_score += 1
         complexity_signals.append("text:test_your_luck")
-    if re.search(r"\bone at a time\b", lower):
+    if scan.search("one_at_a_time"):
         complexity_score += 2
         complexity_signals.append("text:one_at_a_time")
-    if re.search(r"\broll\b.{0,40}\b(die|dice)\b", lower):
+    if scan.search("roll_die"):
         complexity_score += 1
         complexity_signals.append("text:roll_die")
-    if re.search(r"\bif you have both\b.{0,140}?\bturn to\b", lower) or re.search(r"\bif you have\b[^.]{0,80}\band\b[^.]{0,80}\bturn to\b", lower):
+    if scan.search("multi_item_both") or scan.search("multi_item_and"):
         complexity_score += 1
         complexity_signals.append("text:multi_item")
 
@@ -142,9 +181,9 @@ def _scan_text(
             page_end=page_end,
         )
 
-    alive_match = re.search(r"\bif you (?:are|re) still alive\b|\bif you survive\b|\bif you are alive\b|\bif you are still alive\b|\bif you're alive\b", lower)
-    damage_match = re.search(r"\b(lose|reduce|deduct|subtract)\b.{0,40}\bstamina\b", lower)
-    roll_match = re.search(r"\broll\b.{0,40}\b(die|dice)\b", lower)
+    alive_match = scan.search("alive")
+    damage_match = scan.search("damage")
+    roll_match = scan.search("roll_die")
     if alive_match and (damage_match or roll_match) and not has_any_kind(("stat_change", "damage", "luck_check", "skill_check")):
         snippet = _sentence_at(text, alive_match.start(), alive_match.end())
         _add_issue(
@@ -157,8 +196,8 @@ def _scan_text(
             page_end=page_end,
         )
 
-    pos_branch = re.search(r"\bif you (?:do(?!\s+not)|choose|decide|wish|want|agree|take|drink|eat|attack|fight|enter|open|pull|push|climb|run)\b.{0,140}?\bturn to\b\s*(\d+)", lower)
-    neg_branch = re.search(r"\bif you (?:do not|don't|refuse|decline|would rather not|do not wish)\b.{0,140}?\bturn to\b\s*(\d+)", lower)
+    pos_branch = scan.search("pos_branch")
+    neg_branch = scan.search("neg_branch")
     if pos_branch and neg_branch and not has_any_kind(("choice", "conditional_choice", "item_check")):
         snippet = _sentence_at(text, pos_branch.start(), pos_branch.end())
         _add_issue(
@@ -171,8 +210,8 @@ def _scan_text(
             page_end=page_end,
         )
 
-    has_item = re.search(r"\bif you (?:have|possess|carry)\b.{0,140}?\bturn to\b\s*(\d+)", lower)
-    missing_item = re.search(r"\bif you (?:do not have|don't have|do not possess|lack)\b.{0,140}?\bturn to\b\s*(\d+)", lower)
+    has_item = scan.search("has_item")
+    missing_item = scan.search("missing_item")
     if has_item and missing_item and not has_any_kind(("item_check", "choice", "conditional_choice")):
         snippet = _sentence_at(text, has_item.start(), has_item.end())
         _add_issue(
@@ -185,7 +224,7 @@ def _scan_text(
             page_end=page_end,
         )
 
-    state_check = re.search(r"\bhave you (?:previously |ever )?(?:read|seen|visited)\b.{0,140}?\bturn to\b\s*(\d+)", lower)
+    state_check = scan.search("state_check")
     if state_check and not has_any_kind(("state_check", "choice", "conditional_choice")):
         snippet = _sentence_at(text, state_check.start(), state_check.end())
         _add_issue(
@@ -198,12 +237,13 @@ def _scan_text(
             page_end=page_end,
         )
 
-    sentence_chunks = re.split(r"[.!?]", text)
+    # A sentence can only match both patterns if the whole text does.
+    sentence_chunks = re.split(r"[.!?]", text) if roll_match and damage_match else []
     for chunk in sentence_chunks:
         chunk_lower = chunk.lower()
         if "turn to" in chunk_lower:
             continue
-        if re.search(r"\broll\b.{0,40}\b(die|dice)\b", chunk_lower) and re.search(r"\b(lose|reduce|deduct|subtract)\b.{0,40}\bstamina\b", chunk_lower):
+        if EDGECASE_SCANNER.patterns["roll_die"].regex.search(chunk_lower) and EDGECASE_SCANNER.patterns["damage"].regex.search(chunk_lower):
             if has_any_kind(("stat_change", "damage", "luck_check", "skill_check")):
                 continue
             snippet = chunk.strip()
@@ -219,8 +259,8 @@ def _scan_text(
                 )
                 break
 
-    if (re.search(r"\bif you have both\b.{0,140}?\bturn to\b", lower) or re.search(r"\bif you have\b[^.]{0,80}\band\b[^.]{0,80}\bturn to\b", lower)) and not has_any_kind(("item_check", "choice", "conditional_choice")):
-        match = re.search(r"\bif you have\b", lower)
+    if (scan.search("multi_item_both") or scan.search("multi_item_and")) and not has_any_kind(("item_check", "choice", "conditional_choice")):
+        match = scan.search("if_you_have")
         snippet = _sentence_at(text, match.start(), match.end()) if match else ""
         _add_issue(
             issues,
@@ -18,7 +18,9 @@ from collections import defaultdict
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 
+from modules.common.batch_planner import BatchPlanner, TruncatedOutput, estimate_tokens, run_batches
 from modules.common.openai_client import OpenAI
+from modules.common.table_rescue import RateLimiter
 from modules.common.utils import read_jsonl, append_jsonl, ensure_dir
 from schemas import ElementCore
 
@@ -37,6 +39,9 @@ DOCLAYNET_LABELS = [
     "Page-footer",
 ]
 
+# Reply rows are {"seq", "content_type", "content_type_confidence", "content_subtype"}.
+LLM_OUTPUT_TOKENS_PER_ITEM = 40
+
 PUBLAYNET_LABELS = ["Title", "Text", "List", "Table", "Figure"]
 
 DEFAULT_KV_KEY_WHITELIST = {"SKILL", "STAMINA", "LUCK"}
@@ -686,13 +691,6 @@ def detect_other_header_footer_patterns(
     return matched_elements
 
 
-def batch_items(items: List[Any], batch_size: int) -> List[List[Any]]:
-    out: List[List[Any]] = []
-    for i in range(0, len(items), batch_size):
-        out.append(items[i : i + batch_size])
-    return out
-
-
 def build_llm_prompt(items: List[Dict[str, Any]]) -> str:
     instructions = {
         "labels": DOCLAYNET_LABELS,
@@ -722,37 +720,51 @@ def llm_classify(
     model: str,
     items: List[Dict[str, Any]],
     max_tokens: int = 2500,
-) -> Dict[int, Dict[str, Any]]:
+) -> List[Dict[str, Any]]:
+    """
+    Label one batch; returns the model's rows. Raises TruncatedOutput when the reply was cut
+    off (so run_batches re-splits the batch); other failures propagate to the caller.
+    """
+    prompt = build_llm_prompt(items)
+    kwargs: Dict[str, Any] = dict(
+        model=model,
+        messages=[
+            {"role": "system", "content": "You are a precise document layout labeler."},
+            {"role": "user", "content": prompt},
+        ],
+        response_format={"type": "json_object"},
+    )
+    if model.startswith("gpt-5"):
+        kwargs["max_completion_tokens"] = max_tokens
+        kwargs["temperature"] = 1
+    else:
+        kwargs["max_tokens"] = max_tokens
+        kwargs["temperature"] = 0.0
+
+    completion = client.chat.completions.create(**kwargs)
+    choice = completion.choices[0]
+    if getattr(choice, "finish_reason", None) == "length":
+        raise TruncatedOutput(f"reply hit max_tokens={max_tokens} for {len(items)} items")
     try:
-        prompt = build_llm_prompt(items)
-        kwargs: Dict[str, Any] = dict(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are a precise document layout labeler."},
-                {"role": "user", "content": prompt},
-            ],
-            response_format={"type": "json_object"},
-        )
-        if model.startswith("gpt-5"):
-            kwargs["max_completion_tokens"] = max_tokens
-            kwargs["temperature"] = 1
-        else:
-            kwargs["max_tokens"] = max_tokens
-            kwargs["temperature"] = 0.0
-
-        completion = client.chat.completions.create(**kwargs)
-        payload = json.loads(completion.choices[0].message.content)
-        results: Dict[int, Dict[str, Any]] = {}
-        for row in (payload or {}).get("elements", []):
-            try:
-                seq = int(row.get("seq"))
-            except Exception:
-                continue
-            results[seq] = row
-        return results
-    except Exception as e:
-        print(f"[elements_content_type_v1] LLM classify failed: {e}")
-        return {}
+        payload = json.loads(choice.message.content or "")
+    except json.JSONDecodeError as e:
+        raise TruncatedOutput(f"unparseable reply for {len(items)} items: {e}") from e
+    rows = (payload or {}).get("elements", []) if isinstance(payload, dict) else []
+    return [row for row in rows if isinstance(row, dict)]
+
+
+def plan_llm_batches(items: List[Dict[str, Any]], model: str, batch_size: int, max_tokens: int) -> Tuple[BatchPlanner, List[List[Dict[str, Any]]]]:
+    """Token-budget batches of ambiguous items; `batch_size` caps the item count."""
+    planner = BatchPlanner(
+        model=model,
+        base_prompt_tokens=estimate_tokens(build_llm_prompt([]), model),
+        output_tokens_per_item=LLM_OUTPUT_TOKENS_PER_ITEM,
+        max_output_tokens=max_tokens,
+        max_items=batch_size,
+    )
+    # build_llm_prompt pretty-prints, so measure items the same way.
+    batches = planner.plan(items, lambda item: estimate_tokens(json.dumps(item, ensure_ascii=True, indent=2), model) + 2)
+    return planner, batches
 
 
 @dataclass
@@ -772,8 +784,16 @@ def main():
     parser.add_argument("--use-llm", dest="use_llm", action="store_true", help="Enable LLM classification for ambiguous items")
     parser.add_argument("--use_llm", dest="use_llm", action="store_true", help=argparse.SUPPRESS)  # alias for driver params
     parser.add_argument("--model", default="gpt-4.1-mini", help="LLM model (when --use-llm)")
-    parser.add_argument("--batch-size", dest="batch_size", type=int, default=200)
+    parser.add_argument("--batch-size", dest="batch_size", type=int, default=200,
+                        help="Max items per LLM batch; batches are also capped by prompt/reply token budget")
     parser.add_argument("--batch_size", dest="batch_size", type=int, help=argparse.SUPPRESS)  # alias for driver params
+    parser.add_argument("--max-tokens", dest="max_tokens", type=int, default=8000,
+                        help="Max reply tokens per LLM batch; truncated replies are re-split")
+    parser.add_argument("--max_tokens", dest="max_tokens", type=int, help=argparse.SUPPRESS)  # alias for driver params
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallel LLM batch requests (1=sequential)")
+    parser.add_argument("--rate-limit", dest="rate_limit", type=float, default=0.0,
+                        help="Max LLM requests started per second (0=unlimited)")
+    parser.add_argument("--rate_limit", dest="rate_limit", type=float, help=argparse.SUPPRESS)  # alias for driver params
     parser.add_argument("--context-window", dest="context_window", type=int, default=1)
     parser.add_argument("--context_window", dest="context_window", type=int, help=argparse.SUPPRESS)  # alias for driver params
     parser.add_argument("--llm-threshold", dest="llm_threshold", type=float, default=0.65)
@@ -1177,8 +1197,29 @@ def main():
                 }
             )
 
-        for batch in batch_items(items, args.batch_size):
-            results = llm_classify(client, args.model, batch)
+        planner, batches = plan_llm_batches(items, args.model, args.batch_size, args.max_tokens)
+
+        def _fallback(batch, exc):
+            print(f"[elements_content_type_v1] LLM classify failed: {exc}")
+            return []
+
+        batch_rows = run_batches(
+            batches,
+            lambda batch: llm_classify(client, args.model, batch, max_tokens=planner.output_tokens(len(batch))),
+            fallback=_fallback,
+            concurrency=args.concurrency,
+            rate_limiter=RateLimiter(args.rate_limit),
+            on_split=lambda batch, depth: print(
+                f"[elements_content_type_v1] reply truncated for {len(batch)} items; re-splitting (depth {depth})"
+            ),
+        )
+        for batch, rows in zip(batches, batch_rows):
+            results: Dict[int, Dict[str, Any]] = {}
+            for out_row in rows:
+                try:
+                    results[int(out_row.get("seq"))] = out_row
+                except Exception:
+                    continue
             for row in batch:
                 seq = row.get("seq")
                 if not isinstance(seq, int):
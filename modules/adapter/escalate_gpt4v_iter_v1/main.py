@@ -1,17 +1,15 @@
 import argparse
-import base64
 import json
 import os
 from typing import Any, Dict, List
 
 from modules.common.utils import ensure_dir, save_json
+from modules.common.prepared_image import image_data_uri
+from modules.common.pagelines_store import open_pagelines, overlay_writer
 
 
 def encode_image(path: str) -> str:
-    with open(path, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode("utf-8")
-    ext = os.path.splitext(path)[1].lower().lstrip(".") or "jpeg"
-    return f"data:image/{ext};base64,{b64}"
+    return image_data_uri(path)
 
 
 def load_prompt(path: str) -> str:
@@ -78,7 +76,10 @@ def main():
     ensure_dir(args.outdir)
     prompt = load_prompt(args.prompt_file)
 
-    index = {int(k): v for k, v in load_json(args.index).items()}
+    source_index = load_json(args.index)
+    index = {int(k): v for k, v in source_index.items()}
+    source_keys = {int(k): str(k) for k in source_index}
+    store = open_pagelines(args.index)
     quality = load_json(args.quality)
 
     explicit_pages: List[int] = []
@@ -86,6 +87,7 @@ def main():
         explicit_pages = [int(p.strip()) for p in args.pages.split(",") if p.strip()]
 
     escalated_pages: List[int] = []
+    escalated_data: Dict[int, Dict[str, Any]] = {}
     batches = 0
 
     def next_batch():
@@ -112,8 +114,9 @@ def main():
         client = OpenAI() if not args.dry_run else None
 
         for page in cand:
-            src = index[page]
-            page_data = load_json(src)
+            page_data = store.get_page(source_keys[page]) if page in source_keys else None
+            if page_data is None:
+                page_data = load_json(index[page])
             image_path = os.path.join(args.images_dir, os.path.basename(page_data.get("image", "")))
             if args.dry_run:
                 text = page_data.get("raw_text") or ""
@@ -127,6 +130,7 @@ def main():
             out_page_path = os.path.join(args.outdir, f"page-{page:03d}.json")
             save_json(out_page_path, page_data)
             index[page] = out_page_path
+            escalated_data[page] = page_data
 
             # update quality row
             for row in quality:
@@ -145,7 +149,22 @@ def main():
         # copy reference to existing file
         index[page] = path
 
-    save_json_sorted(os.path.join(args.outdir, "pagelines_index.json"), index)
+    index_out = os.path.join(args.outdir, "pagelines_index.json")
+    save_json_sorted(index_out, index)
+    pack = overlay_writer(args.outdir, store)
+    for page in sorted(index):
+        key = str(page)
+        if page in escalated_data:
+            pack.add(key, escalated_data[page])
+        elif pack.base and source_keys.get(page) == key:
+            pack.inherit(key)
+        else:
+            page_data = store.get_page(source_keys[page]) if page in source_keys else load_json(index[page])
+            if page_data is not None:
+                pack.add(key, page_data)
+    pack.bind_legacy_index(index_out)
+    pack.close()
+    store.close()
     save_json(os.path.join(args.outdir, "ocr_quality_report.json"), quality)
 
     summary = {
@@ -4,6 +4,83 @@ import re
 from pathlib import Path
 
 from modules.common.utils import read_jsonl, save_jsonl, ensure_dir, save_json
+from modules.common.pagelines_store import open_pagelines
+
+
+NUM_RE = re.compile(r"\b(\d{1,3})\b")
+
+
+def section_numbers(text: str):
+    """Candidate section ids (1-400) appearing anywhere in text."""
+    found = set()
+    for m in NUM_RE.finditer(text or ""):
+        try:
+            sid = int(m.group(1))
+        except Exception:
+            continue
+        if 1 <= sid <= 400:
+            found.add(sid)
+    return found
+
+
+def header_ids(hypos):
+    present = set()
+    for h in hypos:
+        try:
+            sid = int(h.get("portion_id"))
+        except Exception:
+            continue
+        present.add(sid)
+    return present
+
+
+def page_clean_numbers(page):
+    return section_numbers(page.get("clean_text") or page.get("raw_text") or "")
+
+
+def page_ocr_numbers(page):
+    return section_numbers("\n".join([line.get("text", "") for line in (page or {}).get("lines", [])]))
+
+
+def pagelines_numbers(path: str):
+    try:
+        page = json.load(open(path, "r", encoding="utf-8"))
+    except Exception:
+        return set()
+    return page_ocr_numbers(page)
+
+
+def missing_rows(present_headers, present_clean, present_ocr, expected_start: int = 1,
+                 expected_end: int = 400, note=None):
+    expected = set(range(expected_start, expected_end + 1))
+    payload = []
+    for sid in sorted(expected - present_headers):
+        row = {"section_id": sid}
+        if note:
+            row["note"] = note
+        row["seen_in_ocr"] = sid in present_ocr
+        row["seen_in_clean"] = sid in present_clean
+        row["seen_in_headers"] = False
+        payload.append(row)
+    return payload
+
+
+def write_bundles(bundle_dir: str, payload, note=None) -> None:
+    if not payload:
+        return
+    ensure_dir(bundle_dir)
+    for row in payload:
+        sid = row["section_id"]
+        bundle = {
+            "section_id": sid,
+            "seen": {
+                "ocr": row["seen_in_ocr"],
+                "clean": row["seen_in_clean"],
+                "headers": False,
+            },
+            "note": note,
+        }
+        save_json(Path(bundle_dir) / f"missing_{sid}.json", bundle)
 
 
 def main():
@@ -19,74 +96,26 @@ def main():
     parser.add_argument("--bundle-dir", help="If set, write per-ID debug bundles (json) with presence flags.")
     args = parser.parse_args()
 
-    num_re = re.compile(r"\b(\d{1,3})\b")
-
-    present_headers = set()
-    for h in read_jsonl(args.headers):
-        try:
-            sid = int(h.get("portion_id"))
-        except Exception:
-            continue
-        present_headers.add(sid)
+    present_headers = header_ids(read_jsonl(args.headers))
 
     present_clean = set()
     if args.pages_clean:
         for p in read_jsonl(args.pages_clean):
-            text = (p.get("clean_text") or p.get("raw_text") or "")
-            for m in num_re.finditer(text):
-                try:
-                    sid = int(m.group(1))
-                except Exception:
-                    continue
-                if 1 <= sid <= 400:
-                    present_clean.add(sid)
+            present_clean |= page_clean_numbers(p)
 
     present_ocr = set()
     if args.ocr_index:
-        index = json.load(open(args.ocr_index, "r", encoding="utf-8"))
-        for _, path in index.items():
-            try:
-                page = json.load(open(path, "r", encoding="utf-8"))
-            except Exception:
-                continue
-            text = "\n".join([line.get("text", "") for line in page.get("lines", [])])
-            for m in num_re.finditer(text):
-                try:
-                    sid = int(m.group(1))
-                except Exception:
-                    continue
-                if 1 <= sid <= 400:
-                    present_ocr.add(sid)
-
-    expected = set(range(args.expected_start, args.expected_end + 1))
-    missing = sorted(list(expected - present_headers))
+        with open_pagelines(args.ocr_index) as store:
+            for _, page in store.iter_pages():
+                present_ocr |= page_ocr_numbers(page)
+
+    payload = missing_rows(present_headers, present_clean, present_ocr,
+                           args.expected_start, args.expected_end, note=args.note)
     ensure_dir(Path(args.out).parent)
-    payload = []
-    bundles = {}
-    for sid in missing:
-        row = {"section_id": sid}
-        if args.note:
-            row["note"] = args.note
-        row["seen_in_ocr"] = sid in present_ocr
-        row["seen_in_clean"] = sid in present_clean
-        row["seen_in_headers"] = False
-        payload.append(row)
-        if args.bundle_dir:
-            bundles[sid] = {
-                "section_id": sid,
-                "seen": {
-                    "ocr": row["seen_in_ocr"],
-                    "clean": row["seen_in_clean"],
-                    "headers": False,
-                },
-                "note": args.note,
-            }
     save_jsonl(args.out, payload)
-    if args.bundle_dir and bundles:
-        ensure_dir(args.bundle_dir)
-        for sid, bundle in bundles.items():
-            save_json(Path(args.bundle_dir) / f"missing_{sid}.json", bundle)
-    print(f"Missing {len(missing)} sections → {args.out}")
+    if args.bundle_dir:
+        write_bundles(args.bundle_dir, payload, note=args.note)
+    print(f"Missing {len(payload)} sections → {args.out}")
 
 
 if __name__ == "__main__":
@@ -6,7 +6,8 @@ from html.parser import HTMLParser
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from modules.common.utils import read_jsonl, save_jsonl, ensure_dir, ProgressLogger
+from modules.common import stream
+from modules.common.utils import read_jsonl, ensure_dir, ProgressLogger
 
 
 BLOCK_TAGS = {"h1", "h2", "p", "dt", "dd", "li", "caption", "th", "td", "img", "a"}
@@ -180,7 +181,7 @@ def main() -> None:
     pages_path = args.pages or (args.inputs[0] if args.inputs else None)
     if not pages_path:
         raise SystemExit("Missing --pages or --inputs")
-    if not os.path.exists(pages_path):
+    if not os.path.exists(pages_path) and not stream.is_streamed(pages_path):
         raise SystemExit(f"Missing pages file: {pages_path}")
 
     if not args.outdir:
@@ -191,8 +192,10 @@ def main() -> None:
     else:
         out_path = os.path.join(args.outdir, args.out)
 
-    rows = list(read_jsonl(pages_path))
-    total = len(rows)
+    # A streamed input is consumed while the upstream stage is still writing it; total is unknown.
+    streaming = stream.is_streamed(pages_path)
+    rows = stream.iter_rows(pages_path) if streaming else list(read_jsonl(pages_path))
+    total = None if streaming else len(rows)
     if total == 0:
         raise SystemExit(f"Input is empty: {pages_path}")
 
@@ -208,11 +211,13 @@ def main() -> None:
         schema_version="page_html_blocks_v1",
     )
 
-    out_rows: List[Dict[str, Any]] = []
+    writer = stream.RowWriter(out_path)
+    total_blocks = 0
     for idx, page in enumerate(rows, start=1):
         blocks = parse_blocks(page.get("html") or "", drop_empty=args.drop_empty_blocks)
         is_blank = len(blocks) == 0
-        out_rows.append({
+        total_blocks += len(blocks)
+        writer.write({
             "schema_version": "page_html_blocks_v1",
             "module_id": "html_to_blocks_v1",
             "run_id": args.run_id,
@@ -236,8 +241,10 @@ def main() -> None:
             schema_version="page_html_blocks_v1",
         )
 
-    save_jsonl(out_path, out_rows)
-    total_blocks = sum(len(row.get("blocks", [])) for row in out_rows)
+    writer.close()
+    if writer.count == 0:
+        raise SystemExit(f"Input is empty: {pages_path}")
+    total = writer.count
     # Determine stage name based on output filename (html_blocks_raw vs html_blocks_repaired)
     stage_name = "html_blocks_repaired" if "repaired" in str(out_path) else "html_blocks_raw"
     logger.log(
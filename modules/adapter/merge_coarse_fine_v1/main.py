@@ -2,6 +2,7 @@ import argparse
 import re
 from typing import Dict, List, Set, Optional
 
+from modules.common.spatial_index import IntervalIndex
 from modules.common.utils import read_jsonl, save_jsonl, ProgressLogger
 
 
@@ -103,19 +104,18 @@ def attach_continuations(portions: List[Dict], gap: int, title_sim_thresh: float
 
 
 def merge_portions(fine: List[Dict], coarse: List[Dict], uncovered_thresh: float) -> List[Dict]:
-    fine_cov: Set[int] = set()
-    for p in fine:
-        fine_cov |= page_set(p)
+    fine_cov = IntervalIndex((p["page_start"], p["page_end"], None) for p in fine)
 
     merged: List[Dict] = []
     merged.extend(fine)
 
     for c in coarse:
-        pages = page_set(c)
-        if not pages:
+        start, end = c["page_start"], c["page_end"]
+        if end < start:
             continue
-        uncovered = pages - fine_cov
-        ratio = len(uncovered) / len(pages)
+        pages = end - start + 1
+        uncovered = pages - fine_cov.covered_length(start, end)
+        ratio = uncovered / pages
         if ratio >= uncovered_thresh:
             merged.append(c)
     merged = dedupe_portions(merged)
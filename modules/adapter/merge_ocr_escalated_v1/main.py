@@ -9,6 +9,8 @@ This adapter combines:
 Output: Final OCR artifact in `pagelines_final/` directory:
 - `pagelines_final/pagelines_index.json` - unified index (final OCR output)
 - `pagelines_final/pages/*.json` - all pages (escalated if available, otherwise original)
+- `pagelines_final/pagelines.pack.idx.json` - packed overlay holding only the escalated pages
+  on top of the original pack (see modules/common/pagelines_store.py)
 
 This is the final, authoritative OCR output that downstream stages consume.
 """
@@ -19,6 +21,7 @@ from pathlib import Path
 from typing import Dict
 
 from modules.common.utils import ensure_dir, save_json, save_jsonl, ProgressLogger
+from modules.common.pagelines_store import open_pagelines, overlay_writer
 
 
 def load_index(index_path: str) -> Dict[str, str]:
@@ -102,6 +105,8 @@ def main():
     # Load both indices
     original_index = load_index(args.original_index)
     escalated_index = load_index(args.escalated_index)
+    original_store = open_pagelines(args.original_index) if original_index else None
+    escalated_store = open_pagelines(args.escalated_index) if escalated_index else None
     
     # Merge: escalated pages override original, others kept from original
     # Strategy: Build final index with escalated pages taking precedence
@@ -113,8 +118,7 @@ def main():
     for page_key, escalated_path in escalated_index.items():
         if page_key in original_index and os.path.exists(escalated_path):
             try:
-                with open(escalated_path, "r", encoding="utf-8") as f:
-                    page_data = json.load(f)
+                page_data = escalated_store.get_page(page_key) or {}
                 if page_data.get("module_id") == "ocr_escalate_gpt4v_v1":
                     escalated_pages.append(page_key)
             except Exception:
@@ -131,6 +135,7 @@ def main():
     # Track which files we've copied to avoid duplicates
     import shutil
     final_merged_index = {}
+    final_pages = {}
     copied_files = set()  # Track filenames we've already copied
     
     # First pass: Copy escalated pages (these take precedence over originals)
@@ -146,6 +151,7 @@ def main():
                     shutil.copy2(escalated_path, dst_path)
                     copied_files.add(filename)
                 final_merged_index[page_key] = dst_path
+                final_pages[page_key] = escalated_store.get_page(page_key)
     
     # Second pass: Copy original pages that weren't escalated
     for page_key, original_path in original_index.items():
@@ -158,20 +164,33 @@ def main():
                     shutil.copy2(original_path, dst_path)
                     copied_files.add(filename)
                 final_merged_index[page_key] = dst_path
+                final_pages[page_key] = original_store.get_page(page_key)
     
     # Save index for auditing (intermediate artifact)
     merged_index_path = os.path.join(merged_dir, "pagelines_index.json")
     save_json(merged_index_path, {k: v for k, v in sorted(final_merged_index.items())})
+
+    # Packed overlay: escalated pages are stored, originals are inherited from the source pack.
+    pack = overlay_writer(merged_dir, original_store)
+    for page_key in sorted(final_merged_index.keys()):
+        if final_pages[page_key] is None:
+            continue
+        if page_key in escalated_pages:
+            pack.add(page_key, final_pages[page_key])
+        else:
+            pack.carry(page_key, final_pages[page_key])
+    pack.bind_legacy_index(merged_index_path)
+    pack.close()
+    for store in (original_store, escalated_store):
+        if store is not None:
+            store.close()
     
-    # Load all pages and create unified JSONL file (final artifact)
+    # Build the unified JSONL file (final artifact) from the pages already read above.
     # Clean up line data to only include canonical text (remove raw/fused/post)
     page_rows = []
     for page_key in sorted(final_merged_index.keys()):
-        page_path = final_merged_index[page_key]
-        if os.path.exists(page_path):
-            with open(page_path, "r", encoding="utf-8") as f:
-                page_data = json.load(f)
-            
+        page_data = final_pages[page_key]
+        if page_data is not None:
             # Clean up lines: keep canonical text/source and preserve bbox/meta when present.
             # All alternatives remain in engines_raw for provenance.
             cleaned_lines = []
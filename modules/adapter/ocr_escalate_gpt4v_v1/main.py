@@ -1,11 +1,12 @@
 import argparse
-import base64
 import json
 import os
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
 
 from modules.common.utils import ensure_dir, save_json
+from modules.common.prepared_image import image_data_uri
+from modules.common.pagelines_store import open_pagelines, overlay_writer
 
 
 def load_index(index_path: str) -> Dict[str, str]:
@@ -48,10 +49,7 @@ def read_prompt(path: str) -> str:
 
 
 def encode_image(path: str) -> str:
-    with open(path, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode("utf-8")
-    ext = os.path.splitext(path)[1].lower().lstrip(".") or "jpeg"
-    return f"data:image/{ext};base64,{b64}"
+    return image_data_uri(path)
 
 
 def vision_transcribe(image_path: str, prompt: str, model: str, client=None) -> str:
@@ -186,14 +184,20 @@ def _page_text_stats(page_data: Dict[str, Any]) -> Dict[str, Any]:
 
 def _load_page_data(page_key: str,
                     index: Dict[str, str],
-                    pages_cache: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+                    pages_cache: Dict[str, Dict[str, Any]],
+                    store=None) -> Optional[Dict[str, Any]]:
     page_path = index.get(page_key)
     if not page_path:
         return None
     if page_key in pages_cache:
         return pages_cache[page_key]
     try:
-        page_data = json.load(open(page_path, "r", encoding="utf-8"))
+        if store is not None:
+            page_data = store.get_page(page_key)
+            if page_data is None:
+                return None
+        else:
+            page_data = json.load(open(page_path, "r", encoding="utf-8"))
         pages_cache[page_key] = page_data
         return page_data
     except Exception:
@@ -203,7 +207,8 @@ def _load_page_data(page_key: str,
 def _resolve_other_side_key(page_key: str,
                             page_data: Optional[Dict[str, Any]],
                             index: Dict[str, str],
-                            pages_cache: Dict[str, Dict[str, Any]]) -> Optional[str]:
+                            pages_cache: Dict[str, Dict[str, Any]],
+                            store=None) -> Optional[str]:
     # Legacy fast path: L/R suffix in key
     if page_key.endswith("L") or page_key.endswith("R"):
         return page_key[:-1] + ("R" if page_key.endswith("L") else "L")
@@ -223,7 +228,7 @@ def _resolve_other_side_key(page_key: str,
     for k in index.keys():
         if k == page_key:
             continue
-        other = _load_page_data(k, index, pages_cache)
+        other = _load_page_data(k, index, pages_cache, store=store)
         if not other:
             continue
         if other.get("original_page_number") == orig and other.get("spread_side") == target:
@@ -237,7 +242,8 @@ def should_escalate_page_key(page_key: str,
                             index: Dict[str, str],
                             pages_cache: Dict[str, Dict[str, Any]],
                             min_other_side_chars: int,
-                            min_chars_to_escalate_short_missing: int) -> Tuple[bool, Optional[str]]:
+                            min_chars_to_escalate_short_missing: int,
+                            store=None) -> Tuple[bool, Optional[str]]:
     """
     Apply conservative policy to avoid expensive rereads on likely-legit short/blank pages.
 
@@ -247,7 +253,7 @@ def should_escalate_page_key(page_key: str,
         return False, "no_reasons"
 
     # Load current page data for text stats when needed.
-    page_data = _load_page_data(page_key, index, pages_cache)
+    page_data = _load_page_data(page_key, index, pages_cache, store=store)
 
     stats = _page_text_stats(page_data or {})
 
@@ -259,9 +265,9 @@ def should_escalate_page_key(page_key: str,
     # Heuristic 2: For half-spreads, empty-side pages are often truly blank.
     # If this side is empty and the other side has substantial text, skip reread.
     if reasons == ["missing_content"] and (not stats["has_text"]):
-        other_key = _resolve_other_side_key(page_key, page_data, index, pages_cache)
+        other_key = _resolve_other_side_key(page_key, page_data, index, pages_cache, store=store)
         if other_key:
-            other = _load_page_data(other_key, index, pages_cache)
+            other = _load_page_data(other_key, index, pages_cache, store=store)
             other_stats = _page_text_stats(other or {})
             if other_stats["has_text"] and (other_stats["char_count"] >= min_other_side_chars or other_stats["char_count"] > 0):
                 return False, "skip_blank_half_spread"
@@ -372,6 +378,7 @@ def main():
     prompt = read_prompt(args.prompt_file)
 
     index = load_index(args.index)
+    store = open_pagelines(args.index)
     quality = load_quality(args.quality)
     pages_cache: Dict[str, Dict[str, Any]] = {}
 
@@ -392,6 +399,7 @@ def main():
             reasons,
             index=index,
             pages_cache=pages_cache,
+            store=store,
             min_other_side_chars=args.min_other_side_chars,
             min_chars_to_escalate_short_missing=args.min_chars_to_escalate_short_missing,
         )
@@ -418,6 +426,7 @@ def main():
 
     new_index = {}
     new_quality = []
+    pack = overlay_writer(args.outdir, store)
 
     for q in quality:
         # Quality report uses page_key (string like "001L"/"001R") or numeric page_number
@@ -429,9 +438,9 @@ def main():
         src_path = index.get(page_key)
         if not src_path:
             continue
-        
-        with open(src_path, "r", encoding="utf-8") as f:
-            page_data = json.load(f)
+        page_data = _load_page_data(page_key, index, pages_cache, store=store)
+        if page_data is None:
+            raise FileNotFoundError(src_path)
 
         # Output path preserves L/R if present in page_key
         if page_key.endswith("L") or page_key.endswith("R"):
@@ -479,6 +488,10 @@ def main():
 
         save_json(out_page_path, new_page)
         new_index[page_key] = out_page_path
+        if would_escalate:
+            pack.add(page_key, new_page)
+        else:
+            pack.carry(page_key, new_page)
 
         new_quality.append(update_quality_row(q, would_escalate=would_escalate, reasons=escalation_reasons, dry_run=args.dry_run))
 
@@ -486,6 +499,9 @@ def main():
     index_path = os.path.join(args.outdir, "pagelines_index.json")
     quality_path = os.path.join(args.outdir, "ocr_quality_report.json")
     save_json(index_path, {k: v for k, v in sorted(new_index.items())})
+    pack.bind_legacy_index(index_path)
+    pack.close()
+    store.close()
     save_json(quality_path, new_quality)
 
     if args.out:
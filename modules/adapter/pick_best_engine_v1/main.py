@@ -6,6 +6,7 @@ from typing import Any, Dict, List, Optional, Tuple
 
 from modules.common.text_quality import spell_garble_metrics
 from modules.common.utils import ensure_dir, save_json, append_jsonl, ProgressLogger
+from modules.common.pagelines_store import PackWriter, open_pagelines
 from modules.adapter.reconstruct_text_v1.main import is_section_header
 
 
@@ -248,6 +249,8 @@ def main():
     logger = ProgressLogger(state_path=args.state_file, progress_path=args.progress_file, run_id=args.run_id)
 
     index = load_index(index_path)
+    store = open_pagelines(index_path)
+    pack = PackWriter(str(outdir))
     keys = sorted(index.keys())
     if args.max_pages is not None:
         keys = keys[: args.max_pages]
@@ -259,9 +262,9 @@ def main():
 
     for idx, page_key in enumerate(keys, start=1):
         src_path = index.get(page_key)
-        if not src_path or not os.path.exists(src_path):
+        page_data = store.get_page(page_key) if src_path else None
+        if page_data is None:
             continue
-        page_data = json.load(open(src_path, "r", encoding="utf-8"))
 
         engine, details = pick_best_engine(page_data, args.preferred_engines, min_chars=args.min_chars)
         if engine is None:
@@ -302,6 +305,7 @@ def main():
         dst_path = pages_out / filename
         save_json(str(dst_path), out_page)
         new_index[page_key] = str(dst_path)
+        pack.add(page_key, out_page)
         append_jsonl(args.out, out_page)
 
         if idx % 25 == 0:
@@ -311,6 +315,9 @@ def main():
 
     index_out = outdir / "pagelines_index.json"
     save_json(str(index_out), {k: v for k, v in sorted(new_index.items())})
+    pack.bind_legacy_index(str(index_out))
+    pack.close()
+    store.close()
 
     logger.log("adapter", "done", current=len(new_index), total=len(new_index),
                message=f"Picked best engine for {len(new_index)} pages (changed={picked}, unchanged={unchanged})",
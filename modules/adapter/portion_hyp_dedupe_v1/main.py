@@ -16,6 +16,21 @@ def best_occurrence(items):
     return max(items, key=score)
 
 
+def dedupe_hypotheses(hypos):
+    """Keep the best occurrence per portion_id, ordered by page_start then portion_id."""
+    grouped = defaultdict(list)
+    for idx, h in enumerate(hypos):
+        pid = str(h.get("portion_id"))
+        grouped[pid].append((idx, h))
+
+    selected = []
+    for pid, items in grouped.items():
+        order_idx, h = best_occurrence(items)
+        selected.append((pid, order_idx, h))
+    selected.sort(key=lambda t: (t[2].get("page_start", 0) or 0, t[0]))
+    return [h for _pid, _idx, h in selected]
+
+
 def main():
     ap = argparse.ArgumentParser(description="Dedupe portion_hyp_v1 by portion_id, keeping best occurrence.")
     ap.add_argument("--input", required=True, help="portion_hyp.jsonl")
@@ -26,23 +41,12 @@ def main():
     args = ap.parse_args()
 
     logger = ProgressLogger(state_path=args.state_file, progress_path=args.progress_file, run_id=args.run_id)
-    grouped = defaultdict(list)
-    for idx, h in enumerate(read_jsonl(args.input)):
-        pid = str(h.get("portion_id"))
-        grouped[pid].append((idx, h))
-
-    rows = []
-    selected = []
-    for pid, items in grouped.items():
-        order_idx, h = best_occurrence(items)
-        selected.append((pid, order_idx, h))
-    selected.sort(key=lambda t: (t[2].get("page_start", 0) or 0, t[0]))
+    rows = dedupe_hypotheses(read_jsonl(args.input))
 
-    total = len(selected)
-    for idx, (pid, _, h) in enumerate(selected, start=1):
-        rows.append(h)
+    total = len(rows)
+    for idx, h in enumerate(rows, start=1):
         logger.log("adapter", "running", current=idx, total=total,
-                   message=f"keep {pid}", artifact=args.out,
+                   message=f"keep {h.get('portion_id')}", artifact=args.out,
                    module_id="portion_hyp_dedupe_v1", schema_version="portion_hyp_v1")
 
     save_jsonl(args.out, rows)
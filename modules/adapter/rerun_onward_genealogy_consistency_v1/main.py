@@ -27,6 +27,7 @@ from modules.adapter.table_rescue_onward_tables_v1.main import (
     _normalize_rescue_html,
     _should_accept_rescue,
 )
+from modules.common.genealogy_table_model import load_sidecar, write_sidecar
 from modules.common.onward_genealogy_html import merge_contiguous_genealogy_tables
 from modules.common.utils import ProgressLogger, ensure_dir, read_jsonl, save_json, save_jsonl
 from modules.extract.ocr_ai_gpt51_v1.main import (
@@ -196,6 +197,7 @@ def _coerce_page_number(row: Dict[str, Any]) -> Optional[int]:
 
 def _load_pages(path: str) -> Tuple[List[Dict[str, Any]], Dict[int, Dict[str, Any]]]:
     rows = list(read_jsonl(path))
+    load_sidecar(path)
     page_map: Dict[int, Dict[str, Any]] = {}
     for row in rows:
         page_number = _coerce_page_number(row)
@@ -1532,6 +1534,7 @@ def run_reruns(
     }
 
     save_jsonl(out_path, out_rows)
+    write_sidecar(out_path, out_rows)
     save_jsonl(report_path, report_rows)
     save_json(summary_path, summary)
 
@@ -11,6 +11,7 @@ from typing import Dict, List, Optional
 
 from bs4 import BeautifulSoup
 
+from modules.common.genealogy_table_model import html_sha1, tables_from_soup, write_sidecar
 from modules.common.utils import read_jsonl, save_jsonl, ProgressLogger
 
 
@@ -159,6 +160,7 @@ def main() -> None:
         if page_fixes:
             total_fixes += page_fixes
             row["html"] = str(soup)
+        tables_from_soup(soup, html_sha1(row.get("html") or html))
         if idx % 20 == 0:
             logger.log("adapter", "running", current=idx, total=len(rows),
                        message=f"Processed {idx}/{len(rows)} pages (fixes={total_fixes})",
@@ -166,6 +168,7 @@ def main() -> None:
                        schema_version="page_html_v1")
 
     save_jsonl(args.out, rows)
+    write_sidecar(args.out, rows)
     logger.log("adapter", "done", current=len(rows), total=len(rows),
                message=f"Table continuation fix complete: fixes={total_fixes}",
                artifact=args.out, module_id="table_fix_continuations_v1",
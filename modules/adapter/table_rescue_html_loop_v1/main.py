@@ -3,7 +3,6 @@
 Iterative table rescue loop that re-OCRs pages until table structure is recovered.
 """
 import argparse
-import base64
 import os
 import re
 from dataclasses import dataclass
@@ -21,6 +20,12 @@ except Exception as exc:  # pragma: no cover - environment dependency
 else:
     _OPENAI_IMPORT_ERROR = None
 
+from modules.common.table_rescue import (
+    DEFAULT_RESCUE_CONCURRENCY,
+    PageImageCache,
+    RateLimiter,
+    run_rescue_jobs,
+)
 from modules.common.utils import read_jsonl, save_jsonl, ensure_dir, ProgressLogger
 from modules.extract.ocr_ai_gpt51_v1.main import (
     build_system_prompt,
@@ -58,13 +63,6 @@ def _utc() -> str:
     return datetime.utcnow().isoformat() + "Z"
 
 
-def _encode_image(path: str) -> str:
-    with open(path, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode("utf-8")
-    ext = os.path.splitext(path)[1].lower().lstrip(".") or "jpeg"
-    return f"data:image/{ext};base64,{b64}"
-
-
 def _build_prompt(ocr_hints: Optional[str], rescue_hints: Optional[str]) -> str:
     prompt = build_system_prompt(ocr_hints)
     prompt += "\n\n" + RESCUE_INSTRUCTIONS.strip() + "\n"
@@ -186,6 +184,33 @@ def _call_ocr(model: str, prompt: str, image_data: str, temperature: float, max_
     return raw, usage, request_id
 
 
+def _rescue_page(job: Dict[str, Any], args: argparse.Namespace, prompt: str,
+                 cache: PageImageCache) -> Dict[str, Any]:
+    """Re-OCR one page and score the result. Runs in a pool worker."""
+    image_data = cache.full_image(job["image_path"])
+    raw, usage, request_id = _call_ocr(
+        args.model,
+        prompt,
+        image_data,
+        args.temperature,
+        args.max_output_tokens,
+    )
+    raw = _extract_code_fence(raw)
+    cleaned_raw, meta, meta_tag, meta_warning = _extract_ocr_metadata(raw)
+    cleaned = sanitize_html(cleaned_raw)
+    return {
+        "raw": raw,
+        "cleaned": cleaned,
+        "meta": meta,
+        "meta_tag": meta_tag,
+        "meta_warning": meta_warning,
+        "images": extract_image_metadata(cleaned),
+        "after": _table_quality(cleaned),
+        "usage": usage,
+        "request_id": request_id,
+    }
+
+
 def _resolve_default_outdir(input_path: Path, module_id: str) -> Path:
     cur = input_path.parent
     for parent in [cur] + list(cur.parents):
@@ -219,6 +244,11 @@ def main() -> None:
     parser.add_argument("--fail-on-unresolved", dest="fail_on_unresolved", action="store_true", default=True)
     parser.add_argument("--no-fail-on-unresolved", dest="fail_on_unresolved", action="store_false")
     parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_RESCUE_CONCURRENCY,
+                        help="Parallel rescue requests per pass (1=sequential)")
+    parser.add_argument("--rate-limit", dest="rate_limit", type=float, default=0.0,
+                        help="Max rescue requests started per second (0=unlimited)")
+    parser.add_argument("--rate_limit", dest="rate_limit", type=float, default=0.0)
     parser.add_argument("--progress-file")
     parser.add_argument("--state-file")
     parser.add_argument("--run-id")
@@ -280,6 +310,9 @@ def main() -> None:
     prompt_hash = re.sub(r"[^a-z0-9]", "", str(abs(hash(prompt))))[:12]
 
     remaining_budget = args.budget_pages if args.budget_pages is not None else None
+    # Full-page data URIs are reused when a page is re-selected on a later pass.
+    image_cache = PageImageCache()
+    rate_limiter = RateLimiter(args.rate_limit)
     report_rows: List[Dict[str, Any]] = []
 
     def page_number(row: Dict[str, Any]) -> int:
@@ -310,7 +343,8 @@ def main() -> None:
         if not selected:
             break
 
-        for idx, row in enumerate(rows, start=1):
+        jobs: List[Dict[str, Any]] = []
+        for row in rows:
             pn = page_number(row)
             if pn not in selected:
                 continue
@@ -337,63 +371,66 @@ def main() -> None:
                     "after": before.__dict__,
                 })
                 continue
+            # Reserve the report slot so report order stays by page, not by completion.
+            jobs.append({"row": row, "page_number": pn, "image_path": image_path, "before": before,
+                         "report_index": len(report_rows)})
+            report_rows.append({})
+
+        def _on_rescued(done: int, job: Dict[str, Any], _result: Dict[str, Any]) -> None:
+            if done % 10 == 0 or done == len(jobs):
+                logger.log(
+                    "adapter",
+                    "running",
+                    current=done,
+                    total=len(jobs),
+                    message=f"Table rescue pass {pass_idx} progress {done}/{len(jobs)}",
+                    artifact=str(out_path),
+                    module_id="table_rescue_html_loop_v1",
+                    schema_version="page_html_v1",
+                )
 
-            image_data = _encode_image(image_path)
-            raw, usage, request_id = _call_ocr(
-                args.model,
-                prompt,
-                image_data,
-                args.temperature,
-                args.max_output_tokens,
-            )
-            raw = _extract_code_fence(raw)
-            cleaned_raw, meta, meta_tag, meta_warning = _extract_ocr_metadata(raw)
-            cleaned = sanitize_html(cleaned_raw)
+        results = run_rescue_jobs(
+            jobs,
+            lambda job: _rescue_page(job, args, prompt, image_cache),
+            concurrency=args.concurrency,
+            rate_limiter=rate_limiter,
+            on_done=_on_rescued,
+        )
 
+        for job, result in zip(jobs, results):
+            row = job["row"]
+            meta = result["meta"]
+            meta_tag = result["meta_tag"]
             row["module_id"] = "table_rescue_html_loop_v1"
             if meta:
                 row.update({k: v for k, v in meta.items() if v is not None})
-            if meta_warning:
-                row["ocr_metadata_warning"] = meta_warning
+            if result["meta_warning"]:
+                row["ocr_metadata_warning"] = result["meta_warning"]
             if meta_tag and not all(v is not None for v in meta.values()):
                 row["ocr_metadata_tag"] = meta_tag
             if not meta_tag:
                 row["ocr_metadata_missing"] = True
-            row["html"] = cleaned
-            row["raw_html"] = raw
+            row["html"] = result["cleaned"]
+            row["raw_html"] = result["raw"]
 
-            images = extract_image_metadata(cleaned)
-            if images:
-                row["images"] = images
+            if result["images"]:
+                row["images"] = result["images"]
 
-            after = _table_quality(cleaned)
-            report_rows.append({
-                "page_number": pn,
+            report_rows[job["report_index"]] = {
+                "page_number": job["page_number"],
                 "pass": pass_idx,
                 "attempted": True,
                 "model": args.model,
                 "prompt_hash": prompt_hash,
-                "usage": usage,
-                "request_id": request_id,
-                "before": before.__dict__,
-                "after": after.__dict__,
-            })
+                "usage": result["usage"],
+                "request_id": result["request_id"],
+                "before": job["before"].__dict__,
+                "after": result["after"].__dict__,
+            }
 
             if remaining_budget is not None:
                 remaining_budget -= 1
 
-            if idx % 10 == 0:
-                logger.log(
-                    "adapter",
-                    "running",
-                    current=idx,
-                    total=total,
-                    message=f"Table rescue pass {pass_idx} progress {idx}/{total}",
-                    artifact=str(out_path),
-                    module_id="table_rescue_html_loop_v1",
-                    schema_version="page_html_v1",
-                )
-
         if remaining_budget is not None and remaining_budget <= 0:
             break
 
@@ -1,7 +1,5 @@
 import argparse
-import base64
 import hashlib
-import io
 import os
 import re
 from dataclasses import dataclass
@@ -10,6 +8,12 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from PIL import Image
+from modules.common.table_rescue import (
+    DEFAULT_RESCUE_CONCURRENCY,
+    PageImageCache,
+    RateLimiter,
+    run_rescue_jobs,
+)
 from modules.common.utils import read_jsonl, append_jsonl, ensure_dir, ProgressLogger
 from modules.extract.ocr_ai_gpt51_v1.main import SYSTEM_PROMPT, sanitize_html
 
@@ -104,27 +108,9 @@ def detect_collapsed_table(stats: HtmlStats) -> Tuple[bool, List[str]]:
     return (len(reasons) > 0), reasons
 
 
-def encode_crop(image_path: str, crop_top: float, crop_bottom: float) -> Tuple[str, Dict[str, float]]:
-    with Image.open(image_path) as img:
-        width, height = img.size
-        top_px = max(0, int(height * crop_top))
-        bottom_px = min(height, int(height * crop_bottom))
-        if bottom_px <= top_px:
-            bottom_px = min(height, top_px + int(height * 0.25))
-        box = (0, top_px, width, bottom_px)
-        cropped = img.crop(box)
-        buffer = io.BytesIO()
-        cropped.save(buffer, format="PNG")
-        data = base64.b64encode(buffer.getvalue()).decode("utf-8")
-    crop_meta = {
-        "top": crop_top,
-        "bottom": crop_bottom,
-        "left": 0.0,
-        "right": 1.0,
-        "unit": "ratio",
-        "pixel_box": [0, top_px, width, bottom_px],
-    }
-    return f"data:image/png;base64,{data}", crop_meta
+def encode_crop(image_path: str, crop_top: float, crop_bottom: float,
+                cache: Optional[PageImageCache] = None) -> Tuple[str, Dict[str, float]]:
+    return (cache or PageImageCache(max_entries=1)).crop(image_path, crop_top, crop_bottom)
 
 
 def extract_table(html: str) -> str:
@@ -204,6 +190,41 @@ def call_rescue(model: str, prompt: str, image_data: str, temperature: float, ma
     return raw, usage, request_id
 
 
+def _rescue_page(job: Dict[str, Any], args: argparse.Namespace, prompt: str,
+                 cache: PageImageCache) -> Dict[str, Any]:
+    """Primary crop, then fallback crop when no table comes back. Runs in a pool worker."""
+    image_path = job["image_path"]
+    attempts: List[Dict[str, Any]] = []
+    crops = [(args.crop_top, args.crop_bottom)]
+    if args.fallback_crop_bottom > args.fallback_crop_top:
+        crops.append((args.fallback_crop_top, args.fallback_crop_bottom))
+    new_table = ""
+    new_tr = 0
+    for crop_top, crop_bottom in crops:
+        image_data, crop_meta = encode_crop(image_path, crop_top, crop_bottom, cache=cache)
+        raw, _usage, _request_id = call_rescue(
+            args.model,
+            prompt,
+            image_data,
+            args.temperature,
+            args.max_output_tokens,
+        )
+        raw = extract_code_fence(raw)
+        cleaned = sanitize_html(raw)
+        new_table = extract_table(cleaned)
+        new_tr = len(re.findall(r"<tr\b", new_table, flags=re.IGNORECASE)) if new_table else 0
+        attempts.append(
+            {
+                "crop": crop_meta,
+                "table_tr": new_tr,
+                "table_chars": len(new_table),
+            }
+        )
+        if new_table:
+            break
+    return {"attempts": attempts, "new_table": new_table, "new_tr": new_tr}
+
+
 def _resolve_default_outdir(input_path: Path, module_id: str) -> Path:
     # Prefer the module folder in the run dir (e.g., 04_table_rescue_html_v1) if discoverable.
     cur = input_path.parent
@@ -246,6 +267,11 @@ def main() -> None:
     parser.add_argument("--fallback_crop_top", dest="fallback_crop_top", type=float, default=0.35)
     parser.add_argument("--fallback-crop-bottom", dest="fallback_crop_bottom", type=float, default=0.85)
     parser.add_argument("--fallback_crop_bottom", dest="fallback_crop_bottom", type=float, default=0.85)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_RESCUE_CONCURRENCY,
+                        help="Parallel rescue requests (1=sequential)")
+    parser.add_argument("--rate-limit", dest="rate_limit", type=float, default=0.0,
+                        help="Max rescue requests started per second (0=unlimited)")
+    parser.add_argument("--rate_limit", dest="rate_limit", type=float, default=0.0)
     parser.add_argument("--progress-file")
     parser.add_argument("--state-file")
     parser.add_argument("--run-id")
@@ -331,6 +357,36 @@ def main() -> None:
     selected_pages = {c["page_number"]: c for c in candidates[:cap]}
     skipped_pages = {c["page_number"]: c for c in candidates[cap:]}
 
+    rescue_jobs: List[Dict[str, Any]] = []
+    if not args.dry_run:
+        for row in rows:
+            image_path = row.get("image")
+            if row.get("page_number") in selected_pages and image_path and os.path.exists(image_path):
+                rescue_jobs.append({"page_number": row.get("page_number"), "image_path": image_path})
+
+    image_cache = PageImageCache()
+
+    def _on_rescued(done: int, job: Dict[str, Any], _result: Dict[str, Any]) -> None:
+        logger.log(
+            "adapter",
+            "running",
+            current=done,
+            total=len(rescue_jobs),
+            message=f"Table rescue page {job['page_number']} ({done}/{len(rescue_jobs)})",
+            artifact=str(out_path),
+            module_id="table_rescue_html_v1",
+            schema_version="page_html_v1",
+        )
+
+    rescue_results = run_rescue_jobs(
+        rescue_jobs,
+        lambda job: _rescue_page(job, args, prompt, image_cache),
+        concurrency=args.concurrency,
+        rate_limiter=RateLimiter(args.rate_limit),
+        on_done=_on_rescued,
+    )
+    results_by_page = {job["page_number"]: result for job, result in zip(rescue_jobs, rescue_results)}
+
     rescued = 0
     attempted = 0
 
@@ -360,80 +416,38 @@ def main() -> None:
             if args.dry_run:
                 rescue_meta["skipped_reason"] = "dry_run"
                 row["rescue"] = rescue_meta
+            elif page_number not in results_by_page:
+                rescue_meta["skipped_reason"] = "missing_image"
+                row["rescue"] = rescue_meta
             else:
-                image_path = row.get("image")
-                if not image_path or not os.path.exists(image_path):
-                    rescue_meta["skipped_reason"] = "missing_image"
-                    row["rescue"] = rescue_meta
-                else:
-                    attempts: List[Dict[str, Any]] = []
-                    image_data, crop_meta = encode_crop(image_path, args.crop_top, args.crop_bottom)
-                    raw, usage, request_id = call_rescue(
-                        args.model,
-                        prompt,
-                        image_data,
-                        args.temperature,
-                        args.max_output_tokens,
-                    )
-                    raw = extract_code_fence(raw)
-                    cleaned = sanitize_html(raw)
-                    new_table = extract_table(cleaned)
-                    new_tr = len(re.findall(r"<tr\b", new_table, flags=re.IGNORECASE)) if new_table else 0
-                    attempts.append(
-                        {
-                            "crop": crop_meta,
-                            "table_tr": new_tr,
-                            "table_chars": len(new_table),
-                        }
-                    )
-
-                    if not new_table and args.fallback_crop_bottom > args.fallback_crop_top:
-                        image_data, crop_meta = encode_crop(
-                            image_path, args.fallback_crop_top, args.fallback_crop_bottom
-                        )
-                        raw, usage2, request_id2 = call_rescue(
-                            args.model,
-                            prompt,
-                            image_data,
-                            args.temperature,
-                            args.max_output_tokens,
-                        )
-                        raw = extract_code_fence(raw)
-                        cleaned = sanitize_html(raw)
-                        new_table = extract_table(cleaned)
-                        new_tr = len(re.findall(r"<tr\b", new_table, flags=re.IGNORECASE)) if new_table else 0
-                        attempts.append(
-                            {
-                                "crop": crop_meta,
-                                "table_tr": new_tr,
-                                "table_chars": len(new_table),
-                            }
-                        )
-                    rescue_meta.update(
-                        {
-                            "attempts": attempts,
-                            "new_table_tr": new_tr,
-                            "old_table_tr": old_tr,
-                            "table_chars": len(new_table),
-                            "table_preview": new_table[:200],
-                        }
-                    )
-                    applied = False
-                    replaced = False
-                    inserted = False
-                    if new_table and new_tr >= 2 and (old_tr <= 1 or new_tr > old_tr):
-                        html, replaced, inserted = replace_or_insert_table(html, new_table)
-                        row["html"] = html
-                        applied = True
-                        rescued += 1
-                    rescue_meta.update(
-                        {
-                            "applied": applied,
-                            "table_replaced": replaced,
-                            "table_inserted": inserted,
-                        }
-                    )
-                    row["rescue"] = rescue_meta
+                result = results_by_page[page_number]
+                new_table = result["new_table"]
+                new_tr = result["new_tr"]
+                rescue_meta.update(
+                    {
+                        "attempts": result["attempts"],
+                        "new_table_tr": new_tr,
+                        "old_table_tr": old_tr,
+                        "table_chars": len(new_table),
+                        "table_preview": new_table[:200],
+                    }
+                )
+                applied = False
+                replaced = False
+                inserted = False
+                if new_table and new_tr >= 2 and (old_tr <= 1 or new_tr > old_tr):
+                    html, replaced, inserted = replace_or_insert_table(html, new_table)
+                    row["html"] = html
+                    applied = True
+                    rescued += 1
+                rescue_meta.update(
+                    {
+                        "applied": applied,
+                        "table_replaced": replaced,
+                        "table_inserted": inserted,
+                    }
+                )
+                row["rescue"] = rescue_meta
 
         elif page_number in skipped_pages:
             rescue_meta = {
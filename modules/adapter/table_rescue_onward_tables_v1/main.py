@@ -6,7 +6,6 @@ then strips page-number/running-head tags from the resulting HTML while preservi
 printed_page_number fields already extracted.
 """
 import argparse
-import base64
 import os
 import re
 from copy import deepcopy
@@ -25,6 +24,21 @@ except Exception as exc:  # pragma: no cover - environment dependency
 else:
     _OPENAI_IMPORT_ERROR = None
 
+from modules.common.genealogy_table_model import (
+    SUBGROUP_CLASS,
+    PageTables,
+    TableRow,
+    load_sidecar,
+    page_tables,
+    write_sidecar,
+)
+from modules.common.prepared_image import image_data_uri
+from modules.common.table_rescue import (
+    DEFAULT_RESCUE_CONCURRENCY,
+    PageImageCache,
+    RateLimiter,
+    run_rescue_jobs,
+)
 from modules.common.utils import read_jsonl, save_jsonl, ensure_dir, ProgressLogger
 from modules.extract.ocr_ai_gpt51_v1.main import (
     build_system_prompt,
@@ -96,10 +110,7 @@ def _model_to_dict(obj: Any) -> Any:
 
 
 def _encode_image(path: str) -> str:
-    with open(path, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode("utf-8")
-    ext = os.path.splitext(path)[1].lower().lstrip(".") or "jpeg"
-    return f"data:image/{ext};base64,{b64}"
+    return image_data_uri(path)
 
 
 def _supports_temperature(model: str) -> bool:
@@ -180,43 +191,29 @@ def _header_match_score(cell: str, token: str) -> float:
         return 0.0
 
 
-def _table_has_headers(html: str, threshold: float) -> bool:
-    soup = BeautifulSoup(html or "", "html.parser")
-    for table in soup.find_all("table"):
-        header_cells: List[str] = []
-        thead = table.find("thead")
-        if thead:
-            header_cells = [c.get_text(" ", strip=True) for c in thead.find_all(["th", "td"])]
-        if not header_cells:
-            first_row = table.find("tr")
-            if first_row:
-                header_cells = [c.get_text(" ", strip=True) for c in first_row.find_all(["th", "td"])]
-        if not header_cells:
-            continue
+def _header_cells_match(header_cells: List[str], threshold: float) -> bool:
+    if not header_cells:
+        return False
+    matched = set()
+    for cell in header_cells:
+        cell_norm = _normalize_token(cell)
+        for token in EXPECTED_HEADERS:
+            score = _header_match_score(cell_norm, token)
+            if score >= threshold:
+                matched.add(token)
+        # allow combined boy/girl header
+        if "boy" in cell_norm and "girl" in cell_norm:
+            matched.add("boy")
+            matched.add("girl")
+    return all(t in matched for t in EXPECTED_HEADERS)
 
-        matched = set()
-        for cell in header_cells:
-            cell_norm = _normalize_token(cell)
-            for token in EXPECTED_HEADERS:
-                score = _header_match_score(cell_norm, token)
-                if score >= threshold:
-                    matched.add(token)
-            # allow combined boy/girl header
-            if "boy" in cell_norm and "girl" in cell_norm:
-                matched.add("boy")
-                matched.add("girl")
-
-        if all(t in matched for t in EXPECTED_HEADERS):
-            return True
-    return False
-
-
-def _count_header_tables(soup: BeautifulSoup, threshold: float) -> int:
-    count = 0
-    for table in soup.find_all("table"):
-        if _table_has_headers(str(table), threshold):
-            count += 1
-    return count
+
+def _count_header_tables(page: PageTables, threshold: float) -> int:
+    return sum(1 for table in page.tables if _header_cells_match(table.header_texts(), threshold))
+
+
+def _table_has_headers(html: str, threshold: float) -> bool:
+    return _count_header_tables(page_tables(html), threshold) > 0
 
 
 def _extract_family_labels(text: str) -> List[str]:
@@ -224,11 +221,18 @@ def _extract_family_labels(text: str) -> List[str]:
     return list(dict.fromkeys(FAMILY_HEADING_RE.findall(normalized)))
 
 
+def _row_cell_texts(row: Any) -> List[str]:
+    """Direct cell texts of a BeautifulSoup <tr> or a table-model row."""
+    if isinstance(row, TableRow):
+        return row.texts()
+    return [cell.get_text(" ", strip=True) for cell in row.find_all(["th", "td"], recursive=False)]
+
+
 def _row_family_heading_text(row: Any) -> Optional[str]:
-    cells = row.find_all(["th", "td"], recursive=False)
+    cells = _row_cell_texts(row)
     if len(cells) != 1:
         return None
-    raw_text = re.sub(r"\s+", " ", cells[0].get_text(" ", strip=True)).strip()
+    raw_text = re.sub(r"\s+", " ", cells[0]).strip()
     if not raw_text:
         return None
     labels = _extract_family_labels(raw_text)
@@ -240,10 +244,10 @@ def _row_family_heading_text(row: Any) -> Optional[str]:
 
 
 def _row_single_cell_text(row: Any) -> Optional[str]:
-    cells = row.find_all(["th", "td"], recursive=False)
+    cells = _row_cell_texts(row)
     if len(cells) != 1:
         return None
-    text = re.sub(r"\s+", " ", cells[0].get_text(" ", strip=True)).strip()
+    text = re.sub(r"\s+", " ", cells[0]).strip()
     return text or None
 
 
@@ -381,9 +385,9 @@ def _is_outside_table_data_line(text: str) -> bool:
 
 
 def _page_rescue_quality(html: str, threshold: float) -> RescueQuality:
-    soup = BeautifulSoup(html or "", "html.parser")
-    table_count = len(soup.find_all("table"))
-    header_table_count = _count_header_tables(soup, threshold)
+    page = page_tables(html)
+    table_count = len(page.tables)
+    header_table_count = _count_header_tables(page, threshold)
     row_count = 0
     family_labels = set()
     inline_family_heading_count = 0
@@ -392,8 +396,10 @@ def _page_rescue_quality(html: str, threshold: float) -> RescueQuality:
     combined_boy_girl_headers = 0
     slash_count_cells = 0
 
-    for tag in soup.find_all(["p", "h1", "h2", "h3", "th", "td", "li"]):
-        text = _normalize_text(tag.get_text(" ", strip=True))
+    texts = [(block.tag, block.text, block.in_table) for block in page.blocks]
+    texts.extend(("th" if cell.header else "td", cell.text, True) for cell in page.cells())
+    for tag_name, raw_text, in_table in texts:
+        text = _normalize_text(raw_text)
         if not text:
             continue
         family_labels.update(_extract_family_labels(text))
@@ -401,29 +407,27 @@ def _page_rescue_quality(html: str, threshold: float) -> RescueQuality:
         for label in SUMMARY_LABELS:
             if label in upper:
                 summary_labels.add(label)
-        if tag.name in {"th", "td"}:
+        if tag_name in {"th", "td"}:
             if SLASH_COUNT_RE.search(text):
                 slash_count_cells += len(SLASH_COUNT_RE.findall(text))
-            if tag.name == "th" and COMBINED_BOY_GIRL_RE.search(text):
+            if tag_name == "th" and COMBINED_BOY_GIRL_RE.search(text):
                 combined_boy_girl_headers += 1
-        if tag.name in {"p", "h1", "h2", "h3", "li"} and tag.find_parent("table") is None:
+        elif not in_table:
             if _is_outside_table_data_line(text):
                 outside_table_data_lines += 1
 
-    for table in soup.find_all("table"):
-        row_count += len(table.find_all("tr"))
-    for table in soup.find_all("table"):
-        body_rows = table.find("tbody").find_all("tr", recursive=False) if table.find("tbody") else table.find_all("tr")[1:]
+    for table in page.tables:
+        row_count += len(table.rows)
         heading_sequence_has_context = False
         pending_family_rows = 0
-        for row in body_rows:
+        for row in table.body_rows():
             text = _row_single_cell_text(row)
             if not text:
                 inline_family_heading_count += pending_family_rows
                 pending_family_rows = 0
                 heading_sequence_has_context = False
                 continue
-            if "genealogy-subgroup-heading" in (row.get("class") or []):
+            if SUBGROUP_CLASS in row.classes:
                 pending_family_rows = 0
                 if _is_generation_context_text(text):
                     heading_sequence_has_context = True
@@ -1209,6 +1213,49 @@ def _build_user_text(current_html: str, max_context_chars: int) -> str:
     )
 
 
+def _rescue_page(job: Dict[str, Any], args: argparse.Namespace, prompt: str,
+                 cache: PageImageCache) -> Dict[str, Any]:
+    """Re-OCR one page and decide acceptance against its baseline. Runs in a pool worker."""
+    image_data = cache.full_image(job["image_path"])
+    user_text = _build_user_text(job["baseline_html"], args.max_context_chars)
+    try:
+        raw, usage, request_id = _call_ocr(
+            args.model,
+            prompt,
+            image_data,
+            args.temperature,
+            args.max_output_tokens,
+            args.timeout_seconds,
+            user_text=user_text,
+        )
+    except Exception as exc:
+        return {"error": str(exc)}
+    raw = _extract_code_fence(raw)
+    cleaned_raw, meta, meta_tag, meta_warning = _extract_ocr_metadata(raw)
+    cleaned = _normalize_rescue_html(cleaned_raw)
+    accepted, decision_reason, existing_quality, candidate_quality = _should_accept_rescue(
+        job["baseline_html"],
+        cleaned,
+        args.header_threshold,
+        args.min_score_gain,
+    )
+    return {
+        "error": None,
+        "raw": raw,
+        "cleaned": cleaned,
+        "meta": meta,
+        "meta_tag": meta_tag,
+        "meta_warning": meta_warning,
+        "accepted": accepted,
+        "decision_reason": decision_reason,
+        "existing_quality": existing_quality,
+        "candidate_quality": candidate_quality,
+        "images": extract_image_metadata(cleaned) if accepted else [],
+        "usage": usage,
+        "request_id": request_id,
+    }
+
+
 def _resolve_default_outdir(input_path: Path, module_id: str) -> Path:
     cur = input_path.parent
     for parent in [cur] + list(cur.parents):
@@ -1248,6 +1295,11 @@ def main() -> None:
                         help="Log progress every N pages (default: 1 if <=50 pages else 10)")
     parser.add_argument("--timeout-seconds", type=float, default=120.0,
                         help="Per-page OCR request timeout (seconds)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_RESCUE_CONCURRENCY,
+                        help="Parallel rescue requests (1=sequential)")
+    parser.add_argument("--rate-limit", dest="rate_limit", type=float, default=0.0,
+                        help="Max rescue requests started per second (0=unlimited)")
+    parser.add_argument("--rate_limit", dest="rate_limit", type=float, default=0.0)
     args = parser.parse_args()
 
     input_path = None
@@ -1282,6 +1334,7 @@ def main() -> None:
         report_path = outdir_path / args.report
 
     rows = list(read_jsonl(str(input_path)))
+    load_sidecar(str(input_path))
     total = len(rows)
     if total == 0:
         raise SystemExit(f"Input is empty: {input_path}")
@@ -1324,7 +1377,9 @@ def main() -> None:
     if not log_every or log_every <= 0:
         log_every = 1 if total <= 50 else 10
 
-    for idx, row in enumerate(rows, start=1):
+    # Pass 1: local decisions (selection, normalized-existing repair); collect re-OCR jobs.
+    jobs: List[Dict[str, Any]] = []
+    for row in rows:
         pn = int(row.get("page_number") or row.get("page") or 0)
         html = row.get("html") or row.get("raw_html") or ""
         row["module_id"] = "table_rescue_onward_tables_v1"
@@ -1359,17 +1414,6 @@ def main() -> None:
         if normalized_existing_applied:
             row["html"] = normalized_existing
 
-        logger.log(
-            "adapter",
-            "running",
-            current=idx,
-            total=total,
-            message=f"Onward table rescue page {pn} ({idx}/{total})",
-            artifact=str(out_path),
-            module_id="table_rescue_onward_tables_v1",
-            schema_version="page_html_v1",
-        )
-
         if normalized_existing_applied:
             final_html = row.get("html") or row.get("raw_html") or ""
             if not _table_has_headers(final_html, args.header_threshold):
@@ -1392,88 +1436,97 @@ def main() -> None:
             })
             continue
 
-        image_data = _encode_image(image_path)
-        user_text = _build_user_text(baseline_html, args.max_context_chars)
-        try:
-            raw, usage, request_id = _call_ocr(
-                args.model,
-                prompt,
-                image_data,
-                args.temperature,
-                args.max_output_tokens,
-                args.timeout_seconds,
-                user_text=user_text,
+        # Reserve the report slot so report order stays by page, not by completion.
+        jobs.append({
+            "row": row,
+            "page_number": pn,
+            "image_path": image_path,
+            "baseline_html": baseline_html,
+            "report_index": len(report_rows),
+            "normalized_existing_accepted": normalized_existing_accepted,
+            "normalized_existing_applied": normalized_existing_applied,
+            "normalized_existing_reason": normalized_reason,
+            "input_quality": input_quality,
+            "normalized_quality": normalized_quality,
+        })
+        report_rows.append({})
+
+    # Pass 2: re-OCR and score candidates concurrently.
+    def _on_rescued(done: int, job: Dict[str, Any], _result: Dict[str, Any]) -> None:
+        if done % log_every == 0 or done == len(jobs):
+            logger.log(
+                "adapter",
+                "running",
+                current=done,
+                total=len(jobs),
+                message=f"Onward table rescue page {job['page_number']} ({done}/{len(jobs)})",
+                artifact=str(out_path),
+                module_id="table_rescue_onward_tables_v1",
+                schema_version="page_html_v1",
             )
-        except Exception as exc:
-            report_rows.append({
+
+    image_cache = PageImageCache()
+    results = run_rescue_jobs(
+        jobs,
+        lambda job: _rescue_page(job, args, prompt, image_cache),
+        concurrency=args.concurrency,
+        rate_limiter=RateLimiter(args.rate_limit),
+        on_done=_on_rescued,
+    )
+
+    # Pass 3: apply accepted results in page order.
+    for job, result in zip(jobs, results):
+        row = job["row"]
+        pn = job["page_number"]
+        if result["error"] is not None:
+            report_rows[job["report_index"]] = {
                 "page_number": pn,
                 "rescued": False,
                 "reason": "ocr_error",
-                "error": str(exc),
-            })
+                "error": result["error"],
+            }
             unresolved.append(pn)
             continue
-        raw = _extract_code_fence(raw)
-        cleaned_raw, meta, meta_tag, meta_warning = _extract_ocr_metadata(raw)
-        cleaned = _normalize_rescue_html(cleaned_raw)
-
-        accepted, decision_reason, existing_quality, candidate_quality = _should_accept_rescue(
-            baseline_html,
-            cleaned,
-            args.header_threshold,
-            args.min_score_gain,
-        )
-        if accepted:
+        if result["accepted"]:
+            meta = result["meta"]
+            meta_tag = result["meta_tag"]
             if meta:
                 row.update({k: v for k, v in meta.items() if v is not None})
-            if meta_warning:
-                row["ocr_metadata_warning"] = meta_warning
+            if result["meta_warning"]:
+                row["ocr_metadata_warning"] = result["meta_warning"]
             if meta_tag and not all(v is not None for v in meta.values()):
                 row["ocr_metadata_tag"] = meta_tag
             if not meta_tag:
                 row["ocr_metadata_missing"] = True
-            row["html"] = cleaned
-            row["raw_html"] = raw
+            row["html"] = result["cleaned"]
+            row["raw_html"] = result["raw"]
 
-            images = extract_image_metadata(cleaned)
-            if images:
-                row["images"] = images
+            if result["images"]:
+                row["images"] = result["images"]
 
         # If headers are still missing after re-OCR, mark unresolved.
         final_html = row.get("html") or row.get("raw_html") or ""
         if not _table_has_headers(final_html, args.header_threshold):
             unresolved.append(pn)
 
-        report_rows.append({
+        report_rows[job["report_index"]] = {
             "page_number": pn,
             "rescued": True,
-            "accepted": accepted,
-            "decision_reason": decision_reason,
+            "accepted": result["accepted"],
+            "decision_reason": result["decision_reason"],
             "model": args.model,
-            "request_id": request_id,
-            "usage": _model_to_dict(usage),
-            "normalized_existing_accepted": normalized_existing_accepted,
-            "normalized_existing_applied": normalized_existing_applied,
-            "normalized_existing_reason": normalized_reason,
-            "input_quality": asdict(input_quality),
-            "normalized_existing_quality": asdict(normalized_quality),
-            "existing_quality": asdict(existing_quality),
-            "candidate_quality": asdict(candidate_quality),
-        })
-
-        if idx % log_every == 0:
-            logger.log(
-                "adapter",
-                "running",
-                current=idx,
-                total=total,
-                message=f"Onward table rescue progress {idx}/{total}",
-                artifact=str(out_path),
-                module_id="table_rescue_onward_tables_v1",
-                schema_version="page_html_v1",
-            )
-
+            "request_id": result["request_id"],
+            "usage": _model_to_dict(result["usage"]),
+            "normalized_existing_accepted": job["normalized_existing_accepted"],
+            "normalized_existing_applied": job["normalized_existing_applied"],
+            "normalized_existing_reason": job["normalized_existing_reason"],
+            "input_quality": asdict(job["input_quality"]),
+            "normalized_existing_quality": asdict(job["normalized_quality"]),
+            "existing_quality": asdict(result["existing_quality"]),
+            "candidate_quality": asdict(result["candidate_quality"]),
+        }
     save_jsonl(str(out_path), rows)
+    write_sidecar(str(out_path), rows)
     if report_rows:
         save_jsonl(str(report_path), report_rows)
 
@@ -5,7 +5,7 @@ from collections import Counter
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional
 
-from modules.common.text_quality import spell_garble_metrics
+from modules.common.text_quality import spell_garble_metrics_batch
 from modules.common.utils import ensure_dir, save_json, append_jsonl
 
 
@@ -118,11 +118,11 @@ def main():
     ensure_dir(os.path.dirname(args.out) or ".")
     ensure_dir(os.path.dirname(args.report) or ".")
 
+    pages = [(_page_key_from_obj(obj), _extract_lines(obj)) for obj in _read_jsonl(in_path)]
+    all_metrics = spell_garble_metrics_batch([lines for _, lines in pages])
+
     rows: List[Dict[str, Any]] = []
-    for obj in _read_jsonl(in_path):
-        page_key = _page_key_from_obj(obj)
-        lines = _extract_lines(obj)
-        metrics = spell_garble_metrics(lines)
+    for (page_key, lines), metrics in zip(pages, all_metrics):
         row = {
             "page": page_key,
             "dictionary_score": metrics["dictionary_score"],
@@ -888,6 +888,8 @@ def main() -> None:
         default=False,
         help="Collapse contiguous same-schema genealogy tables into one table with subgroup heading rows.",
     )
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Worker processes for emitting changed entries (0 = auto, 1 = in-process)")
     parser.add_argument("--run-id", dest="run_id", default=None, help="Run ID for progress logging")
     parser.add_argument("--state-file", dest="state_file", default=None, help="Pipeline state JSON path")
     parser.add_argument("--progress-file", dest="progress_file", default=None, help="Pipeline progress JSONL path")
@@ -1145,6 +1147,7 @@ def main() -> None:
         images_subdir=args.images_subdir.rstrip("/") if args.illustration_manifest else None,
         run_id=args.run_id,
         module_id="build_chapter_html_v1",
+        workers=args.workers,
     )
     logger = ProgressLogger(state_path=args.state_file, progress_path=args.progress_file, run_id=args.run_id)
     logger.log("build", "done", current=len(manifest_rows), total=len(manifest_rows),
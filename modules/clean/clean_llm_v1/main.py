@@ -1,11 +1,11 @@
 import argparse
 import json
 import os
-from base64 import b64encode
 from typing import Dict
 from modules.common.openai_client import OpenAI
 from tqdm import tqdm
 
+from modules.common.prepared_image import image_data_uri
 from modules.common.utils import read_jsonl, save_jsonl, ProgressLogger
 
 
@@ -20,17 +20,12 @@ Rules:
 Return JSON: { "clean_text": "<string>", "confidence": <0-1 float> }"""
 
 
-def encode_image(path: str) -> str:
-    with open(path, "rb") as f:
-        return b64encode(f.read()).decode("utf-8")
-
-
 def clean_page(client: OpenAI, model: str, page: Dict) -> Dict:
     content = [
         {"type": "text", "text": "Raw OCR:\n" + page.get("text", "")},
     ]
-    if page.get("image"):
-        content.append({"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{page['image_b64']}"}})
+    if page.get("image") and os.path.exists(page["image"]):
+        content.append({"type": "image_url", "image_url": {"url": image_data_uri(page["image"])}})
 
     completion = client.chat.completions.create(
         model=model,
@@ -80,11 +75,6 @@ def main():
     client = OpenAI()
     pages = list(read_jsonl(args.pages))
 
-    # attach base64 images
-    for p in pages:
-        if "image" in p and p["image"] and os.path.exists(p["image"]):
-            p["image_b64"] = encode_image(p["image"])
-
     out_rows = []
     total = len(pages)
     for idx, p in enumerate(tqdm(pages, desc="Clean pages"), start=1):
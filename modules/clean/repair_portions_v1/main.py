@@ -1,11 +1,11 @@
 import argparse
 import json
 import re
-from base64 import b64encode
 from pathlib import Path
 from typing import Dict, List, Tuple, Union
 
 from modules.common.openai_client import OpenAI
+from modules.common.prepared_image import image_data_uri
 from modules.common.utils import (
     ProgressLogger,
     read_jsonl,
@@ -38,8 +38,7 @@ Rules:
 
 
 def encode_image(path: str) -> str:
-    with open(path, "rb") as f:
-        return b64encode(f.read()).decode("utf-8")
+    return image_data_uri(path)
 
 
 def load_portions(path: str) -> Tuple[List[Dict], str]:
@@ -122,7 +121,7 @@ def call_llm(
             continue
         content.append({
             "type": "image_url",
-            "image_url": {"url": f"data:image/jpeg;base64,{encode_image(img_path)}"}
+            "image_url": {"url": encode_image(img_path)}
         })
 
     completion = client.chat.completions.create(
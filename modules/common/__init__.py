@@ -10,7 +10,7 @@ from .utils import (
     PROGRESS_STATUS_VALUES,
     validate_progress_event,
 )
-from .ocr import render_pdf, run_ocr, run_ocr_with_word_data
+from .ocr import render_pdf, run_ocr, run_ocr_with_word_data, run_tesseract_page
 
 __all__ = [
     "load_settings",
@@ -26,4 +26,5 @@ __all__ = [
     "render_pdf",
     "run_ocr",
     "run_ocr_with_word_data",
+    "run_tesseract_page",
 ]
@@ -8,8 +8,10 @@ from __future__ import annotations
 
 import base64
 import os
-from typing import Any, Optional, Tuple
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Tuple
 
+from modules.common import llm_cache, provider_quota
 from modules.common.utils import log_llm_usage
 
 try:
@@ -32,6 +34,22 @@ def _decode_data_uri(data_uri: str) -> Tuple[bytes, str]:
     return base64.b64decode(b64_data), mime_type
 
 
+def _dump_result(result: Tuple[str, Optional[Any], Optional[str]]) -> Dict[str, Any]:
+    raw, usage, response_id = result
+    return {
+        "raw": raw,
+        "usage": {
+            "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+            "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+        },
+        "response_id": response_id,
+    }
+
+
+def _load_result(entry: Dict[str, Any]) -> Tuple[str, Any, Optional[str]]:
+    return entry["raw"], SimpleNamespace(**entry["usage"]), entry.get("response_id")
+
+
 class AnthropicVisionClient:
     """Stateless helper for Claude vision calls with usage logging."""
 
@@ -69,43 +87,52 @@ class AnthropicVisionClient:
         Returns:
             (raw_text, usage_metadata, response_id)
         """
-        _image_bytes, media_type = _decode_data_uri(image_data)
-        # Re-encode to base64 string for the API
-        b64_str = base64.b64encode(_image_bytes).decode("utf-8")
-
-        resp = self._client.messages.create(
-            model=model,
-            system=system_prompt,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": user_text},
+        request = {
+            "model": model, "system_prompt": system_prompt, "user_text": user_text,
+            "image_data": image_data, "temperature": temperature, "max_tokens": max_tokens,
+        }
+
+        def send():
+            _image_bytes, media_type = _decode_data_uri(image_data)
+            # Re-encode to base64 string for the API
+            b64_str = base64.b64encode(_image_bytes).decode("utf-8")
+
+            with provider_quota.acquire("anthropic"):
+                resp = self._client.messages.create(
+                    model=model,
+                    system=system_prompt,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    messages=[
                         {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": media_type,
-                                "data": b64_str,
-                            },
+                            "role": "user",
+                            "content": [
+                                {"type": "text", "text": user_text},
+                                {
+                                    "type": "image",
+                                    "source": {
+                                        "type": "base64",
+                                        "media_type": media_type,
+                                        "data": b64_str,
+                                    },
+                                },
+                            ],
                         },
                     ],
-                },
-            ],
-        )
+                )
 
-        # Extract text from content blocks
-        raw = ""
-        for block in resp.content:
-            if block.type == "text":
-                raw += block.text
+            # Extract text from content blocks
+            raw = ""
+            for block in resp.content:
+                if block.type == "text":
+                    raw += block.text
+            return raw, getattr(resp, "usage", None), getattr(resp, "id", None)
 
-        response_id = getattr(resp, "id", None)
+        (raw, usage, response_id), source = llm_cache.call(
+            "anthropic", "vision", request, send, dump=_dump_result, load=_load_result
+        )
 
         # Extract usage for logging
-        usage = getattr(resp, "usage", None)
         prompt_tokens = 0
         completion_tokens = 0
         if usage:
@@ -117,6 +144,7 @@ class AnthropicVisionClient:
             prompt_tokens=prompt_tokens,
             completion_tokens=completion_tokens,
             provider="anthropic",
+            **llm_cache.usage_flags(source),
         )
 
         return raw, usage, response_id
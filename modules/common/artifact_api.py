@@ -0,0 +1,230 @@
+"""
+Read helpers behind the local artifact server (tools/artifact_server.py).
+
+- `ArtifactReader.read_rows` pages through a JSONL artifact by row range with optional
+  top-level field projection. Plain `.jsonl` files keep a cached line-offset index that is
+  extended (not rebuilt) when the file grows, so a page of rows is a seek + a few reads.
+- `tail_jsonl` returns complete rows appended after a byte offset (pipeline_events.jsonl).
+- `RunIndex` folds run_manifest.jsonl / run_health.jsonl / run_assessments.jsonl into an
+  in-memory table keyed by run_id, consuming only bytes appended since the last query.
+"""
+import json
+import os
+import threading
+from array import array
+from itertools import islice
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from modules.common.run_registry import registry_paths
+from modules.common.utils import artifact_format, read_jsonl
+
+
+def project_row(row: Any, fields: Optional[Sequence[str]]) -> Any:
+    if not fields or not isinstance(row, dict):
+        return row
+    return {k: row[k] for k in fields if k in row}
+
+
+def _file_key(path: str) -> Tuple[int, int, int]:
+    st = os.stat(path)
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class _LineIndex:
+    """Byte offsets of complete lines in an append-only text file."""
+
+    def __init__(self):
+        self.inode = -1
+        self.size = 0
+        self.starts = array("q")
+
+    def refresh(self, path: str) -> None:
+        inode, size, _ = _file_key(path)
+        if inode != self.inode or size < self.size:
+            self.inode, self.size, self.starts = inode, 0, array("q")
+        if size == self.size:
+            return
+        with open(path, "rb") as f:
+            f.seek(self.size)
+            pos = self.size
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partial trailing write; pick it up next time
+                if line.strip():
+                    self.starts.append(pos)
+                pos += len(line)
+        self.size = pos
+
+
+class ArtifactReader:
+    """Row-range reads over JSONL artifacts with per-file cached indexes."""
+
+    def __init__(self):
+        self._indexes: Dict[str, _LineIndex] = {}
+        self._totals: Dict[str, Tuple[Tuple[int, int, int], int]] = {}
+        self._lock = threading.Lock()
+
+    def _index(self, path: str) -> _LineIndex:
+        with self._lock:
+            index = self._indexes.setdefault(path, _LineIndex())
+            index.refresh(path)
+            return index
+
+    def _total(self, path: str) -> int:
+        key = _file_key(path)
+        cached = self._totals.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+        total = sum(1 for _ in read_jsonl(path))
+        self._totals[path] = (key, total)
+        return total
+
+    def read_rows(
+        self,
+        path: str,
+        offset: int = 0,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        offset = max(0, int(offset))
+        limit = max(0, int(limit))
+        if artifact_format(path) == "jsonl":
+            index = self._index(path)
+            starts = index.starts
+            total = len(starts)
+            rows = []
+            if offset < total and limit:
+                with open(path, "rb") as f:
+                    f.seek(starts[offset])
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        rows.append(project_row(json.loads(line), fields))
+                        if len(rows) >= limit or offset + len(rows) >= total:
+                            break
+        else:
+            total = self._total(path)
+            rows = list(islice(read_jsonl(path, fields=fields), offset, offset + limit))
+        end = offset + len(rows)
+        return {
+            "path": path,
+            "offset": offset,
+            "limit": limit,
+            "total": total,
+            "rows": rows,
+            "next_offset": end if end < total else None,
+        }
+
+
+def tail_jsonl(path: str, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Complete rows written after byte `offset`, plus the offset to resume from.
+    A file that shrank (rewritten) is read again from the start.
+    """
+    if not os.path.exists(path):
+        return [], 0
+    size = os.path.getsize(path)
+    if size < offset:
+        offset = 0
+    if size == offset:
+        return [], offset
+    rows = []
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            if line.strip():
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return rows, offset
+
+
+class RunIndex:
+    """Latest manifest / health / assessment row per run_id, updated incrementally."""
+
+    SOURCES = ("manifest", "health", "assessments")
+
+    def __init__(self, output_root: str):
+        self.output_root = output_root
+        self.paths = registry_paths(output_root)
+        self._offsets = {name: 0 for name in self.SOURCES}
+        self._runs: Dict[str, Dict[str, Any]] = {}
+        self._order: List[str] = []
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        with self._lock:
+            for name in self.SOURCES:
+                path = self.paths[name]
+                if os.path.exists(path) and os.path.getsize(path) < self._offsets[name]:
+                    # Registry rewritten: rebuild from scratch.
+                    self._offsets = {n: 0 for n in self.SOURCES}
+                    self._runs, self._order = {}, []
+                    break
+            for name in self.SOURCES:
+                rows, self._offsets[name] = tail_jsonl(self.paths[name], self._offsets[name])
+                for row in rows:
+                    run_id = row.get("run_id")
+                    if not run_id:
+                        continue
+                    if run_id not in self._runs:
+                        self._runs[run_id] = {"run_id": run_id}
+                        self._order.append(run_id)
+                    entry = self._runs[run_id]
+                    if name == "manifest":
+                        entry.update({k: v for k, v in row.items() if k not in ("health", "assessment")})
+                    elif name == "health":
+                        entry["health"] = row
+                    else:
+                        entry["assessment"] = row
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        self.refresh()
+        return self._runs.get(run_id)
+
+    def query(
+        self,
+        *,
+        document: Optional[str] = None,
+        recipe: Optional[str] = None,
+        status: Optional[str] = None,
+        q: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> Dict[str, Any]:
+        """
+        Newest-first runs (manifest order) filtered by health document, recipe, latest
+        assessment status and a free-text match on run_id/path/input.
+        """
+        self.refresh()
+        matches = []
+        for run_id in reversed(self._order):
+            entry = self._runs[run_id]
+            health = entry.get("health") or {}
+            assessment = entry.get("assessment") or {}
+            if document and health.get("document") != document:
+                continue
+            if recipe and entry.get("recipe") != recipe:
+                continue
+            if status and assessment.get("status") != status:
+                continue
+            if q:
+                haystack = f"{run_id} {entry.get('path') or ''} {json.dumps(entry.get('input') or {})}".lower()
+                if q.lower() not in haystack:
+                    continue
+            matches.append(entry)
+        offset = max(0, int(offset))
+        limit = max(0, int(limit))
+        page = matches[offset:offset + limit]
+        end = offset + len(page)
+        return {
+            "total": len(matches),
+            "offset": offset,
+            "limit": limit,
+            "runs": page,
+            "next_offset": end if end < len(matches) else None,
+        }
@@ -0,0 +1,184 @@
+"""
+Token-budget batch planner for LLM classification stages.
+
+Stages such as classify_headers_v1 and elements_content_type_v1 send a list of small items
+(elements) per request and expect one JSON row back per item. Fixed-size batches either waste
+requests (short items) or overflow the model's output budget (long items / verbose models),
+and a truncated JSON reply used to turn a whole batch into empty classifications. This module:
+
+- `estimate_tokens`: prompt token count (tiktoken when installed, else a chars/4 estimate
+  with a safety margin).
+- `BatchPlanner.plan`: greedy, order-preserving batches sized so that the rendered prompt
+  fits the model context and the expected reply fits the output limit.
+- `run_batches`: dispatches batch calls on a thread pool (results in input order) and
+  re-splits a batch in half when its call raises `TruncatedOutput`, down to single items.
+"""
+import math
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from modules.common.table_rescue import RateLimiter, run_rescue_jobs
+
+try:  # pragma: no cover - optional dependency
+    import tiktoken  # type: ignore
+except Exception:  # pragma: no cover
+    tiktoken = None
+
+# (context window, max output tokens) by model-name prefix; longest prefix wins.
+MODEL_TOKEN_LIMITS: Dict[str, Tuple[int, int]] = {
+    "gpt-5": (400_000, 128_000),
+    "gpt-4.1": (1_047_576, 32_768),
+    "gpt-4o": (128_000, 16_384),
+    "gpt-4-turbo": (128_000, 4_096),
+    "o3": (200_000, 100_000),
+    "o4-mini": (200_000, 100_000),
+}
+DEFAULT_TOKEN_LIMITS = (128_000, 4_096)
+CHARS_PER_TOKEN = 4.0
+ESTIMATE_MARGIN = 1.15
+
+_encoders: Dict[str, Any] = {}
+
+
+class TruncatedOutput(Exception):
+    """Raised by a batch call when the model reply was cut off (finish_reason=length / bad JSON)."""
+
+
+def model_token_limits(model: str) -> Tuple[int, int]:
+    """(context window, max output tokens) for a model name."""
+    best = ""
+    for prefix in MODEL_TOKEN_LIMITS:
+        if (model or "").startswith(prefix) and len(prefix) > len(best):
+            best = prefix
+    return MODEL_TOKEN_LIMITS[best] if best else DEFAULT_TOKEN_LIMITS
+
+
+def _encoder(model: Optional[str]):
+    if tiktoken is None:
+        return None
+    key = model or ""
+    if key not in _encoders:
+        try:
+            _encoders[key] = tiktoken.encoding_for_model(key)
+        except Exception:
+            try:
+                _encoders[key] = tiktoken.get_encoding("o200k_base")
+            except Exception:
+                _encoders[key] = None
+    return _encoders[key]
+
+
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """Prompt tokens for `text`; exact with tiktoken, otherwise a conservative estimate."""
+    if not text:
+        return 0
+    enc = _encoder(model)
+    if enc is not None:
+        return len(enc.encode(text))
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN * ESTIMATE_MARGIN))
+
+
+@dataclass
+class BatchPlanner:
+    """
+    Sizes batches from measured item prompt tokens and the model's limits.
+
+    `base_prompt_tokens` covers the fixed instructions; each item then costs its own prompt
+    tokens and `output_tokens_per_item` of reply. `max_output_tokens` caps the reply (the
+    module's --max_tokens), `max_items` caps the batch length (the module's --batch_size).
+    """
+
+    model: str
+    base_prompt_tokens: int = 0
+    output_tokens_per_item: int = 50
+    output_overhead_tokens: int = 100
+    min_output_tokens: int = 200
+    max_output_tokens: Optional[int] = None
+    max_items: Optional[int] = None
+    context_limit: Optional[int] = None
+    context_fill: float = 0.5
+
+    def __post_init__(self):
+        context, output = model_token_limits(self.model)
+        self.context_limit = self.context_limit or context
+        self.max_output_tokens = min(self.max_output_tokens or output, output)
+
+    def output_tokens(self, n_items: int) -> int:
+        """max_tokens to request for a batch of `n_items`."""
+        want = n_items * self.output_tokens_per_item + self.output_overhead_tokens
+        return min(self.max_output_tokens, max(self.min_output_tokens, want))
+
+    def prompt_budget(self) -> int:
+        # Stay well under the window: long prompts degrade per-item attention and latency.
+        return max(1, int(self.context_limit * self.context_fill) - self.max_output_tokens)
+
+    def plan(self, items: Sequence[Any], item_tokens: Callable[[Any], int]) -> List[List[Any]]:
+        """Greedy, order-preserving batches; every batch has at least one item."""
+        budget = self.prompt_budget() - self.base_prompt_tokens
+        max_by_output = max(
+            1, (self.max_output_tokens - self.output_overhead_tokens) // max(1, self.output_tokens_per_item)
+        )
+        max_items = min(self.max_items or max_by_output, max_by_output)
+        batches: List[List[Any]] = []
+        current: List[Any] = []
+        used = 0
+        for item in items:
+            cost = item_tokens(item)
+            if current and (len(current) >= max_items or used + cost > budget):
+                batches.append(current)
+                current, used = [], 0
+            current.append(item)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+
+def run_batches(
+    batches: Sequence[Sequence[Any]],
+    call: Callable[[List[Any]], List[Any]],
+    *,
+    fallback: Callable[[List[Any], BaseException], List[Any]],
+    concurrency: int = 1,
+    rate_limiter: Optional[RateLimiter] = None,
+    on_done: Optional[Callable[[int, int, List[Any]], None]] = None,
+    on_split: Optional[Callable[[List[Any], int], None]] = None,
+) -> List[List[Any]]:
+    """
+    Run `call(batch)` for every batch and return the result lists in batch order.
+
+    When `call` raises `TruncatedOutput`, the batch is split in half and each half is
+    retried; a single item that is still truncated gets `fallback(batch, exc)`, as does any
+    batch whose call fails for another reason. `on_done(done_count, batch_index, results)`
+    runs on the coordinating thread as batches finish; `on_split(batch, depth)` reports
+    re-splits (from worker threads).
+    """
+    limiter = rate_limiter or RateLimiter(0)
+
+    def _solve(batch: List[Any], depth: int) -> List[Any]:
+        try:
+            return list(call(batch))
+        except TruncatedOutput as exc:
+            if len(batch) <= 1:
+                return list(fallback(batch, exc))
+            if on_split:
+                on_split(batch, depth + 1)
+            mid = len(batch) // 2
+            limiter.acquire()
+            left = _solve(batch[:mid], depth + 1)
+            limiter.acquire()
+            return left + _solve(batch[mid:], depth + 1)
+        except Exception as exc:  # noqa: BLE001 - module decides what a failed batch yields
+            return list(fallback(batch, exc))
+
+    def _done(done: int, job: Tuple[int, List[Any]], results: List[Any]) -> None:
+        if on_done:
+            on_done(done, job[0], results)
+
+    return run_rescue_jobs(
+        [(i, list(b)) for i, b in enumerate(batches)],
+        lambda job: _solve(job[1], 0),
+        concurrency=concurrency,
+        rate_limiter=limiter,
+        on_done=_done,
+    )
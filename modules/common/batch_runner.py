@@ -0,0 +1,293 @@
+"""
+Run several books concurrently under one scheduler.
+
+A batch (`schemas.BatchConfig`) lists RunConfig files. `run_batch` starts up to
+`max_parallel_runs` driver processes at a time and gives every run the same environment:
+- `provider_limits` become `CODEX_PROVIDER_LIMITS`, so the LLM clients share one request
+  budget per provider across all runs (`modules/common/provider_quota.py`);
+- `response_cache` becomes `CODEX_LLM_CACHE_DIR`, so identical requests from any run (or a
+  rerun of a failed book) are answered from disk (`modules/common/llm_cache.py`).
+
+Runs start in priority order, then longest expected run first. The longest book bounds the
+batch wall time and should not be left for last. The expected time is the critical path of the
+run's plan forecast by `modules/common/cost_model.py` from past runs and the book's page count;
+without a forecast it falls back to earlier instrumentation of the same run, else the median
+of earlier runs of the same recipe. Every run is instrumented. When runs finish, the batch
+writes `batch_report.json` / `batch_report.md` with per-run and total wall time, LLM calls,
+cache hits and cost.
+"""
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from modules.common import cost_model, llm_cache, provider_quota
+from modules.common.utils import ensure_dir, save_json
+from schemas import BatchConfig, RunConfig
+
+BATCH_REPORT_JSON = "batch_report.json"
+BATCH_REPORT_MD = "batch_report.md"
+POLL_SECONDS = 1.0
+
+
+def _utc() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def load_batch(path: str) -> BatchConfig:
+    with open(path, "r", encoding="utf-8") as f:
+        return BatchConfig(**(yaml.safe_load(f) or {}))
+
+
+def batch_dir(batch: BatchConfig) -> str:
+    return batch.output_dir or os.path.join("output", "batches", batch.name)
+
+
+def resolve_run_dir(run_id: str, config_output_dir: Optional[str], recipe_output_dir: Optional[str]) -> str:
+    """Same resolution as driver.py: an output_dir ending in run_id is the run dir, else its parent."""
+    base = config_output_dir or recipe_output_dir
+    if not base:
+        return os.path.join("output", "runs", run_id)
+    return base if base.endswith(run_id) else os.path.join(base, run_id)
+
+
+def load_run_history(runs_root: str = os.path.join("output", "runs")) -> List[Dict[str, Any]]:
+    return cost_model.load_history(runs_root)
+
+
+def forecast_run_seconds(config: RunConfig, model: Dict[str, Dict[str, Any]]) -> Optional[float]:
+    """Critical-path seconds of the run's plan under the cost model, or None without history."""
+    from driver import build_plan, load_recipe, load_registry
+
+    try:
+        recipe = load_recipe(config.recipe)
+        plan = build_plan(recipe, load_registry(config.registry)["modules"])
+    except (OSError, SystemExit, KeyError, TypeError):
+        return None
+    input_conf = dict(recipe.get("input") or {})
+    if config.input_pdf:
+        input_conf["pdf"] = config.input_pdf
+    forecast = cost_model.forecast_plan(plan, model, cost_model.count_input_pages(input_conf))
+    return forecast["critical_path_seconds"] if forecast["stages"] else None
+
+
+def estimate_run_seconds(run_dir: str, recipe_path: str, history: List[Dict[str, Any]]) -> Optional[float]:
+    own = cost_model.load_instrumentation(run_dir)
+    if own and (own.get("totals") or {}).get("wall_seconds"):
+        return float(own["totals"]["wall_seconds"])
+    recipe_name = os.path.basename(recipe_path or "")
+    walls = [
+        float(h["totals"]["wall_seconds"]) for h in history
+        if os.path.basename(h.get("recipe_path") or "") == recipe_name and (h.get("totals") or {}).get("wall_seconds")
+    ]
+    return statistics.median(walls) if walls else None
+
+
+def plan_batch(batch: BatchConfig, history: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """Resolve every run of the batch and return them in launch order."""
+    history = load_run_history() if history is None else history
+    model = cost_model.build_cost_model(history)
+    runs = []
+    for idx, entry in enumerate(batch.runs):
+        with open(entry.config, "r", encoding="utf-8") as f:
+            config = RunConfig(**(yaml.safe_load(f) or {}))
+        extra_args = list(entry.extra_args)
+        run_id = config.run_id
+        if not run_id:
+            run_id = os.path.basename(os.path.dirname(os.path.abspath(entry.config)))
+            extra_args += ["--run-id", run_id]
+        recipe_output_dir = None
+        if os.path.exists(config.recipe):
+            with open(config.recipe, "r", encoding="utf-8") as f:
+                recipe_output_dir = (yaml.safe_load(f) or {}).get("output_dir")
+        run_dir = resolve_run_dir(run_id, config.output_dir, recipe_output_dir)
+        estimate, source = forecast_run_seconds(config, model), "forecast"
+        if estimate is None:
+            estimate, source = estimate_run_seconds(run_dir, config.recipe, history), "history"
+        runs.append({
+            "index": idx,
+            "run_id": run_id,
+            "config": entry.config,
+            "recipe": config.recipe,
+            "run_dir": run_dir,
+            "priority": entry.priority,
+            "estimate_seconds": estimate,
+            "estimate_source": source if estimate is not None else None,
+            "extra_args": extra_args,
+        })
+    # Unknown estimates go first: a book never run before may well be the longest.
+    runs.sort(key=lambda r: (-r["priority"], -(r["estimate_seconds"] if r["estimate_seconds"] is not None else float("inf")), r["index"]))
+    return runs
+
+
+def batch_env(batch: BatchConfig, out_dir: str, base_env: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    env = dict(os.environ if base_env is None else base_env)
+    limits = {name: limit.model_dump(exclude_none=True) for name, limit in batch.provider_limits.items()}
+    if limits:
+        env[provider_quota.LIMITS_ENV] = json.dumps(limits)
+        env[provider_quota.QUOTA_DIR_ENV] = os.path.join(out_dir, "provider_quota")
+    if batch.response_cache and batch.response_cache.lower() != "off":
+        env[llm_cache.CACHE_DIR_ENV] = batch.response_cache
+    return env
+
+
+def summarize_run(run: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-run report row: scheduling facts plus LLM totals from the run's instrumentation.json."""
+    llm = {"calls": 0, "cached_calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0}
+    per_provider: Dict[str, Dict[str, Any]] = {}
+    instr = cost_model.load_instrumentation(run["run_dir"]) or {}
+    stages = instr.get("stages") or []
+    for stage in stages:
+        for call in stage.get("llm_calls") or []:
+            provider = call.get("provider") or "unknown"
+            pp = per_provider.setdefault(provider, {"calls": 0, "cached_calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            for agg in (llm, pp):
+                agg["calls"] += 1
+                agg["cached_calls"] += 1 if call.get("cached") else 0
+                agg["prompt_tokens"] += int(call.get("prompt_tokens") or 0)
+                agg["completion_tokens"] += int(call.get("completion_tokens") or 0)
+    llm["cost"] = round(float((instr.get("totals") or {}).get("cost") or 0.0), 6)
+    return {
+        "run_id": run["run_id"],
+        "config": run["config"],
+        "run_dir": run["run_dir"],
+        "priority": run["priority"],
+        "estimate_seconds": run["estimate_seconds"],
+        "estimate_source": run.get("estimate_source"),
+        "status": run.get("status"),
+        "returncode": run.get("returncode"),
+        "started_at": run.get("started_at"),
+        "ended_at": run.get("ended_at"),
+        "wall_seconds": run.get("wall_seconds"),
+        "stages_done": sum(1 for s in stages if s.get("status") == "done"),
+        "llm": llm,
+        "per_provider": per_provider,
+        "log": run.get("log"),
+    }
+
+
+def build_report(batch: BatchConfig, runs: List[Dict[str, Any]], started_at: str, wall_seconds: float) -> Dict[str, Any]:
+    rows = [summarize_run(r) for r in runs]
+    totals = {"calls": 0, "cached_calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0}
+    per_provider: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        for key in totals:
+            totals[key] += row["llm"][key]
+        for provider, stats in row["per_provider"].items():
+            agg = per_provider.setdefault(provider, {k: 0 for k in stats})
+            for key, value in stats.items():
+                agg[key] += value
+    totals["cost"] = round(totals["cost"], 6)
+    done = [r for r in rows if r["status"] == "done"]
+    run_seconds = sum(r["wall_seconds"] or 0.0 for r in rows)
+    return {
+        "schema_version": "batch_report_v1",
+        "batch": batch.name,
+        "started_at": started_at,
+        "ended_at": _utc(),
+        "wall_seconds": round(wall_seconds, 3),
+        "max_parallel_runs": batch.max_parallel_runs,
+        "provider_limits": {k: v.model_dump(exclude_none=True) for k, v in batch.provider_limits.items()},
+        "response_cache": batch.response_cache,
+        "runs_done": len(done),
+        "runs_failed": sum(1 for r in rows if r["status"] == "failed"),
+        "runs_per_hour": round(len(done) * 3600.0 / wall_seconds, 3) if wall_seconds > 0 else None,
+        "run_seconds_total": round(run_seconds, 3),
+        "concurrency_achieved": round(run_seconds / wall_seconds, 3) if wall_seconds > 0 else None,
+        "llm_totals": totals,
+        "cache_hit_rate": round(totals["cached_calls"] / totals["calls"], 4) if totals["calls"] else None,
+        "per_provider": per_provider,
+        "runs": rows,
+    }
+
+
+def render_report_md(report: Dict[str, Any]) -> str:
+    totals = report["llm_totals"]
+    lines = [f"# Batch Report — {report['batch']}", ""]
+    lines.append(f"- Started: {report['started_at']}")
+    lines.append(f"- Ended: {report['ended_at']}")
+    lines.append(f"- Wall time: {report['wall_seconds']} seconds ({report['max_parallel_runs']} runs in parallel)")
+    lines.append(f"- Runs: {report['runs_done']} done, {report['runs_failed']} failed; {report['runs_per_hour']} runs/hour")
+    lines.append(f"- LLM calls: {totals['calls']} ({totals['cached_calls']} from cache)")
+    lines.append(f"- Total cost: {totals['cost']:.6f}")
+    lines.append("")
+    lines.append("## Runs")
+    lines.append("| run | status | priority | estimate_s | wall_s | calls | cached | cost |")
+    lines.append("|---|---|---:|---:|---:|---:|---:|---:|")
+    for row in report["runs"]:
+        est = row["estimate_seconds"]
+        lines.append(
+            f"| {row['run_id']} | {row['status']} | {row['priority']} | {'' if est is None else f'{est:.0f}'} | "
+            f"{row['wall_seconds'] or 0:.1f} | {row['llm']['calls']} | {row['llm']['cached_calls']} | {row['llm']['cost']:.6f} |"
+        )
+    if report["per_provider"]:
+        lines.append("")
+        lines.append("## Per-provider usage")
+        lines.append("| provider | calls | cached | prompt_tokens | completion_tokens |")
+        lines.append("|---|---:|---:|---:|---:|")
+        for provider, stats in report["per_provider"].items():
+            lines.append(f"| {provider} | {stats['calls']} | {stats['cached_calls']} | {stats['prompt_tokens']} | {stats['completion_tokens']} |")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def write_report(report: Dict[str, Any], out_dir: str) -> str:
+    path = os.path.join(out_dir, BATCH_REPORT_JSON)
+    save_json(path, report)
+    with open(os.path.join(out_dir, BATCH_REPORT_MD), "w", encoding="utf-8") as f:
+        f.write(render_report_md(report))
+    return path
+
+
+def driver_command(run: Dict[str, Any]) -> List[str]:
+    return [sys.executable, "driver.py", "--config", run["config"], "--instrument", *run["extra_args"]]
+
+
+def run_batch(batch: BatchConfig, runs: Optional[List[Dict[str, Any]]] = None,
+              base_env: Optional[Dict[str, str]] = None, poll_seconds: float = POLL_SECONDS) -> Dict[str, Any]:
+    """Execute the batch; returns the report (also written under the batch directory)."""
+    out_dir = batch_dir(batch)
+    log_dir = os.path.join(out_dir, "logs")
+    ensure_dir(log_dir)
+    runs = plan_batch(batch) if runs is None else runs
+    env = batch_env(batch, out_dir, base_env)
+    started_at = _utc()
+    wall_start = time.perf_counter()
+    queue = list(runs)
+    running: Dict[int, Dict[str, Any]] = {}
+
+    while queue or running:
+        while queue and len(running) < batch.max_parallel_runs:
+            run = queue.pop(0)
+            run["log"] = os.path.join(log_dir, f"{run['run_id']}.log")
+            run["started_at"] = _utc()
+            log_file = open(run["log"], "w", encoding="utf-8")
+            proc = subprocess.Popen(driver_command(run), stdout=log_file, stderr=subprocess.STDOUT, env=env)
+            running[run["index"]] = {"run": run, "proc": proc, "log_file": log_file, "start": time.perf_counter()}
+            print(f"[batch] started {run['run_id']} (priority {run['priority']}, estimate {run['estimate_seconds']})")
+        time.sleep(poll_seconds)
+        for idx, slot in list(running.items()):
+            rc = slot["proc"].poll()
+            if rc is None:
+                continue
+            del running[idx]
+            slot["log_file"].close()
+            run = slot["run"]
+            run["returncode"] = rc
+            run["status"] = "done" if rc == 0 else "failed"
+            run["ended_at"] = _utc()
+            run["wall_seconds"] = round(time.perf_counter() - slot["start"], 3)
+            print(f"[batch] {run['status']} {run['run_id']} in {run['wall_seconds']:.0f}s (rc={rc})")
+            write_report(build_report(batch, runs, started_at, time.perf_counter() - wall_start), out_dir)
+
+    report = build_report(batch, runs, started_at, time.perf_counter() - wall_start)
+    write_report(report, out_dir)
+    return report
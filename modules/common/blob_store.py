@@ -0,0 +1,281 @@
+"""
+Content-addressed blob store shared by all runs under an output root.
+
+Layout:
+    output/blobs/<aa>/<sha256>   immutable, read-only blob files
+    output/blobs/index.jsonl     append-only references: {digest, run_id, path}
+
+Run files are materialized from blobs by reflink (copy-on-write clone), then hardlink, then
+plain copy, so identical page rasters and key artifacts across runs of the same book share
+storage. Because hardlinked run files share an inode with their blob, the driver detaches
+(re-copies) a stage's module folder before re-running it; modules may then rewrite files in
+place without touching the store.
+"""
+import hashlib
+import os
+import shutil
+import stat
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+from modules.common.run_registry import latest_run_assessment, registry_paths, rel_to_output_root
+from modules.common.utils import append_jsonl, read_jsonl, save_jsonl
+
+BLOBS_DIRNAME = "blobs"
+BLOB_INDEX_FILENAME = "index.jsonl"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".webp", ".bmp", ".gif")
+_FICLONE = 0x40049409  # linux/fs.h
+_CHUNK = 1 << 20
+
+
+def blob_root(output_root: str) -> str:
+    return os.path.join(output_root, BLOBS_DIRNAME)
+
+
+def blob_index_path(output_root: str) -> str:
+    return os.path.join(blob_root(output_root), BLOB_INDEX_FILENAME)
+
+
+def blob_path(output_root: str, digest: str) -> str:
+    return os.path.join(blob_root(output_root), digest[:2], digest)
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _try_reflink(src: str, dst: str) -> bool:
+    try:
+        import fcntl
+    except ImportError:  # pragma: no cover - not on Windows
+        return False
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        return True
+    except (OSError, AttributeError):
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        return False
+
+
+def _materialize(src: str, dst: str, mode: str = "auto") -> str:
+    """
+    Atomically create `dst` with the content of `src`. Returns the method used:
+    'reflink', 'hardlink' or 'copy'.
+    """
+    dst_dir = os.path.dirname(os.path.abspath(dst))
+    os.makedirs(dst_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".blob-", dir=dst_dir)
+    os.close(fd)
+    os.remove(tmp)
+    method = "copy"
+    try:
+        if mode in ("auto", "reflink") and _try_reflink(src, tmp):
+            method = "reflink"
+            os.chmod(tmp, stat.S_IMODE(os.stat(src).st_mode) | stat.S_IWUSR)
+        elif mode in ("auto", "hardlink"):
+            try:
+                os.link(src, tmp)
+                method = "hardlink"
+            except OSError:
+                shutil.copy2(src, tmp)
+                os.chmod(tmp, stat.S_IMODE(os.stat(tmp).st_mode) | stat.S_IWUSR)
+        else:
+            shutil.copy2(src, tmp)
+            os.chmod(tmp, stat.S_IMODE(os.stat(tmp).st_mode) | stat.S_IWUSR)
+        os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return method
+
+
+def _put(path: str, output_root: str):
+    digest = file_digest(path)
+    target = blob_path(output_root, digest)
+    if os.path.exists(target):
+        return digest, False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    _materialize(path, target, mode="copy")
+    os.chmod(target, 0o444)
+    return digest, True
+
+
+def put(path: str, output_root: str) -> str:
+    """Add a file's content to the store (no-op if already present). Returns its digest."""
+    return _put(path, output_root)[0]
+
+
+def _record_ref(output_root: str, digest: str, path: str, run_id: Optional[str]) -> None:
+    append_jsonl(blob_index_path(output_root), {
+        "digest": digest,
+        "run_id": run_id,
+        "path": rel_to_output_root(path, output_root) or path,
+    })
+
+
+def dedupe_file(path: str, output_root: str, run_id: Optional[str] = None, mode: str = "auto") -> Dict[str, Any]:
+    """
+    Store `path` and replace it in place with a link/clone of its blob. `saved_bytes` counts
+    only content that was already in the store (i.e. a duplicate that now shares storage).
+    """
+    digest, created = _put(path, output_root)
+    target = blob_path(output_root, digest)
+    if _same_inode(path, target):
+        return {"digest": digest, "method": "hardlink", "path": path, "saved_bytes": 0}
+    size = os.path.getsize(path)
+    method = _materialize(target, path, mode=mode)
+    _record_ref(output_root, digest, path, run_id)
+    saved = size if (method != "copy" and not created) else 0
+    return {"digest": digest, "method": method, "path": path, "saved_bytes": saved}
+
+
+def link_into(src: str, dst: str, output_root: str, run_id: Optional[str] = None, mode: str = "auto") -> Dict[str, Any]:
+    """Materialize `dst` as a blob-backed copy of `src` (replaces shutil.copy2 for run artifacts)."""
+    digest = put(src, output_root)
+    method = _materialize(blob_path(output_root, digest), dst, mode=mode)
+    _record_ref(output_root, digest, dst, run_id)
+    return {"digest": digest, "method": method, "path": dst}
+
+
+def _same_inode(a: str, b: str) -> bool:
+    try:
+        sa, sb = os.stat(a), os.stat(b)
+    except OSError:
+        return False
+    return (sa.st_dev, sa.st_ino) == (sb.st_dev, sb.st_ino)
+
+
+def iter_tree(root: str, extensions: Sequence[str] = IMAGE_EXTENSIONS) -> Iterable[str]:
+    exts = tuple(e.lower() for e in extensions)
+    for dirpath, _dirs, files in os.walk(root):
+        for name in sorted(files):
+            if name.startswith(".blob-"):
+                continue
+            if name.lower().endswith(exts):
+                yield os.path.join(dirpath, name)
+
+
+def dedupe_tree(root: str, output_root: str, run_id: Optional[str] = None,
+                extensions: Sequence[str] = IMAGE_EXTENSIONS, mode: str = "auto") -> Dict[str, Any]:
+    """Ingest every matching file under `root` (default: page rasters and crops)."""
+    summary = {"files": 0, "saved_bytes": 0, "methods": {}}
+    if not os.path.isdir(root):
+        return summary
+    for path in iter_tree(root, extensions):
+        result = dedupe_file(path, output_root, run_id=run_id, mode=mode)
+        summary["files"] += 1
+        summary["saved_bytes"] += result["saved_bytes"]
+        summary["methods"][result["method"]] = summary["methods"].get(result["method"], 0) + 1
+    return summary
+
+
+def detach_tree(root: str) -> int:
+    """
+    Replace hardlinked files under `root` with private writable copies so a stage rerun can
+    rewrite them in place without mutating shared blobs. Returns number of files detached.
+    """
+    detached = 0
+    if not os.path.isdir(root):
+        return detached
+    for dirpath, _dirs, files in os.walk(root):
+        for name in files:
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.lstat(path)
+            except OSError:
+                continue
+            if not stat.S_ISREG(st.st_mode) or st.st_nlink < 2:
+                continue
+            _materialize(path, path, mode="copy")
+            detached += 1
+    return detached
+
+
+def _protected_run_ids(output_root: str, run_ids: Set[str]) -> Set[str]:
+    """Runs whose latest assessment (any scope) is known_good pin their blobs."""
+    if not os.path.exists(registry_paths(output_root)["assessments"]):
+        return set()
+    protected = set()
+    for run_id in run_ids:
+        entry = latest_run_assessment(output_root, run_id)
+        if entry and entry.get("status") == "known_good":
+            protected.add(run_id)
+    return protected
+
+
+def gc(output_root: str, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Delete blobs that no surviving run file references.
+
+    A reference is live when its run file still exists with the blob's content (same inode for
+    hardlinks, same size otherwise), or when its run's latest assessment is `known_good` —
+    known-good runs keep their blobs even if run folders were pruned, so they can be restored.
+    Dead index entries are compacted away.
+    """
+    root = blob_root(output_root)
+    index_path = blob_index_path(output_root)
+    refs: List[Dict[str, Any]] = list(read_jsonl(index_path)) if os.path.exists(index_path) else []
+    protected = _protected_run_ids(output_root, {r.get("run_id") for r in refs if r.get("run_id")})
+
+    live_refs: List[Dict[str, Any]] = []
+    live_digests: Set[str] = set()
+    for ref in refs:
+        digest = ref.get("digest")
+        if not digest:
+            continue
+        target = blob_path(output_root, digest)
+        run_file = ref.get("path") or ""
+        run_file = run_file if os.path.isabs(run_file) else os.path.join(output_root, run_file)
+        alive = False
+        if os.path.exists(run_file) and os.path.exists(target):
+            alive = _same_inode(run_file, target) or os.path.getsize(run_file) == os.path.getsize(target)
+        if alive or ref.get("run_id") in protected:
+            live_refs.append(ref)
+            live_digests.add(digest)
+
+    removed: List[str] = []
+    freed = 0
+    kept = 0
+    if os.path.isdir(root):
+        for dirpath, _dirs, files in os.walk(root):
+            for name in files:
+                if name == BLOB_INDEX_FILENAME or dirpath == root:
+                    continue
+                if name in live_digests:
+                    kept += 1
+                    continue
+                path = os.path.join(dirpath, name)
+                freed += os.path.getsize(path)
+                removed.append(name)
+                if not dry_run:
+                    os.chmod(path, 0o644)
+                    os.remove(path)
+
+    if not dry_run and os.path.exists(index_path):
+        # Keep one entry per (digest, path) so the index does not grow without bound.
+        seen = set()
+        compacted = []
+        for ref in live_refs:
+            key = (ref.get("digest"), ref.get("path"))
+            if key in seen:
+                continue
+            seen.add(key)
+            compacted.append(ref)
+        save_jsonl(index_path, compacted)
+
+    return {
+        "output_root": output_root,
+        "dry_run": dry_run,
+        "blobs_kept": kept,
+        "blobs_removed": len(removed),
+        "bytes_freed": freed,
+        "protected_runs": sorted(protected),
+    }
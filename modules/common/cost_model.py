@@ -0,0 +1,218 @@
+"""
+Per-module cost model built from past `instrumentation.json` files.
+
+For every finished stage of a past run, wall seconds, LLM calls and cost are divided by the
+run's page count (`units.pages`, recorded by the driver; older runs fall back to the row count
+of their first page-level artifact). A module's rate is the median over its samples, so one
+slow or failed-and-retried run does not skew it. Section-level stages are normalized by pages
+too: section counts are not known before a run, and within a recipe they scale with pages.
+
+`forecast_run` applies the rates to a plan and the page count of the new input. It returns
+per-stage predictions, totals, and the critical path: the chain of dependent stages with the
+largest predicted wall time. Stages with no history are listed under `unmodeled` and add nothing
+to the totals.
+"""
+from __future__ import annotations
+
+import glob
+import json
+import os
+import statistics
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp")
+METRICS = ("wall_seconds", "calls", "cost")
+
+
+def load_instrumentation(run_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(run_dir, "instrumentation.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_history(runs_root: str, exclude_run_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """instrumentation.json of every run under `runs_root` (optionally skipping one run dir)."""
+    skip = os.path.abspath(exclude_run_dir) if exclude_run_dir else None
+    history = []
+    for path in sorted(glob.glob(os.path.join(runs_root, "*", "instrumentation.json"))):
+        run_dir = os.path.dirname(path)
+        if skip and os.path.abspath(run_dir) == skip:
+            continue
+        data = load_instrumentation(run_dir)
+        if data:
+            data.setdefault("run_dir", run_dir)
+            history.append(data)
+    return history
+
+
+def _count_pages(path: str) -> Optional[int]:
+    pages = set()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                pages.add(row.get("page_number", row.get("page")))
+    except (OSError, ValueError):
+        return None
+    pages.discard(None)
+    return len(pages) or None
+
+
+def run_page_count(instr: Dict[str, Any]) -> Optional[int]:
+    pages = (instr.get("units") or {}).get("pages")
+    if pages:
+        return int(pages)
+    for stage in instr.get("stages") or []:
+        schema = stage.get("schema_version_output") or ""
+        artifact = stage.get("artifact") or ""
+        if schema.startswith("page_") and artifact.endswith(".jsonl"):
+            return _count_pages(artifact)
+    return None
+
+
+def build_cost_model(history: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """{module_id: {"samples", "wall_seconds_per_page", "calls_per_page", "cost_per_page"}}"""
+    rates: Dict[str, Dict[str, List[float]]] = {}
+    for instr in history:
+        pages = run_page_count(instr)
+        if not pages:
+            continue
+        for stage in instr.get("stages") or []:
+            module_id = stage.get("module_id")
+            if stage.get("status") != "done" or not module_id or stage.get("wall_seconds") is None:
+                continue
+            totals = stage.get("llm_totals") or {}
+            sample = rates.setdefault(module_id, {m: [] for m in METRICS})
+            sample["wall_seconds"].append(float(stage["wall_seconds"]) / pages)
+            sample["calls"].append(float(totals.get("calls") or 0) / pages)
+            sample["cost"].append(float(totals.get("cost") or 0.0) / pages)
+    model = {}
+    for module_id, sample in rates.items():
+        entry: Dict[str, Any] = {"samples": len(sample["wall_seconds"])}
+        for metric in METRICS:
+            entry[f"{metric}_per_page"] = statistics.median(sample[metric])
+        model[module_id] = entry
+    return model
+
+
+def count_input_pages(input_conf: Dict[str, Any]) -> Optional[int]:
+    """Page count of a recipe input: PDF pages, image files, or text files."""
+    pdf = input_conf.get("pdf")
+    if pdf and os.path.exists(pdf):
+        try:
+            from modules.common.pdf_session import PdfSession
+
+            with PdfSession(pdf) as session:
+                return session.page_count
+        except Exception:
+            return None
+    images = input_conf.get("images")
+    if images and os.path.isdir(images):
+        return sum(1 for name in os.listdir(images) if name.lower().endswith(IMAGE_EXTS)) or None
+    text_glob = input_conf.get("text_glob")
+    if text_glob:
+        return len(glob.glob(text_glob)) or None
+    return None
+
+
+def critical_path(plan: Dict[str, Any], seconds: Dict[str, float],
+                  stage_ids: Optional[Iterable[str]] = None) -> Tuple[List[str], float]:
+    """Longest chain of dependent stages by predicted seconds (stages outside `stage_ids` count 0)."""
+    include = set(plan["topo"] if stage_ids is None else stage_ids)
+    best: Dict[str, Tuple[float, Optional[str]]] = {}
+    for sid in plan["topo"]:
+        own = seconds.get(sid, 0.0) if sid in include else 0.0
+        prev = max(((best[d][0], d) for d in plan["nodes"][sid]["needs"] if d in best), default=(0.0, None))
+        best[sid] = (prev[0] + own, prev[1])
+    if not best:
+        return [], 0.0
+    end = max(best, key=lambda sid: best[sid][0])
+    length = best[end][0]
+    path = []
+    node: Optional[str] = end
+    while node is not None:
+        if node in include:
+            path.append(node)
+        node = best[node][1]
+    return list(reversed(path)), round(length, 3)
+
+
+def forecast_plan(plan: Dict[str, Any], model: Dict[str, Dict[str, Any]], pages: Optional[int],
+                  stage_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    stage_ids = list(plan["topo"] if stage_ids is None else stage_ids)
+    stages: Dict[str, Dict[str, Any]] = {}
+    unmodeled = []
+    for sid in stage_ids:
+        rates = model.get(plan["nodes"][sid]["module"])
+        if not rates or not pages:
+            unmodeled.append(sid)
+            continue
+        stages[sid] = {
+            "wall_seconds": round(rates["wall_seconds_per_page"] * pages, 3),
+            "calls": round(rates["calls_per_page"] * pages, 1),
+            "cost": round(rates["cost_per_page"] * pages, 6),
+            "samples": rates["samples"],
+        }
+    path, path_seconds = critical_path(plan, {sid: s["wall_seconds"] for sid, s in stages.items()}, stage_ids)
+    return {
+        "schema_version": "run_forecast_v1",
+        "pages": pages,
+        "stages": stages,
+        "totals": {metric: round(sum(s[metric] for s in stages.values()), 6) for metric in METRICS},
+        "critical_path": path,
+        "critical_path_seconds": path_seconds,
+        "unmodeled": unmodeled,
+    }
+
+
+def forecast_run(plan: Dict[str, Any], input_conf: Dict[str, Any], runs_root: str,
+                 exclude_run_dir: Optional[str] = None, stage_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    history = load_history(runs_root, exclude_run_dir=exclude_run_dir)
+    forecast = forecast_plan(plan, build_cost_model(history), count_input_pages(input_conf), stage_ids)
+    forecast["history_runs"] = len(history)
+    return forecast
+
+
+def forecast_error(predicted: Optional[Dict[str, Any]], actual: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Actual minus predicted for each metric, plus relative wall-time error."""
+    if not predicted:
+        return None
+    error = {metric: round(float(actual.get(metric) or 0) - float(predicted.get(metric) or 0), 6) for metric in METRICS}
+    if predicted.get("wall_seconds"):
+        error["wall_seconds_pct"] = round(100.0 * error["wall_seconds"] / predicted["wall_seconds"], 1)
+    return error
+
+
+def run_forecast_error(forecast: Optional[Dict[str, Any]], stages: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """forecast_error() summed over the stages that had a prediction and completed this run."""
+    predictions = (forecast or {}).get("stages") or {}
+    ran = [st for st in stages if st.get("status") == "done" and st.get("id") in predictions]
+    if not ran:
+        return None
+    predicted = {m: sum(predictions[st["id"]][m] for st in ran) for m in METRICS}
+    actual = {
+        "wall_seconds": sum(st.get("wall_seconds") or 0 for st in ran),
+        "calls": sum((st.get("llm_totals") or {}).get("calls", 0) for st in ran),
+        "cost": sum((st.get("llm_totals") or {}).get("cost", 0.0) for st in ran),
+    }
+    return forecast_error(predicted, actual)
+
+
+def render_forecast(forecast: Dict[str, Any]) -> str:
+    totals = forecast["totals"]
+    lines = [
+        f"[forecast] {forecast['pages'] or 'unknown'} pages, history from {forecast.get('history_runs', 0)} runs: "
+        f"~{totals['wall_seconds']:.0f}s stage time, ~{totals['calls']:.0f} LLM calls, ~{totals['cost']:.4f} cost",
+    ]
+    if forecast["critical_path"]:
+        lines.append(f"[forecast] critical path ({forecast['critical_path_seconds']:.0f}s): {' -> '.join(forecast['critical_path'])}")
+    for sid, stage in forecast["stages"].items():
+        lines.append(f"[forecast]   {sid}: {stage['wall_seconds']:.1f}s, {stage['calls']:.0f} calls, {stage['cost']:.4f} "
+                     f"({stage['samples']} samples)")
+    if forecast["unmodeled"]:
+        lines.append(f"[forecast] no history for: {', '.join(forecast['unmodeled'])}")
+    return "\n".join(lines)
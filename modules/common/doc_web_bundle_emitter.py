@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from html import escape as html_escape
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from bs4 import BeautifulSoup
 
@@ -162,6 +166,13 @@ _SIGNIFICANT_TAGS = {
     "blockquote",
 }
 _WHITESPACE_RE = re.compile(r"\s+")
+_SOURCE_BLOCK_IDS_RE = re.compile(r"""data-source-block-ids\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""")
+_INPUT_HASH_META = "doc-web-input-hash"
+_INPUT_HASH_RE = re.compile(r'<meta name="doc-web-input-hash" content="([0-9a-f]+)">')
+# Bump when the HTML or provenance emitted for the same inputs changes, so entry files
+# written by an older emitter are rebuilt instead of reused.
+_EMITTER_VERSION = 1
+_RUN_FIELDS = ("schema_version", "module_id", "run_id", "created_at")
 _TOKEN_RE = re.compile(r"[a-z0-9]+")
 
 
@@ -198,15 +209,16 @@ def _related_text(a: str, b: str) -> bool:
 
 
 def html5_wrap(body_html: str, title: str, nav_html_top: str = "",
-               nav_html_bottom: str = "") -> str:
+               nav_html_bottom: str = "", input_hash: Optional[str] = None) -> str:
     """Wrap body content in a proper HTML5 document."""
     title_esc = html_escape(title)
+    hash_meta = f'<meta name="{_INPUT_HASH_META}" content="{input_hash}">\n' if input_hash else ""
     return f"""<!DOCTYPE html>
 <html lang="en">
 <head>
 <meta charset="utf-8">
 <meta name="viewport" content="width=device-width, initial-scale=1">
-<title>{title_esc}</title>
+{hash_meta}<title>{title_esc}</title>
 <style>
 {_CSS}
 </style>
@@ -387,6 +399,152 @@ def _slugify_identifier(text: str) -> str:
     return slug or "book"
 
 
+def _write_atomic(path: Path, write: Callable[[str], None]) -> None:
+    """Write through a temp file in the same directory, then rename it over `path`."""
+    tmp = path.with_name(f".tmp-{os.getpid()}-{path.name}")
+    try:
+        write(str(tmp))
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def _write_text_atomic(path: Path, text: str) -> None:
+    _write_atomic(path, lambda tmp: Path(tmp).write_text(text, encoding="utf-8"))
+
+
+def _referenced_source_blocks(
+    body_html: str, source_block_index: Dict[str, Dict[str, Any]]
+) -> Dict[str, Dict[str, Any]]:
+    """The slice of `source_block_index` an entry's body refers to."""
+    referenced: Dict[str, Dict[str, Any]] = {}
+    for match in _SOURCE_BLOCK_IDS_RE.finditer(body_html or ""):
+        for block_id in next(group for group in match.groups() if group is not None).split():
+            if block_id in source_block_index:
+                referenced[block_id] = source_block_index[block_id]
+    return referenced
+
+
+def _input_hash(job: Dict[str, Any], module_id: str) -> str:
+    """sha256 over everything that determines an entry's HTML file and provenance blocks."""
+    payload = {
+        "emitter_version": _EMITTER_VERSION,
+        "module_id": module_id,
+        **{key: job[key] for key in ("filename", "body_html", "page_title", "nav_top", "nav_bottom", "source_blocks")},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _file_input_hash(path: Path) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            head = f.read(1024)
+    except (OSError, UnicodeDecodeError):
+        return None
+    match = _INPUT_HASH_RE.search(head)
+    return match.group(1) if match else None
+
+
+def _previous_bundle(
+    html_dir: Path,
+) -> Tuple[Dict[str, Tuple[str, int]], Dict[str, List[Dict[str, Any]]]]:
+    """
+    (input hash, block count) and provenance blocks per entry from the bundle already in
+    `html_dir`. Unreadable provenance lines are dropped; the block counts catch the gap.
+    """
+    try:
+        with open(html_dir / "manifest.json", "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        hashes = {
+            entry["entry_id"]: (entry["input_hash"], entry["block_count"])
+            for entry in manifest.get("entries") or []
+            if entry.get("input_hash") and isinstance(entry.get("block_count"), int)
+        }
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return {}, {}
+    blocks: Dict[str, List[Dict[str, Any]]] = {}
+    provenance_path = html_dir / "provenance" / "blocks.jsonl"
+    if hashes and provenance_path.exists():
+        with open(provenance_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(row, dict):
+                    blocks.setdefault(row.get("entry_id"), []).append(
+                        {key: value for key, value in row.items() if key not in _RUN_FIELDS}
+                    )
+    return hashes, blocks
+
+
+def _emit_entry(job: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Render one entry and write its HTML file; returns its provenance blocks without the
+    per-run fields. Runs in a worker process, so it only sees the job dict.
+    """
+    body_soup = BeautifulSoup(job["body_html"] or "", "html.parser")
+    entry_id = job["entry_id"]
+    source_blocks = job["source_blocks"]
+    blocks: List[Dict[str, Any]] = []
+
+    for ordinal, tag in enumerate(_iter_bundle_blocks(body_soup), start=1):
+        source_block_ids = get_source_block_ids(tag)
+        if not source_block_ids:
+            raise ValueError(
+                f"missing source block ids on emitted block {ordinal} in {job['filename']}"
+            )
+        unresolved_ids = [block_id for block_id in source_block_ids if block_id not in source_blocks]
+        if unresolved_ids:
+            raise ValueError(
+                f"unresolved source block ids {unresolved_ids} in {job['filename']}"
+            )
+
+        primary_source = source_blocks[source_block_ids[0]]
+        block_id = f"blk-{entry_id}-{ordinal:04d}"
+        tag["id"] = block_id
+        if _SOURCE_BLOCK_IDS_ATTR in tag.attrs:
+            del tag.attrs[_SOURCE_BLOCK_IDS_ATTR]
+
+        block_kind = _block_kind_for_tag(tag)
+        text_quote = _normalize_ws(tag.get_text(" ", strip=True)) or None
+        blocks.append({
+            "block_id": block_id,
+            "entry_id": entry_id,
+            "block_kind": block_kind,
+            "source_page_number": primary_source["source_page_number"],
+            "source_element_ids": source_block_ids,
+            "source_printed_page_number": primary_source.get("source_printed_page_number"),
+            "source_printed_page_label": (
+                str(primary_source["source_printed_page_number"])
+                if primary_source.get("source_printed_page_number") is not None
+                else None
+            ),
+            "text_quote": text_quote if block_kind in {"paragraph", "heading", "list_item"} else None,
+        })
+
+    full_html = html5_wrap(
+        body_soup.decode_contents(), job["page_title"], job["nav_top"], job["nav_bottom"], job["input_hash"]
+    )
+    # Atomic, because a torn file would still carry a valid input hash in its <head>.
+    _write_text_atomic(Path(job["file_path"]), full_html)
+    return blocks
+
+
+def _run_jobs(jobs: List[Dict[str, Any]], workers: int) -> Iterator[List[Dict[str, Any]]]:
+    """Results in job order; entries are emitted in a process pool when workers != 1."""
+    if workers <= 0:
+        workers = min(os.cpu_count() or 1, 8)
+    workers = min(workers, len(jobs))
+    if workers <= 1:
+        for job in jobs:
+            yield _emit_entry(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_emit_entry, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+
+
 def emit_doc_web_bundle(
     *,
     html_dir: Path,
@@ -400,73 +558,50 @@ def emit_doc_web_bundle(
     images_subdir: Optional[str],
     run_id: Optional[str],
     module_id: str,
+    workers: int = 0,
 ) -> List[Dict[str, Any]]:
+    """
+    Write the bundle's entry files, index, provenance sidecar and manifests.
+
+    Each entry file carries a sha256 of its inputs in a `doc-web-input-hash` meta tag,
+    also recorded per entry in manifest.json with the entry's provenance block count. An
+    entry whose hash matches both the previous manifest and its file on disk, and whose
+    previous provenance blocks are all still there, is not rewritten and keeps them. The
+    remaining entries are rendered in a process pool (`workers`: 0 = auto, 1 =
+    in-process); results are collected in entry order, so the output does not depend on
+    the worker count. The manifests and the provenance sidecar are replaced atomically,
+    manifest.json last.
+    """
     ensure_dir(str(html_dir))
     ensure_dir(str(html_dir / "provenance"))
 
     manifest_rows: List[Dict[str, Any]] = []
     doc_web_entries: List[Dict[str, Any]] = []
-    provenance_rows: List[Dict[str, Any]] = []
     created_at = _utc()
     document_id = _slugify_identifier(book_title or run_id or "book")
+    previous_hashes, previous_blocks = _previous_bundle(html_dir)
 
+    jobs: List[Dict[str, Any]] = []
     for index, entry in enumerate(entries):
         prev_entry = entries[index - 1] if index > 0 else None
         next_entry = entries[index + 1] if index + 1 < len(entries) else None
-
-        body_soup = BeautifulSoup(entry["body_html"] or "", "html.parser")
-        entry_id = Path(entry["filename"]).stem
-
-        for ordinal, tag in enumerate(_iter_bundle_blocks(body_soup), start=1):
-            source_block_ids = get_source_block_ids(tag)
-            if not source_block_ids:
-                raise ValueError(
-                    f"missing source block ids on emitted block {ordinal} in {entry['filename']}"
-                )
-            unresolved_ids = [block_id for block_id in source_block_ids if block_id not in source_block_index]
-            if unresolved_ids:
-                raise ValueError(
-                    f"unresolved source block ids {unresolved_ids} in {entry['filename']}"
-                )
-
-            primary_source = source_block_index[source_block_ids[0]]
-            block_id = f"blk-{entry_id}-{ordinal:04d}"
-            tag["id"] = block_id
-            if _SOURCE_BLOCK_IDS_ATTR in tag.attrs:
-                del tag.attrs[_SOURCE_BLOCK_IDS_ATTR]
-
-            block_kind = _block_kind_for_tag(tag)
-            text_quote = _normalize_ws(tag.get_text(" ", strip=True)) or None
-            provenance_rows.append({
-                "schema_version": "doc_web_provenance_block_v1",
-                "module_id": module_id,
-                "run_id": run_id,
-                "created_at": created_at,
-                "block_id": block_id,
-                "entry_id": entry_id,
-                "block_kind": block_kind,
-                "source_page_number": primary_source["source_page_number"],
-                "source_element_ids": source_block_ids,
-                "source_printed_page_number": primary_source.get("source_printed_page_number"),
-                "source_printed_page_label": (
-                    str(primary_source["source_printed_page_number"])
-                    if primary_source.get("source_printed_page_number") is not None
-                    else None
-                ),
-                "text_quote": text_quote if block_kind in {"paragraph", "heading", "list_item"} else None,
-            })
-
         prev_file = prev_entry["filename"] if prev_entry else None
         prev_title = prev_entry["title"] if prev_entry else None
         next_file = next_entry["filename"] if next_entry else None
         next_title = next_entry["title"] if next_entry else None
 
-        nav_top = build_nav(prev_file, prev_title, next_file, next_title)
-        nav_bottom = build_nav(prev_file, prev_title, next_file, next_title, is_bottom=True)
-        page_title = f"{entry['title']} — {book_title}" if book_title else entry["title"]
-        full_html = html5_wrap(body_soup.decode_contents(), page_title, nav_top, nav_bottom)
-        file_path = html_dir / entry["filename"]
-        file_path.write_text(full_html, encoding="utf-8")
+        job = {
+            "filename": entry["filename"],
+            "entry_id": Path(entry["filename"]).stem,
+            "file_path": str(html_dir / entry["filename"]),
+            "body_html": entry["body_html"],
+            "page_title": f"{entry['title']} — {book_title}" if book_title else entry["title"],
+            "nav_top": build_nav(prev_file, prev_title, next_file, next_title),
+            "nav_bottom": build_nav(prev_file, prev_title, next_file, next_title, is_bottom=True),
+            "source_blocks": _referenced_source_blocks(entry["body_html"], source_block_index),
+        }
+        job["input_hash"] = _input_hash(job, module_id)
+        jobs.append(job)
 
         manifest_rows.append({
             "schema_version": "chapter_html_manifest_v1",
@@ -477,7 +612,7 @@ def emit_doc_web_bundle(
             "title": entry["title"],
             "page_start": entry["page_start"],
             "page_end": entry["page_end"],
-            "file": str(file_path),
+            "file": job["file_path"],
             "kind": entry["kind"],
             "source_pages": entry.get("source_pages"),
             "source_printed_pages": entry.get("source_printed_pages"),
@@ -487,7 +622,7 @@ def emit_doc_web_bundle(
             "source_portion_page_starts": entry.get("source_portion_page_starts"),
         })
         doc_web_entries.append({
-            "entry_id": entry_id,
+            "entry_id": job["entry_id"],
             "kind": entry["kind"],
             "title": entry["title"],
             "path": entry["filename"],
@@ -498,8 +633,40 @@ def emit_doc_web_bundle(
             "printed_pages": list(entry.get("source_printed_pages") or []),
             "printed_page_start": entry.get("page_start"),
             "printed_page_end": entry.get("page_end"),
+            "input_hash": job["input_hash"],
         })
 
+    blocks_by_entry: Dict[str, List[Dict[str, Any]]] = {}
+    pending: List[Dict[str, Any]] = []
+    for job in jobs:
+        previous_hash, previous_count = previous_hashes.get(job["entry_id"], (None, None))
+        reused = previous_blocks.get(job["entry_id"], [])
+        unchanged = (
+            previous_hash == job["input_hash"]
+            and len(reused) == previous_count
+            and _file_input_hash(Path(job["file_path"])) == job["input_hash"]
+        )
+        if unchanged:
+            blocks_by_entry[job["entry_id"]] = reused
+        else:
+            pending.append(job)
+    for job, blocks in zip(pending, _run_jobs(pending, workers)):
+        blocks_by_entry[job["entry_id"]] = blocks
+    for doc_web_entry in doc_web_entries:
+        doc_web_entry["block_count"] = len(blocks_by_entry[doc_web_entry["entry_id"]])
+
+    provenance_rows = [
+        {
+            "schema_version": "doc_web_provenance_block_v1",
+            "module_id": module_id,
+            "run_id": run_id,
+            "created_at": created_at,
+            **block,
+        }
+        for job in jobs
+        for block in blocks_by_entry[job["entry_id"]]
+    ]
+
     author_line = f'<p class="author">{html_escape(book_author)}</p>' if book_author else ""
     toc_items = []
     for entry in index_entries:
@@ -518,28 +685,33 @@ def emit_doc_web_bundle(
 </ul>
 """
     index_html = html5_wrap(index_body, book_title or "Index")
-    (html_dir / "index.html").write_text(index_html, encoding="utf-8")
+    _write_text_atomic(html_dir / "index.html", index_html)
 
-    save_jsonl(str(manifest_path), manifest_rows)
+    _write_atomic(Path(manifest_path), lambda tmp: save_jsonl(tmp, manifest_rows))
     provenance_path = html_dir / "provenance" / "blocks.jsonl"
-    save_jsonl(str(provenance_path), provenance_rows)
-    save_json(
-        str(html_dir / "manifest.json"),
-        {
-            "schema_version": "doc_web_bundle_manifest_v1",
-            "module_id": module_id,
-            "run_id": run_id,
-            "created_at": created_at,
-            "document_id": document_id,
-            "title": book_title or "Book",
-            "creator": book_author or None,
-            "source_artifact": source_artifact,
-            "index_path": "index.html",
-            "entries": doc_web_entries,
-            "reading_order": [entry["entry_id"] for entry in doc_web_entries],
-            "asset_roots": [images_subdir] if images_subdir else [],
-            "provenance_path": "provenance/blocks.jsonl",
-        },
+    _write_atomic(provenance_path, lambda tmp: save_jsonl(tmp, provenance_rows))
+    # manifest.json goes last: its input hashes vouch for the entry files and
+    # provenance blocks written above.
+    _write_atomic(
+        html_dir / "manifest.json",
+        lambda tmp: save_json(
+            tmp,
+            {
+                "schema_version": "doc_web_bundle_manifest_v1",
+                "module_id": module_id,
+                "run_id": run_id,
+                "created_at": created_at,
+                "document_id": document_id,
+                "title": book_title or "Book",
+                "creator": book_author or None,
+                "source_artifact": source_artifact,
+                "index_path": "index.html",
+                "entries": doc_web_entries,
+                "reading_order": [entry["entry_id"] for entry in doc_web_entries],
+                "asset_roots": [images_subdir] if images_subdir else [],
+                "provenance_path": "provenance/blocks.jsonl",
+            },
+        ),
     )
 
     return manifest_rows
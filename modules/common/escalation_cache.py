@@ -9,8 +9,8 @@ import json
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
-import base64
 
+from modules.common.prepared_image import image_data_uri
 from modules.common.utils import ensure_dir, ProgressLogger
 
 # Vision model for escalation (configured per-run)
@@ -276,9 +276,7 @@ class EscalationCache:
             }
         }
         """
-        # Read and encode image
-        with open(image_path, 'rb') as f:
-            image_data = base64.b64encode(f.read()).decode('utf-8')
+        image_data = image_data_uri(str(image_path))
         
         # Vision prompt (boundaries + text only, NO feature extraction)
         prompt = """You are reading a page from a Fighting Fantasy gamebook.
@@ -326,7 +324,7 @@ IMPORTANT:
                             {"type": "text", "text": prompt},
                             {
                                 "type": "image_url",
-                                "image_url": {"url": f"data:image/png;base64,{image_data}"},
+                                "image_url": {"url": image_data},
                             },
                         ],
                     }
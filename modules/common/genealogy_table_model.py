@@ -0,0 +1,290 @@
+"""
+Typed table model for Onward genealogy pages.
+
+The genealogy stages (table rescue, consistency validation and document planning) all read
+the same facts from a page's HTML: its tables, their rows and cells, which rows are headers,
+family headings or subgroup rows, and the headings and paragraphs around them. Instead of
+each stage re-parsing the HTML with BeautifulSoup, `page_tables(html)` parses a page once
+into a `PageTables` model and keeps it in a process-wide cache keyed by the HTML's sha1.
+
+Stages that write `page_html_v1` pages on this path also write a sidecar next to their
+output (`<artifact stem>.tables.jsonl`, one `genealogy_page_tables_v1` row per page).
+Downstream stages call `load_sidecar(pages_path)` once, after which `page_tables_for_row`
+serves those pages without parsing. A sidecar row is only used when its `html_sha1`
+matches the page's current HTML, so pages edited by a later stage are parsed again.
+
+The page HTML stays the artifact of record; the model is a read-only view of it.
+Cell and block `text` is the element's stripped text nodes joined with newlines; use
+`spaced()` for the single-line form.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from modules.common.doc_web_bundle_emitter import get_source_block_ids
+from modules.common.utils import read_jsonl, save_jsonl
+
+SCHEMA_VERSION = "genealogy_page_tables_v1"
+SIDECAR_SUFFIX = ".tables.jsonl"
+SUBGROUP_CLASS = "genealogy-subgroup-heading"
+EXPECTED_HEADERS = ("name", "born", "married", "spouse", "boy", "girl", "died")
+FUSED_HEADERS = ("name", "born", "married", "spouse", "boygirl", "died")
+SUMMARY_LABELS = ("TOTAL DESCENDANTS", "LIVING", "DECEASED")
+FAMILY_HEADING_RE = re.compile(r"\b[A-Z][A-Z'’\-]+(?:\s+[A-Z][A-Z'’\-]+)*\s+FAMILY\b")
+GENERATION_CONTEXT_RE = re.compile(r"\b(?:great\s+grandchildren|grandchildren|children)\b", re.IGNORECASE)
+BLOCK_TAGS = ("p", "h1", "h2", "h3", "li")
+CACHE_LIMIT = 2048
+
+_cache: Dict[str, "PageTables"] = {}
+_cache_lock = threading.Lock()
+
+
+def spaced(text: str) -> str:
+    return (text or "").replace("\n", " ")
+
+
+def normalize_token(text: str) -> str:
+    return re.sub(r"[^a-z]", "", (text or "").lower())
+
+
+@dataclass
+class TableCell:
+    text: str
+    header: bool = False  # <th>
+    colspan: int = 1
+    rowspan: int = 1
+
+
+@dataclass
+class TableRow:
+    cells: List[TableCell]
+    role: str = "data"  # header | subgroup | family | summary | data
+    section: Optional[str] = None  # thead | tbody | tfoot, or None for rows directly under <table>
+    classes: List[str] = field(default_factory=list)
+
+    def texts(self) -> List[str]:
+        return [spaced(cell.text) for cell in self.cells]
+
+    def header_tokens(self) -> List[str]:
+        tokens = [normalize_token(text) for text in self.texts()]
+        while tokens and not tokens[-1]:
+            tokens.pop()
+        return tokens
+
+
+@dataclass
+class GenealogyTable:
+    rows: List[TableRow]
+    has_thead: bool = False
+    has_tbody: bool = False
+    source_block_ids: List[str] = field(default_factory=list)
+
+    def header_texts(self) -> List[str]:
+        """Cell texts of the <thead>, else of the first row."""
+        texts = [text for row in self.rows if row.section == "thead" for text in row.texts()]
+        if not texts and self.rows:
+            texts = self.rows[0].texts()
+        return texts
+
+    def signature(self) -> Tuple[str, ...]:
+        return tuple(token for token in (normalize_token(text) for text in self.header_texts()) if token)
+
+    def is_genealogy(self) -> bool:
+        return self.signature() in (EXPECTED_HEADERS, FUSED_HEADERS)
+
+    def body_rows(self) -> List[TableRow]:
+        if self.has_tbody:
+            return [row for row in self.rows if row.section == "tbody"]
+        return self.rows[1:]
+
+
+@dataclass
+class TextBlock:
+    tag: str
+    text: str
+    in_table: bool = False
+
+
+@dataclass
+class PageTables:
+    html_sha1: str
+    tables: List[GenealogyTable] = field(default_factory=list)
+    blocks: List[TextBlock] = field(default_factory=list)
+    page_number: Optional[int] = None
+    printed_page_number: Optional[int] = None
+
+    def cells(self) -> Iterable[TableCell]:
+        for table in self.tables:
+            for row in table.rows:
+                yield from row.cells
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"schema_version": SCHEMA_VERSION, **asdict(self)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PageTables":
+        tables = [
+            GenealogyTable(
+                rows=[
+                    TableRow(
+                        cells=[TableCell(**cell) for cell in row["cells"]],
+                        role=row.get("role", "data"),
+                        section=row.get("section"),
+                        classes=list(row.get("classes") or []),
+                    )
+                    for row in table["rows"]
+                ],
+                has_thead=bool(table.get("has_thead")),
+                has_tbody=bool(table.get("has_tbody")),
+                source_block_ids=list(table.get("source_block_ids") or []),
+            )
+            for table in data.get("tables") or []
+        ]
+        return cls(
+            html_sha1=data["html_sha1"],
+            tables=tables,
+            blocks=[TextBlock(**block) for block in data.get("blocks") or []],
+            page_number=data.get("page_number"),
+            printed_page_number=data.get("printed_page_number"),
+        )
+
+
+def html_sha1(html: str) -> str:
+    return hashlib.sha1((html or "").encode("utf-8")).hexdigest()
+
+
+def _int_attr(value: Any) -> int:
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return 1
+
+
+def _is_heading_text(text: str) -> bool:
+    normalized = re.sub(r"\s+", " ", spaced(text).replace("’", "'")).strip()
+    if not normalized:
+        return False
+    return bool(FAMILY_HEADING_RE.search(normalized.upper()) or GENERATION_CONTEXT_RE.search(normalized))
+
+
+def _row_role(row: TableRow) -> str:
+    if SUBGROUP_CLASS in row.classes:
+        return "subgroup"
+    if tuple(row.header_tokens()) in (EXPECTED_HEADERS, FUSED_HEADERS):
+        return "header"
+    texts = [text.strip() for text in row.texts()]
+    non_empty = [text for text in texts if text]
+    if len(non_empty) == 1 and texts[0] and _is_heading_text(texts[0]):
+        return "family"
+    if any(label in " ".join(non_empty).upper() for label in SUMMARY_LABELS):
+        return "summary"
+    return "data"
+
+
+def _owning_table(tag: Any) -> Any:
+    return tag.find_parent("table")
+
+
+def _build_table(table: Any) -> GenealogyTable:
+    rows: List[TableRow] = []
+    for tr in table.find_all("tr"):
+        if _owning_table(tr) is not table:
+            continue  # rows of a nested table belong to that table
+        parent = getattr(tr.parent, "name", None)
+        row = TableRow(
+            cells=[
+                TableCell(
+                    text=cell.get_text("\n", strip=True),
+                    header=cell.name == "th",
+                    colspan=_int_attr(cell.get("colspan")),
+                    rowspan=_int_attr(cell.get("rowspan")),
+                )
+                for cell in tr.find_all(["th", "td"], recursive=False)
+            ],
+            section=parent if parent in {"thead", "tbody", "tfoot"} else None,
+            classes=list(tr.get("class") or []),
+        )
+        row.role = _row_role(row)
+        rows.append(row)
+    return GenealogyTable(
+        rows=rows,
+        has_thead=table.find("thead", recursive=False) is not None,
+        has_tbody=table.find("tbody", recursive=False) is not None,
+        source_block_ids=get_source_block_ids(table),
+    )
+
+
+def _remember(model: PageTables) -> None:
+    with _cache_lock:
+        if len(_cache) >= CACHE_LIMIT:
+            _cache.pop(next(iter(_cache)))
+        _cache[model.html_sha1] = model
+
+
+def tables_from_soup(soup: Any, sha1: str) -> PageTables:
+    """
+    Model of an already parsed page, cached like page_tables().
+    `sha1` is html_sha1() of the HTML the page is saved with.
+    """
+    model = PageTables(
+        html_sha1=sha1,
+        tables=[_build_table(table) for table in soup.find_all("table")],
+        blocks=[
+            TextBlock(tag=tag.name, text=tag.get_text("\n", strip=True), in_table=_owning_table(tag) is not None)
+            for tag in soup.find_all(list(BLOCK_TAGS))
+        ],
+    )
+    _remember(model)
+    return model
+
+
+def page_tables(html: str) -> PageTables:
+    """Parse `html` once per process; repeat calls with the same HTML return the cached model."""
+    sha1 = html_sha1(html)
+    with _cache_lock:
+        cached = _cache.get(sha1)
+    if cached is not None:
+        return cached
+    return tables_from_soup(BeautifulSoup(html or "", "html.parser"), sha1)
+
+
+def page_tables_for_row(page_row: Dict[str, Any]) -> PageTables:
+    model = page_tables(page_row.get("html") or page_row.get("raw_html") or "")
+    return replace(
+        model,
+        page_number=page_row.get("page_number"),
+        printed_page_number=page_row.get("printed_page_number"),
+    )
+
+
+def sidecar_path(pages_path: str) -> str:
+    root, _ext = os.path.splitext(str(pages_path))
+    return root + SIDECAR_SUFFIX
+
+
+def write_sidecar(pages_path: str, page_rows: Iterable[Dict[str, Any]]) -> str:
+    """Write the table model of every page row next to the pages artifact."""
+    path = sidecar_path(pages_path)
+    save_jsonl(path, [page_tables_for_row(row).to_dict() for row in page_rows])
+    return path
+
+
+def load_sidecar(pages_path: str) -> int:
+    """Make the models stored next to `pages_path` available to page_tables(); returns how many."""
+    path = sidecar_path(pages_path)
+    if not os.path.exists(path):
+        return 0
+    count = 0
+    for row in read_jsonl(path):
+        if row.get("schema_version") != SCHEMA_VERSION or not row.get("html_sha1"):
+            continue
+        _remember(replace(PageTables.from_dict(row), page_number=None, printed_page_number=None))
+        count += 1
+    return count
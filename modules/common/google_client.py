@@ -8,8 +8,10 @@ from __future__ import annotations
 
 import base64
 import os
-from typing import Any, Optional, Tuple
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Tuple
 
+from modules.common import llm_cache, provider_quota
 from modules.common.utils import log_llm_usage
 
 try:
@@ -34,6 +36,22 @@ def _decode_data_uri(data_uri: str) -> Tuple[bytes, str]:
     return base64.b64decode(b64_data), mime_type
 
 
+def _dump_result(result: Tuple[str, Optional[Any], Optional[str]]) -> Dict[str, Any]:
+    raw, usage_meta, response_id = result
+    return {
+        "raw": raw,
+        "usage": {
+            "prompt_token_count": getattr(usage_meta, "prompt_token_count", 0) or 0,
+            "candidates_token_count": getattr(usage_meta, "candidates_token_count", 0) or 0,
+        },
+        "response_id": response_id,
+    }
+
+
+def _load_result(entry: Dict[str, Any]) -> Tuple[str, Any, Optional[str]]:
+    return entry["raw"], SimpleNamespace(**entry["usage"]), entry.get("response_id")
+
+
 class GeminiVisionClient:
     """Stateless helper for Gemini vision calls with usage logging."""
 
@@ -71,33 +89,41 @@ class GeminiVisionClient:
         Returns:
             (raw_text, usage_metadata, response_id)
         """
-        image_bytes, mime_type = _decode_data_uri(image_data)
-        image_part = types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
-
-        resp = self._client.models.generate_content(
-            model=model,
-            contents=[
-                types.Content(
-                    role="user",
-                    parts=[
-                        types.Part.from_text(text=user_text),
-                        image_part,
+        request = {
+            "model": model, "system_prompt": system_prompt, "user_text": user_text,
+            "image_data": image_data, "temperature": temperature, "max_tokens": max_tokens,
+        }
+
+        def send():
+            image_bytes, mime_type = _decode_data_uri(image_data)
+            image_part = types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
+
+            with provider_quota.acquire("google"):
+                resp = self._client.models.generate_content(
+                    model=model,
+                    contents=[
+                        types.Content(
+                            role="user",
+                            parts=[
+                                types.Part.from_text(text=user_text),
+                                image_part,
+                            ],
+                        ),
                     ],
-                ),
-            ],
-            config=types.GenerateContentConfig(
-                system_instruction=system_prompt,
-                temperature=temperature,
-                max_output_tokens=max_tokens,
-                response_mime_type="text/plain",
-            ),
+                    config=types.GenerateContentConfig(
+                        system_instruction=system_prompt,
+                        temperature=temperature,
+                        max_output_tokens=max_tokens,
+                        response_mime_type="text/plain",
+                    ),
+                )
+            return resp.text or "", getattr(resp, "usage_metadata", None), getattr(resp, "response_id", None)
+
+        (raw, usage_meta, response_id), source = llm_cache.call(
+            "google", "vision", request, send, dump=_dump_result, load=_load_result
         )
 
-        raw = resp.text or ""
-        response_id = getattr(resp, "response_id", None)
-
         # Extract usage for logging
-        usage_meta = getattr(resp, "usage_metadata", None)
         prompt_tokens = 0
         completion_tokens = 0
         if usage_meta:
@@ -109,6 +135,7 @@ class GeminiVisionClient:
             prompt_tokens=prompt_tokens,
             completion_tokens=completion_tokens,
             provider="google",
+            **llm_cache.usage_flags(source),
         )
 
         return raw, usage_meta, response_id
@@ -16,7 +16,43 @@ from typing import List, Tuple, Optional, Dict, Any
 HAS_OPENCV = importlib.util.find_spec("cv2") is not None
 
 
-def detect_skew_angle(image: Image.Image, delta: float = 0.5, limit: float = 2) -> float:
+def image_size(path: str) -> Tuple[int, int]:
+    """(width, height) from the image header only; pixel data is never decoded."""
+    with Image.open(path) as img:
+        return img.size
+
+
+def gray_pyramid(image: Image.Image, max_sides: Tuple[int, ...] = (512, 1024)) -> List[np.ndarray]:
+    """
+    Grayscale levels of `image`, one per entry in `max_sides` (coarse first), each reduced by an
+    integer box-filter factor so its longer side is at most that size. Levels never upscale.
+    """
+    gray = image.convert("L")
+    longest = max(gray.size)
+    levels = []
+    for side in max_sides:
+        factor = max(1, -(-longest // side))
+        levels.append(np.asarray(gray.reduce(factor) if factor > 1 else gray))
+    return levels
+
+
+def _shear_projection_variance(ink: np.ndarray, angle: float) -> float:
+    """
+    Variance of the row projection of `ink` after a small-angle rotation, approximated by
+    shifting each column vertically (a shear) instead of resampling the image.
+    """
+    h, w = ink.shape
+    if angle == 0:
+        return float(np.var(ink.sum(axis=1)))
+    shift = np.rint(-(np.arange(w) - w / 2.0) * np.tan(np.deg2rad(angle))).astype(np.int64)
+    shift -= shift.min()
+    rows = np.arange(h, dtype=np.int64)[:, None] + shift[None, :]
+    profile = np.bincount(rows.ravel(), weights=ink.ravel(), minlength=h + int(shift.max()))
+    return float(np.var(profile))
+
+
+def detect_skew_angle(image: Image.Image, delta: float = 0.5, limit: float = 2,
+                      refine_top: int = 3) -> float:
     """
     Detect skew angle via projection variance (for text-heavy pages only).
 
@@ -28,39 +64,42 @@ def detect_skew_angle(image: Image.Image, delta: float = 0.5, limit: float = 2)
     rotated off-axis) vs INCREASES variance (indicating artwork edges). Only
     returns a correction angle if rotation decreases variance.
 
+    Projections are computed with shear profiles on a downsampled grayscale pyramid:
+    every angle in the grid is scored on the coarse level, and the baseline, the
+    1° artwork check and the `refine_top` best angles are re-scored on the finer
+    level (at most 1024 px on the long side), where the final decision is made.
+
     Returns:
         Detected skew angle in degrees, or 0.0 if page appears straight or
         is not suitable for deskew (artwork/cover).
     """
-    def projection_score(img):
-        arr = np.array(img.convert("L"))
-        proj = np.sum(255 - arr, axis=1)
-        return np.var(proj)
+    coarse, fine = gray_pyramid(image)
+    fine_ink = 255.0 - fine.astype(np.float64)
 
     # Get baseline score at 0°
-    baseline_score = projection_score(image)
+    baseline_score = _shear_projection_variance(fine_ink, 0.0)
 
     # Quick check: if rotating slightly INCREASES variance, this is likely
     # artwork/cover, not text. Skip deskew entirely.
-    test_rotated = image.rotate(1.0, expand=True, fillcolor="white")
-    test_score = projection_score(test_rotated)
-    if test_score > baseline_score:
-        # Rotation increases variance = not a text page, skip deskew
+    if _shear_projection_variance(fine_ink, 1.0) > baseline_score:
+        return 0.0
+
+    # Coarse pass over the full grid, skipping near-zero angles.
+    angles = [float(a) for a in np.arange(-limit, limit + delta, delta) if abs(a) >= 0.1]
+    if not angles:
         return 0.0
+    coarse_ink = 255.0 - coarse.astype(np.float64)
+    coarse_scores = [_shear_projection_variance(coarse_ink, a) for a in angles]
+    ranked = sorted(range(len(angles)), key=lambda i: -coarse_scores[i])[:max(1, refine_top)]
 
     # Search for angle that maximizes variance (sharpens text lines)
-    angles = np.arange(-limit, limit + delta, delta)
     best_angle = 0.0
     best_score = baseline_score
-
-    for a in angles:
-        if abs(a) < 0.1:  # Skip near-zero
-            continue
-        rotated = image.rotate(a, expand=True, fillcolor="white")
-        score = projection_score(rotated)
+    for i in sorted(ranked):
+        score = _shear_projection_variance(fine_ink, angles[i])
         if score > best_score:
             best_score = score
-            best_angle = float(a)
+            best_angle = angles[i]
 
     # Only return if there's meaningful improvement
     if best_score > baseline_score * 1.02:
@@ -109,7 +148,7 @@ def find_gutter_position(image: Image.Image, center_pct: float = 0.15,
     - continuity_score: 1.0 if passes margin checks, 0.0 otherwise
     """
     w, h = image.size
-    gray = np.array(image.convert("L"))
+    gray = np.asarray(image.convert("L"))
 
     center = w // 2
     # Search middle 10% of width (binding is very close to center in two-page spreads)
@@ -121,108 +160,72 @@ def find_gutter_position(image: Image.Image, center_pct: float = 0.15,
 
     # Sample points along height: 0%, 5%, 10%, ..., 95%, 100%
     sample_points = [int(h * i / 20) for i in range(21)]  # 21 points from 0 to 20/20
+    # Sample horizontal bands (not single rows) to average out text
+    band_height = max(5, h // 40)  # Sample bands ~2.5% of image height
+
+    # Each candidate column averages a narrow vertical band (binding is typically 3-8 pixels
+    # wide). Band sums come from integer prefix sums over the search strip only, so every
+    # candidate is scored at once with the same means the per-column loop produced.
+    idxs = np.arange(search_start, search_end)
+    band_starts = np.maximum(0, idxs - 2)
+    band_ends = np.minimum(w, idxs + 3)
+    strip_lo = int(band_starts.min())
+    strip = gray[:, strip_lo:int(band_ends.max())].astype(np.int64)
+    c0 = band_starts - strip_lo
+    c1 = band_ends - strip_lo
+    band_w = (band_ends - band_starts).astype(np.float64)
+
+    row_bounds = [(max(0, y - band_height // 2), min(h, y + band_height // 2)) for y in sample_points]
+    block_cols = np.stack([strip[y0:y1].sum(axis=0) for y0, y1 in row_bounds])  # (21, strip_w)
+    block_prefix = np.concatenate([np.zeros((len(row_bounds), 1), dtype=np.int64), np.cumsum(block_cols, axis=1)], axis=1)
+    block_rows = np.asarray([y1 - y0 for y0, y1 in row_bounds], dtype=np.float64)
+    # samples[i, k]: mean brightness of candidate i's band at sample height k
+    samples = ((block_prefix[:, c1] - block_prefix[:, c0]).T / (block_rows[None, :] * band_w[:, None]))
+
+    # Compute variance (how much brightness varies top-to-bottom)
+    variances = np.var(samples, axis=1)
+
+    # Check if this column actually extends into margins
+    # Margins are samples 0-1 (top 0-5%) and 19-20 (bottom 95-100%)
+    # If both margins are very bright (>240), this column doesn't extend into margins
+    # (it's probably a text column within content area)
+    top_brightness = np.mean(samples[:, 0:2], axis=1)
+    bottom_brightness = np.mean(samples[:, -2:], axis=1)
+    extends_to_margins = ~((top_brightness > 240) & (bottom_brightness > 240))
+
+    col_prefix = np.concatenate([[0], np.cumsum(strip.sum(axis=0))])
+    full_brightness = (col_prefix[c1] - col_prefix[c0]) / (h * band_w)
 
     best_idx = center
     best_score = -1.0
     best_variance = float('inf')
     best_continuity = 0.0
 
-    # Track all candidates for comparison
-    candidates = []
-
-    for idx in range(search_start, search_end):
-        # Sample a narrow vertical band (binding is typically 3-8 pixels wide)
-        band_start = max(0, idx - 2)
-        band_end = min(w, idx + 3)
-
-        # Get brightness samples at each height point
-        # Sample horizontal bands (not single rows) to average out text
-        samples = []
-        band_height = max(5, h // 40)  # Sample bands ~2.5% of image height
-
-        for y in sample_points:
-            # Average a horizontal band of rows around this y position
-            y_start = max(0, y - band_height // 2)
-            y_end = min(h, y + band_height // 2)
-            band_brightness = float(np.mean(gray[y_start:y_end, band_start:band_end]))
-            samples.append(band_brightness)
-
-        # Compute variance (how much brightness varies top-to-bottom)
-        variance = float(np.var(samples))
-
-        # Check if this column actually extends into margins
-        # Margins are samples 0-1 (top 0-5%) and 19-20 (bottom 95-100%)
-        # Check if there's SOMETHING visible (not pure white) in margins
-        top_samples = samples[0:2]
-        bottom_samples = samples[-2:]
-
-        # Average brightness of margins
-        top_brightness = np.mean(top_samples)
-        bottom_brightness = np.mean(bottom_samples)
-
-        # If both margins are very bright (>240), this column doesn't extend into margins
-        # (it's probably a text column within content area)
-        if top_brightness > 240 and bottom_brightness > 240:
-            extends_to_margins = False
-        else:
-            extends_to_margins = True
-
-        # Track candidate for later comparison
-        distance_from_center = abs(idx - center)
-        candidates.append((idx, variance, extends_to_margins, distance_from_center))
-
     # Find minimum variance among candidates that extend to margins
-    margin_candidates = [(idx, var, dist) for idx, var, ext, dist in candidates if ext]
-
-    if margin_candidates:
-        min_variance = min(var for _, var, _ in margin_candidates)
+    if extends_to_margins.any():
+        min_variance = float(variances[extends_to_margins].min())
 
         # If multiple columns have SIMILAR variance (within 10% of minimum),
         # prefer the DARKEST one (binding is darker than white margins)
         variance_threshold = min_variance * 1.10
-        close_candidates = [(idx, var, dist) for idx, var, dist in margin_candidates
-                           if var <= variance_threshold]
-
-        # Among close candidates, get brightness for each and pick the darkest
-        if close_candidates:
-            candidates_with_brightness = []
-            for idx, var, dist in close_candidates:
-                band_start = max(0, idx - 2)
-                band_end = min(w, idx + 3)
-                avg_brightness = float(np.mean(gray[:, band_start:band_end]))
-                candidates_with_brightness.append((idx, var, avg_brightness))
-
-            # Pick the darkest (lowest brightness) among similar-variance candidates
-            best_idx, best_variance, _ = min(candidates_with_brightness, key=lambda x: x[2])
-            best_continuity = 1.0
-            best_score = 1.0 / (best_variance + 1.0)
+        close = np.nonzero(extends_to_margins & (variances <= variance_threshold))[0]
+
+        # Pick the darkest (lowest brightness) among similar-variance candidates
+        pick = int(close[np.argmin(full_brightness[close])])
+        best_idx = int(idxs[pick])
+        best_variance = float(variances[pick])
+        best_continuity = 1.0
+        best_score = 1.0 / (best_variance + 1.0)
 
     # If no column passed margin checks, fall back to lowest variance in search region
     if best_score < 0:
-        band_height = max(5, h // 40)
-
-        for idx in range(search_start, search_end):
-            band_start = max(0, idx - 2)
-            band_end = min(w, idx + 3)
-
-            samples = []
-            for y in sample_points:
-                y_start = max(0, y - band_height // 2)
-                y_end = min(h, y + band_height // 2)
-                band_brightness = float(np.mean(gray[y_start:y_end, band_start:band_end]))
-                samples.append(band_brightness)
-
-            variance = float(np.var(samples))
-            score = 1.0 / (variance + 1.0)
-
-            distance_from_center = abs(idx - center) / (search_end - search_start)
-            score *= (1.0 - distance_from_center * 0.01)
-
-            if score > best_score:
-                best_score = score
-                best_idx = idx
-                best_variance = variance
-                best_continuity = 0.0  # Didn't pass margin checks
+        scores = 1.0 / (variances + 1.0)
+        distance_from_center = np.abs(idxs - center) / (search_end - search_start)
+        scores = scores * (1.0 - distance_from_center * 0.01)
+        pick = int(np.argmax(scores))
+        best_idx = int(idxs[pick])
+        best_variance = float(variances[pick])
+        best_continuity = 0.0  # Didn't pass margin checks
 
     # Get average brightness at detected position
     band_start = max(0, best_idx - 2)
@@ -270,13 +273,12 @@ def sample_spread_decision(image_paths: List[str], sample_size: int = 5,
     all_gutters = []
 
     for i in indices:
-        img = Image.open(image_paths[i])
-        w, h = img.size
+        with Image.open(image_paths[i]) as img:
+            w, h = img.size
+            gutter_frac, brightness, variance_score, continuity = find_gutter_position(img)
         ratio = w / h
         is_landscape = ratio > min_ratio
 
-        gutter_frac, brightness, variance_score, continuity = find_gutter_position(img)
-
         # Variance-based confidence:
         # - continuity = 1.0 means column passed margin checks (extends top-to-bottom)
         # - variance_score = how consistent the column is (higher = more consistent)
@@ -0,0 +1,290 @@
+"""
+Vectorized page layout helpers: column assignment, reading order and paragraph-break candidates.
+
+`BookLines.from_pages` flattens every line bbox of a book into NumPy arrays once; the batch
+functions then work on all pages together with segment sums instead of per-page Python loops.
+Per-page wrappers (`cluster_columns`, `sort_lines_by_columns`, `infer_column_spans`,
+`column_splits_from_mask`) keep the signatures and results of the functions they replace in
+pagelines_to_elements_v1 and extract_ocr_ensemble_v1.
+
+Bboxes are [x0, y0, x1, y1] normalized to the page; lines without a usable bbox are left out of
+the arrays and sort as column 0 at y=0 in the reading order.
+"""
+from itertools import chain
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+class BookLines:
+    """Flattened line boxes for a list of pages (each page a list of line dicts)."""
+
+    def __init__(self, page: np.ndarray, line: np.ndarray, boxes: np.ndarray, n_pages: int):
+        self.page = page
+        self.line = line
+        self.boxes = boxes
+        self.n_pages = n_pages
+
+    @classmethod
+    def from_pages(cls, pages: Sequence[Sequence[Dict[str, Any]]]) -> "BookLines":
+        counts: List[int] = []
+        line_ids: List[int] = []
+        boxes: List[Sequence[float]] = []
+        for lines in pages:
+            page_boxes = [ln.get("bbox") for ln in lines or []]
+            if all(b and len(b) == 4 for b in page_boxes):
+                # Common case: every line carries a plain 4-value bbox.
+                boxes.extend(page_boxes)
+                line_ids.extend(range(len(page_boxes)))
+                counts.append(len(page_boxes))
+                continue
+            kept = [i for i, b in enumerate(page_boxes) if b and len(b) >= 4]
+            boxes.extend(page_boxes[i][:4] for i in kept)
+            line_ids.extend(kept)
+            counts.append(len(kept))
+        flat = np.fromiter(chain.from_iterable(boxes), dtype=np.float64, count=4 * len(boxes))
+        return cls(
+            np.repeat(np.arange(len(pages), dtype=np.int64), counts),
+            np.asarray(line_ids, dtype=np.int64),
+            flat.reshape(-1, 4),
+            len(pages),
+        )
+
+    def __len__(self) -> int:
+        return int(self.page.size)
+
+    @property
+    def centers(self) -> np.ndarray:
+        return (self.boxes[:, 0] + self.boxes[:, 2]) / 2.0
+
+
+def _segment_sum(seg: np.ndarray, values: np.ndarray, n: int) -> np.ndarray:
+    # bincount accumulates in array order, matching a left-to-right Python sum.
+    return np.bincount(seg, weights=values, minlength=n)
+
+
+def assign_columns(book: BookLines, gap: float = 0.12, min_per_col: int = 4) -> np.ndarray:
+    """
+    Column (0 or 1) per book line, computed for all pages at once:
+    - if the page's x-center spread > 0.2, 2-means on x-centers;
+    - else (or when a k-means side is too small) split at the largest center gap >= `gap`;
+    - otherwise a single column.
+    A split is only kept when both sides have at least `min_per_col` lines.
+    """
+    n = len(book)
+    cols = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return cols
+    centers = book.centers
+    # Sort by (page, center); lexsort is stable so equal centers keep line order.
+    order = np.lexsort((centers, book.page))
+    pg = book.page[order]
+    cs = centers[order]
+    n_pages = book.n_pages
+
+    counts = np.bincount(pg, minlength=n_pages)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    present = counts > 0
+    lo = np.zeros(n_pages)
+    hi = np.zeros(n_pages)
+    lo[present] = cs[starts[present]]
+    hi[present] = cs[starts[present] + counts[present] - 1]
+
+    decided = np.zeros(n_pages, dtype=bool)
+    right_sorted = np.zeros(n, dtype=bool)
+
+    # 2-means where the spread is wide.
+    km = present & (hi - lo > 0.2) & (counts >= 2)
+    if km.any():
+        c1 = lo.copy()
+        c2 = hi.copy()
+        for _ in range(5):
+            left = np.abs(cs - c1[pg]) <= np.abs(cs - c2[pg])
+            l_n = _segment_sum(pg, left.astype(np.float64), n_pages)
+            r_n = counts - l_n
+            l_sum = _segment_sum(pg, np.where(left, cs, 0.0), n_pages)
+            r_sum = _segment_sum(pg, np.where(left, 0.0, cs), n_pages)
+            upd_l = km & (l_n > 0)
+            upd_r = km & (r_n > 0)
+            c1[upd_l] = l_sum[upd_l] / l_n[upd_l]
+            c2[upd_r] = r_sum[upd_r] / r_n[upd_r]
+        right = np.abs(cs - c2[pg]) < np.abs(cs - c1[pg])
+        r_n = _segment_sum(pg, right.astype(np.float64), n_pages)
+        ok = km & (counts - r_n >= min_per_col) & (r_n >= min_per_col)
+        right_sorted |= right & ok[pg]
+        decided |= ok
+
+    # Largest-gap split for the rest.
+    multi = present & (counts > 1)
+    if multi.any():
+        gaps = np.diff(cs)
+        gaps[pg[1:] != pg[:-1]] = -np.inf  # no gaps across page boundaries
+        seg_starts = starts[multi]
+        page_max = np.full(n_pages, -np.inf)
+        page_max[multi] = np.maximum.reduceat(gaps, seg_starts)
+        # First maximal gap per page (matches max() over a Python list).
+        is_max = (gaps == page_max[pg[:-1]]) & (pg[1:] == pg[:-1])
+        hits = np.nonzero(is_max)[0]
+        first = np.ones(hits.size, dtype=bool)
+        first[1:] = pg[hits[1:]] != pg[hits[:-1]]
+        best = hits[first]
+        best_pg = pg[best]
+        big = gaps[best] >= gap
+        split_at = np.full(n_pages, np.inf)
+        split_at[best_pg[big]] = cs[best[big] + 1]
+        cand = np.zeros(n_pages, dtype=bool)
+        cand[best_pg[big]] = True
+        cand &= ~decided
+        right = cs >= split_at[pg]
+        r_n = _segment_sum(pg, right.astype(np.float64), n_pages)
+        ok = cand & (counts - r_n >= min_per_col) & (r_n >= min_per_col)
+        right_sorted |= right & ok[pg]
+        decided |= ok
+
+    cols[order] = right_sorted.astype(np.int64)
+    return cols
+
+
+def reading_order(pages: Sequence[Sequence[Dict[str, Any]]], book: BookLines,
+                  columns: np.ndarray) -> List[List[int]]:
+    """
+    Per page, line indices sorted by column (left→right) then top→bottom. Lines without a bbox
+    sort as column 0 at y=0. Pages with no bbox at all keep their original order.
+    """
+    counts = np.bincount(book.page, minlength=book.n_pages)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+    # One stable sort for the whole book: (page, column, y).
+    order = np.lexsort((book.boxes[:, 1], columns, book.page))
+    sorted_lines = book.line[order].tolist()
+    out: List[List[int]] = []
+    for p, lines in enumerate(pages):
+        n_lines = len(lines or [])
+        n_boxed = int(counts[p])
+        if n_boxed == 0:
+            out.append(list(range(n_lines)))
+        elif n_boxed == n_lines:
+            out.append(sorted_lines[starts[p]:starts[p] + n_boxed])
+        else:
+            # Mixed page: lines without a full bbox join column 0 (y from a short bbox if any).
+            col = np.zeros(n_lines, dtype=np.int64)
+            y = np.zeros(n_lines, dtype=np.float64)
+            for i, ln in enumerate(lines):
+                bbox = ln.get("bbox")
+                if bbox and len(bbox) >= 2:
+                    y[i] = float(bbox[1])
+            s = slice(starts[p], starts[p] + n_boxed)
+            col[book.line[s]] = columns[s]
+            out.append(np.lexsort((y, col)).tolist())
+    return out
+
+
+def paragraph_breaks(book: BookLines, columns: np.ndarray, gap_factor: float = 1.5,
+                     indent: float = 0.02) -> np.ndarray:
+    """
+    Geometric paragraph-start candidates per book line: the first line of each column, a
+    vertical gap above the line larger than `gap_factor` x the page's median line height, or a
+    left indent of more than `indent` relative to the previous line in the column.
+    """
+    n = len(book)
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+    x0, y0, _, y1 = book.boxes.T
+    order = np.lexsort((y0, columns, book.page))
+    pg = book.page[order]
+    col = columns[order]
+    heights = y1 - y0
+    # Per-page median line height from one (page, height) sort.
+    by_h = np.lexsort((heights, book.page))
+    counts = np.bincount(book.page, minlength=book.n_pages)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    h_sorted = heights[by_h]
+    has = counts > 0
+    lo_mid = starts[has] + (counts[has] - 1) // 2
+    hi_mid = starts[has] + counts[has] // 2
+    median_h = np.zeros(book.n_pages)
+    median_h[has] = (h_sorted[lo_mid] + h_sorted[hi_mid]) / 2.0
+    starts = np.ones(n, dtype=bool)
+    same = (pg[1:] == pg[:-1]) & (col[1:] == col[:-1])
+    vgap = y0[order][1:] - y1[order][:-1]
+    shift = x0[order][1:] - x0[order][:-1]
+    starts[1:] = ~same | (vgap > gap_factor * median_h[pg[1:]]) | (shift > indent)
+    out = np.zeros(n, dtype=bool)
+    out[order] = starts
+    return out
+
+
+def cluster_columns(lines: List[Dict[str, Any]], gap: float = 0.12, min_per_col: int = 4) -> Dict[int, int]:
+    """Per-page column assignment: line_idx -> column_idx for lines with a bbox."""
+    book = BookLines.from_pages([lines])
+    cols = assign_columns(book, gap=gap, min_per_col=min_per_col)
+    return {int(i): int(c) for i, c in zip(book.line, cols)}
+
+
+def sort_lines_by_columns(lines: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Lines sorted by column then top→bottom; original order when no line has a bbox."""
+    if not lines:
+        return lines
+    book = BookLines.from_pages([lines])
+    order = reading_order([lines], book, assign_columns(book))[0]
+    return [lines[i] for i in order]
+
+
+def infer_column_spans(raw_lines, min_lines: int = 6, min_gap: float = 0.12, min_side: int = 6) -> List[List[float]]:
+    """
+    Two column spans [[0, split], [split, 1]] from the largest gap between line x-centers, or []
+    when the gap is below `min_gap` or either side has fewer than `min_side` lines. Lines
+    without a bbox count as full-width.
+    """
+    if not raw_lines or len(raw_lines) < min_lines:
+        return []
+    boxes = np.asarray([(ln.get("bbox", [0, 0, 1, 1]) or [0, 0, 1, 1])[:4] for ln in raw_lines], dtype=np.float64)
+    centers = np.sort((boxes[:, 0] + boxes[:, 2]) / 2.0)
+    if centers.size < 2:
+        return []
+    gaps = np.diff(centers)
+    gap_idx = int(np.argmax(gaps))
+    if gaps[gap_idx] < min_gap:
+        return []
+    left = gap_idx + 1
+    right = centers.size - left
+    if left < min_side or right < min_side:
+        return []
+    split = float((centers[gap_idx] + centers[gap_idx + 1]) / 2.0)
+    return [[0.0, split], [split, 1.0]]
+
+
+def column_splits_from_mask(mask: np.ndarray, min_lines: int = 30, min_spread: float = 0.25) -> List[Tuple[float, float]]:
+    """
+    Two-column split from a text-pixel mask (H x W, truthy = ink) by 2-means on pixel x
+    positions. Works on the per-x ink histogram, so cost scales with page width rather than
+    ink pixel count. Returns [(0, 1)] when the page reads as a single column.
+    """
+    hist = np.count_nonzero(mask, axis=0).astype(np.float64)
+    total = hist.sum()
+    if total < min_lines * 10:
+        return [(0.0, 1.0)]
+    width = mask.shape[1]
+    pos = np.arange(width, dtype=np.float64) / float(width)
+    inked = np.nonzero(hist)[0]
+    lo, hi = pos[inked[0]], pos[inked[-1]]
+    if hi - lo < min_spread:
+        return [(0.0, 1.0)]
+    weighted = hist * pos
+    c1, c2 = lo, hi
+    for _ in range(6):
+        left = np.abs(pos - c1) <= np.abs(pos - c2)
+        right = ~left
+        l_n = hist[left].sum()
+        r_n = hist[right].sum()
+        if l_n > 0:
+            c1 = weighted[left].sum() / l_n
+        if r_n > 0:
+            c2 = weighted[right].sum() / r_n
+    if c1 > c2:
+        c1, c2 = c2, c1
+    split = float((c1 + c2) / 2.0)
+    left_ct = hist[pos < split].sum()
+    right_ct = hist[pos >= split].sum()
+    if left_ct < min_lines or right_ct < min_lines:
+        return [(0.0, 1.0)]
+    return [(0.0, split), (split, 1.0)]
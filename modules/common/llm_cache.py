@@ -0,0 +1,201 @@
+"""
+LLM response reuse: a shared on-disk cache, a run-scoped memo, and in-flight coalescing.
+
+The LLM clients key each request by provider, call kind and the full request arguments
+(model, prompts, images, limits) and send it through `call()`, which tries, in order:
+- the run memo (`CODEX_LLM_RUN_MEMO_DIR`, set by the driver to `<run_dir>/llm_memo`): an
+  identical request made earlier in the same run returns its reply, logged `deduped: true`;
+- an identical request already in flight in this process: the caller waits for it and
+  shares its reply, logged `coalesced: true`;
+- the shared cache (`CODEX_LLM_CACHE_DIR`, set by the batch runner for every run in a batch):
+  logged `cached: true`.
+Reused replies are logged with zero cost. Streaming requests and requests with a non-zero
+`temperature` always go to the provider. Code that retries the same request on purpose
+(e.g. a retry after an unusable reply) wraps it in `fresh()` to skip all three lookups; a
+retry that runs in a subprocess passes `env=fresh_env()` instead.
+
+Entries are JSON files under `<dir>/<key[:2]>/<key>.json`, written atomically. Both
+directories are safe to delete at any time; set either variable to `off` to disable it.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+CACHE_DIR_ENV = "CODEX_LLM_CACHE_DIR"
+RUN_MEMO_ENV = "CODEX_LLM_RUN_MEMO_DIR"
+FRESH_ENV = "CODEX_LLM_FRESH"
+
+_local = threading.local()
+_inflight_lock = threading.Lock()
+_inflight: Dict[str, "_Flight"] = {}
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = False
+        self.result: Any = None
+
+
+def _env_dir(name: str) -> Optional[str]:
+    value = os.environ.get(name)
+    if not value or value.lower() == "off":
+        return None
+    return value
+
+
+def cache_dir() -> Optional[str]:
+    return _env_dir(CACHE_DIR_ENV)
+
+
+def memo_dir() -> Optional[str]:
+    return _env_dir(RUN_MEMO_ENV)
+
+
+def is_cacheable(kwargs: Dict[str, Any]) -> bool:
+    if kwargs.get("stream"):
+        return False
+    temperature = kwargs.get("temperature")
+    return temperature is None or float(temperature) == 0.0
+
+
+def cache_key(provider: str, kind: str, kwargs: Dict[str, Any]) -> str:
+    payload = json.dumps({"provider": provider, "kind": kind, "request": kwargs},
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry_path(root: str, key: str) -> str:
+    return os.path.join(root, key[:2], f"{key}.json")
+
+
+def get(key: str, root: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    root = root or cache_dir()
+    if not root:
+        return None
+    try:
+        with open(_entry_path(root, key), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def put(key: str, data: Dict[str, Any], root: Optional[str] = None) -> None:
+    root = root or cache_dir()
+    if not root:
+        return
+    path = _entry_path(root, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+@contextmanager
+def fresh() -> Iterator[None]:
+    """Within the block, requests from this thread skip the memo, coalescing and the cache."""
+    previous = getattr(_local, "fresh", False)
+    _local.fresh = True
+    try:
+        yield
+    finally:
+        _local.fresh = previous
+
+
+def fresh_env(env: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Environment for a subprocess whose requests should behave as if made under fresh()."""
+    return {**(os.environ if env is None else env), FRESH_ENV: "1"}
+
+
+def _is_fresh() -> bool:
+    return getattr(_local, "fresh", False) or os.environ.get(FRESH_ENV) == "1"
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _lookup(key: str, root: Optional[str], load: Callable[[Dict[str, Any]], Any]) -> Optional[Any]:
+    if not root:
+        return None
+    entry = get(key, root)
+    return load(entry) if entry is not None else None
+
+
+def _store(key: str, result: Any, dump: Callable[[Any], Optional[Dict[str, Any]]]) -> None:
+    roots = [root for root in (memo_dir(), cache_dir()) if root]
+    entry = dump(result) if roots else None
+    if entry is None:
+        return
+    for root in roots:
+        put(key, entry, root)
+
+
+def call(provider: str, kind: str, request: Dict[str, Any], fn: Callable[[], Any],
+         dump: Callable[[Any], Optional[Dict[str, Any]]] = _identity,
+         load: Callable[[Dict[str, Any]], Any] = _identity) -> Tuple[Any, Optional[str]]:
+    """
+    Run `fn()` for `request` unless an identical request can be reused.
+    Returns (result, source); source is None for a provider call, else "deduped", "coalesced"
+    or "cached". `dump`/`load` convert results to and from JSON-safe dicts (returning None
+    when a result cannot be stored or restored).
+    """
+    if _is_fresh() or not is_cacheable(request):
+        result = fn()
+        if is_cacheable(request):
+            _store(cache_key(provider, kind, request), result, dump)
+        return result, None
+    key = cache_key(provider, kind, request)
+    memoized = _lookup(key, memo_dir(), load)
+    if memoized is not None:
+        return memoized, "deduped"
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+    if not leader:
+        flight.done.wait()
+        if flight.ok:
+            entry = dump(flight.result)
+            shared = load(entry) if entry is not None else None
+            return (flight.result if shared is None else shared), "coalesced"
+        return fn(), None  # the leader failed; make our own attempt
+    try:
+        source: Optional[str] = None
+        result = _lookup(key, cache_dir(), load)
+        if result is not None:
+            source = "cached"
+            memo = memo_dir()
+            entry = dump(result) if memo else None
+            if entry is not None:
+                put(key, entry, memo)
+        else:
+            result = fn()
+            _store(key, result, dump)
+        flight.result, flight.ok = result, True
+        return result, source
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        flight.done.set()
+
+
+def usage_flags(source: Optional[str]) -> Dict[str, Any]:
+    """log_llm_usage() keyword arguments for a result returned by `call()`."""
+    return {
+        "cached": source == "cached",
+        "deduped": source == "deduped",
+        "coalesced": source == "coalesced",
+        "cost": 0.0 if source else None,
+    }
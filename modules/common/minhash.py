@@ -0,0 +1,71 @@
+"""
+MinHash signatures with LSH banding for near-duplicate candidate search.
+
+Signatures estimate token-set Jaccard similarity; banding buckets items so that pairs above
+roughly (1/bands) ** (1/rows) Jaccard collide in at least one band with high probability.
+Candidates still need exact verification by the caller.
+"""
+import hashlib
+import struct
+from typing import Dict, Hashable, Iterable, List, Sequence, Set, Tuple
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _token_hash(token: str) -> int:
+    return struct.unpack("<I", hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest())[0]
+
+
+class MinHasher:
+    """Deterministic MinHash over token sets (same seed -> comparable signatures across runs)."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        self.num_perm = num_perm
+        params: List[Tuple[int, int]] = []
+        for i in range(num_perm):
+            digest = hashlib.blake2b(f"{seed}:{i}".encode("utf-8"), digest_size=16).digest()
+            a, b = struct.unpack("<QQ", digest)
+            params.append(((a % (_MERSENNE_PRIME - 1)) + 1, b % _MERSENNE_PRIME))
+        self._params = params
+
+    def signature(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        hashes = {_token_hash(t) for t in tokens}
+        if not hashes:
+            return tuple([_MAX_HASH] * self.num_perm)
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._params
+        )
+
+
+def estimate_jaccard(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class LSHIndex:
+    """Banded LSH index; `query` returns previously inserted keys sharing any band bucket."""
+
+    def __init__(self, num_perm: int = 128, bands: int = 32):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[Tuple[int, ...], List[Hashable]]] = [{} for _ in range(bands)]
+
+    def _band_keys(self, signature: Sequence[int]):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, tuple(signature[start:start + self.rows])
+
+    def insert(self, key: Hashable, signature: Sequence[int]) -> None:
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+    def query(self, signature: Sequence[int]) -> Set[Hashable]:
+        found: Set[Hashable] = set()
+        for band, band_key in self._band_keys(signature):
+            found.update(self._buckets[band].get(band_key, ()))
+        return found
@@ -1,10 +1,33 @@
+"""
+Tesseract helpers.
+
+`run_tesseract_page` is the single-pass engine: one recognition per page returns Tesseract's
+TSV, from which the page text, per-line confidences and per-line bboxes are all derived by
+structure (block/paragraph/line ids), so nothing has to be fuzzy-matched back to the text and
+the image does not need to be re-opened for its size. When `tesserocr` is installed a
+persistent in-process API handle (one per thread and lang/psm/oem) is reused instead of
+forking the `tesseract` binary for every call; otherwise pytesseract runs the binary once.
+"""
 import os
+import threading
+from dataclasses import dataclass, field
 from typing import List, Tuple, Optional, Dict, Any
 from pdf2image import convert_from_path
 import pytesseract
 from PIL import Image
 from .utils import ensure_dir
 
+try:  # pragma: no cover - optional dependency
+    import tesserocr  # type: ignore
+except Exception:  # pragma: no cover
+    tesserocr = None
+
+TSV_COLUMNS = (
+    "level", "page_num", "block_num", "par_num", "line_num", "word_num",
+    "left", "top", "width", "height", "conf", "text",
+)
+_INT_COLUMNS = TSV_COLUMNS[:10]
+
 
 def render_pdf(pdf_path: str, out_dir: str, dpi: int = 300,
                start_page: int = 1, end_page: Optional[int] = None) -> List[str]:
@@ -20,9 +43,174 @@ def render_pdf(pdf_path: str, out_dir: str, dpi: int = 300,
     return paths
 
 
+@dataclass
+class OcrLine:
+    text: str
+    conf: Optional[float]  # mean word confidence, 0..1
+    bbox: List[int]  # pixel [x0, y0, x1, y1]
+    key: Tuple[int, int, int]  # (block_num, par_num, line_num)
+
+
+@dataclass
+class TesseractPage:
+    """
+    One recognized page. `lines` is aligned to `text.splitlines()`; blank separator lines
+    (between paragraphs) are None.
+    """
+
+    text: str
+    lines: List[Optional[OcrLine]]
+    width: int
+    height: int
+    word_data: Dict[str, List[Any]] = field(default_factory=dict)
+    backend: str = "pytesseract"
+
+    @property
+    def page_confidence(self) -> Optional[float]:
+        confs = [c / 100.0 for c, w in zip(self.word_data.get("conf", []), self.word_data.get("text", []))
+                 if c >= 0 and str(w).strip()]
+        return sum(confs) / len(confs) if confs else None
+
+    def line_confidences(self) -> List[Optional[float]]:
+        return [ln.conf if ln else None for ln in self.lines]
+
+    def line_bboxes(self) -> List[Optional[List[float]]]:
+        """Per-line bboxes normalized to 0..1."""
+        if self.width <= 0 or self.height <= 0:
+            return [None for _ in self.lines]
+        out: List[Optional[List[float]]] = []
+        for ln in self.lines:
+            if ln is None:
+                out.append(None)
+                continue
+            x0, y0, x1, y1 = ln.bbox
+            out.append([
+                max(0.0, min(1.0, x0 / self.width)),
+                max(0.0, min(1.0, y0 / self.height)),
+                max(0.0, min(1.0, x1 / self.width)),
+                max(0.0, min(1.0, y1 / self.height)),
+            ])
+        return out
+
+
+def parse_tesseract_tsv(tsv: str) -> Dict[str, List[Any]]:
+    """Tesseract TSV (with or without the header row) as pytesseract's Output.DICT layout."""
+    data: Dict[str, List[Any]] = {col: [] for col in TSV_COLUMNS}
+    for raw in (tsv or "").splitlines():
+        parts = raw.split("\t")
+        if len(parts) < 11 or parts[0] == "level":
+            continue
+        if len(parts) == 11:
+            parts.append("")
+        try:
+            ints = [int(v) for v in parts[:10]]
+            conf = float(parts[10])
+        except ValueError:
+            continue
+        for col, value in zip(_INT_COLUMNS, ints):
+            data[col].append(value)
+        data["conf"].append(conf)
+        data["text"].append("\t".join(parts[11:]))
+    return data
+
+
+def page_from_word_data(data: Dict[str, List[Any]], backend: str = "pytesseract") -> TesseractPage:
+    """
+    Build text + aligned lines from word data the way Tesseract's text renderer lays out a
+    page: words joined by spaces, one line per text line, a blank line after each paragraph.
+    """
+    width = height = 0
+    groups: Dict[Tuple[int, int, int], Dict[str, Any]] = {}
+    order: List[Tuple[int, int, int]] = []
+    for i, level in enumerate(data.get("level", [])):
+        if level == 1:
+            width, height = int(data["width"][i]), int(data["height"][i])
+            continue
+        word = str(data["text"][i] or "").strip()
+        if level != 5 or not word:
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        grp = groups.get(key)
+        if grp is None:
+            grp = groups[key] = {"words": [], "confs": [], "bbox": None}
+            order.append(key)
+        grp["words"].append(word)
+        conf = float(data["conf"][i])
+        if conf >= 0:
+            grp["confs"].append(max(0.0, min(1.0, conf / 100.0)))
+        x0, y0 = int(data["left"][i]), int(data["top"][i])
+        x1, y1 = x0 + int(data["width"][i]), y0 + int(data["height"][i])
+        bb = grp["bbox"]
+        grp["bbox"] = [x0, y0, x1, y1] if bb is None else [min(bb[0], x0), min(bb[1], y0), max(bb[2], x1), max(bb[3], y1)]
+
+    text_lines: List[str] = []
+    lines: List[Optional[OcrLine]] = []
+    prev_para = None
+    for key in order:
+        grp = groups[key]
+        para = key[:2]
+        if prev_para is not None and para != prev_para:
+            text_lines.append("")
+            lines.append(None)
+        prev_para = para
+        line_text = " ".join(grp["words"])
+        conf = sum(grp["confs"]) / len(grp["confs"]) if grp["confs"] else None
+        text_lines.append(line_text)
+        lines.append(OcrLine(text=line_text, conf=conf, bbox=grp["bbox"], key=key))
+    text = "\n".join(text_lines) + ("\n" if text_lines else "")
+    return TesseractPage(text=text, lines=lines, width=width, height=height, word_data=data, backend=backend)
+
+
+_api_local = threading.local()
+
+
+def _tesserocr_api(lang: str, psm: int, oem: int):
+    """Per-thread persistent tesserocr handle for (lang, psm, oem), or None when unavailable."""
+    if tesserocr is None:
+        return None
+    apis = getattr(_api_local, "apis", None)
+    if apis is None:
+        apis = _api_local.apis = {}
+    key = (lang, psm, oem)
+    if key not in apis:
+        try:
+            apis[key] = tesserocr.PyTessBaseAPI(lang=lang, psm=psm, oem=oem)
+        except Exception:
+            apis[key] = None
+    return apis[key]
+
+
+def run_tesseract_page(
+    image_path: str,
+    lang: str = "eng",
+    psm: int = 4,
+    oem: int = 3,
+    tesseract_cmd: Optional[str] = None,
+) -> TesseractPage:
+    """One Tesseract recognition of `image_path`; see module docstring."""
+    api = None if tesseract_cmd else _tesserocr_api(lang, psm, oem)
+    with Image.open(image_path) as img:
+        if api is not None:
+            api.SetImage(img)
+            api.Recognize()
+            tsv = api.GetTSVText(0)
+            api.Clear()
+            page = page_from_word_data(parse_tesseract_tsv(tsv), backend="tesserocr")
+            if not page.width:
+                page.width, page.height = img.size
+            return page
+        if tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        config = f"--psm {psm} --oem {oem}"
+        tsv = pytesseract.image_to_data(img, lang=lang, config=config)
+    return page_from_word_data(parse_tesseract_tsv(tsv))
+
+
 def run_ocr(image_path: str, lang: str = "eng",
             psm: int = 4, oem: int = 3,
             tesseract_cmd: Optional[str] = None) -> str:
+    if not tesseract_cmd and _tesserocr_api(lang, psm, oem) is not None:
+        return run_tesseract_page(image_path, lang=lang, psm=psm, oem=oem).text
     if tesseract_cmd:
         pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
     config = f"--psm {psm} --oem {oem}"
@@ -39,20 +227,12 @@ def run_ocr_with_word_data(
     tesseract_cmd: Optional[str] = None,
 ) -> Tuple[str, Dict[str, Any]]:
     """
-    Run Tesseract OCR and return both text and word-level data (incl. confidences).
+    Run Tesseract OCR once and return both text and word-level data (incl. confidences).
 
     Notes:
-    - `pytesseract.image_to_data` returns confidences in 0..100 (or -1 for non-words).
-    - Returned `data` is the raw `Output.DICT` payload from pytesseract.
+    - Confidences are in 0..100 (or -1 for non-words), as in `pytesseract.image_to_data`.
+    - Returned `data` has the `Output.DICT` layout; the text is derived from it
+      (see `run_tesseract_page`).
     """
-    if tesseract_cmd:
-        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
-    config = f"--psm {psm} --oem {oem}"
-    with Image.open(image_path) as img:
-        text = pytesseract.image_to_string(img, lang=lang, config=config)
-        try:
-            from pytesseract import Output
-            data = pytesseract.image_to_data(img, lang=lang, config=config, output_type=Output.DICT)
-        except Exception:
-            data = {}
-    return text, data
+    page = run_tesseract_page(image_path, lang=lang, psm=psm, oem=oem, tesseract_cmd=tesseract_cmd)
+    return page.text, page.word_data
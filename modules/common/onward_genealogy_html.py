@@ -432,24 +432,26 @@ def _append_genealogy_heading_and_rows(base_table: Any, heading_tags: List[Any],
         base_tbody.append(_clone_genealogy_row(row, col_count, soup))
 
 
-def _preserve_figure_and_image_attrs(original_html: str, merged_html: str) -> str:
-    original_soup = BeautifulSoup(original_html or "", "html.parser")
-    merged_soup = BeautifulSoup(merged_html or "", "html.parser")
-
-    original_imgs = original_soup.find_all("img")
-    merged_imgs = merged_soup.find_all("img")
-    if len(original_imgs) != len(merged_imgs):
-        return merged_html
+def _figure_and_image_attrs(soup: BeautifulSoup) -> List[Any]:
+    attrs = []
+    for img in soup.find_all("img"):
+        parent = img.parent
+        figure_attrs = dict(parent.attrs) if getattr(parent, "name", None) == "figure" else None
+        attrs.append((dict(img.attrs), figure_attrs))
+    return attrs
+
+
+def _restore_figure_and_image_attrs(original_attrs: List[Any], soup: BeautifulSoup) -> None:
+    merged_imgs = soup.find_all("img")
+    if len(original_attrs) != len(merged_imgs):
+        return
 
-    for original_img, merged_img in zip(original_imgs, merged_imgs):
-        merged_img.attrs = dict(original_img.attrs)
+    for (img_attrs, figure_attrs), merged_img in zip(original_attrs, merged_imgs):
+        merged_img.attrs = dict(img_attrs)
 
-        original_parent = original_img.parent
         merged_parent = merged_img.parent
-        if getattr(original_parent, "name", None) == "figure" and getattr(merged_parent, "name", None) == "figure":
-            merged_parent.attrs = dict(original_parent.attrs)
-
-    return merged_soup.decode_contents()
+        if figure_attrs is not None and getattr(merged_parent, "name", None) == "figure":
+            merged_parent.attrs = dict(figure_attrs)
 
 
 def merge_contiguous_genealogy_tables(html: str, *, rescue_normalizer: Optional[Any] = None) -> str:
@@ -468,11 +470,10 @@ def merge_contiguous_genealogy_tables(html: str, *, rescue_normalizer: Optional[
     if normalizer is None:
         normalizer = _normalize_genealogy_rescue_html
 
-    normalized = html or ""
-    if normalizer is not None:
-        normalized = normalizer(normalized)
-
-    soup = BeautifulSoup(normalized, "html.parser")
+    # The working tree is parsed from the normalized HTML; image and figure attributes are
+    # taken from the detection tree and restored on it in place.
+    original_attrs = _figure_and_image_attrs(original_soup)
+    soup = BeautifulSoup(normalizer(html or "") if normalizer else html or "", "html.parser")
     _convert_genealogy_name_list_paragraphs_to_tables(soup)
     for base_table in list(soup.find_all("table")):
         if base_table.parent is None or not _is_genealogy_table_header(base_table):
@@ -514,4 +515,5 @@ def merge_contiguous_genealogy_tables(html: str, *, rescue_normalizer: Optional[
         if _is_genealogy_table_header(table):
             _normalize_genealogy_body_rows(table, soup)
 
-    return _preserve_figure_and_image_attrs(html, soup.decode_contents())
+    _restore_figure_and_image_attrs(original_attrs, soup)
+    return soup.decode_contents()
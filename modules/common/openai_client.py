@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from typing import Any, Optional, Tuple
+import importlib
+from typing import Any, Callable, Dict, Optional, Tuple
 
+from modules.common import llm_cache, provider_quota
 from modules.common.utils import log_llm_usage
 
 try:  # pragma: no cover - import is environment-dependent
@@ -29,15 +31,44 @@ def _extract_usage(response: Any) -> Tuple[int, int]:
     return int(prompt or 0), int(completion or 0)
 
 
+def _dump_response(response: Any) -> Optional[Dict[str, Any]]:
+    cls = type(response)
+    if not cls.__module__.startswith("openai.") or not hasattr(response, "model_dump"):
+        return None
+    return {"type": f"{cls.__module__}:{cls.__qualname__}", "response": response.model_dump(mode="json")}
+
+
+def _load_response(entry: Dict[str, Any]) -> Optional[Any]:
+    try:
+        module_name, qualname = entry["type"].split(":", 1)
+        if not module_name.startswith("openai."):
+            return None
+        cls: Any = importlib.import_module(module_name)
+        for part in qualname.split("."):
+            cls = getattr(cls, part)
+        return cls.model_validate(entry["response"])
+    except Exception:
+        return None
+
+
+def _create(create: Callable[..., Any], kind: str, kwargs: Dict[str, Any], logger) -> Any:
+    """Run one request through the response reuse layer and provider quota."""
+    def send():
+        with provider_quota.acquire("openai"):
+            return create(**kwargs)
+
+    response, source = llm_cache.call("openai", kind, kwargs, send, dump=_dump_response, load=_load_response)
+    logger(response, kwargs.get("model"), source=source)
+    return response
+
+
 class _ChatCompletionsProxy:
     def __init__(self, client: Any, logger):
         self._client = client
         self._logger = logger
 
     def create(self, **kwargs):
-        response = self._client.chat.completions.create(**kwargs)
-        self._logger(response, kwargs.get("model"))
-        return response
+        return _create(self._client.chat.completions.create, "chat", kwargs, self._logger)
 
 
 class _ChatProxy:
@@ -53,9 +84,7 @@ class _ResponsesProxy:
     def create(self, **kwargs):
         if not hasattr(self._client, "responses"):
             raise RuntimeError("OpenAI client does not support responses API")
-        response = self._client.responses.create(**kwargs)
-        self._logger(response, kwargs.get("model"))
-        return response
+        return _create(self._client.responses.create, "responses", kwargs, self._logger)
 
 
 class OpenAI:
@@ -72,7 +101,7 @@ class OpenAI:
         if hasattr(self._client, "responses"):
             self.responses = _ResponsesProxy(self._client, self._log_usage)
 
-    def _log_usage(self, response: Any, model: Optional[str]):
+    def _log_usage(self, response: Any, model: Optional[str], source: Optional[str] = None):
         prompt_tokens, completion_tokens = _extract_usage(response)
         if model is None:
             model = getattr(response, "model", None)
@@ -81,4 +110,5 @@ class OpenAI:
             prompt_tokens=prompt_tokens,
             completion_tokens=completion_tokens,
             provider="openai",
+            **llm_cache.usage_flags(source),
         )
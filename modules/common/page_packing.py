@@ -0,0 +1,129 @@
+"""
+Pack several sparse page images into one vision request.
+
+Chapter openers, short sections and end matter carry little text, yet each one costs a full
+OCR request with the full system prompt. These helpers let an OCR module send a few such pages
+as one composite image and split the reply back per page:
+
+- `ink_ratio`: fraction of dark pixels on a thumbnail, used to pick low-ink pages.
+- `compose_tile`: grid layout in the style of contact_sheet_builder_v1.make_contact_sheets
+  (fixed-width cells, padding, row height = tallest cell), with a "PAGE k" marker bar above
+  each page instead of a number drawn over it, so no page content is hidden.
+- `split_marked_output`: cuts a reply on `<!-- PAGE k -->` markers; returns None unless every
+  expected marker appears exactly once and in order, so callers can fall back to single-page
+  requests.
+"""
+import math
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Allow large page images from high-resolution scans.
+Image.MAX_IMAGE_PIXELS = None
+
+PAGE_MARKER_RE = re.compile(r"<!--\s*PAGE\s+(\d+)\s*-->", re.IGNORECASE)
+
+
+def page_marker(label: int) -> str:
+    return f"<!-- PAGE {label} -->"
+
+
+def ink_ratio(path: str, dark_threshold: int = 160, thumb_size: int = 512) -> float:
+    """Fraction of pixels darker than `dark_threshold` on a grayscale thumbnail."""
+    with Image.open(path) as src:
+        img = src.convert("L")
+    img.thumbnail((thumb_size, thumb_size))
+    hist = img.histogram()
+    total = sum(hist)
+    if not total:
+        return 0.0
+    return sum(hist[: dark_threshold + 1]) / total
+
+
+def _load_font(size: int):
+    try:
+        return ImageFont.truetype("DejaVuSans-Bold.ttf", size)
+    except Exception:
+        try:
+            return ImageFont.truetype("DejaVuSans.ttf", size)
+        except Exception:
+            return ImageFont.load_default()
+
+
+def compose_tile(
+    image_paths: Sequence[str],
+    out_path: str,
+    *,
+    grid_cols: int = 2,
+    cell_width: int = 1024,
+    pad: int = 24,
+    marker_height: int = 56,
+    quality: int = 90,
+) -> Dict[str, Any]:
+    """
+    Lay pages out on a grid, label cell k (1-based) with a "PAGE k" bar and save as JPEG.
+    Returns {"path", "width", "height", "cells": [{"label", "source_image", "bbox"}]}.
+    """
+    font = _load_font(int(marker_height * 0.6))
+    thumbs = []
+    max_h = 0
+    for path in image_paths:
+        with Image.open(path) as src:
+            im = src.convert("RGB")
+        w, h = im.size
+        scale = min(1.0, cell_width / float(w))
+        thumb = im.resize((max(1, int(w * scale)), max(1, int(h * scale))), Image.Resampling.LANCZOS)
+        thumbs.append((path, thumb))
+        max_h = max(max_h, thumb.height)
+
+    cols = max(1, min(grid_cols, len(thumbs)))
+    rows = math.ceil(len(thumbs) / cols)
+    row_h = marker_height + max_h
+    sheet_w = cols * cell_width + (cols + 1) * pad
+    sheet_h = rows * row_h + (rows + 1) * pad
+    sheet = Image.new("RGB", (sheet_w, sheet_h), color=(255, 255, 255))
+    draw = ImageDraw.Draw(sheet)
+
+    cells: List[Dict[str, Any]] = []
+    for local_idx, (path, thumb) in enumerate(thumbs):
+        row = local_idx // cols
+        col = local_idx % cols
+        x = pad + col * (cell_width + pad)
+        y = pad + row * (row_h + pad)
+        label = local_idx + 1
+        draw.rectangle([x, y, x + cell_width - 1, y + marker_height - 1], fill=(0, 0, 0))
+        draw.text((x + 12, y + marker_height * 0.15), f"PAGE {label}", font=font, fill=(255, 255, 255))
+        sheet.paste(thumb, (x, y + marker_height))
+        # Frame each page so neighbouring cells are not read as one spread.
+        draw.rectangle(
+            [x - 2, y + marker_height - 2, x + thumb.width + 1, y + marker_height + thumb.height + 1],
+            outline=(128, 128, 128),
+            width=2,
+        )
+        cells.append({
+            "label": label,
+            "source_image": str(path),
+            "bbox": {"x": x, "y": y + marker_height, "width": thumb.width, "height": thumb.height},
+        })
+
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    sheet.save(out_path, format="JPEG", quality=quality)
+    return {"path": str(out_path), "width": sheet_w, "height": sheet_h, "cells": cells}
+
+
+def split_marked_output(text: str, labels: Sequence[int]) -> Optional[Dict[int, str]]:
+    """
+    Split a packed reply into {label: chunk}. Text before the first marker is dropped.
+    Returns None when markers are missing, repeated, unexpected or out of order.
+    """
+    matches = list(PAGE_MARKER_RE.finditer(text or ""))
+    found = [int(m.group(1)) for m in matches]
+    if found != list(labels):
+        return None
+    chunks: Dict[int, str] = {}
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        chunks[found[i]] = text[match.end():end].strip()
+    return chunks
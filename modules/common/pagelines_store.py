@@ -0,0 +1,306 @@
+"""
+Packed page-lines store: one append-only data file plus an offset table per OCR output dir.
+
+Layout (next to the legacy pagelines_index.json):
+    pagelines-<id>.pack       page payloads as UTF-8 JSON, one per line (also valid JSONL)
+    pagelines.pack.idx.json   {"schema_version": "pagelines_pack_v1", "data": "pagelines-<id>.pack",
+                               "base": <dir|null>, "legacy_index_sha256": <sha|null>,
+                               "keys": [visible keys in order], "pages": {key: [offset, length]}}
+
+Readers map the data file with mmap and slice records on demand (`get_page`, `iter_pages`), so a
+stage touching every page does one open instead of one per page. An overlay pack (escalation,
+final merge) stores only the pages it changed and points at its base pack; inherited keys are
+looked up in the base, so the base is never copied.
+
+`open_pagelines(path)` accepts either a pagelines_index.json or a pack dir/idx and falls back to
+the legacy per-page JSON files when no matching pack exists. A pack is only trusted when its
+recorded legacy index hash matches the index file, so a module that rewrites the legacy index
+without updating the pack never reads stale pages.
+"""
+import hashlib
+import json
+import mmap
+import os
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+PACK_DATA_PREFIX = "pagelines-"
+PACK_DATA_SUFFIX = ".pack"
+PACK_INDEX_NAME = "pagelines.pack.idx.json"
+LEGACY_INDEX_NAME = "pagelines_index.json"
+PACK_SCHEMA_VERSION = "pagelines_pack_v1"
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def pack_dir_for(path: str) -> str:
+    """Directory holding the pack for a legacy index path, pack idx path or directory."""
+    if os.path.isdir(path):
+        return path
+    return os.path.dirname(os.path.abspath(path))
+
+
+def has_pack(pack_dir: str) -> bool:
+    return os.path.exists(os.path.join(pack_dir, PACK_INDEX_NAME))
+
+
+class PackWriter:
+    """
+    Append pages to a pack. With `base`, only pages passed to `add` are stored; `inherit(key)`
+    exposes an unchanged base page without copying it. With `append=True` records are appended to the existing
+    data file and later keys supersede earlier ones (offsets already handed out stay valid).
+    Call `close()` (or use as a context manager) to publish the offset table atomically; until
+    then readers keep seeing the previous table and data file.
+    """
+
+    def __init__(self, pack_dir: str, base: Optional[str] = None, append: bool = False):
+        self.pack_dir = pack_dir
+        os.makedirs(pack_dir, exist_ok=True)
+        self.base = os.path.abspath(base) if base else None
+        if self.base and os.path.abspath(pack_dir) == self.base:
+            raise ValueError("overlay pack cannot use its own directory as base")
+        self._pages: Dict[str, List[int]] = {}
+        self._keys: Dict[str, None] = {}
+        self.legacy_index_sha256: Optional[str] = None
+        existing = _read_table(pack_dir) if append and has_pack(pack_dir) else None
+        if existing:
+            self._data_name = existing["data"]
+            self._pages = {k: list(v) for k, v in existing["pages"].items()}
+            self._keys = dict.fromkeys(existing.get("keys") or existing["pages"])
+            if existing.get("base") and not self.base:
+                self.base = os.path.normpath(os.path.join(os.path.abspath(pack_dir), existing["base"]))
+            self._fh = open(os.path.join(pack_dir, self._data_name), "ab")
+        else:
+            # A fresh data file per write session keeps open readers of the old pack valid.
+            self._data_name = f"{PACK_DATA_PREFIX}{uuid.uuid4().hex[:12]}{PACK_DATA_SUFFIX}"
+            self._fh = open(os.path.join(pack_dir, self._data_name), "wb")
+        self._offset = self._fh.tell()
+
+    def add(self, key: Any, page: Dict[str, Any]) -> None:
+        record = json.dumps(page, ensure_ascii=False).encode("utf-8") + b"\n"
+        self._fh.write(record)
+        self._pages[str(key)] = [self._offset, len(record) - 1]
+        self._keys[str(key)] = None
+        self._offset += len(record)
+
+    def inherit(self, key: Any) -> None:
+        """Expose the base pack's page for `key` unchanged."""
+        if not self.base:
+            raise ValueError("inherit() requires a base pack")
+        self._keys[str(key)] = None
+
+    def carry(self, key: Any, page: Dict[str, Any]) -> None:
+        """Keep an unchanged page: inherited when there is a base pack, stored otherwise."""
+        if self.base:
+            self.inherit(key)
+        else:
+            self.add(key, page)
+
+    def bind_legacy_index(self, index_path: str) -> None:
+        """Record the hash of the pagelines_index.json written alongside this pack."""
+        self.legacy_index_sha256 = _file_sha256(index_path)
+
+    def close(self) -> str:
+        idx_path = os.path.join(self.pack_dir, PACK_INDEX_NAME)
+        if self._fh.closed:
+            return idx_path
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._fh.close()
+        base = None
+        if self.base:
+            base = os.path.relpath(self.base, os.path.abspath(self.pack_dir))
+        table = {
+            "schema_version": PACK_SCHEMA_VERSION,
+            "data": self._data_name,
+            "base": base,
+            "legacy_index_sha256": self.legacy_index_sha256,
+            "keys": list(self._keys),
+            "pages": self._pages,
+        }
+        tmp_path = idx_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(table, f, ensure_ascii=False)
+        os.replace(tmp_path, idx_path)
+        for name in os.listdir(self.pack_dir):
+            if name.startswith(PACK_DATA_PREFIX) and name.endswith(PACK_DATA_SUFFIX) and name != self._data_name:
+                os.remove(os.path.join(self.pack_dir, name))
+        return idx_path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._fh.close()
+
+
+def _read_table(pack_dir: str) -> Dict[str, Any]:
+    with open(os.path.join(pack_dir, PACK_INDEX_NAME), "r", encoding="utf-8") as f:
+        table = json.load(f)
+    if table.get("schema_version") != PACK_SCHEMA_VERSION:
+        raise ValueError(f"Unsupported page-lines pack: {pack_dir}")
+    return table
+
+
+class PageLinesPack:
+    """Read-only mmap view of a pack (and, transitively, its base packs)."""
+
+    def __init__(self, pack_dir: str):
+        self.pack_dir = os.path.abspath(pack_dir)
+        table = _read_table(self.pack_dir)
+        self._data_name = table["data"]
+        self.legacy_index_sha256 = table.get("legacy_index_sha256")
+        self._pages: Dict[str, Tuple[int, int]] = {k: (v[0], v[1]) for k, v in (table.get("pages") or {}).items()}
+        self._keys: Dict[str, None] = dict.fromkeys(table.get("keys") or self._pages)
+        self.base: Optional[PageLinesPack] = None
+        if table.get("base"):
+            self.base = PageLinesPack(os.path.normpath(os.path.join(self.pack_dir, table["base"])))
+        self._fh = None
+        self._mm = None
+
+    def _map(self):
+        if self._mm is None:
+            self._fh = open(os.path.join(self.pack_dir, self._data_name), "rb")
+            if os.fstat(self._fh.fileno()).st_size == 0:
+                self._mm = b""
+            else:
+                self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mm
+
+    def keys(self) -> List[str]:
+        return list(self._keys)
+
+    def own_keys(self) -> List[str]:
+        """Keys stored in this pack's data file (excludes pages inherited from the base)."""
+        return list(self._pages)
+
+    def __contains__(self, key: Any) -> bool:
+        return str(key) in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get_page(self, key: Any) -> Optional[Dict[str, Any]]:
+        key = str(key)
+        if key not in self._keys:
+            return None
+        loc = self._pages.get(key)
+        if loc is None:
+            return self.base.get_page(key) if self.base else None
+        offset, length = loc
+        return json.loads(bytes(self._map()[offset:offset + length]).decode("utf-8"))
+
+    def record_id(self, key: Any) -> Optional[Tuple[str, int, int]]:
+        """Stable identity of the stored record (data file, offset, length); None if absent."""
+        key = str(key)
+        if key not in self._keys:
+            return None
+        loc = self._pages.get(key)
+        if loc is None:
+            return self.base.record_id(key) if self.base else None
+        return os.path.join(self.pack_dir, self._data_name), loc[0], loc[1]
+
+    def iter_pages(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for key in self.keys():
+            yield key, self.get_page(key)
+
+    def close(self) -> None:
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        if self._fh is not None:
+            self._fh.close()
+        self._mm = None
+        self._fh = None
+        if self.base:
+            self.base.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class LegacyPageLines:
+    """Same API over a pagelines_index.json that maps keys to per-page JSON files."""
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        with open(index_path, "r", encoding="utf-8") as f:
+            self.index: Dict[str, str] = {str(k): v for k, v in json.load(f).items()}
+
+    def keys(self) -> List[str]:
+        return list(self.index)
+
+    def __contains__(self, key: Any) -> bool:
+        return str(key) in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def get_page(self, key: Any) -> Optional[Dict[str, Any]]:
+        path = self.index.get(str(key))
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def record_id(self, key: Any) -> Optional[Tuple[str, int, int]]:
+        """(path, mtime_ns, size) of the page file; None if absent."""
+        path = self.index.get(str(key))
+        try:
+            st = os.stat(path) if path else None
+        except OSError:
+            return None
+        return (path, st.st_mtime_ns, st.st_size) if st else None
+
+    def iter_pages(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for key in self.keys():
+            yield key, self.get_page(key)
+
+    def close(self) -> None:
+        return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def overlay_writer(pack_dir: str, source) -> PackWriter:
+    """Writer for a stage that rewrites some pages of `source` (as returned by open_pagelines)."""
+    base = source.pack_dir if isinstance(source, PageLinesPack) else None
+    if base and os.path.abspath(pack_dir) == base:
+        base = None
+    return PackWriter(pack_dir, base=base)
+
+
+def open_pagelines(path: str):
+    """
+    Open page lines for reading from a pagelines_index.json, a pack dir or a pack idx file.
+    Returns a PageLinesPack when a pack matching the legacy index exists, else LegacyPageLines.
+    """
+    if os.path.isdir(path) or os.path.basename(path) == PACK_INDEX_NAME:
+        pack_dir = pack_dir_for(path)
+        if has_pack(pack_dir):
+            return PageLinesPack(pack_dir)
+        path = os.path.join(pack_dir, LEGACY_INDEX_NAME)
+    pack_dir = pack_dir_for(path)
+    if has_pack(pack_dir):
+        pack = PageLinesPack(pack_dir)
+        if not os.path.exists(path):
+            return pack
+        if pack.legacy_index_sha256 and pack.legacy_index_sha256 == _file_sha256(path):
+            return pack
+        pack.close()
+    return LegacyPageLines(path)
@@ -0,0 +1,155 @@
+"""
+Multi-pattern scanner for the regex-heavy extractors.
+
+Extractors declare their regexes once as named `ScanPattern`s together with the literal keywords
+each pattern cannot match without (e.g. a "turn to N" pattern needs "turn"). `PatternScanner.scan`
+makes one keyword pass over a portion's text (Aho-Corasick via `pyahocorasick` when installed,
+otherwise one substring test per distinct keyword), and a pattern's regex only ever runs on text
+that contains its keywords. Regex results are computed on first use and memoized on the
+`ScanResult`, so every consumer of the same text shares one match stream.
+
+Keyword checks are made on a case-folded copy of the text, so they are sound for IGNORECASE
+patterns too; a pattern with no keywords always runs. `lower=True` patterns run on
+`text.lower()` (and report offsets into it), matching call sites that lowercase first.
+"""
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:  # pragma: no cover - optional dependency
+    import ahocorasick  # type: ignore
+except Exception:  # pragma: no cover
+    ahocorasick = None
+
+Keyword = Union[str, Tuple[str, ...]]
+
+
+@dataclass(frozen=True)
+class ScanPattern:
+    """
+    A named regex. `keywords` lists required literals (lowercase); a tuple entry means "any of
+    these". Leave it empty when the pattern has no reliable literal.
+    """
+
+    name: str
+    regex: "re.Pattern[str]"
+    keywords: Tuple[Keyword, ...] = ()
+    lower: bool = False
+
+
+@dataclass(frozen=True)
+class ScanMatch:
+    name: str
+    start: int
+    end: int
+    groups: Tuple[Optional[str], ...]
+    match: "re.Match[str]" = field(compare=False, repr=False)
+
+
+def _fold(text: str) -> str:
+    # casefold() covers IGNORECASE equivalences except dotless i, which `re` also treats as "i".
+    return text.casefold().replace("ı", "i")
+
+
+class ScanResult:
+    """Lazy, memoized matches of one scanner over one text."""
+
+    def __init__(self, scanner: "PatternScanner", text: str, present: frozenset):
+        self.scanner = scanner
+        self.text = text
+        self.present = present
+        self._lower: Optional[str] = None
+        self._all: Dict[str, List["re.Match[str]"]] = {}
+        self._first: Dict[str, Optional["re.Match[str]"]] = {}
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    def possible(self, name: str) -> bool:
+        """False when the keyword prefilter rules the pattern out for this text."""
+        pattern = self.scanner.patterns[name]
+        for kw in pattern.keywords:
+            options = kw if isinstance(kw, tuple) else (kw,)
+            if not any(opt in self.present for opt in options):
+                return False
+        return True
+
+    def _subject(self, pattern: ScanPattern) -> str:
+        return self.lower if pattern.lower else self.text
+
+    def search(self, name: str) -> Optional["re.Match[str]"]:
+        """First match of pattern `name` (as `regex.search`)."""
+        if name in self._first:
+            return self._first[name]
+        if name in self._all:
+            found = self._all[name][0] if self._all[name] else None
+        elif not self.possible(name):
+            found = None
+        else:
+            pattern = self.scanner.patterns[name]
+            found = pattern.regex.search(self._subject(pattern))
+        self._first[name] = found
+        return found
+
+    def finditer(self, name: str) -> List["re.Match[str]"]:
+        """All non-overlapping matches of pattern `name` (as `regex.finditer`)."""
+        found = self._all.get(name)
+        if found is None:
+            if self.possible(name):
+                pattern = self.scanner.patterns[name]
+                found = list(pattern.regex.finditer(self._subject(pattern)))
+            else:
+                found = []
+            self._all[name] = found
+        return found
+
+    def matches(self, names: Optional[Iterable[str]] = None) -> List[ScanMatch]:
+        """Typed matches of `names` (default: all patterns) ordered by offset, then name order."""
+        order = list(names) if names is not None else list(self.scanner.patterns)
+        rank = {n: i for i, n in enumerate(order)}
+        out = [
+            ScanMatch(name=n, start=m.start(), end=m.end(), groups=m.groups(), match=m)
+            for n in order
+            for m in self.finditer(n)
+        ]
+        out.sort(key=lambda sm: (sm.start, rank[sm.name]))
+        return out
+
+
+class PatternScanner:
+    def __init__(self, patterns: Sequence[ScanPattern]):
+        self.patterns: Dict[str, ScanPattern] = {}
+        for p in patterns:
+            if p.name in self.patterns:
+                raise ValueError(f"duplicate scan pattern: {p.name}")
+            self.patterns[p.name] = p
+        keywords = set()
+        for p in patterns:
+            for kw in p.keywords:
+                keywords.update(kw if isinstance(kw, tuple) else (kw,))
+        self.keywords = tuple(sorted(k.lower() for k in keywords if k))
+        self._automaton = None
+        if ahocorasick is not None and self.keywords:
+            automaton = ahocorasick.Automaton()
+            for kw in self.keywords:
+                automaton.add_word(kw, kw)
+            automaton.make_automaton()
+            self._automaton = automaton
+        self._cached_scan = lru_cache(maxsize=8)(self._scan)
+
+    def keywords_in(self, text: str) -> frozenset:
+        folded = _fold(text or "")
+        if self._automaton is not None:
+            return frozenset(kw for _, kw in self._automaton.iter(folded))
+        return frozenset(kw for kw in self.keywords if kw in folded)
+
+    def _scan(self, text: str) -> ScanResult:
+        return ScanResult(self, text, self.keywords_in(text))
+
+    def scan(self, text: str) -> ScanResult:
+        """Scan `text`; the last few texts are cached, so helpers over one portion share a result."""
+        return self._cached_scan(text or "")
@@ -0,0 +1,294 @@
+"""
+Shared PDF session and page inventory.
+
+Stages that read a source PDF used to re-open it per query (`pdfplumber.open` for every page's
+text layer) or separately per stage (pypdf to inspect image XObjects). `PdfSession` opens the
+document once per stage, lazily, with pypdf for the object tree and pdfplumber for text, and
+sweeps pages into inventory rows:
+
+    {"schema_version": "pdf_inventory_v1", "pdf_sha256", "page", "page_count", "width_pts", "height_pts",
+     "max_image_dpi", "image_xobject_count", "images": [{"name", "width", "height",
+     "coverage_x", "coverage_y"}], "text", "text_chars"}
+
+Rows are cached in a sidecar `pdf_inventory.jsonl` under
+`<output_root>/cache/pdf_inventory/<pdf sha256>/`, so later stages and reruns on the same PDF
+read the inventory (and the text layer) without parsing the PDF again. `text`/`text_chars` are
+only present once a text sweep has covered the page. Set CODEX_PDF_INVENTORY_DIR to move the
+cache, or to "off" to keep inventories in memory only.
+"""
+import hashlib
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from modules.common.utils import read_jsonl, save_jsonl
+
+PDF_INVENTORY_ENV = "CODEX_PDF_INVENTORY_DIR"
+INVENTORY_FILENAME = "pdf_inventory.jsonl"
+INVENTORY_SCHEMA = "pdf_inventory_v1"
+
+_hashes: Dict[Any, str] = {}
+
+
+def pdf_sha256(pdf_path: str) -> str:
+    """sha256 of the PDF bytes, memoized on (path, mtime, size)."""
+    st = os.stat(pdf_path)
+    stamp = (os.path.abspath(pdf_path), st.st_mtime_ns, st.st_size)
+    digest = _hashes.get(stamp)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(pdf_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = _hashes[stamp] = h.hexdigest()
+    return digest
+
+
+def default_inventory_dir() -> Optional[str]:
+    env = os.environ.get(PDF_INVENTORY_ENV)
+    if env is not None:
+        return None if env.strip().lower() in ("", "0", "off", "none") else env
+    from modules.common.run_registry import resolve_output_root
+
+    return os.path.join(resolve_output_root(), "cache", "pdf_inventory")
+
+
+def load_pdf_reader(pdf_path: str):
+    """pypdf (or PyPDF2) reader, or None when neither is installed / the file is unreadable."""
+    try:
+        from pypdf import PdfReader
+        return PdfReader(pdf_path)
+    except Exception:
+        try:
+            from PyPDF2 import PdfReader
+            return PdfReader(pdf_path)
+        except Exception:
+            return None
+
+
+def resolve_obj(obj):
+    """Resolve indirect PDF objects."""
+    try:
+        return obj.get_object()
+    except Exception:
+        return obj
+
+
+def page_xobjects(page):
+    resources = page.get("/Resources") if hasattr(page, "get") else None
+    if resources and hasattr(resources, "get"):
+        return resources.get("/XObject")
+    return None
+
+
+def _collect_images(xobject, page_w_pts: float, page_h_pts: float, out: List[Dict[str, Any]]) -> None:
+    if not xobject:
+        return
+    for name, ref in xobject.items():
+        obj = resolve_obj(ref)
+        subtype = obj.get("/Subtype") if hasattr(obj, "get") else None
+        if subtype == "/Image":
+            width = obj.get("/Width")
+            height = obj.get("/Height")
+            if not width or not height:
+                continue
+            out.append({
+                "name": str(name),
+                "width": int(width),
+                "height": int(height),
+                "coverage_x": round(float(width) / page_w_pts, 3) if page_w_pts > 0 else 0.0,
+                "coverage_y": round(float(height) / page_h_pts, 3) if page_h_pts > 0 else 0.0,
+            })
+        elif subtype == "/Form":
+            resources = obj.get("/Resources") if hasattr(obj, "get") else None
+            nested = resources.get("/XObject") if resources and hasattr(resources, "get") else None
+            _collect_images(nested, page_w_pts, page_h_pts, out)
+
+
+def page_image_inventory(page) -> Dict[str, Any]:
+    """Page size, image XObjects (incl. nested forms) and the max embedded image DPI."""
+    try:
+        media_box = page.mediabox
+        width_pts = float(media_box.width)
+        height_pts = float(media_box.height)
+    except Exception:
+        return {"width_pts": None, "height_pts": None, "max_image_dpi": None, "image_xobject_count": 0, "images": []}
+    xobject = page_xobjects(page)
+    images: List[Dict[str, Any]] = []
+    _collect_images(xobject, width_pts, height_pts, images)
+    top_level = 0
+    if xobject:
+        for _, ref in xobject.items():
+            obj = resolve_obj(ref)
+            if hasattr(obj, "get") and obj.get("/Subtype") == "/Image":
+                top_level += 1
+    max_dpi = None
+    w_in, h_in = width_pts / 72.0, height_pts / 72.0
+    if w_in > 0 and h_in > 0:
+        for im in images:
+            dpi = max(im["width"] / w_in, im["height"] / h_in)
+            if max_dpi is None or dpi > max_dpi:
+                max_dpi = dpi
+    return {
+        "width_pts": width_pts,
+        "height_pts": height_pts,
+        "max_image_dpi": max_dpi,
+        "image_xobject_count": top_level,
+        "images": images,
+    }
+
+
+class PdfSession:
+    """One open PDF per stage: lazy pypdf reader + pdfplumber document + cached inventory."""
+
+    def __init__(self, pdf_path: str, cache_dir: Optional[str] = "default"):
+        self.pdf_path = str(pdf_path)
+        self.sha256 = pdf_sha256(self.pdf_path)
+        if cache_dir == "default":
+            cache_dir = default_inventory_dir()
+        self.inventory_path = os.path.join(cache_dir, self.sha256, INVENTORY_FILENAME) if cache_dir else None
+        self._reader = None
+        self._reader_loaded = False
+        self._plumber = None
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._page_count: Optional[int] = None
+        self._dirty = False
+        self._lock = threading.RLock()
+        self._load_sidecar()
+
+    # -- documents ----------------------------------------------------------------------------
+
+    @property
+    def reader(self):
+        with self._lock:
+            if not self._reader_loaded:
+                self._reader = load_pdf_reader(self.pdf_path)
+                self._reader_loaded = True
+            return self._reader
+
+    def _plumber_doc(self):
+        if self._plumber is None:
+            import pdfplumber
+
+            self._plumber = pdfplumber.open(self.pdf_path)
+        return self._plumber
+
+    @property
+    def page_count(self) -> int:
+        with self._lock:
+            if self._page_count is None:
+                cached = [row.get("page_count") for row in self._rows.values() if row.get("page_count")]
+                if cached:
+                    self._page_count = int(cached[0])
+                elif self.reader is not None:
+                    self._page_count = len(self.reader.pages)
+                else:
+                    self._page_count = len(self._plumber_doc().pages)
+            return self._page_count
+
+    def page(self, page_num: int):
+        """pypdf page object (1-based) or None."""
+        reader = self.reader
+        if reader is None or not 1 <= page_num <= len(reader.pages):
+            return None
+        return reader.pages[page_num - 1]
+
+    # -- inventory ----------------------------------------------------------------------------
+
+    def _load_sidecar(self) -> None:
+        if not self.inventory_path or not os.path.exists(self.inventory_path):
+            return
+        try:
+            for row in read_jsonl(self.inventory_path):
+                if row.get("pdf_sha256") == self.sha256 and isinstance(row.get("page"), int):
+                    self._rows[row["page"]] = row
+        except Exception:
+            self._rows = {}
+
+    def _sweep_page(self, page_num: int, text: bool) -> Dict[str, Any]:
+        row = self._rows.get(page_num)
+        if row is None:
+            row = {
+                "schema_version": INVENTORY_SCHEMA,
+                "pdf_sha256": self.sha256,
+                "page": page_num,
+                "page_count": self.page_count,
+            }
+            page = self.page(page_num)
+            if page is not None:
+                row.update(page_image_inventory(page))
+            self._rows[page_num] = row
+            self._dirty = True
+        if text and "text" not in row:
+            extracted = ""
+            try:
+                doc = self._plumber_doc()
+                if 1 <= page_num <= len(doc.pages):
+                    extracted = doc.pages[page_num - 1].extract_text() or ""
+            except Exception:
+                extracted = ""
+            row["text"] = extracted
+            row["text_chars"] = len(extracted.strip())
+            self._dirty = True
+        return row
+
+    def inventory(self, pages: Optional[Iterable[int]] = None, text: bool = False) -> Dict[int, Dict[str, Any]]:
+        """
+        Inventory rows for `pages` (default: all), sweeping only pages (or text layers) not
+        already cached, then persisting the sidecar.
+        """
+        with self._lock:
+            wanted = list(pages) if pages is not None else list(range(1, self.page_count + 1))
+            out = {p: self._sweep_page(p, text) for p in wanted}
+            self.save()
+            return out
+
+    def page_row(self, page_num: int, text: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            return self._sweep_page(page_num, text)
+
+    def page_text(self, page_num: int) -> str:
+        """Embedded text layer of a page ('' when there is none)."""
+        return self.page_row(page_num, text=True).get("text") or ""
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty or not self.inventory_path:
+                return
+            os.makedirs(os.path.dirname(self.inventory_path), exist_ok=True)
+            tmp_path = f"{self.inventory_path}.{os.getpid()}.tmp"
+            save_jsonl(tmp_path, [self._rows[p] for p in sorted(self._rows)])
+            os.replace(tmp_path, self.inventory_path)
+            self._dirty = False
+
+    def close(self) -> None:
+        with self._lock:
+            self.save()
+            if self._plumber is not None:
+                try:
+                    self._plumber.close()
+                except Exception:
+                    pass
+                self._plumber = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_sessions: Dict[str, PdfSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_pdf_session(pdf_path: str) -> PdfSession:
+    """Process-wide session per PDF (re-created when the file changes)."""
+    key = os.path.abspath(str(pdf_path))
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None or session.sha256 != pdf_sha256(key):
+            if session is not None:
+                session.close()
+            session = _sessions[key] = PdfSession(key)
+        return session
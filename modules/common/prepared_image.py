@@ -0,0 +1,329 @@
+"""
+Prepared-image cache shared by every vision LLM call site.
+
+`image_data_uri(path, max_long_side=..., crop_box=..., fmt=..., quality=...)` returns the data URI
+a model request needs. Results are keyed by (sha256 of the image bytes, max_long_side, crop_box,
+fmt, quality), so the same page prepared by several stages (or several retries/passes of one
+stage) is read, resized and base64-encoded once per process:
+
+- memory: LRU of finished data URIs, bounded by total size;
+- disk: re-encoded images (crops / downscales) under `<output_root>/cache/prepared_images`,
+  bounded by total size with oldest-first eviction, so later stages and resumed runs skip the
+  decode + resize + encode. Untouched images are not copied to disk; their bytes are the
+  source file.
+
+An image that needs no crop and is already within `max_long_side` is sent as the original file
+bytes (the historic behaviour of the per-module `_encode_image` helpers); `fmt`/`quality` only
+apply when the image is re-encoded. Set CODEX_IMAGE_CACHE_DIR to move the disk cache, or to
+"off" to keep it in memory only.
+"""
+import base64
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Sequence, Tuple
+
+from PIL import Image
+
+# Allow large page images from high-resolution scans.
+Image.MAX_IMAGE_PIXELS = None
+
+IMAGE_CACHE_ENV = "CODEX_IMAGE_CACHE_DIR"
+DEFAULT_MEMORY_BYTES = 256 * 1024 * 1024
+DEFAULT_DISK_BYTES = 2 * 1024 * 1024 * 1024
+
+_MIME_BY_EXT = {
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "gif": "image/gif",
+    "tif": "image/tiff",
+    "tiff": "image/tiff",
+    "bmp": "image/bmp",
+}
+_FORMAT_EXT = {"PNG": "png", "JPEG": "jpeg", "WEBP": "webp"}
+
+
+def mime_for_path(path: str) -> str:
+    ext = os.path.splitext(str(path))[1].lower().lstrip(".") or "jpeg"
+    return _MIME_BY_EXT.get(ext, f"image/{ext}")
+
+
+def bytes_to_data_uri(data: bytes, mime: str) -> str:
+    return f"data:{mime};base64,{base64.b64encode(data).decode('utf-8')}"
+
+
+class PreparedImage(NamedTuple):
+    uri: str
+    width: int
+    height: int
+    pixel_box: Optional[Tuple[int, int, int, int]]
+
+
+def _encode(img: Image.Image, fmt: str, quality: Optional[int]) -> bytes:
+    if fmt == "JPEG" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    buf = io.BytesIO()
+    kwargs: Dict[str, Any] = {}
+    if quality is not None and fmt in ("JPEG", "WEBP"):
+        kwargs["quality"] = int(quality)
+    img.save(buf, format=fmt, **kwargs)
+    return buf.getvalue()
+
+
+class PreparedImageCache:
+    """Thread-safe memory + disk LRU of prepared image data URIs."""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_memory_bytes: int = DEFAULT_MEMORY_BYTES,
+        max_disk_bytes: int = DEFAULT_DISK_BYTES,
+        max_entries: Optional[int] = None,
+        max_decoded: int = 2,
+    ):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.max_entries = max_entries
+        self.max_decoded = max_decoded
+        self._memory: "OrderedDict[Tuple[Any, ...], PreparedImage]" = OrderedDict()
+        self._decoded: "OrderedDict[str, Image.Image]" = OrderedDict()
+        self._memory_bytes = 0
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._disk_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # -- keys -------------------------------------------------------------------------------
+
+    def _digest(self, path: str) -> Tuple[str, Optional[bytes]]:
+        """sha256 of the file, memoized on (path, mtime, size); returns the bytes when read."""
+        st = os.stat(path)
+        stamp = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            digest = self._digests.get(stamp)
+        if digest:
+            return digest, None
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._digests[stamp] = digest
+        return digest, data
+
+    # -- memory tier ------------------------------------------------------------------------
+
+    def _get_memory(self, key) -> Optional[PreparedImage]:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def _put_memory(self, key, value: PreparedImage) -> None:
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = value
+            self._memory_bytes += len(value.uri)
+            while len(self._memory) > 1 and (
+                self._memory_bytes > self.max_memory_bytes
+                or (self.max_entries is not None and len(self._memory) > self.max_entries)
+            ):
+                _, old = self._memory.popitem(last=False)
+                self._memory_bytes -= len(old.uri)
+
+    def _decode(self, path: str, digest: str) -> Image.Image:
+        """Decoded source image, kept for the next few crops/resizes of the same page."""
+        with self._lock:
+            img = self._decoded.get(digest)
+            if img is not None:
+                self._decoded.move_to_end(digest)
+                return img
+        with Image.open(path) as src:
+            src.load()
+            img = src.copy()
+        if self.max_decoded > 0:
+            with self._lock:
+                self._decoded[digest] = img
+                while len(self._decoded) > self.max_decoded:
+                    self._decoded.popitem(last=False)
+        return img
+
+    # -- disk tier --------------------------------------------------------------------------
+
+    def _disk_path(self, key_hash: str, fmt: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, key_hash[:2], f"{key_hash}.{_FORMAT_EXT.get(fmt, fmt.lower())}")
+
+    def _get_disk(self, path: Optional[str]) -> Optional[bytes]:
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path, None)  # refresh LRU position
+        except OSError:
+            return None
+        with self._lock:
+            self.disk_hits += 1
+        return data
+
+    def _put_disk(self, path: Optional[str], data: bytes) -> None:
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            else:
+                self._disk_bytes += len(data)
+            over = self._disk_bytes > self.max_disk_bytes
+        if over:
+            self._evict_disk()
+
+    def _disk_files(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                full = os.path.join(root, name)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                yield full, st.st_mtime, st.st_size
+
+    def _scan_disk_bytes(self) -> int:
+        return sum(size for _, _, size in self._disk_files())
+
+    def _evict_disk(self) -> None:
+        entries = sorted(self._disk_files(), key=lambda e: e[1])
+        total = sum(size for _, _, size in entries)
+        target = int(self.max_disk_bytes * 0.9)
+        for full, _, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(full)
+            except OSError:
+                continue
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+
+    # -- public -----------------------------------------------------------------------------
+
+    def prepare(
+        self,
+        path: str,
+        *,
+        max_long_side: int = 0,
+        crop_box: Optional[Sequence[int]] = None,
+        fmt: Optional[str] = None,
+        quality: Optional[int] = None,
+    ) -> PreparedImage:
+        path = str(path)
+        fmt = (fmt or "PNG").upper()
+        if fmt == "JPG":
+            fmt = "JPEG"
+        box = tuple(int(v) for v in crop_box) if crop_box is not None else None
+        max_long_side = int(max_long_side or 0)
+        digest, data = self._digest(path)
+        key = (digest, max_long_side, box, fmt, quality)
+        cached = self._get_memory(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            self.misses += 1
+        if box is None:
+            with Image.open(path) as probe:
+                width, height = probe.size
+            if max_long_side <= 0 or max(width, height) <= max_long_side:
+                if data is None:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                prepared = PreparedImage(bytes_to_data_uri(data, mime_for_path(path)), width, height, None)
+                self._put_memory(key, prepared)
+                return prepared
+
+        key_hash = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        disk_path = self._disk_path(key_hash, fmt)
+        encoded = self._get_disk(disk_path)
+        if encoded is not None:
+            with Image.open(io.BytesIO(encoded)) as probe:
+                width, height = probe.size
+        else:
+            src = self._decode(path, digest)
+            img = src.crop(box) if box is not None else src
+            width, height = img.size
+            if max_long_side > 0 and max(width, height) > max_long_side:
+                scale = max_long_side / max(width, height)
+                img = img.resize((int(width * scale), int(height * scale)), Image.LANCZOS)
+                width, height = img.size
+            encoded = _encode(img, fmt, quality)
+            self._put_disk(disk_path, encoded)
+        mime = _MIME_BY_EXT[_FORMAT_EXT.get(fmt, "png")]
+        prepared = PreparedImage(bytes_to_data_uri(encoded, mime), width, height, box)
+        self._put_memory(key, prepared)
+        return prepared
+
+    def data_uri(self, path: str, **kwargs) -> str:
+        return self.prepare(path, **kwargs).uri
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
+
+
+_default_cache: Optional[PreparedImageCache] = None
+_default_lock = threading.Lock()
+
+
+def default_cache_dir() -> Optional[str]:
+    env = os.environ.get(IMAGE_CACHE_ENV)
+    if env is not None:
+        return None if env.strip().lower() in ("", "0", "off", "none") else env
+    from modules.common.run_registry import resolve_output_root
+
+    return os.path.join(resolve_output_root(), "cache", "prepared_images")
+
+
+def get_image_cache() -> PreparedImageCache:
+    """Process-wide cache used by `image_data_uri` / `prepare_image`."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = PreparedImageCache(cache_dir=default_cache_dir())
+        return _default_cache
+
+
+def prepare_image(path: str, **kwargs) -> PreparedImage:
+    return get_image_cache().prepare(path, **kwargs)
+
+
+def image_data_uri(path: str, **kwargs) -> str:
+    """Data URI for a (possibly cropped / downscaled) image; see PreparedImageCache.prepare."""
+    return get_image_cache().prepare(path, **kwargs).uri
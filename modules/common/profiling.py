@@ -0,0 +1,216 @@
+"""
+On-demand per-stage CPU profiling for driver runs.
+
+The driver wraps selected stage commands so they execute under a profiler:
+- `py-spy` (sampling, low overhead) when the binary is available on PATH
+- `cProfile` otherwise
+
+Every profiled stage writes, into its module folder:
+- `profile_<run_id>_<stage_id>.prof`       (cProfile only; loadable with pstats/snakeviz)
+- `profile_<run_id>_<stage_id>.collapsed`  (flamegraph.pl / speedscope compatible)
+- `profile_<run_id>_<stage_id>.json`       (run/stage ids + top-N hot functions)
+"""
+import os
+import pstats
+import re
+import shutil
+import sys
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from modules.common.utils import save_json
+
+PROFILE_TOP_N = 20
+PROFILE_SAMPLE_RATE = 100  # samples/second for py-spy
+_MAX_STACK_DEPTH = 128
+
+
+def parse_profile_stages(spec: Optional[str], stage_ids: Sequence[str]) -> Set[str]:
+    """
+    Resolve a `--profile-stages` value ("all" or comma-separated stage ids) against the plan.
+    Unknown stage ids raise SystemExit so typos do not silently disable profiling.
+    """
+    if not spec:
+        return set()
+    tokens = [t.strip() for t in str(spec).split(",") if t.strip()]
+    if any(t.lower() == "all" for t in tokens):
+        return set(stage_ids)
+    unknown = [t for t in tokens if t not in stage_ids]
+    if unknown:
+        raise SystemExit(f"--profile-stages references unknown stage ids: {unknown}")
+    return set(tokens)
+
+
+def sampling_profiler_available() -> bool:
+    return shutil.which("py-spy") is not None
+
+
+def _safe_token(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", value or "unknown")
+
+
+def profile_paths(out_dir: str, run_id: str, stage_id: str) -> Dict[str, str]:
+    base = os.path.join(out_dir, f"profile_{_safe_token(run_id)}_{_safe_token(stage_id)}")
+    return {
+        "prof": base + ".prof",
+        "collapsed": base + ".collapsed",
+        "summary": base + ".json",
+    }
+
+
+def wrap_command(cmd: List[str], out_dir: str, run_id: str, stage_id: str,
+                 prefer_sampling: bool = True) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Return (profiled_cmd, profile_meta). `cmd` must be a driver stage command of the form
+    `[python, -m, module, ...]` or `[python, script.py, ...]`.
+    """
+    paths = profile_paths(out_dir, run_id, stage_id)
+    os.makedirs(out_dir, exist_ok=True)
+    meta: Dict[str, Any] = {"run_id": run_id, "stage_id": stage_id, "paths": paths}
+    if prefer_sampling and sampling_profiler_available():
+        meta["profiler"] = "py-spy"
+        wrapped = [
+            shutil.which("py-spy"), "record",
+            "--format", "raw",
+            "--rate", str(PROFILE_SAMPLE_RATE),
+            "--subprocesses",
+            "--output", paths["collapsed"],
+            "--",
+        ] + list(cmd)
+        return wrapped, meta
+
+    meta["profiler"] = "cProfile"
+    python, rest = cmd[0], list(cmd[1:])
+    wrapped = [python, "-m", "cProfile", "-o", paths["prof"]] + rest
+    return wrapped, meta
+
+
+def _func_label(func: Tuple[str, int, str]) -> str:
+    filename, lineno, name = func
+    if filename == "~":
+        return name
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+def pstats_to_collapsed(prof_path: str, out_path: str) -> int:
+    """
+    Convert a cProfile dump into collapsed stacks (`a;b;c <microseconds>`).
+
+    cProfile only keeps caller->callee edges, so full stacks are reconstructed by walking
+    edges from root functions and splitting each function's self time across callers in
+    proportion to the cumulative time they spent calling it. Returns number of lines written.
+    """
+    stats = pstats.Stats(prof_path).stats  # type: ignore[attr-defined]
+    children: Dict[Any, List[Tuple[Any, float]]] = {}
+    for func, (_cc, _nc, _tt, ct, callers) in stats.items():
+        for caller, edge in callers.items():
+            edge_ct = edge[3] if isinstance(edge, tuple) else 0.0
+            share = (edge_ct / ct) if ct else 0.0
+            children.setdefault(caller, []).append((func, share))
+    roots = [f for f, row in stats.items() if not row[4]]
+
+    weights: Counter = Counter()
+
+    def walk(func, path: List[str], fraction: float, on_path: Set[Any]):
+        if fraction <= 0 or len(path) >= _MAX_STACK_DEPTH:
+            return
+        label = _func_label(func)
+        stack = path + [label]
+        self_us = int(round(stats[func][2] * fraction * 1_000_000))
+        if self_us > 0:
+            weights[";".join(stack)] += self_us
+        on_path.add(func)
+        for child, share in children.get(func, []):
+            if child in on_path or child not in stats:
+                continue
+            walk(child, stack, fraction * share, on_path)
+        on_path.discard(func)
+
+    for root in roots:
+        walk(root, [], 1.0, set())
+
+    with open(out_path, "w", encoding="utf-8") as f:
+        for stack, value in sorted(weights.items()):
+            f.write(f"{stack} {value}\n")
+    return len(weights)
+
+
+def summarize_pstats(prof_path: str, top_n: int = PROFILE_TOP_N) -> List[Dict[str, Any]]:
+    stats = pstats.Stats(prof_path).stats  # type: ignore[attr-defined]
+    rows = []
+    for func, (cc, nc, tt, ct, _callers) in stats.items():
+        rows.append({
+            "function": _func_label(func),
+            "calls": nc,
+            "self_seconds": round(tt, 6),
+            "cumulative_seconds": round(ct, 6),
+        })
+    rows.sort(key=lambda r: (-r["self_seconds"], r["function"]))
+    return rows[:top_n]
+
+
+def summarize_collapsed(collapsed_path: str, top_n: int = PROFILE_TOP_N,
+                        sample_rate: int = PROFILE_SAMPLE_RATE) -> List[Dict[str, Any]]:
+    """Top-N leaf frames by sample count (self time) from a collapsed-stack file."""
+    self_counts: Counter = Counter()
+    total_counts: Counter = Counter()
+    with open(collapsed_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            stack, _, count = line.rpartition(" ")
+            try:
+                n = int(count)
+            except ValueError:
+                continue
+            frames = stack.split(";")
+            self_counts[frames[-1]] += n
+            for frame in set(frames):
+                total_counts[frame] += n
+    rows = []
+    for frame, n in self_counts.most_common(top_n):
+        rows.append({
+            "function": frame,
+            "samples": n,
+            "self_seconds": round(n / sample_rate, 6),
+            "cumulative_seconds": round(total_counts[frame] / sample_rate, 6),
+        })
+    return rows
+
+
+def finalize_profile(meta: Dict[str, Any], top_n: int = PROFILE_TOP_N) -> Dict[str, Any]:
+    """
+    Post-process a finished stage profile: derive collapsed stacks (cProfile), compute the
+    hot-function summary, and persist the summary JSON next to the raw profile.
+    Never raises; failures are recorded in the returned summary.
+    """
+    paths = meta.get("paths") or {}
+    summary: Dict[str, Any] = {
+        "schema_version": "stage_profile_v1",
+        "run_id": meta.get("run_id"),
+        "stage_id": meta.get("stage_id"),
+        "profiler": meta.get("profiler"),
+        "prof_path": None,
+        "collapsed_path": None,
+        "top_functions": [],
+    }
+    try:
+        if meta.get("profiler") == "cProfile":
+            prof_path = paths.get("prof")
+            if prof_path and os.path.exists(prof_path):
+                summary["prof_path"] = prof_path
+                pstats_to_collapsed(prof_path, paths["collapsed"])
+                summary["collapsed_path"] = paths["collapsed"]
+                summary["top_functions"] = summarize_pstats(prof_path, top_n)
+        else:
+            collapsed = paths.get("collapsed")
+            if collapsed and os.path.exists(collapsed):
+                summary["collapsed_path"] = collapsed
+                summary["top_functions"] = summarize_collapsed(collapsed, top_n)
+    except Exception as e:  # pragma: no cover - defensive; profiling must never fail a run
+        summary["error"] = str(e)
+        print(f"[profile-warning] failed to summarize profile for {meta.get('stage_id')}: {e}", file=sys.stderr)
+    if paths.get("summary"):
+        save_json(paths["summary"], summary)
+    return summary
@@ -0,0 +1,109 @@
+"""
+Provider request quotas shared by every process of a batch.
+
+When `CODEX_PROVIDER_LIMITS` is set (JSON, e.g. `{"openai": {"concurrency": 8, "rpm": 500}}`)
+the LLM clients wrap each request in `acquire(provider)`:
+- `concurrency` caps requests in flight across all processes. Each request holds an flock on
+  one of N slot files, so a crashed process releases its slot automatically.
+- `rpm` spaces request starts 60/rpm seconds apart. The next free start time is kept in a small
+  state file, updated under an flock.
+
+State lives in `CODEX_PROVIDER_QUOTA_DIR` (default `output/cache/provider_quota`). Without the
+limits variable, or for a provider it does not list, `acquire` does nothing.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import fcntl
+except Exception:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+LIMITS_ENV = "CODEX_PROVIDER_LIMITS"
+QUOTA_DIR_ENV = "CODEX_PROVIDER_QUOTA_DIR"
+DEFAULT_QUOTA_DIR = os.path.join("output", "cache", "provider_quota")
+POLL_SECONDS = 0.05
+
+
+def provider_limits() -> Dict[str, Dict[str, Any]]:
+    raw = os.environ.get(LIMITS_ENV)
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return {}
+    return {str(k): v for k, v in data.items() if isinstance(v, dict)}
+
+
+def quota_dir() -> str:
+    return os.environ.get(QUOTA_DIR_ENV) or DEFAULT_QUOTA_DIR
+
+
+def _positive(value: Any) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def _take_slot(root: str, provider: str, slots: int):
+    """Block until one of `slots` slot files is locked; returns its open file."""
+    while True:
+        for idx in range(slots):
+            f = open(os.path.join(root, f"{provider}.slot.{idx}"), "a")
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return f
+            except OSError:
+                f.close()
+        time.sleep(POLL_SECONDS)
+
+
+def _reserve_start(root: str, provider: str, rpm: float) -> float:
+    """Reserve the next request start for `provider`; returns seconds to wait before it."""
+    interval = 60.0 / rpm
+    state_path = os.path.join(root, f"{provider}.rate.json")
+    with open(os.path.join(root, f"{provider}.rate.lock"), "a") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                next_at = float(json.load(f).get("next_at", 0.0))
+        except (OSError, ValueError):
+            next_at = 0.0
+        now = time.time()
+        start = max(now, next_at)
+        tmp = state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"next_at": start + interval}, f)
+        os.replace(tmp, state_path)
+    return start - now
+
+
+@contextmanager
+def acquire(provider: str) -> Iterator[None]:
+    """Hold one request's worth of `provider` quota for the duration of the block."""
+    limits = provider_limits().get(provider)
+    if not limits or fcntl is None:
+        yield
+        return
+    root = quota_dir()
+    os.makedirs(root, exist_ok=True)
+    slots = _positive(limits.get("concurrency"))
+    rpm = _positive(limits.get("rpm"))
+    slot = _take_slot(root, provider, int(slots)) if slots else None
+    try:
+        if rpm:
+            delay = _reserve_start(root, provider, rpm)
+            if delay > 0:
+                time.sleep(delay)
+        yield
+    finally:
+        if slot is not None:
+            slot.close()
@@ -0,0 +1,265 @@
+"""
+Page-sharded execution for page-local driver stages.
+
+A recipe stage may declare `shard: {by: page, size: N}` (optionally `workers: W` and
+`input: <artifact input key>`). The driver then:
+- splits the stage's page manifest into contiguous shards of N pages
+  (`<module_dir>/shards/NNNN/input.jsonl`),
+- runs the unchanged module command once per shard, concurrently, with the input, `--out`,
+  output directory and state/progress paths rewritten to the shard folder,
+- merges shard outputs in page order into the stage artifact, then stamps/validates it as usual.
+
+Each finished shard writes `shard.json` (input hash, page range, row count). On rerun, shards
+whose marker matches the current input are reused, so a failed stage only redoes the shards
+that did not finish. Side outputs (images, raw dumps) are moved from the shard folder into
+the stage's module folder, and string fields pointing into the shard folder are rebased.
+
+Only stages whose rows do not depend on other pages should be sharded.
+"""
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from modules.common.utils import artifact_format, ensure_dir, read_jsonl, save_json, save_jsonl
+
+SHARD_BY = ("page",)
+DEFAULT_SHARD_WORKERS = 4
+SHARD_INPUT_KEYS = ("pages", "ocr_manifest", "input", "inputs")
+PAGE_KEYS = ("page_number", "page", "source_page")
+SHARD_MARKER = "shard.json"
+
+
+def normalize_shard_conf(conf: Any, stage_id: str) -> Optional[Dict[str, Any]]:
+    """Validate a recipe `shard:` block; returns None when the stage is not sharded."""
+    if conf is None or conf is False:
+        return None
+    if not isinstance(conf, dict):
+        raise SystemExit(f"Stage '{stage_id}': shard must be a mapping like {{by: page, size: 20}}")
+    unknown = set(conf) - {"by", "size", "workers", "input"}
+    if unknown:
+        raise SystemExit(f"Stage '{stage_id}': unknown shard keys {sorted(unknown)}")
+    by = conf.get("by", "page")
+    if by not in SHARD_BY:
+        raise SystemExit(f"Stage '{stage_id}': shard.by must be one of {list(SHARD_BY)}, got {by!r}")
+    size = conf.get("size")
+    if not isinstance(size, int) or isinstance(size, bool) or size < 1:
+        raise SystemExit(f"Stage '{stage_id}': shard.size must be a positive integer")
+    workers = conf.get("workers", DEFAULT_SHARD_WORKERS)
+    if not isinstance(workers, int) or isinstance(workers, bool) or workers < 1:
+        raise SystemExit(f"Stage '{stage_id}': shard.workers must be a positive integer")
+    input_key = conf.get("input")
+    if input_key is not None and not isinstance(input_key, str):
+        raise SystemExit(f"Stage '{stage_id}': shard.input must be an input name")
+    return {"by": by, "size": size, "workers": workers, "input": input_key}
+
+
+def select_shard_input(artifact_inputs: Dict[str, Any], input_key: Optional[str], stage_id: str) -> str:
+    """Pick the manifest path to split: `shard.input` if given, else the first page-manifest input."""
+    keys = [input_key] if input_key else [k for k in SHARD_INPUT_KEYS if k in artifact_inputs]
+    for key in keys:
+        val = artifact_inputs.get(key)
+        if isinstance(val, (list, tuple)):
+            if len(val) != 1:
+                raise SystemExit(f"Stage '{stage_id}': shard input '{key}' has {len(val)} paths; set shard.input")
+            val = val[0]
+        if isinstance(val, str) and val:
+            return val
+    raise SystemExit(f"Stage '{stage_id}': no page manifest input to shard (inputs: {sorted(artifact_inputs)})")
+
+
+def row_page_key(row: Dict[str, Any]) -> Any:
+    for key in PAGE_KEYS:
+        val = row.get(key)
+        if val is not None:
+            return val
+    return None
+
+
+def split_by_page(rows: Sequence[Dict[str, Any]], size: int) -> List[List[Dict[str, Any]]]:
+    """
+    Group rows into contiguous shards of `size` distinct pages, keeping manifest order.
+    Rows without a page key stay with the page before them.
+    """
+    shards: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    seen = 0
+    last_key: Any = object()
+    for row in rows:
+        key = row_page_key(row)
+        if key is not None and key != last_key:
+            if seen == size:
+                shards.append(current)
+                current, seen = [], 0
+            seen += 1
+            last_key = key
+        current.append(row)
+    if current:
+        shards.append(current)
+    return shards
+
+
+def _encode_rows(rows: Sequence[Dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows).encode("utf-8")
+
+
+def _load_marker(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def plan_shards(input_path: str, shard_root: str, size: int, artifact_name: str) -> List[Dict[str, Any]]:
+    """Split `input_path` into shard folders under `shard_root`; unchanged shard inputs are not rewritten."""
+    groups = split_by_page(list(read_jsonl(input_path)), size)
+    shards = []
+    for idx, rows in enumerate(groups, start=1):
+        shard_dir = os.path.join(shard_root, f"{idx:04d}")
+        outdir = os.path.join(shard_dir, "out")
+        payload = _encode_rows(rows)
+        sha = hashlib.sha256(payload).hexdigest()
+        shard_input = os.path.join(shard_dir, "input.jsonl")
+        marker_path = os.path.join(shard_dir, SHARD_MARKER)
+        marker = _load_marker(marker_path)
+        if not (marker and marker.get("input_sha256") == sha and os.path.exists(shard_input)):
+            ensure_dir(shard_dir)
+            with open(shard_input, "wb") as f:
+                f.write(payload)
+            if marker and os.path.exists(marker_path):
+                os.remove(marker_path)
+        keys = [k for k in (row_page_key(r) for r in rows) if k is not None]
+        shards.append({
+            "index": idx,
+            "first_page": keys[0] if keys else None,
+            "last_page": keys[-1] if keys else None,
+            "rows": len(rows),
+            "dir": shard_dir,
+            "input": shard_input,
+            "outdir": outdir,
+            "output": os.path.join(outdir, artifact_name),
+            "marker": marker_path,
+            "input_sha256": sha,
+        })
+    # Drop folders left from an earlier split with more shards.
+    if os.path.isdir(shard_root):
+        keep = {os.path.basename(s["dir"]) for s in shards}
+        for name in os.listdir(shard_root):
+            if name not in keep:
+                shutil.rmtree(os.path.join(shard_root, name), ignore_errors=True)
+    return shards
+
+
+def shard_done(shard: Dict[str, Any]) -> bool:
+    marker = _load_marker(shard["marker"])
+    return bool(marker and marker.get("input_sha256") == shard["input_sha256"] and os.path.exists(shard["output"]))
+
+
+def shard_command(cmd: Sequence[str], replacements: Dict[str, str]) -> List[str]:
+    """Rewrite exact argv entries (input, out, outdir, state/progress paths) for one shard."""
+    return [replacements.get(arg, arg) for arg in cmd]
+
+
+def _rebase(value: Any, old: str, new: str) -> Any:
+    if isinstance(value, str):
+        return new + value[len(old):] if value.startswith(old) else value
+    if isinstance(value, list):
+        return [_rebase(v, old, new) for v in value]
+    if isinstance(value, dict):
+        return {k: _rebase(v, old, new) for k, v in value.items()}
+    return value
+
+
+def promote_side_outputs(shard: Dict[str, Any], module_dir: str) -> int:
+    """Move everything a shard wrote besides its artifact into the stage module folder."""
+    moved = 0
+    outdir = shard["outdir"]
+    if not os.path.isdir(outdir):
+        return 0
+    skip = os.path.abspath(shard["output"])
+    for root, _dirs, files in os.walk(outdir):
+        rel = os.path.relpath(root, outdir)
+        dest_root = module_dir if rel == "." else os.path.join(module_dir, rel)
+        for name in files:
+            src = os.path.join(root, name)
+            if os.path.abspath(src) == skip:
+                continue
+            ensure_dir(dest_root)
+            os.replace(src, os.path.join(dest_root, name))
+            moved += 1
+    return moved
+
+
+def complete_shard(shard: Dict[str, Any], module_dir: str) -> Dict[str, Any]:
+    promote_side_outputs(shard, module_dir)
+    rows_out = sum(1 for _ in read_jsonl(shard["output"])) if os.path.exists(shard["output"]) else 0
+    marker = {
+        "index": shard["index"],
+        "pages": [shard["first_page"], shard["last_page"]],
+        "rows_in": shard["rows"],
+        "rows_out": rows_out,
+        "input_sha256": shard["input_sha256"],
+        "completed_at": datetime.utcnow().isoformat() + "Z",
+    }
+    save_json(shard["marker"], marker)
+    return marker
+
+
+def merge_shard_outputs(shards: Sequence[Dict[str, Any]], out_path: str, module_dir: str) -> int:
+    """Concatenate shard outputs in shard (page) order into `out_path`; returns the row count."""
+    if artifact_format(out_path) not in ("jsonl", "jsonl.zst", "parquet"):
+        raise SystemExit(f"Sharded stages must produce a JSONL artifact, got {out_path}")
+    count = 0
+
+    def rows():
+        nonlocal count
+        for shard in shards:
+            prefix = shard["outdir"] + os.sep
+            for row in read_jsonl(shard["output"]):
+                count += 1
+                yield _rebase(row, prefix, module_dir + os.sep)
+
+    save_jsonl(out_path, rows())
+    return count
+
+
+def run_shards(shards: Sequence[Dict[str, Any]], build_cmd: Callable[[Dict[str, Any]], List[str]],
+               cwd: str, env: Dict[str, str], workers: int,
+               on_done: Optional[Callable[[Dict[str, Any], int], None]] = None,
+               tick: Optional[Callable[[], None]] = None, tick_seconds: float = 2.0) -> Dict[int, int]:
+    """
+    Run one subprocess per shard with at most `workers` in flight.
+    Returns {shard index: return code}; `on_done` is called in the caller's thread as shards finish.
+    """
+    codes: Dict[int, int] = {}
+    if not shards:
+        return codes
+
+    def _run(shard):
+        ensure_dir(shard["outdir"])
+        return subprocess.run(build_cmd(shard), cwd=cwd, env=env).returncode
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(shards)))) as pool:
+        pending = {pool.submit(_run, s): s for s in shards}
+        last_tick = time.time()
+        while pending:
+            done, _ = wait(list(pending), timeout=tick_seconds, return_when=FIRST_COMPLETED)
+            for fut in done:
+                shard = pending.pop(fut)
+                try:
+                    rc = fut.result()
+                except Exception:
+                    rc = 1
+                codes[shard["index"]] = rc
+                if on_done:
+                    on_done(shard, rc)
+            if tick and time.time() - last_tick >= tick_seconds:
+                tick()
+                last_tick = time.time()
+    return codes
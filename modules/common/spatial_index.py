@@ -0,0 +1,208 @@
+"""
+Interval and rectangle indexes for overlap queries.
+
+`IntervalIndex` holds closed intervals `[start, end]` (page or element spans) in an augmented,
+array-backed interval tree: intervals sorted by start, each implicit subtree annotated with the
+largest end it contains, so an overlap query visits O(log n + k) nodes instead of every span.
+Single `add` calls go to a small unsorted buffer that is folded into the tree once it grows past
+~sqrt(n), which keeps greedy "accept unless it overlaps something accepted" loops near n log n.
+
+`BoxIndex` is a uniform grid over axis-aligned boxes `(x0, y0, x1, y1)` for pixel-space box
+pruning and dedupe. Queries return candidate keys whose boxes touch the query rectangle (closed
+bounds); callers apply their exact predicate (IoU, containment ratio, ...) to the candidates, so
+results match a full pairwise scan.
+"""
+import math
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+
+class IntervalIndex:
+    """Closed intervals with payloads; `[1, 3]` and `[3, 5]` overlap."""
+
+    def __init__(self, intervals: Optional[Iterable[Tuple[float, float, Any]]] = None):
+        self._starts: List[float] = []
+        self._ends: List[float] = []
+        self._items: List[Any] = []
+        self._max_end: List[float] = []
+        self._buffer: List[Tuple[float, float, Any]] = []
+        if intervals is not None:
+            self.extend(intervals)
+
+    def __len__(self) -> int:
+        return len(self._starts) + len(self._buffer)
+
+    def add(self, start: float, end: float, item: Any = None) -> None:
+        self._buffer.append((start, end, item))
+        if len(self._buffer) > max(16, int(math.sqrt(len(self._starts)))):
+            self._rebuild()
+
+    def extend(self, intervals: Iterable[Tuple[float, float, Any]]) -> None:
+        """Bulk insert; rebuilds the tree once."""
+        self._buffer.extend(intervals)
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        rows = sorted(
+            list(zip(self._starts, self._ends, self._items)) + self._buffer,
+            key=lambda r: (r[0], r[1]),
+        )
+        self._buffer = []
+        self._starts = [r[0] for r in rows]
+        self._ends = [r[1] for r in rows]
+        self._items = [r[2] for r in rows]
+        self._max_end = list(self._ends)
+        if rows:
+            self._annotate(0, len(rows))
+
+    def _annotate(self, lo: int, hi: int) -> None:
+        # Post-order over the implicit balanced tree rooted at mid = (lo + hi) // 2.
+        stack = [(lo, hi, False)]
+        while stack:
+            lo, hi, done = stack.pop()
+            mid = (lo + hi) // 2
+            if not done:
+                stack.append((lo, hi, True))
+                if lo < mid:
+                    stack.append((lo, mid, False))
+                if mid + 1 < hi:
+                    stack.append((mid + 1, hi, False))
+                continue
+            best = self._ends[mid]
+            if lo < mid:
+                best = max(best, self._max_end[(lo + mid) // 2])
+            if mid + 1 < hi:
+                best = max(best, self._max_end[(mid + 1 + hi) // 2])
+            self._max_end[mid] = best
+
+    def _tree_hits(self, start: float, end: float, first_only: bool) -> List[int]:
+        hits: List[int] = []
+        if not self._starts:
+            return hits
+        # Nodes starting after `end` can never overlap; restrict the walk to that prefix.
+        limit = bisect_right(self._starts, end)
+        stack = [(0, len(self._starts))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi or lo >= limit:
+                continue
+            mid = (lo + hi) // 2
+            if self._max_end[mid] < start:
+                continue
+            if mid < limit and self._ends[mid] >= start:
+                hits.append(mid)
+                if first_only:
+                    return hits
+            stack.append((lo, mid))
+            stack.append((mid + 1, hi))
+        return hits
+
+    def overlapping(self, start: float, end: float) -> List[Any]:
+        """Payloads of all intervals overlapping `[start, end]`, ordered by (start, end)."""
+        hits = sorted(self._tree_hits(start, end, first_only=False))
+        out = [(self._starts[i], self._ends[i], self._items[i]) for i in hits]
+        buffered = [r for r in self._buffer if r[0] <= end and r[1] >= start]
+        if buffered:
+            out = sorted(out + buffered, key=lambda r: (r[0], r[1]))
+        return [r[2] for r in out]
+
+    def any_overlap(self, start: float, end: float) -> bool:
+        if any(r[0] <= end and r[1] >= start for r in self._buffer):
+            return True
+        return bool(self._tree_hits(start, end, first_only=True))
+
+    def covered_length(self, start: int, end: int) -> int:
+        """Number of integers in `[start, end]` covered by at least one (integer) interval."""
+        spans = sorted(
+            (max(s, start), min(e, end))
+            for s, e in ((self._starts[i], self._ends[i]) for i in self._tree_hits(start, end, first_only=False))
+        )
+        spans += sorted((max(s, start), min(e, end)) for s, e, _ in self._buffer if s <= end and e >= start)
+        spans.sort()
+        covered = 0
+        cur_s = cur_e = None
+        for s, e in spans:
+            if s > e:
+                continue
+            if cur_e is None or s > cur_e + 1:
+                if cur_e is not None:
+                    covered += cur_e - cur_s + 1
+                cur_s, cur_e = s, e
+            else:
+                cur_e = max(cur_e, e)
+        if cur_e is not None:
+            covered += cur_e - cur_s + 1
+        return covered
+
+
+Box = Sequence[float]
+
+
+def _normalized(box: Box) -> Tuple[float, float, float, float]:
+    x0, y0, x1, y1 = (float(v) for v in box[:4])
+    return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+
+class BoxIndex:
+    """Uniform grid of axis-aligned boxes keyed by caller-chosen keys."""
+
+    def __init__(self, cell_size: float = 64.0):
+        self.cell_size = max(1.0, float(cell_size))
+        self._cells: Dict[Tuple[int, int], List[Hashable]] = defaultdict(list)
+        self._boxes: Dict[Hashable, Tuple[float, float, float, float]] = {}
+        self._order: Dict[Hashable, int] = {}
+
+    @classmethod
+    def for_boxes(cls, boxes: Iterable[Box], min_cell: float = 16.0) -> "BoxIndex":
+        """
+        Index sized so a typical box spans about one cell (mean of the larger box side); the
+        largest box is kept to at most ~32 cells per side.
+        """
+        sides = [max(abs(b[2] - b[0]), abs(b[3] - b[1])) for b in boxes]
+        if not sides:
+            return cls(cell_size=min_cell)
+        return cls(cell_size=max(min_cell, sum(sides) / len(sides), max(sides) / 32.0))
+
+    def __len__(self) -> int:
+        return len(self._boxes)
+
+    def _cell_range(self, x0: float, y0: float, x1: float, y1: float):
+        c = self.cell_size
+        return (
+            range(int(math.floor(x0 / c)), int(math.floor(x1 / c)) + 1),
+            range(int(math.floor(y0 / c)), int(math.floor(y1 / c)) + 1),
+        )
+
+    def add(self, key: Hashable, box: Box) -> None:
+        x0, y0, x1, y1 = _normalized(box)
+        self._boxes[key] = (x0, y0, x1, y1)
+        self._order[key] = len(self._order)
+        xs, ys = self._cell_range(x0, y0, x1, y1)
+        for cx in xs:
+            for cy in ys:
+                self._cells[(cx, cy)].append(key)
+
+    def extend(self, items: Iterable[Tuple[Hashable, Box]]) -> None:
+        for key, box in items:
+            self.add(key, box)
+
+    def query(self, box: Box, pad: float = 0.0) -> List[Hashable]:
+        """Keys whose boxes touch `box` grown by `pad` on every side, in insertion order."""
+        qx0, qy0, qx1, qy1 = _normalized(box)
+        pad = max(0.0, float(pad))
+        qx0, qy0, qx1, qy1 = qx0 - pad, qy0 - pad, qx1 + pad, qy1 + pad
+        xs, ys = self._cell_range(qx0, qy0, qx1, qy1)
+        seen = set()
+        out: List[Hashable] = []
+        for cx in xs:
+            for cy in ys:
+                for key in self._cells.get((cx, cy), ()):
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    bx0, by0, bx1, by1 = self._boxes[key]
+                    if bx0 <= qx1 and bx1 >= qx0 and by0 <= qy1 and by1 >= qy0:
+                        out.append(key)
+        out.sort(key=self._order.__getitem__)
+        return out
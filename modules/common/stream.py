@@ -0,0 +1,217 @@
+"""
+Streaming hand-off between driver stages.
+
+Contract for a recipe edge declared with `stream: [<producer>]` on the consumer stage:
+- The producer appends rows to its plain JSONL artifact in page order (as `append_jsonl` does).
+- The driver starts the consumer while the producer is still running and lists the producer
+  artifact in `PIPELINE_STREAM_INPUTS` (JSON: path -> producer schema/module/run id).
+- When the producer process exits, the driver writes `<artifact>.complete`
+  (`{"status": "done" | "failed", ...}`) before it stamps the artifact.
+- Consumers read their input through `iter_rows(path)`. Without the env entry this is
+  `read_jsonl(path)`. With it, the file is tailed until the completion marker appears and every
+  row is normalized with `stamp_row`, so the consumer sees the same rows it would after stamping.
+
+Modules that read streamed input set `streaming_input: true` in module.yaml. They should write
+their own output row by row (`RowWriter`) so they can feed a further streamed stage.
+"""
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+from modules.common.utils import artifact_format, read_jsonl, save_jsonl
+
+STREAM_ENV = "PIPELINE_STREAM_INPUTS"
+COMPLETE_SUFFIX = ".complete"
+POLL_SECONDS = 0.5
+
+
+class StreamError(RuntimeError):
+    pass
+
+
+def complete_marker_path(path: str) -> str:
+    return path + COMPLETE_SUFFIX
+
+
+def clear_complete(path: str) -> None:
+    marker = complete_marker_path(path)
+    if os.path.exists(marker):
+        os.remove(marker)
+
+
+def mark_complete(path: str, status: str = "done", **extra: Any) -> None:
+    """Written by the driver when the producer exits; `status` is "done" or "failed"."""
+    payload = {"status": status, "completed_at": datetime.utcnow().isoformat() + "Z", **extra}
+    marker = complete_marker_path(path)
+    tmp = marker + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp, marker)
+
+
+def read_complete(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(complete_marker_path(path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def stamp_row(row: Any, schema_name: Optional[str], module_id: Optional[str], run_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Normalize one artifact row the way the driver stamps artifacts: drop error rows, backfill
+    schema_version/module_id/run_id/created_at and round-trip through the schema model.
+    Returns None for rows the stamp would drop.
+    """
+    if isinstance(row, dict) and row.get("error"):
+        return None
+    if not schema_name:
+        return row
+    from validate_artifact import SCHEMA_MAP
+
+    model_cls = SCHEMA_MAP.get(schema_name)
+    if model_cls is None:
+        return row
+    row.setdefault("schema_version", schema_name)
+    if not row.get("module_id"):
+        row["module_id"] = module_id
+    if not row.get("run_id"):
+        row["run_id"] = run_id
+    if not row.get("created_at"):
+        row["created_at"] = datetime.utcnow().isoformat() + "Z"
+    return model_cls(**row).dict()
+
+
+def streamed_inputs() -> Dict[str, Dict[str, Any]]:
+    raw = os.environ.get(STREAM_ENV)
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return {}
+    return {os.path.abspath(k): v or {} for k, v in data.items()}
+
+
+def is_streamed(path: str) -> bool:
+    return os.path.abspath(path) in streamed_inputs()
+
+
+def _same_file(fd_stat: os.stat_result, path: str) -> bool:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return (st.st_ino, st.st_dev) == (fd_stat.st_ino, fd_stat.st_dev)
+
+
+def tail_rows(path: str, poll_seconds: float = POLL_SECONDS, timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield raw JSON rows appended to `path` until its completion marker says the producer is done.
+    A partial last line is held back until its newline arrives. Raises StreamError if the producer
+    failed, or if the file is replaced after rows were already read and before the stream completed.
+    """
+    start = time.time()
+
+    def _wait():
+        if timeout is not None and time.time() - start > timeout:
+            raise StreamError(f"Timed out waiting for streamed input {path}")
+        time.sleep(poll_seconds)
+
+    def _check_failed(marker):
+        if marker and marker.get("status") != "done":
+            raise StreamError(f"Producer of {path} failed: {marker}")
+
+    while not os.path.exists(path):
+        marker = read_complete(path)
+        _check_failed(marker)
+        if marker:
+            return
+        _wait()
+
+    f = open(path, "rb")
+    try:
+        yielded = 0
+        buf = b""
+        while True:
+            # Read the marker before draining so rows written before it are never missed.
+            marker = read_complete(path)
+            _check_failed(marker)
+            chunk = f.read()
+            if chunk:
+                buf += chunk
+                *lines, buf = buf.split(b"\n")
+                for line in lines:
+                    if line.strip():
+                        yielded += 1
+                        yield json.loads(line)
+                continue
+            if marker:
+                if buf.strip():
+                    yield json.loads(buf)
+                return
+            if not _same_file(os.fstat(f.fileno()), path) or os.path.getsize(path) < f.tell():
+                # The driver may have marked the stream complete and renamed the stamped file into
+                # place since the marker was read; the open handle still holds every row written.
+                if read_complete(path):
+                    continue
+                if yielded:
+                    raise StreamError(f"Streamed input {path} was rewritten after {yielded} rows were read")
+                f.close()
+                f = open(path, "rb")
+                buf = b""
+                continue
+            _wait()
+    finally:
+        f.close()
+
+
+def iter_rows(path: str, poll_seconds: float = POLL_SECONDS) -> Iterator[Dict[str, Any]]:
+    """Rows of a stage input: tailed and stamped when the driver streams it, else `read_jsonl`."""
+    meta = streamed_inputs().get(os.path.abspath(path))
+    if meta is None:
+        yield from read_jsonl(path)
+        return
+    for row in tail_rows(path, poll_seconds=poll_seconds):
+        try:
+            stamped = stamp_row(row, meta.get("schema"), meta.get("module_id"), meta.get("run_id"))
+        except Exception:
+            continue  # the driver's stamp drops rows that fail validation
+        if stamped is not None:
+            yield stamped
+
+
+class RowWriter:
+    """
+    Write rows one at a time. Plain JSONL is flushed per row so a streamed downstream stage
+    sees it immediately; other formats are buffered and saved on close().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._rows: Optional[list] = None
+        self._f = None
+        if artifact_format(path) == "jsonl":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._f = open(path, "w", encoding="utf-8")
+        else:
+            self._rows = []
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self.count += 1
+        if self._f is None:
+            self._rows.append(row)
+            return
+        self._f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+        elif self._rows is not None:
+            save_jsonl(self.path, self._rows)
+            self._rows = None
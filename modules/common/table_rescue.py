@@ -0,0 +1,125 @@
+"""
+Shared executor for table-rescue re-OCR modules.
+
+Rescue modules (table_rescue_html_v1, table_rescue_html_loop_v1, table_rescue_onward_tables_v1)
+pick a handful of candidate pages and send each one back to a vision model. The round trip
+dominates, so this module provides:
+
+- PageImageCache: the shared prepared-image cache (modules/common/prepared_image.py) plus
+  band-crop helpers, so fallback crops and repeated passes reuse the same data URIs.
+- RateLimiter: spaces request starts so a concurrent pool stays under provider limits.
+- run_rescue_jobs: runs per-page workers on a thread pool. Workers call the model *and*
+  evaluate the candidate HTML, so BeautifulSoup scoring overlaps with other in-flight
+  requests. Results come back in input order so module output stays deterministic.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from modules.common.image_utils import image_size
+from modules.common.prepared_image import PreparedImageCache, default_cache_dir
+
+# Allow large page images from high-resolution scans.
+Image.MAX_IMAGE_PIXELS = None
+
+DEFAULT_RESCUE_CONCURRENCY = 4
+
+
+class PageImageCache(PreparedImageCache):
+    """Prepared-image cache with the crop helpers the rescue modules use."""
+
+    def __init__(self, max_entries: int = 64, max_decoded: int = 4):
+        super().__init__(cache_dir=default_cache_dir(), max_entries=max_entries, max_decoded=max_decoded)
+
+    def full_image(self, path: str) -> str:
+        """Data URI of the file bytes as-is."""
+        return self.data_uri(path)
+
+    def crop(self, path: str, crop_top: float, crop_bottom: float) -> Tuple[str, Dict[str, Any]]:
+        """PNG data URI of a full-width vertical band given as height ratios, plus crop metadata."""
+        width, height = image_size(path)
+        top_px = max(0, int(height * crop_top))
+        bottom_px = min(height, int(height * crop_bottom))
+        if bottom_px <= top_px:
+            bottom_px = min(height, top_px + int(height * 0.25))
+        uri = self.data_uri(path, crop_box=(0, top_px, width, bottom_px), fmt="PNG")
+        crop_meta = {
+            "top": crop_top,
+            "bottom": crop_bottom,
+            "left": 0.0,
+            "right": 1.0,
+            "unit": "ratio",
+            "pixel_box": [0, top_px, width, bottom_px],
+        }
+        return uri, crop_meta
+
+
+class RateLimiter:
+    """Spaces acquisitions at least 1/rate seconds apart across threads (rate <= 0 disables)."""
+
+    def __init__(self, requests_per_second: float = 0.0):
+        self.interval = 1.0 / requests_per_second if requests_per_second and requests_per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def acquire(self) -> None:
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def run_rescue_jobs(
+    jobs: Sequence[Any],
+    worker: Callable[[Any], Any],
+    concurrency: int = 1,
+    rate_limiter: Optional[RateLimiter] = None,
+    on_done: Optional[Callable[[int, Any, Any], None]] = None,
+) -> List[Any]:
+    """
+    Run `worker(job)` for each job and return results in job order.
+
+    The worker should do the whole per-page unit (model call + candidate evaluation) and
+    handle its own expected errors; an unexpected exception is re-raised after the pool
+    drains. `on_done(done_count, job, result)` is called from the coordinating thread as
+    results arrive (use it for progress logs).
+    """
+    results: List[Any] = [None] * len(jobs)
+    limiter = rate_limiter or RateLimiter(0)
+
+    def _run(job):
+        limiter.acquire()
+        return worker(job)
+
+    if concurrency <= 1 or len(jobs) <= 1:
+        for i, job in enumerate(jobs):
+            results[i] = _run(job)
+            if on_done:
+                on_done(i + 1, job, results[i])
+        return results
+
+    errors: List[BaseException] = []
+    done = 0
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(jobs))) as executor:
+        futures = {executor.submit(_run, job): i for i, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except BaseException as exc:  # noqa: BLE001 - surfaced after the pool drains
+                errors.append(exc)
+                continue
+            done += 1
+            if on_done:
+                on_done(done, jobs[i], results[i])
+    if errors:
+        raise errors[0]
+    return results
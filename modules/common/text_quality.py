@@ -1,10 +1,12 @@
+import hashlib
 import os
 import re
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 from modules.common.utils import english_wordlist
+from modules.common.vocab import FLAG_PLURAL, FLAG_WORD, FORMAT_VERSION, CompiledVocab, compile_vocab
 
 
 _WORD_RE = re.compile(r"[A-Za-z]+")
@@ -30,6 +32,41 @@ def _iter_words(text: str) -> Iterable[str]:
             yield w
 
 
+_WORDLIST_CANDIDATES = [
+    # Traditional word lists
+    "/usr/share/dict/words",
+    "/usr/dict/words",
+    "/usr/share/dict/web2",
+    # Hunspell/MySpell dictionaries (common on macOS/Linux)
+    "/System/Library/Spelling/en_US.dic",
+    "/System/Library/Spelling/en_GB.dic",
+    "/Library/Spelling/en_US.dic",
+    "/Library/Spelling/en_GB.dic",
+    "/usr/share/hunspell/en_US.dic",
+    "/usr/share/hunspell/en_GB.dic",
+    "/usr/share/myspell/dicts/en_US.dic",
+    "/usr/share/myspell/dicts/en_GB.dic",
+]
+
+VOCAB_CACHE_ENV = "CODEX_VOCAB_DIR"
+
+
+def _wordlist_candidates() -> List[str]:
+    env_path = os.environ.get("CODEX_WORDLIST_PATH")
+    return ([env_path] if env_path else []) + list(_WORDLIST_CANDIDATES)
+
+
+def _read_wordlist(path: Path) -> Set[str]:
+    vocab: Set[str] = set()
+    for line in path.read_text(encoding="utf-8", errors="ignore").splitlines():
+        # Hunspell .dic entries are often "word/FLAGS". Take the word part.
+        raw = (line or "").split("/", 1)[0]
+        w = _ascii_alpha_lower(raw)
+        if w:
+            vocab.add(w)
+    return vocab
+
+
 @lru_cache(maxsize=1)
 def load_default_wordlist() -> Set[str]:
     """
@@ -39,40 +76,17 @@ def load_default_wordlist() -> Set[str]:
     1) `CODEX_WORDLIST_PATH` env var (newline-delimited words).
     2) System dictionaries (common macOS/Linux locations).
     3) Repo-local lightweight fallback (`english_wordlist()`).
-    """
-    env_path = os.environ.get("CODEX_WORDLIST_PATH")
-    candidates = []
-    if env_path:
-        candidates.append(env_path)
-    candidates.extend([
-        # Traditional word lists
-        "/usr/share/dict/words",
-        "/usr/dict/words",
-        "/usr/share/dict/web2",
-        # Hunspell/MySpell dictionaries (common on macOS/Linux)
-        "/System/Library/Spelling/en_US.dic",
-        "/System/Library/Spelling/en_GB.dic",
-        "/Library/Spelling/en_US.dic",
-        "/Library/Spelling/en_GB.dic",
-        "/usr/share/hunspell/en_US.dic",
-        "/usr/share/hunspell/en_GB.dic",
-        "/usr/share/myspell/dicts/en_US.dic",
-        "/usr/share/myspell/dicts/en_GB.dic",
-    ])
 
+    Stages should use `default_vocab()`, which serves the same words from a compiled artifact.
+    """
     vocab: Set[str] = set()
 
-    for p in candidates:
+    for p in _wordlist_candidates():
         try:
             path = Path(p)
             if not path.exists() or not path.is_file():
                 continue
-            for line in path.read_text(encoding="utf-8", errors="ignore").splitlines():
-                # Hunspell .dic entries are often "word/FLAGS". Take the word part.
-                raw = (line or "").split("/", 1)[0]
-                w = _ascii_alpha_lower(raw)
-                if w:
-                    vocab.add(w)
+            vocab = _read_wordlist(path)
             if vocab:
                 break
         except Exception:
@@ -86,30 +100,122 @@ def load_default_wordlist() -> Set[str]:
     return vocab
 
 
-def spell_garble_metrics(lines: List[str], *, vocab: Optional[Set[str]] = None, max_examples: int = 10) -> Dict[str, Any]:
+def default_vocab_path(cache_dir: Optional[str] = None) -> Optional[str]:
+    """
+    Compiled-vocabulary path for the current word list source: keyed by the first readable
+    candidate's path/mtime/size plus the built-in list, under `CODEX_VOCAB_DIR` (default
+    `<output_root>/cache/vocab`). None when the disk cache is off.
+    """
+    if cache_dir is None:
+        env = os.environ.get(VOCAB_CACHE_ENV)
+        if env is not None and env.strip().lower() in ("", "0", "off", "none"):
+            return None
+        if env is None:
+            from modules.common.run_registry import resolve_output_root
+
+            env = os.path.join(resolve_output_root(), "cache", "vocab")
+        cache_dir = env
+    stamp = ["fallback"]
+    for p in _wordlist_candidates():
+        try:
+            if os.path.isfile(p):
+                st = os.stat(p)
+                stamp = [os.path.abspath(p), str(st.st_mtime_ns), str(st.st_size)]
+                break
+        except OSError:
+            continue
+    stamp.append(",".join(sorted(english_wordlist())))
+    stamp.append(str(FORMAT_VERSION))
+    key = hashlib.sha256("\n".join(stamp).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"vocab-{key}.cvocab")
+
+
+def build_default_vocab(cache_dir: Optional[str] = None, force: bool = False) -> Optional[str]:
+    """Compile the default word list (see `load_default_wordlist`) unless already built."""
+    path = default_vocab_path(cache_dir)
+    if path and (force or not os.path.exists(path)):
+        compile_vocab(load_default_wordlist(), path, source=";".join(_wordlist_candidates()[:1]))
+    return path
+
+
+@lru_cache(maxsize=1)
+def default_vocab() -> CompiledVocab:
+    """The default word list as a memory-mapped `CompiledVocab`, compiled on first use."""
+    try:
+        path = build_default_vocab()
+        if path:
+            return CompiledVocab.load(path)
+    except Exception:
+        pass
+    return CompiledVocab.from_words(load_default_wordlist())
+
+
+class _VocabLookup:
+    """Memoized membership for a set or `CompiledVocab`, with the plural fallbacks."""
+
+    def __init__(self, vocab, flags: Optional[Dict[str, int]] = None):
+        self.vocab = vocab
+        self.flags: Dict[str, int] = dict(flags or {})
+
+    def flag(self, word: str) -> int:
+        f = self.flags.get(word)
+        if f is None:
+            if isinstance(self.vocab, CompiledVocab):
+                f = self.vocab._flag(word)
+            else:
+                f = FLAG_WORD if word in self.vocab else 0
+                # Generic plural normalization to reduce false OOV for common plurals when only singular is present.
+                if (
+                    (word.endswith("ies") and len(word) > 4 and (word[:-3] + "y") in self.vocab)
+                    or (word.endswith("es") and len(word) > 3 and word[:-2] in self.vocab)
+                    or (word.endswith("s") and len(word) > 3 and word[:-1] in self.vocab)
+                ):
+                    f |= FLAG_PLURAL
+            self.flags[word] = f
+        return f
+
+    def __contains__(self, word: str) -> bool:
+        return bool(self.flag(word) & FLAG_WORD)
+
+    def accepts(self, word: str) -> bool:
+        return self.flag(word) != 0
+
+
+def spell_garble_metrics(lines: List[str], *, vocab=None, max_examples: int = 10) -> Dict[str, Any]:
     """
     Compute lightweight spell/garble metrics from OCR lines.
     Higher scores indicate worse quality.
+
+    `vocab` may be a set of words or a `CompiledVocab` (default: `default_vocab()`).
+    """
+    return _spell_garble_metrics(lines, _VocabLookup(vocab or default_vocab()), max_examples)
+
+
+def spell_garble_metrics_batch(
+    pages: Sequence[List[str]], *, vocab=None, max_examples: int = 10
+) -> List[Dict[str, Any]]:
+    """
+    `spell_garble_metrics` for many pages (or engines) at once: the distinct words of all pages
+    are resolved in one batch lookup, then each page is scored from that table.
     """
+    vocab = vocab or default_vocab()
+    flags: Dict[str, int] = {}
+    if isinstance(vocab, CompiledVocab):
+        words: Set[str] = set()
+        for lines in pages:
+            words.update(_iter_words("\n".join(lines or [])))
+        flags = vocab.lookup_many(list(words))
+    lookup = _VocabLookup(vocab, flags)
+    return [_spell_garble_metrics(lines, lookup, max_examples) for lines in pages]
+
+
+def _spell_garble_metrics(lines: List[str], vocab: _VocabLookup, max_examples: int) -> Dict[str, Any]:
     text = "\n".join(lines or [])
-    vocab = vocab or load_default_wordlist()
 
     alpha_words = list(_iter_words(text))
     total_words = len(alpha_words)
 
-    def _in_vocab(word: str) -> bool:
-        if word in vocab:
-            return True
-        # Generic plural normalization to reduce false OOV for common plurals when only singular is present.
-        if word.endswith("ies") and len(word) > 4 and (word[:-3] + "y") in vocab:
-            return True
-        if word.endswith("es") and len(word) > 3 and word[:-2] in vocab:
-            return True
-        if word.endswith("s") and len(word) > 3 and word[:-1] in vocab:
-            return True
-        return False
-
-    oov_words: List[str] = [w for w in alpha_words if not _in_vocab(w)]
+    oov_words: List[str] = [w for w in alpha_words if not vocab.accepts(w)]
     oov = len(oov_words)
     oov_ratio = (oov / total_words) if total_words else 0.0
 
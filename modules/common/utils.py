@@ -1,8 +1,9 @@
+import io
 import json
 import os
 import yaml
 from datetime import datetime
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Optional, Sequence, Tuple
 from pathlib import Path
 from functools import lru_cache
 
@@ -44,8 +45,117 @@ def save_json(path: str, data: Any):
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
+# Row-artifact formats, detected by extension:
+#   *.jsonl      plain JSONL (default)
+#   *.jsonl.zst  zstd-compressed JSONL (needs `zstandard`); appends add new zstd frames
+#   *.parquet    columnar; one column per top-level field, values JSON-encoded so nested
+#                payloads round-trip exactly (needs `pyarrow`); supports field projection
+ARTIFACT_FORMAT_EXTENSIONS = {
+    "jsonl": ".jsonl",
+    "jsonl.zst": ".jsonl.zst",
+    "parquet": ".parquet",
+}
+ZSTD_LEVEL = 3
+PREVIEW_SUFFIX = ".preview.jsonl"
+
+
+def artifact_format(path: str) -> str:
+    lower = str(path).lower()
+    if lower.endswith(".jsonl.zst") or lower.endswith(".zst"):
+        return "jsonl.zst"
+    if lower.endswith(".parquet"):
+        return "parquet"
+    return "jsonl"
+
+
+def artifact_base_name(path: str) -> str:
+    """Strip format extensions so `pagelines_final.jsonl.zst` -> `pagelines_final.jsonl`."""
+    name = os.path.basename(str(path))
+    lower = name.lower()
+    if lower.endswith(".jsonl.zst"):
+        return name[: -len(".zst")]
+    if lower.endswith(".parquet"):
+        return name[: -len(".parquet")] + ".jsonl"
+    return name
+
+
+def with_artifact_format(path: str, fmt: Optional[str]) -> str:
+    """Rename a `.jsonl` artifact path to the requested format; other paths are left alone."""
+    if not fmt or fmt == "jsonl":
+        return path
+    if fmt not in ARTIFACT_FORMAT_EXTENSIONS:
+        raise ValueError(f"Unknown artifact format '{fmt}' (expected one of {sorted(ARTIFACT_FORMAT_EXTENSIONS)})")
+    if not str(path).endswith(".jsonl"):
+        return path
+    return str(path)[: -len(".jsonl")] + ARTIFACT_FORMAT_EXTENSIONS[fmt]
+
+
+def _require_zstd():
+    try:
+        import zstandard
+    except ImportError as e:  # pragma: no cover - depends on env
+        raise ImportError("zstandard is required for .jsonl.zst artifacts (pip install zstandard)") from e
+    return zstandard
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:  # pragma: no cover - depends on env
+        raise ImportError("pyarrow is required for .parquet artifacts (pip install pyarrow)") from e
+    return pyarrow
+
+
+def _project(row: Any, fields: Optional[Sequence[str]]):
+    if fields is None or not isinstance(row, dict):
+        return row
+    return {k: row[k] for k in fields if k in row}
+
+
+def _save_parquet(path: str, rows):
+    pa = _require_pyarrow()
+    rows = list(rows)
+    columns: Dict[str, list] = {}
+    for row in rows:
+        for key in row:
+            columns.setdefault(key, [])
+    for key in columns:
+        columns[key] = [json.dumps(row[key], ensure_ascii=False) if key in row else None for row in rows]
+    table = pa.table({k: pa.array(v, type=pa.string()) for k, v in columns.items()})
+    pa.parquet.write_table(table, path, compression="zstd")
+
+
+def _read_parquet(path: str, fields: Optional[Sequence[str]] = None):
+    pa = _require_pyarrow()
+    schema_names = pa.parquet.read_schema(path).names
+    columns = [f for f in fields if f in schema_names] if fields is not None else None
+    if columns == []:
+        # Nothing to project: still one (empty) row per stored row, like the JSONL reader.
+        for _ in range(pa.parquet.read_metadata(path).num_rows):
+            yield {}
+        return
+    table = pa.parquet.read_table(path, columns=columns)
+    names = table.column_names
+    data = [table.column(n).to_pylist() for n in names]
+    for values in zip(*data):
+        yield {n: json.loads(v) for n, v in zip(names, values) if v is not None}
+
+
 def save_jsonl(path: str, rows):
     Path(path).parent.mkdir(parents=True, exist_ok=True)
+    fmt = artifact_format(path)
+    if fmt == "parquet":
+        _save_parquet(path, rows)
+        return
+    if fmt == "jsonl.zst":
+        zstd = _require_zstd()
+        with open(path, "wb") as raw:
+            with zstd.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw) as zf:
+                with io.TextIOWrapper(zf, encoding="utf-8") as f:
+                    for row in rows:
+                        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        return
     with open(path, "w", encoding="utf-8") as f:
         for row in rows:
             f.write(json.dumps(row, ensure_ascii=False) + "\n")
@@ -53,15 +163,60 @@ def save_jsonl(path: str, rows):
 
 def append_jsonl(path: str, row):
     Path(path).parent.mkdir(parents=True, exist_ok=True)
+    fmt = artifact_format(path)
+    if fmt == "parquet":
+        raise ValueError(f"append_jsonl does not support columnar artifacts: {path}")
+    if fmt == "jsonl.zst":
+        zstd = _require_zstd()
+        payload = (json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(path, "ab") as f:
+            f.write(zstd.ZstdCompressor(level=ZSTD_LEVEL).compress(payload))
+        return
     with open(path, "a", encoding="utf-8") as f:
         f.write(json.dumps(row, ensure_ascii=False) + "\n")
 
 
-def read_jsonl(path: str):
+def read_jsonl(path: str, fields: Optional[Sequence[str]] = None):
+    """
+    Iterate rows of a JSONL/JSONL.zst/Parquet artifact.
+    `fields` limits each row to those top-level keys; Parquet reads only those columns.
+    """
+    fmt = artifact_format(path)
+    if fmt == "parquet":
+        yield from _read_parquet(path, fields)
+        return
+    if fmt == "jsonl.zst":
+        zstd = _require_zstd()
+        with open(path, "rb") as raw:
+            reader = zstd.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+            with io.TextIOWrapper(reader, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield _project(json.loads(line), fields)
+        return
     with open(path, "r", encoding="utf-8") as f:
         for line in f:
             if line.strip():
-                yield json.loads(line)
+                yield _project(json.loads(line), fields)
+
+
+def write_artifact_preview(path: str, limit: int = 200) -> Optional[str]:
+    """
+    Write `<artifact>.preview.jsonl` with the first `limit` rows of a compressed/columnar
+    artifact so plain-text consumers (the pipeline dashboard) can still show it.
+    """
+    if artifact_format(path) == "jsonl" or not os.path.exists(path):
+        return None
+    preview_path = str(path) + PREVIEW_SUFFIX
+    rows = []
+    for row in read_jsonl(path):
+        rows.append(row)
+        if len(rows) >= limit:
+            break
+    with open(preview_path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return preview_path
 
 
 def _utc() -> str:
@@ -211,7 +366,8 @@ class ProgressLogger:
 
 
 def log_llm_usage(model: str, prompt_tokens: int, completion_tokens: int, *,
-                  cached: bool = False, provider: str = "openai", request_ms: float = None,
+                  cached: bool = False, deduped: bool = False, coalesced: bool = False,
+                  provider: str = "openai", request_ms: float = None,
                   request_id: str = None, cost: float = None, stage_id: str = None,
                   run_id: str = None, sink_env: str = "INSTRUMENT_SINK"):
     """
@@ -230,6 +386,8 @@ def log_llm_usage(model: str, prompt_tokens: int, completion_tokens: int, *,
         "prompt_tokens": int(prompt_tokens),
         "completion_tokens": int(completion_tokens),
         "cached": bool(cached),
+        "deduped": bool(deduped),
+        "coalesced": bool(coalesced),
         "request_ms": request_ms,
         "request_id": request_id,
         "cost": cost,
@@ -239,3 +397,30 @@ def log_llm_usage(model: str, prompt_tokens: int, completion_tokens: int, *,
     }
     append_jsonl(sink, event)
     return event
+
+
+def log_loop_attempt(loop: str, attempt: int, step_seconds: Dict[str, float], *,
+                     dirty: Optional[Dict[str, int]] = None, remaining: Optional[int] = None,
+                     stage_id: str = None, run_id: str = None, sink_env: str = "INSTRUMENT_SINK"):
+    """
+    Append a per-attempt timing event for an iterative repair loop to the instrumentation sink.
+    The driver keeps these out of LLM call totals and attaches them to the stage entry.
+    No-op when sink env var is unset.
+    """
+    sink = os.getenv(sink_env)
+    if not sink:
+        return None
+    event = {
+        "schema_version": "instrumentation_attempt_v1",
+        "loop": loop,
+        "attempt": int(attempt),
+        "step_seconds": {k: round(float(v), 6) for k, v in step_seconds.items()},
+        "wall_seconds": round(sum(float(v) for v in step_seconds.values()), 6),
+        "dirty": dirty or {},
+        "remaining": remaining,
+        "stage_id": stage_id or os.getenv("INSTRUMENT_STAGE"),
+        "run_id": run_id or os.getenv("RUN_ID"),
+        "created_at": _utc(),
+    }
+    append_jsonl(sink, event)
+    return event
@@ -0,0 +1,170 @@
+"""
+Compiled, memory-mapped vocabulary for spell/garble metrics.
+
+A word list is compiled once into a `.cvocab` file: words are grouped by length, and each group
+is a sorted fixed-width byte array followed by a flag byte per word:
+
+    FLAG_WORD   the word itself is in the source list
+    FLAG_PLURAL the word is accepted through the plural rules of `spell_garble_metrics`
+                (`-s`, `-es`, `y -> -ies` added to a listed word)
+
+Loading maps the file and wraps each group in a NumPy view, so a stage pays no parsing cost and
+processes share the page cache. Lookups are binary searches (`np.searchsorted`); `lookup_many`
+resolves a whole batch of tokens with one search per word length.
+
+File layout: MAGIC, a little-endian uint32 header length, a JSON header
+(`{"format", "source", "words", "buckets": [{"len", "count", "offset"}]}`), then the buckets.
+"""
+import json
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAGIC = b"CVOCAB1\n"
+FORMAT_VERSION = 1
+FLAG_WORD = 1
+FLAG_PLURAL = 2
+
+
+def plural_forms(word: str) -> List[str]:
+    """Forms that `spell_garble_metrics` accepts for a listed singular `word`."""
+    out: List[str] = []
+    if len(word) > 2:
+        out.append(word + "s")
+        if word.endswith("y"):
+            out.append(word[:-1] + "ies")
+    if len(word) > 1:
+        out.append(word + "es")
+    return out
+
+
+def _compile_flags(words: Iterable[str]) -> Dict[str, int]:
+    flags: Dict[str, int] = {}
+    base = {w for w in words if w and w.isascii() and w.isalpha() and w.islower()}
+    for w in base:
+        flags[w] = flags.get(w, 0) | FLAG_WORD
+        for form in plural_forms(w):
+            flags[form] = flags.get(form, 0) | FLAG_PLURAL
+    return flags
+
+
+def compile_vocab(words: Iterable[str], out_path: str, source: Optional[str] = None) -> str:
+    """Compile lowercase ASCII `words` into `out_path` (written atomically)."""
+    flags = _compile_flags(words)
+    by_len: Dict[int, List[str]] = {}
+    for w in flags:
+        by_len.setdefault(len(w), []).append(w)
+
+    buckets = []
+    chunks: List[bytes] = []
+    offset = 0
+    for length in sorted(by_len):
+        group = sorted(by_len[length])
+        data = "".join(group).encode("ascii") + bytes(flags[w] for w in group)
+        buckets.append({"len": length, "count": len(group), "offset": offset})
+        chunks.append(data)
+        offset += len(data)
+    header = json.dumps({
+        "format": FORMAT_VERSION,
+        "source": source,
+        "words": sum(1 for f in flags.values() if f & FLAG_WORD),
+        "buckets": buckets,
+    }).encode("utf-8")
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+class CompiledVocab:
+    """Read-only vocabulary over a compiled `.cvocab` buffer; supports `in`, `len` and `accepts`."""
+
+    def __init__(self, buf, source: Optional[str] = None):
+        if bytes(buf[:len(MAGIC)]) != MAGIC:
+            raise ValueError("not a compiled vocabulary")
+        (header_len,) = struct.unpack_from("<I", buf, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(buf[start:start + header_len]).decode("utf-8"))
+        if header.get("format") != FORMAT_VERSION:
+            raise ValueError(f"unsupported vocabulary format: {header.get('format')}")
+        base = start + header_len
+        self._buf = buf
+        self.source = source or header.get("source")
+        self.word_count = int(header.get("words") or 0)
+        self._buckets: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        for b in header["buckets"]:
+            length, count, offset = int(b["len"]), int(b["count"]), base + int(b["offset"])
+            words = np.frombuffer(buf, dtype=f"S{length}", count=count, offset=offset)
+            flags = np.frombuffer(buf, dtype=np.uint8, count=count, offset=offset + length * count)
+            self._buckets[length] = (words, flags)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledVocab":
+        with open(path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buf, source=path)
+
+    @classmethod
+    def from_words(cls, words: Iterable[str]) -> "CompiledVocab":
+        """Compile in memory (no file), e.g. for tests or when the disk cache is off."""
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = compile_vocab(words, os.path.join(tmp, "vocab.cvocab"))
+            with open(path, "rb") as f:
+                return cls(f.read())
+
+    def _flag(self, word: str) -> int:
+        bucket = self._buckets.get(len(word)) if word else None
+        if bucket is None:
+            return 0
+        words, flags = bucket
+        try:
+            key = word.encode("ascii")
+        except UnicodeEncodeError:
+            return 0
+        i = int(words.searchsorted(key))
+        if i < len(words) and words[i] == key:
+            return int(flags[i])
+        return 0
+
+    def __contains__(self, word: object) -> bool:
+        return isinstance(word, str) and bool(self._flag(word) & FLAG_WORD)
+
+    def __len__(self) -> int:
+        return self.word_count
+
+    def accepts(self, word: str) -> bool:
+        """In the list, or a plural of a listed word."""
+        return self._flag(word) != 0
+
+    def lookup_many(self, words: Sequence[str]) -> Dict[str, int]:
+        """Flags for each distinct word in `words` (0 when unknown), one search per length."""
+        by_len: Dict[int, List[str]] = {}
+        for w in set(words):
+            if w and w.isascii():
+                by_len.setdefault(len(w), []).append(w)
+        out: Dict[str, int] = {w: 0 for w in words}
+        for length, group in by_len.items():
+            bucket = self._buckets.get(length)
+            if bucket is None:
+                continue
+            arr, flags = bucket
+            keys = np.array([w.encode("ascii") for w in group], dtype=f"S{length}")
+            idx = np.searchsorted(arr, keys)
+            hit = idx < len(arr)
+            hit[hit] = arr[idx[hit]] == keys[hit]
+            for w, i, ok in zip(group, idx, hit):
+                if ok:
+                    out[w] = int(flags[i])
+        return out
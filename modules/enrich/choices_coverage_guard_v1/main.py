@@ -14,6 +14,35 @@ def load_portions(path):
     return data
 
 
+def check_row(r, min_target: int = 1, max_target: int = 400, include_text: bool = True):
+    """Return (missing_finding, invalid_finding) for one portion; either may be None."""
+    sid = str(r.get("section_id") or r.get("portion_id"))
+    is_gameplay = r.get("is_gameplay", True)
+    choices = r.get("choices") or []
+    targets = r.get("targets") or []
+    any_choices = bool(choices or targets)
+    text = r.get("raw_text") or r.get("text") or ""
+    missing_row = None
+    if is_gameplay and not any_choices:
+        missing_row = {"section_id": sid, "reason": "no_choices"}
+        if include_text:
+            missing_row["text"] = text[:500]
+    all_targets = []
+    for c in choices:
+        tgt = c.get("target")
+        if tgt is not None:
+            all_targets.append(str(tgt))
+    for t in targets:
+        all_targets.append(str(t))
+    invalid_row = None
+    bad = [t for t in all_targets if not (min_target <= int(t) <= max_target)]
+    if bad:
+        invalid_row = {"section_id": sid, "invalid_targets": bad}
+        if include_text:
+            invalid_row["text"] = text[:500]
+    return missing_row, invalid_row
+
+
 def main():
     ap = argparse.ArgumentParser(description="Validate choices coverage/targets; emit missing/invalid choice report.")
     ap.add_argument("--portions", required=True, help="portions json/jsonl")
@@ -28,30 +57,11 @@ def main():
     missing = []
     invalid = []
     for r in rows:
-        sid = str(r.get("section_id") or r.get("portion_id"))
-        is_gameplay = r.get("is_gameplay", True)
-        choices = r.get("choices") or []
-        targets = r.get("targets") or []
-        any_choices = bool(choices or targets)
-        text = r.get("raw_text") or r.get("text") or ""
-        if is_gameplay and not any_choices:
-            row = {"section_id": sid, "reason": "no_choices"}
-            if args.include_text:
-                row["text"] = text[:500]
-            missing.append(row)
-        all_targets = []
-        for c in choices:
-            tgt = c.get("target")
-            if tgt is not None:
-                all_targets.append(str(tgt))
-        for t in targets:
-            all_targets.append(str(t))
-        bad = [t for t in all_targets if not (args.min_target <= int(t) <= args.max_target)]
-        if bad:
-            row = {"section_id": sid, "invalid_targets": bad}
-            if args.include_text:
-                row["text"] = text[:500]
-            invalid.append(row)
+        missing_row, invalid_row = check_row(r, args.min_target, args.max_target, args.include_text)
+        if missing_row:
+            missing.append(missing_row)
+        if invalid_row:
+            invalid.append(invalid_row)
 
     ensure_dir(Path(args.out_missing).parent)
     save_jsonl(args.out_missing, missing)
@@ -43,35 +43,17 @@ def save_portions(rows: List[Dict], fmt: str, path: str):
         save_json(path, obj)
 
 
-def main():
-    ap = argparse.ArgumentParser(description="Escalate missing-choice sections with LLM to extract choices or mark end_game.")
-    ap.add_argument("--portions", required=True, help="portions json/jsonl")
-    ap.add_argument("--missing", required=True, help="missing choices jsonl (section_id per line)")
-    ap.add_argument("--out", required=True, help="output portions path")
-    ap.add_argument("--model", default="gpt-4.1-mini")
-    ap.add_argument("--max-sections", type=int, default=50)
-    args = ap.parse_args()
-
-    from modules.common.openai_client import OpenAI
-    client = OpenAI()
-
-    rows, fmt = load_portions(args.portions)
-    missing_ids = []
-    for line in read_jsonl(args.missing):
-        missing_ids.append(str(line["section_id"]))
-        if len(missing_ids) >= args.max_sections:
-            break
-
-    set(missing_ids)
+def escalate_sections(client, rows: List[Dict], missing_ids: List[str], model: str) -> List[str]:
+    """Ask the LLM for choices on each missing section (rows updated in place). Returns updated ids."""
     by_id = {str(r.get("section_id") or r.get("portion_id")): r for r in rows}
-
+    updated = []
     for sid in missing_ids:
         r = by_id.get(sid)
         if not r:
             continue
         text = r.get("raw_text") or r.get("text") or ""
         msg = client.chat.completions.create(
-            model=args.model,
+            model=model,
             messages=[{"role": "user", "content": PROMPT + "\n\nsection_id: " + sid + "\ntext:\n" + text}],
             temperature=0,
             max_tokens=400,
@@ -89,6 +71,34 @@ def main():
         except Exception:
             # leave unchanged on parse failure
             continue
+        updated.append(sid)
+    return updated
+
+
+def load_missing_ids(path: str, max_sections: int) -> List[str]:
+    missing_ids = []
+    for line in read_jsonl(path):
+        missing_ids.append(str(line["section_id"]))
+        if len(missing_ids) >= max_sections:
+            break
+    return missing_ids
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Escalate missing-choice sections with LLM to extract choices or mark end_game.")
+    ap.add_argument("--portions", required=True, help="portions json/jsonl")
+    ap.add_argument("--missing", required=True, help="missing choices jsonl (section_id per line)")
+    ap.add_argument("--out", required=True, help="output portions path")
+    ap.add_argument("--model", default="gpt-4.1-mini")
+    ap.add_argument("--max-sections", type=int, default=50)
+    args = ap.parse_args()
+
+    from modules.common.openai_client import OpenAI
+    client = OpenAI()
+
+    rows, fmt = load_portions(args.portions)
+    missing_ids = load_missing_ids(args.missing, args.max_sections)
+    escalate_sections(client, rows, missing_ids, args.model)
 
     save_portions(rows, fmt, args.out)
     print(f"Escalated {len(missing_ids)} sections → {args.out}")
@@ -1,10 +1,11 @@
 import argparse
-import base64
 import json
 import re
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from modules.common.prepared_image import image_data_uri
 from modules.common.openai_client import OpenAI
+from modules.common.pattern_scanner import PatternScanner, ScanPattern
 from modules.common.utils import read_jsonl, save_jsonl, ProgressLogger
 from modules.common.html_utils import html_to_text
 from modules.common.turn_to_claims import merge_turn_to_claims
@@ -41,6 +42,39 @@ WIN_CONTINUE_CUES = [
     re.compile(r"\bif\s+you\s+win\b", re.IGNORECASE),
     re.compile(r"\bif\s+you\s+(?:manage\s+to\s+)?(?:defeat|kill|slay)\b", re.IGNORECASE),
 ]
+_KILL = ("defeat", "kill", "slay")
+_DEPLETED = ("armour", "armor", "stamina")
+# WIN_PATTERNS / LOSS_PATTERNS / escape patterns / WIN_CONTINUE_CUES with their required keywords.
+OUTCOME_SCANNER = PatternScanner(
+    [
+        ScanPattern(f"win_{i}", pattern, keywords)
+        for i, (pattern, keywords) in enumerate(zip(WIN_PATTERNS, [
+            ("win", "turn"),
+            ("win", "attack", "round", "turn"),
+            ("turn", _KILL),
+        ]))
+    ]
+    + [
+        ScanPattern(f"loss_{i}", pattern, keywords)
+        for i, (pattern, keywords) in enumerate(zip(LOSS_PATTERNS, [
+            ("lose", "turn"),
+            ("lose", "turn", ("fight", "combat", "battle")),
+            ("turn", ("defeated", "killed")),
+            ("zero", "turn", _DEPLETED, ("reduced", "reduction")),
+            ("0", "turn", _DEPLETED),
+        ]))
+    ]
+    + [
+        ScanPattern("escape", ESCAPE_PATTERN, ("escape", "turn")),
+        ScanPattern("escape_after", ESCAPE_AFTER_PATTERN, ("escape", "after", "turn")),
+        ScanPattern("escape_choice", ESCAPE_CHOICE_PATTERN, ("escape", "turn", ("may", "can", "choose"))),
+        ScanPattern("escape_flex", ESCAPE_FLEX_PATTERN, ("escape", "turn")),
+    ]
+    + [
+        ScanPattern(f"win_cue_{i}", pattern, keywords)
+        for i, (pattern, keywords) in enumerate(zip(WIN_CONTINUE_CUES, [("win",), ("win",), (_KILL,)]))
+    ]
+)
 PLAYER_ROUND_WIN_TURN_PATTERN = re.compile(
     r"(?:as\s+soon\s+as\s+|if\s+)(?:you\s+)?win\s+your\s+([a-z0-9]+)(?:st|nd|rd|th)?\s+attack\s+round[^.]*?\bturn\s+to\s+(\d+)",
     re.IGNORECASE | re.DOTALL,
@@ -193,27 +227,28 @@ def _detect_outcomes(text: str) -> Tuple[Optional[str], Optional[str], Optional[
     win_section = None
     loss_section = None
     escape_section = None
-    for pattern in WIN_PATTERNS:
-        match = pattern.search(text)
+    scan = OUTCOME_SCANNER.scan(text)
+    for i in range(len(WIN_PATTERNS)):
+        match = scan.search(f"win_{i}")
         if match:
             win_section = match.group(1)
             break
-    for pattern in LOSS_PATTERNS:
-        match = pattern.search(text)
+    for i in range(len(LOSS_PATTERNS)):
+        match = scan.search(f"loss_{i}")
         if match:
             loss_section = match.group(1)
             break
     escape_match = (
-        ESCAPE_PATTERN.search(text)
-        or ESCAPE_AFTER_PATTERN.search(text)
-        or ESCAPE_CHOICE_PATTERN.search(text)
-        or ESCAPE_FLEX_PATTERN.search(text)
+        scan.search("escape")
+        or scan.search("escape_after")
+        or scan.search("escape_choice")
+        or scan.search("escape_flex")
     )
     if escape_match:
         escape_section = escape_match.group(1)
     if win_section is None:
-        for cue in WIN_CONTINUE_CUES:
-            if cue.search(text):
+        for i in range(len(WIN_CONTINUE_CUES)):
+            if scan.search(f"win_cue_{i}"):
                 win_section = "continue"
                 break
     return win_section, loss_section, escape_section
@@ -1067,9 +1102,7 @@ def _coerce_enemies(raw_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
 
 
 def _encode_image(path: str) -> str:
-    with open(path, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode("utf-8")
-    return f"data:image/png;base64,{b64}"
+    return image_data_uri(path)
 
 
 def extract_combat_llm(text: str, model: str, client: OpenAI) -> Tuple[List[Combat], Dict[str, Any]]:
@@ -4,6 +4,7 @@ import re
 from typing import Any, Dict, List, Optional, Tuple
 
 from modules.common.openai_client import OpenAI
+from modules.common.pattern_scanner import PatternScanner, ScanPattern
 from modules.common.utils import read_jsonl, save_jsonl, ProgressLogger
 from modules.common.html_utils import html_to_text
 from modules.common.turn_to_claims import merge_turn_to_claims
@@ -65,6 +66,89 @@ POSSESSIONS_RESTORE_PATTERNS = [
     re.compile(r"\byour\s+possessions\s+(?:are\s+)?returned\b", re.IGNORECASE),
 ]
 
+NOT_HAVE_TURN_PATTERN = re.compile(r"if\s+you\s+(?:do\s+not\s+have|have\s+not)\b.*?turn\s+to\s+(\d+)", re.IGNORECASE | re.DOTALL)
+DO_NOT_TURN_PATTERN = re.compile(r"\bif\s+you\s+do\s+not\b.*?turn\s+to\s+(\d+)", re.IGNORECASE | re.DOTALL)
+HAVE_YOU_GOT_PATTERN = re.compile(r"\bhave\s+you\s+(?:got|have)\s+(?:the\s+|a\s+|an\s+)?(.*?)(?:\?|\.|$)", re.IGNORECASE)
+HAVE_YOU_VERB_PATTERN = re.compile(
+    r"\bhave\s+you\s+(?:read|drunk|swallowed|used|eaten)\s+(?:the\s+|a\s+|an\s+)?(.*?)(?:\?|\.|$)",
+    re.IGNORECASE,
+)
+IF_HAVE_TURN_PATTERN = re.compile(r"\bif\s+you\s+have\b(?!\s+not).*?turn\s+to\s+(\d+)", re.IGNORECASE | re.DOTALL)
+IF_HAVE_NOT_TURN_PATTERN = re.compile(r"\bif\s+you\s+have\s+not\b.*?turn\s+to\s+(\d+)", re.IGNORECASE | re.DOTALL)
+PUT_IT_IN_PACK_PATTERN = re.compile(r"\bput\s+it\s+in\s+your\s+(?:backpack|pack|bag)\b", re.IGNORECASE)
+PUT_THEM_IN_PACK_PATTERN = re.compile(r"\bput\s+them\s+in\s+your\s+(?:backpack|pack|bag)\b", re.IGNORECASE)
+
+_CONTAINERS = ("cupboard", "chest", "box", "bag", "pouch", "pack", "sack", "casket", "cabinet", "drawer", "container")
+_PACK = ("pack", "bag")  # "pack" also covers "backpack"
+# Every pattern run over a whole portion's text, with the keywords it cannot match without.
+INVENTORY_SCANNER = PatternScanner(
+    [
+        ScanPattern(f"gain_{i}", pattern, keywords)
+        for i, (pattern, keywords) in enumerate(zip(GAIN_PATTERNS, [
+            ("you", ("find", "take", "pick", "gain", "receive", "get")),
+            ("add", "backpack"),
+            ("yours",),
+            ("seize",),
+            ("put", "pocket"),
+            ("putting", "pocket"),
+            (_CONTAINERS, "contains"),
+        ]))
+    ]
+    + [
+        ScanPattern(f"lose_{i}", pattern, keywords)
+        for i, (pattern, keywords) in enumerate(zip(LOSE_PATTERNS, [
+            ("you", ("lose", "drop", "discard", "remove")),
+            ("take", "out", _PACK),
+            ("taken", "from"),
+        ]))
+    ]
+    + [
+        ScanPattern(f"use_{i}", pattern, keywords)
+        for i, (pattern, keywords) in enumerate(zip(USE_PATTERNS, [
+            ("you", ("use", "drink", "eat")),
+            ("using",),
+        ]))
+    ]
+    + [
+        ScanPattern(f"check_{i}", pattern, keywords)
+        for i, (pattern, keywords) in enumerate(zip(CHECK_PATTERNS, [
+            ("if", ("have", "possess", "carrying")),
+            ("if", "have", "not"),
+            ("if", "backpack"),
+        ]))
+    ]
+    + [
+        ScanPattern(f"possessions_lose_{i}", pattern, keywords)
+        for i, (pattern, keywords) in enumerate(zip(POSSESSIONS_LOSE_PATTERNS, [
+            ("possessions", "lost"),
+            ("possessions", "lost"),
+            ("stripped", "possessions"),
+            ("deprived", "possessions"),
+            ("possessions", ("taken", "confiscated")),
+        ]))
+    ]
+    + [
+        ScanPattern(f"possessions_restore_{i}", pattern, keywords)
+        for i, (pattern, keywords) in enumerate(zip(POSSESSIONS_RESTORE_PATTERNS, [
+            ("rest", "possessions", "here"),
+            ("possessions", "here"),
+            ("possessions", "here"),
+            ("possessions", ("recover", "retrieve", "regain", "find", "collect", "gather", "get")),
+            ("possessions", "returned"),
+        ]))
+    ]
+    + [
+        ScanPattern("not_have_turn", NOT_HAVE_TURN_PATTERN, ("if", "have", "not", "turn")),
+        ScanPattern("do_not_turn", DO_NOT_TURN_PATTERN, ("if", "not", "turn")),
+        ScanPattern("have_you_got", HAVE_YOU_GOT_PATTERN, ("have", "you")),
+        ScanPattern("have_you_verb", HAVE_YOU_VERB_PATTERN, ("have", "you", ("read", "drunk", "swallowed", "used", "eaten"))),
+        ScanPattern("if_have_turn", IF_HAVE_TURN_PATTERN, ("if", "have", "turn")),
+        ScanPattern("if_have_not_turn", IF_HAVE_NOT_TURN_PATTERN, ("if", "have", "not", "turn")),
+        ScanPattern("put_it_in_pack", PUT_IT_IN_PACK_PATTERN, ("put", "it", _PACK)),
+        ScanPattern("put_them_in_pack", PUT_THEM_IN_PACK_PATTERN, ("put", "them", _PACK)),
+    ]
+)
+
 
 def _coerce_turn_to_claims(raw_claims: Optional[List[Any]]) -> List[TurnToLinkClaimInline]:
     if not raw_claims:
@@ -82,9 +166,10 @@ def _extract_possessions_states(text: str) -> List[InventoryState]:
     if "possessions" not in lower:
         return []
     states: List[InventoryState] = []
-    if any(p.search(text) for p in POSSESSIONS_LOSE_PATTERNS):
+    scan = INVENTORY_SCANNER.scan(text)
+    if any(scan.search(f"possessions_lose_{i}") for i in range(len(POSSESSIONS_LOSE_PATTERNS))):
         states.append(InventoryState(action="lose_all", scope="possessions", confidence=0.8))
-    if any(p.search(text) for p in POSSESSIONS_RESTORE_PATTERNS):
+    if any(scan.search(f"possessions_restore_{i}") for i in range(len(POSSESSIONS_RESTORE_PATTERNS))):
         states.append(InventoryState(action="restore_all", scope="possessions", confidence=0.8))
     return states
 
@@ -493,9 +578,10 @@ def extract_inventory_regex(text: str) -> InventoryEnrichment:
             return InventoryEnrichment()
 
     inventory_states = _extract_possessions_states(text)
+    scan = INVENTORY_SCANNER.scan(text)
 
-    for pattern in GAIN_PATTERNS:
-        for match in pattern.finditer(text):
+    for i in range(len(GAIN_PATTERNS)):
+        for match in scan.finditer(f"gain_{i}"):
             item_text = match.group(1)
             if item_text:
                 if any(phrase in item_text.lower() for phrase in ("out of your backpack", "out of your pack", "out of your bag")):
@@ -512,8 +598,8 @@ def extract_inventory_regex(text: str) -> InventoryEnrichment:
                         item_qty = part_qty if idx > 0 else qty if qty else part_qty
                         gained.append(InventoryItem(item=part_name, quantity=item_qty, confidence=0.7))
 
-    for pattern in LOSE_PATTERNS:
-        for match in pattern.finditer(text):
+    for i in range(len(LOSE_PATTERNS)):
+        for match in scan.finditer(f"lose_{i}"):
             item_text = match.group(1)
             if item_text:
                 name, qty = _parse_item_text(item_text)
@@ -528,8 +614,8 @@ def extract_inventory_regex(text: str) -> InventoryEnrichment:
                         item_qty = part_qty if idx > 0 else qty if qty else part_qty
                         lost.append(InventoryItem(item=part_name, quantity=item_qty, confidence=0.7))
 
-    for pattern in USE_PATTERNS:
-        for match in pattern.finditer(text):
+    for i in range(len(USE_PATTERNS)):
+        for match in scan.finditer(f"use_{i}"):
             item_text = match.group(1)
             if item_text:
                 raw_match = match.group(0).lower()
@@ -549,8 +635,8 @@ def extract_inventory_regex(text: str) -> InventoryEnrichment:
                         item_qty = part_qty if idx > 0 else qty if qty else part_qty
                         used.append(InventoryItem(item=part_name, quantity=item_qty, confidence=0.7))
 
-    for pattern in CHECK_PATTERNS:
-        for match in pattern.finditer(text):
+    for i in range(len(CHECK_PATTERNS)):
+        for match in scan.finditer(f"check_{i}"):
             item_text = match.group(1)
             if item_text:
                 raw_match = match.group(0).lower()
@@ -576,24 +662,20 @@ def extract_inventory_regex(text: str) -> InventoryEnrichment:
                 if name and len(name) < 90 and not _is_bad_item_name(name):
                     checks.append(InventoryCheck(item=name, condition=condition, target_section=target_section, confidence=0.7))
     if checks:
-        neg_match = re.search(r"if\s+you\s+(?:do\s+not\s+have|have\s+not)\b.*?turn\s+to\s+(\d+)", text, re.IGNORECASE | re.DOTALL)
+        neg_match = scan.search("not_have_turn")
         if neg_match and not any((c.condition or "").lower().startswith("if you do not have") for c in checks):
             checks.append(InventoryCheck(item=checks[0].item, condition="if you do not have", target_section=neg_match.group(1), confidence=0.7))
-        else_match = re.search(r"\bif\s+you\s+do\s+not\b.*?turn\s+to\s+(\d+)", text, re.IGNORECASE | re.DOTALL)
+        else_match = scan.search("do_not_turn")
         if else_match and not any((c.condition or "").lower().startswith("if you do not have") for c in checks):
             checks.append(InventoryCheck(item=checks[0].item, condition="if you do not have", target_section=else_match.group(1), confidence=0.7))
-    question_match = re.search(r"\bhave\s+you\s+(?:got|have)\s+(?:the\s+|a\s+|an\s+)?(.*?)(?:\?|\.|$)", text, re.IGNORECASE)
+    question_match = scan.search("have_you_got")
     question_item = None
     if question_match:
         q_item_text = question_match.group(1)
         q_name, _ = _parse_item_text(q_item_text)
         if q_name and not _is_bad_item_name(q_name):
             question_item = q_name
-    verb_question_match = re.search(
-        r"\bhave\s+you\s+(?:read|drunk|swallowed|used|eaten)\s+(?:the\s+|a\s+|an\s+)?(.*?)(?:\?|\.|$)",
-        text,
-        re.IGNORECASE,
-    )
+    verb_question_match = scan.search("have_you_verb")
     if verb_question_match:
         q_item_text = verb_question_match.group(1)
         q_name, _ = _parse_item_text(q_item_text)
@@ -625,8 +707,8 @@ def extract_inventory_regex(text: str) -> InventoryEnrichment:
         if anchor_candidates:
             anchor_item = max(anchor_candidates, key=len)
     if anchor_item:
-        has_match = re.search(r"\bif\s+you\s+have\b(?!\s+not).*?turn\s+to\s+(\d+)", text, re.IGNORECASE | re.DOTALL)
-        not_match = re.search(r"\bif\s+you\s+have\s+not\b.*?turn\s+to\s+(\d+)", text, re.IGNORECASE | re.DOTALL)
+        has_match = scan.search("if_have_turn")
+        not_match = scan.search("if_have_not_turn")
         if has_match:
             checks.append(InventoryCheck(item=anchor_item, condition="if you have", target_section=has_match.group(1), confidence=0.7))
         if not_match:
@@ -653,8 +735,8 @@ def extract_inventory_regex(text: str) -> InventoryEnrichment:
     if lost:
         lost = [lost_item for lost_item in lost if not _item_only_in_choice_prompt(text, lost_item.item)]
 
-    if not gained and re.search(r"\bput\s+it\s+in\s+your\s+(?:backpack|pack|bag)\b", text, re.IGNORECASE):
-        prior = text[:re.search(r"\bput\s+it\s+in\s+your\s+(?:backpack|pack|bag)\b", text, re.IGNORECASE).start()]
+    if not gained and scan.search("put_it_in_pack"):
+        prior = text[:scan.search("put_it_in_pack").start()]
         noun_match = None
         for m in re.finditer(
             r"\b(?:prise|pry|pull|remove|take|lift|pick\s+up|pick|grab|retrieve|collect|extract|draw)\s+"
@@ -671,8 +753,8 @@ def extract_inventory_regex(text: str) -> InventoryEnrichment:
             candidate = _clean_item_name(noun_match.group(1))
             if candidate and not _is_bad_item_name(candidate, "add"):
                 gained.append(InventoryItem(item=candidate, quantity=1, confidence=0.6))
-    if not gained and re.search(r"\bput\s+them\s+in\s+your\s+(?:backpack|pack|bag)\b", text, re.IGNORECASE):
-        prior = text[:re.search(r"\bput\s+them\s+in\s+your\s+(?:backpack|pack|bag)\b", text, re.IGNORECASE).start()]
+    if not gained and scan.search("put_them_in_pack"):
+        prior = text[:scan.search("put_them_in_pack").start()]
         noun_match = None
         for m in re.finditer(r"([A-Za-z][A-Za-z\- ]{1,40}eyes)", prior, re.IGNORECASE):
             noun_match = m
@@ -4,6 +4,7 @@ import re
 from typing import Any, Dict, List, Tuple
 
 from modules.common.openai_client import OpenAI
+from modules.common.pattern_scanner import PatternScanner, ScanPattern
 from modules.common.utils import read_jsonl, save_jsonl, ProgressLogger
 from modules.common.html_utils import html_to_text
 from modules.common.turn_to_claims import merge_turn_to_claims
@@ -90,14 +91,23 @@ If everything is correct, return {"removals": [], "corrections": [], "additions"
 
 # --- Logic ---
 
+STAT_CHECK_SCANNER = PatternScanner([
+    ScanPattern("luck", LUCK_PATTERN, ("test", "your", "luck")),
+    ScanPattern("lucky", LUCKY_PATTERN, ("lucky", "turn")),
+    ScanPattern("unlucky", UNLUCKY_PATTERN, ("unlucky", "turn")),
+    ScanPattern("roll_check", ROLL_CHECK_PATTERN,
+                ("roll", ("die", "dice"), ("skill", "stamina", "luck"), "turn", ("greater", "more"))),
+])
+
 def extract_stat_checks_regex(text: str) -> Tuple[List[StatCheck], List[TestLuck]]:
     checks = []
     luck_tests = []
-    
+    scan = STAT_CHECK_SCANNER.scan(text)
+
     # 1. Test Your Luck
-    if LUCK_PATTERN.search(text):
-        lucky_match = LUCKY_PATTERN.search(text)
-        unlucky_match = UNLUCKY_PATTERN.search(text)
+    if scan.search("luck"):
+        lucky_match = scan.search("lucky")
+        unlucky_match = scan.search("unlucky")
         if lucky_match and unlucky_match:
             luck_tests.append(TestLuck(
                 lucky_section=lucky_match.group(1),
@@ -105,7 +115,7 @@ def extract_stat_checks_regex(text: str) -> Tuple[List[StatCheck], List[TestLuck
                 confidence=0.7
             ))
 
-    roll_match = ROLL_CHECK_PATTERN.search(text)
+    roll_match = scan.search("roll_check")
     if roll_match:
         dice_word = roll_match.group(1).lower()
         dice_count = NUM_MAP.get(dice_word, None)
@@ -132,10 +142,11 @@ def extract_stat_checks_regex(text: str) -> Tuple[List[StatCheck], List[TestLuck
 def ensure_test_luck(text: str, luck_tests: List[TestLuck]) -> List[TestLuck]:
     if luck_tests:
         return luck_tests
-    if not LUCK_PATTERN.search(text):
+    scan = STAT_CHECK_SCANNER.scan(text)
+    if not scan.search("luck"):
         return luck_tests
-    lucky_match = LUCKY_PATTERN.search(text)
-    unlucky_match = UNLUCKY_PATTERN.search(text)
+    lucky_match = scan.search("lucky")
+    unlucky_match = scan.search("unlucky")
     if lucky_match and unlucky_match:
         return [TestLuck(
             lucky_section=lucky_match.group(1),
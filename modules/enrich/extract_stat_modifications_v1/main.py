@@ -4,6 +4,7 @@ import re
 from typing import Any, Dict, List, Optional, Tuple
 
 from modules.common.openai_client import OpenAI
+from modules.common.pattern_scanner import PatternScanner, ScanPattern
 from modules.common.utils import read_jsonl, save_jsonl, ProgressLogger
 from modules.common.html_utils import html_to_text
 from schemas import EnrichedPortion, StatModification
@@ -23,6 +24,74 @@ SENTENCE_MOD_PATTERN = re.compile(
     re.IGNORECASE,
 )
 
+ROLL_EACH_PATTERN = re.compile(
+    r"roll\s+(one|two|three|four|five|six|\d+)\s+(?:die|dice)"
+    r".{0,200}?(?:lose|loses|reduces|reduce)"
+    r"\s+(\d+|one|two|three|four|five|six|seven|eight|nine|ten)\s+"
+    r"(skill|stamina|luck)\s+points?\s+for\s+each",
+    re.IGNORECASE | re.DOTALL,
+)
+EACH_ONE_PATTERN = re.compile(
+    r"roll\s+(one|two|three|four|five|six|\d+)\s+(?:die|dice)"
+    r".{0,200}?each\s+one\s+reduces?\s+your\s+"
+    r"(skill|stamina|luck)\s+by\s+"
+    r"(\d+|one|two|three|four|five|six|seven|eight|nine|ten)",
+    re.IGNORECASE | re.DOTALL,
+)
+EACH_STATS_PATTERN = re.compile(
+    r"\b(?:add|increase)\s+(one|two|three|four|five|six|seven|eight|nine|ten|\d+)\s+to\s+each\s+of\s+your\s+"
+    r"(skill|stamina|luck)"
+    r"(?:\s*,\s*|\s+and\s+)(skill|stamina|luck)"
+    r"(?:\s*,\s*|\s+and\s+)?(skill|stamina|luck)?"
+    r"(?:\s+scores?)?\b",
+    re.IGNORECASE,
+)
+ROLL_ADD_EACH_PATTERN = re.compile(
+    r"roll\s+(one|two|three|four|five|six|\d+)\s+(?:die|dice)\s+and\s+add\s+"
+    r"(\d+|one|two|three|four|five|six|seven|eight|nine|ten)\s+"
+    r"(?:to\s+the\s+total|to\s+this\s+total)?"
+    r".{0,220}?(?:lose|loses|reduces|reduce)\s+(?:your\s+)?"
+    r"(skill|stamina|luck)\s+by\s+"
+    r"(\d+|one|two|three|four|five|six|seven|eight|nine|ten)\s+for\s+each",
+    re.IGNORECASE | re.DOTALL,
+)
+ROLL_REDUCE_TOTAL_PATTERN = re.compile(
+    r"roll\s+(one|two|three|four|five|six|\d+)\s+(?:die|dice)"
+    r"(?:\s*,?\s*(?:and\s+)?add\s+(\d+|one|two|three|four|five|six|seven|eight|nine|ten)\s+to\s+the\s+number)?"
+    r".{0,220}?(?:lose|loses|reduces|reduce|deduct|subtract)\s+(?:your\s+)?"
+    r"(skill|stamina|luck)\s+(?:score\s+)?by\s+(?:the\s+)?(?:total|number|amount)",
+    re.IGNORECASE | re.DOTALL,
+)
+ROLL_DEDUCT_NUMBER_PATTERN = re.compile(
+    r"roll\s+(one|two|three|four|five|six|\d+)\s+(?:die|dice)"
+    r"(?:\s*,?\s*(?:and\s+)?add\s+(\d+|one|two|three|four|five|six|seven|eight|nine|ten)\s+to\s+the\s+number)?"
+    r".{0,200}?(?:deduct|subtract)\s+(?:the\s+)?(?:number|total|amount)\s+from\s+(?:your\s+)?"
+    r"(skill|stamina|luck)\s*(?:score)?",
+    re.IGNORECASE | re.DOTALL,
+)
+
+_STATS = ("skill", "stamina", "luck")
+_DICE = ("die", "dice")
+_LOSS = ("lose", "reduce")  # also cover "loses" / "reduces"
+_AMOUNT_OF = ("total", "number", "amount")
+# Every pattern above with the keywords it cannot match without. SENTENCE_MOD_PATTERN is scanned
+# per sentence; the rest run over a portion's whole text.
+STAT_MOD_SCANNER = PatternScanner([
+    ScanPattern("reduce", REDUCE_PATTERN, (("reduce", "deduct", "subtract"), "by")),
+    ScanPattern("lose", LOSE_PATTERN, (("lose", "deduct"), _STATS)),
+    ScanPattern("gain", GAIN_PATTERN, (("gain", "increase", "restore", "add"), "by")),
+    ScanPattern("gain_val", GAIN_VAL_PATTERN, (("gain", "restore", "add"), _STATS)),
+    ScanPattern("sentence_mod", SENTENCE_MOD_PATTERN, (_STATS,)),
+    ScanPattern("roll_each", ROLL_EACH_PATTERN, ("roll", _DICE, _LOSS, _STATS, "each")),
+    ScanPattern("each_one", EACH_ONE_PATTERN, ("roll", _DICE, "each", "one", "reduce", _STATS)),
+    ScanPattern("each_stats", EACH_STATS_PATTERN, (("add", "increase"), "each", _STATS)),
+    ScanPattern("roll_add_each", ROLL_ADD_EACH_PATTERN, ("roll", _DICE, "add", _LOSS, _STATS, "each")),
+    ScanPattern("roll_reduce_total", ROLL_REDUCE_TOTAL_PATTERN,
+                ("roll", _DICE, (*_LOSS, "deduct", "subtract"), _STATS, _AMOUNT_OF)),
+    ScanPattern("roll_deduct_number", ROLL_DEDUCT_NUMBER_PATTERN,
+                ("roll", _DICE, ("deduct", "subtract"), _AMOUNT_OF, "from", _STATS)),
+])
+
 SYSTEM_PROMPT = """You are an expert at parsing Fighting Fantasy gamebook sections.
 Extract stat modifications (SKILL, STAMINA, LUCK) from the provided text into a JSON object.
 
@@ -187,54 +256,9 @@ def extract_stat_modifications_regex(text: str) -> List[StatModification]:
         return lower.startswith("if ") or " if " in lower or " unless " in lower
 
 
-    roll_each_pattern = re.compile(
-        r"roll\s+(one|two|three|four|five|six|\d+)\s+(?:die|dice)"
-        r".{0,200}?(?:lose|loses|reduces|reduce)"
-        r"\s+(\d+|one|two|three|four|five|six|seven|eight|nine|ten)\s+"
-        r"(skill|stamina|luck)\s+points?\s+for\s+each",
-        re.IGNORECASE | re.DOTALL,
-    )
-    each_one_pattern = re.compile(
-        r"roll\s+(one|two|three|four|five|six|\d+)\s+(?:die|dice)"
-        r".{0,200}?each\s+one\s+reduces?\s+your\s+"
-        r"(skill|stamina|luck)\s+by\s+"
-        r"(\d+|one|two|three|four|five|six|seven|eight|nine|ten)",
-        re.IGNORECASE | re.DOTALL,
-    )
-    each_stats_pattern = re.compile(
-        r"\b(?:add|increase)\s+(one|two|three|four|five|six|seven|eight|nine|ten|\d+)\s+to\s+each\s+of\s+your\s+"
-        r"(skill|stamina|luck)"
-        r"(?:\s*,\s*|\s+and\s+)(skill|stamina|luck)"
-        r"(?:\s*,\s*|\s+and\s+)?(skill|stamina|luck)?"
-        r"(?:\s+scores?)?\b",
-        re.IGNORECASE,
-    )
-    roll_add_each_pattern = re.compile(
-        r"roll\s+(one|two|three|four|five|six|\d+)\s+(?:die|dice)\s+and\s+add\s+"
-        r"(\d+|one|two|three|four|five|six|seven|eight|nine|ten)\s+"
-        r"(?:to\s+the\s+total|to\s+this\s+total)?"
-        r".{0,220}?(?:lose|loses|reduces|reduce)\s+(?:your\s+)?"
-        r"(skill|stamina|luck)\s+by\s+"
-        r"(\d+|one|two|three|four|five|six|seven|eight|nine|ten)\s+for\s+each",
-        re.IGNORECASE | re.DOTALL,
-    )
-    roll_reduce_total_pattern = re.compile(
-        r"roll\s+(one|two|three|four|five|six|\d+)\s+(?:die|dice)"
-        r"(?:\s*,?\s*(?:and\s+)?add\s+(\d+|one|two|three|four|five|six|seven|eight|nine|ten)\s+to\s+the\s+number)?"
-        r".{0,220}?(?:lose|loses|reduces|reduce|deduct|subtract)\s+(?:your\s+)?"
-        r"(skill|stamina|luck)\s+(?:score\s+)?by\s+(?:the\s+)?(?:total|number|amount)",
-        re.IGNORECASE | re.DOTALL,
-    )
-    roll_deduct_number_pattern = re.compile(
-        r"roll\s+(one|two|three|four|five|six|\d+)\s+(?:die|dice)"
-        r"(?:\s*,?\s*(?:and\s+)?add\s+(\d+|one|two|three|four|five|six|seven|eight|nine|ten)\s+to\s+the\s+number)?"
-        r".{0,200}?(?:deduct|subtract)\s+(?:the\s+)?(?:number|total|amount)\s+from\s+(?:your\s+)?"
-        r"(skill|stamina|luck)\s*(?:score)?",
-        re.IGNORECASE | re.DOTALL,
-    )
-
+    scan = STAT_MOD_SCANNER.scan(text)
     dice_spans: List[Tuple[int, int]] = []
-    for match in roll_each_pattern.finditer(text):
+    for match in scan.finditer("roll_each"):
         dice_raw = match.group(1)
         loss_raw = match.group(2)
         stat = normalize_stat(match.group(3))
@@ -245,7 +269,7 @@ def extract_stat_modifications_regex(text: str) -> List[StatModification]:
             _append_expr(stat, expr, _sentence_for(match.start(), match.end()))
             dice_spans.append((match.start(), match.end()))
 
-    for match in each_one_pattern.finditer(text):
+    for match in scan.finditer("each_one"):
         dice_raw = match.group(1)
         stat = normalize_stat(match.group(2))
         loss_raw = match.group(3)
@@ -256,7 +280,7 @@ def extract_stat_modifications_regex(text: str) -> List[StatModification]:
             _append_expr(stat, expr, _sentence_for(match.start(), match.end()))
             dice_spans.append((match.start(), match.end()))
 
-    for match in each_stats_pattern.finditer(text):
+    for match in scan.finditer("each_stats"):
         amount = _to_int(match.group(1))
         if amount is None:
             continue
@@ -265,7 +289,7 @@ def extract_stat_modifications_regex(text: str) -> List[StatModification]:
             if stat:
                 _append(stat, amount, _sentence_for(match.start(), match.end()))
 
-    for match in roll_add_each_pattern.finditer(text):
+    for match in scan.finditer("roll_add_each"):
         dice_raw = match.group(1)
         add_raw = match.group(2)
         stat = normalize_stat(match.group(3))
@@ -278,7 +302,7 @@ def extract_stat_modifications_regex(text: str) -> List[StatModification]:
             _append_expr(stat, expr, _sentence_for(match.start(), match.end()))
             dice_spans.append((match.start(), match.end()))
 
-    for match in roll_reduce_total_pattern.finditer(text):
+    for match in scan.finditer("roll_reduce_total"):
         dice_raw = match.group(1)
         add_raw = match.group(2)
         stat = normalize_stat(match.group(3))
@@ -289,7 +313,7 @@ def extract_stat_modifications_regex(text: str) -> List[StatModification]:
             _append_expr(stat, expr, _sentence_for(match.start(), match.end()))
             dice_spans.append((match.start(), match.end()))
 
-    for match in roll_deduct_number_pattern.finditer(text):
+    for match in scan.finditer("roll_deduct_number"):
         dice_raw = match.group(1)
         add_raw = match.group(2)
         stat = normalize_stat(match.group(3))
@@ -304,7 +328,7 @@ def extract_stat_modifications_regex(text: str) -> List[StatModification]:
     def _in_dice_span(start: int, end: int) -> bool:
         return any(start >= s and end <= e for s, e in dice_spans)
 
-    for match in REDUCE_PATTERN.finditer(text):
+    for match in scan.finditer("reduce"):
         if _in_dice_span(match.start(), match.end()):
             continue
         sentence = _sentence_for(match.start(), match.end())
@@ -317,7 +341,7 @@ def extract_stat_modifications_regex(text: str) -> List[StatModification]:
         if stat and amount is not None:
             _append(stat, -amount, sentence)
 
-    for match in LOSE_PATTERN.finditer(text):
+    for match in scan.finditer("lose"):
         if _in_dice_span(match.start(), match.end()):
             continue
         sentence = _sentence_for(match.start(), match.end())
@@ -329,7 +353,7 @@ def extract_stat_modifications_regex(text: str) -> List[StatModification]:
         if stat:
             _append(stat, -int(match.group(1)), sentence)
 
-    for match in GAIN_PATTERN.finditer(text):
+    for match in scan.finditer("gain"):
         sentence = _sentence_for(match.start(), match.end())
         if _is_combat_modifier(sentence):
             continue
@@ -340,7 +364,7 @@ def extract_stat_modifications_regex(text: str) -> List[StatModification]:
         if stat and amount is not None:
             _append(stat, amount, sentence)
 
-    for match in GAIN_VAL_PATTERN.finditer(text):
+    for match in scan.finditer("gain_val"):
         sentence = _sentence_for(match.start(), match.end())
         if _is_combat_modifier(sentence):
             continue
@@ -359,7 +383,7 @@ def extract_stat_modifications_regex(text: str) -> List[StatModification]:
         if _is_conditional(sentence):
             continue
         current_sign: Optional[int] = None
-        for match in SENTENCE_MOD_PATTERN.finditer(sentence):
+        for match in STAT_MOD_SCANNER.scan(sentence).finditer("sentence_mod"):
             if match.group(1):
                 keyword = match.group(1).lower()
                 amount = int(match.group(2))
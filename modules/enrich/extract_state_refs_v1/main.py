@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
 import argparse
-import base64
 import json
 import re
 from typing import Any, Dict, List, Optional, Tuple
 
+from modules.common.prepared_image import image_data_uri
 from modules.common.utils import read_jsonl, save_jsonl, ProgressLogger
 from modules.common.html_utils import html_to_text
 from schemas import EnrichedPortion
@@ -237,9 +237,7 @@ def _extract_state_refs(text: str, *, map_ref_override: Optional[str] = None) ->
 
 
 def _encode_image(path: str) -> str:
-    with open(path, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode("utf-8")
-    return f"data:image/png;base64,{b64}"
+    return image_data_uri(path)
 
 
 def _resolve_map_reference(
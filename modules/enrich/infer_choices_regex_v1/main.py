@@ -52,6 +52,29 @@ def find_targets(text: str, min_target: int, max_target: int) -> List[Tuple[str,
     return targets
 
 
+def infer_row_choices(row: Dict, min_target: int, max_target: int) -> bool:
+    """Fill `choices`/`targets` from 'turn to N' text when the row has none. Returns True if changed."""
+    existing = row.get("choices") or []
+    if existing:
+        return False  # keep authored choices
+    text = row.get("raw_text") or row.get("text") or ""
+    inferred = find_targets(text, min_target, max_target)
+    if not inferred:
+        return False
+    seen = set()
+    choices = []
+    for snippet, tgt in inferred:
+        if tgt in seen:
+            continue
+        seen.add(tgt)
+        choices.append({"text": snippet, "target": tgt})
+    row["choices"] = choices
+    row.setdefault("targets", [c["target"] for c in choices])
+    row.setdefault("repair", {})
+    row["repair"]["choices_inferred"] = True
+    return True
+
+
 def main():
     parser = argparse.ArgumentParser(description="Infer navigation choices from raw_text using simple 'turn to N' regex.")
     parser.add_argument("--portions", required=True, help="Input portions (json/jsonl).")
@@ -66,25 +89,7 @@ def main():
 
     rows, fmt = load_portions(args.portions)
     for row in rows:
-        existing = row.get("choices") or []
-        if existing:
-            continue  # keep authored choices
-        text = row.get("raw_text") or row.get("text") or ""
-        inferred = find_targets(text, args.min_target, args.max_target)
-        if not inferred:
-            continue
-        seen = set()
-        choices = []
-        for snippet, tgt in inferred:
-            if tgt in seen:
-                continue
-            seen.add(tgt)
-            choices.append({"text": snippet, "target": tgt})
-        if choices:
-            row["choices"] = choices
-            row.setdefault("targets", [c["target"] for c in choices])
-            row.setdefault("repair", {})
-            row["repair"]["choices_inferred"] = True
+        infer_row_choices(row, args.min_target, args.max_target)
 
     save_portions(rows, fmt, args.out)
     print(f"Saved portions with inferred choices → {args.out}")
@@ -2,31 +2,51 @@ import argparse
 import re
 from typing import Any, Dict, List, Optional, Tuple
 
+from modules.common.pattern_scanner import PatternScanner, ScanPattern
 from modules.common.utils import read_jsonl, save_jsonl
 
+_STATS = ("skill", "stamina", "luck")
+
+# All position helpers below read one shared, memoized scan of the portion's raw_html.
+SEQUENCE_SCANNER = PatternScanner([
+    ScanPattern("anchor", re.compile(r'href\s*=\s*["\']#([^"\']+)["\']', re.IGNORECASE), ("href",)),
+    ScanPattern("turn_to", re.compile(r"\bturn\s+to\s+(\d+)\b", re.IGNORECASE), ("turn",)),
+    ScanPattern(
+        "stat_change",
+        re.compile(
+            r"\b(lose|lost|reduce|reduced|reduces|gain|gained|increase|increased|add|subtract)\b(.{0,120}?)\b(stamina|skill|luck)\b",
+            flags=re.IGNORECASE | re.DOTALL,
+        ),
+        (_STATS, ("lose", "lost", "reduce", "gain", "increase", "add", "subtract")),
+        lower=True,
+    ),
+    ScanPattern("roll_stat", re.compile(r"\broll\b.{0,80}?\b(skill|stamina|luck)\b", re.IGNORECASE | re.DOTALL),
+                ("roll", _STATS), lower=True),
+    ScanPattern("test_stat", re.compile(r"\btest\s+(?:your\s+)?(skill|stamina|luck)\b", re.IGNORECASE),
+                ("test", _STATS), lower=True),
+    ScanPattern("test_luck", re.compile(r"\btest\s+your\s+luck\b"), ("test", "your", "luck"), lower=True),
+    ScanPattern("possessions", re.compile(r"\bpossessions\b"), ("possessions",), lower=True),
+    ScanPattern("map_reference", re.compile(r"\bmap reference\b"), ("map reference",), lower=True),
+    ScanPattern("combat_keyword", re.compile(r"\b(fight|attack|combat)\b"), (("fight", "attack", "combat"),), lower=True),
+])
+
 
 def _extract_anchor_order(raw_html: str) -> List[str]:
     if not raw_html:
         return []
-    return [m.group(1).strip() for m in re.finditer(r'href\s*=\s*["\']#([^"\']+)["\']', raw_html, flags=re.IGNORECASE)]
+    return [m.group(1).strip() for m in SEQUENCE_SCANNER.scan(raw_html).finditer("anchor")]
 
 
 def _extract_anchor_positions(raw_html: str) -> List[Tuple[str, int]]:
     if not raw_html:
         return []
-    matches = []
-    for m in re.finditer(r'href\s*=\s*["\']#([^"\']+)["\']', raw_html, flags=re.IGNORECASE):
-        matches.append((m.group(1).strip(), m.start()))
-    return matches
+    return [(m.group(1).strip(), m.start()) for m in SEQUENCE_SCANNER.scan(raw_html).finditer("anchor")]
 
 
 def _extract_turn_to_positions(raw_html: str) -> List[Tuple[str, int]]:
     if not raw_html:
         return []
-    matches = []
-    for m in re.finditer(r"\bturn\s+to\s+(\d+)\b", raw_html, flags=re.IGNORECASE):
-        matches.append((m.group(1).strip(), m.start()))
-    return matches
+    return [(m.group(1).strip(), m.start()) for m in SEQUENCE_SCANNER.scan(raw_html).finditer("turn_to")]
 
 
 def _order_choices_by_html(raw_html: str, choice_events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -52,13 +72,8 @@ def _order_choices_by_html(raw_html: str, choice_events: List[Dict[str, Any]]) -
 def _extract_stat_change_positions(raw_html: str) -> Dict[str, List[int]]:
     if not raw_html:
         return {}
-    lower = raw_html.lower()
-    pattern = re.compile(
-        r"\b(lose|lost|reduce|reduced|reduces|gain|gained|increase|increased|add|subtract)\b(.{0,120}?)\b(stamina|skill|luck)\b",
-        flags=re.IGNORECASE | re.DOTALL,
-    )
     positions: Dict[str, List[int]] = {"stamina": [], "skill": [], "luck": []}
-    for m in pattern.finditer(lower):
+    for m in SEQUENCE_SCANNER.scan(raw_html).finditer("stat_change"):
         stat = m.group(3).lower()
         positions.setdefault(stat, []).append(m.start())
     return positions
@@ -67,12 +82,12 @@ def _extract_stat_change_positions(raw_html: str) -> Dict[str, List[int]]:
 def _extract_stat_check_positions(raw_html: str) -> Dict[str, List[int]]:
     if not raw_html:
         return {}
-    lower = raw_html.lower()
+    scan = SEQUENCE_SCANNER.scan(raw_html)
     positions: Dict[str, List[int]] = {"stamina": [], "skill": [], "luck": []}
-    for m in re.finditer(r"\broll\b.{0,80}?\b(skill|stamina|luck)\b", lower, flags=re.IGNORECASE | re.DOTALL):
+    for m in scan.finditer("roll_stat"):
         stat = m.group(1).lower()
         positions.setdefault(stat, []).append(m.start())
-    for m in re.finditer(r"\btest\s+(?:your\s+)?(skill|stamina|luck)\b", lower, flags=re.IGNORECASE):
+    for m in scan.finditer("test_stat"):
         stat = m.group(1).lower()
         positions.setdefault(stat, []).append(m.start())
     return positions
@@ -153,22 +168,19 @@ def _split_compound_item_names(name: str) -> List[str]:
 def _extract_test_luck_positions(raw_html: str) -> List[int]:
     if not raw_html:
         return []
-    lower = raw_html.lower()
-    return [m.start() for m in re.finditer(r"\btest\s+your\s+luck\b", lower)]
+    return [m.start() for m in SEQUENCE_SCANNER.scan(raw_html).finditer("test_luck")]
 
 
 def _extract_possessions_positions(raw_html: str) -> List[int]:
     if not raw_html:
         return []
-    lower = raw_html.lower()
-    return [m.start() for m in re.finditer(r"\bpossessions\b", lower)]
+    return [m.start() for m in SEQUENCE_SCANNER.scan(raw_html).finditer("possessions")]
 
 
 def _extract_state_positions(raw_html: str) -> List[int]:
     if not raw_html:
         return []
-    lower = raw_html.lower()
-    return [m.start() for m in re.finditer(r"\bmap reference\b", lower)]
+    return [m.start() for m in SEQUENCE_SCANNER.scan(raw_html).finditer("map_reference")]
 
 
 def _extract_conditional_item_stat_events(raw_html: str, sequence: List[Dict[str, Any]]) -> Tuple[List[Tuple[int, Dict[str, Any]]], set, set]:
@@ -265,7 +277,7 @@ def _extract_combat_positions(raw_html: str, sequence: List[Dict[str, Any]]) ->
         return {}
     lower = raw_html.lower()
     positions: Dict[int, int] = {}
-    keyword_positions = [m.start() for m in re.finditer(r"\b(fight|attack|combat)\b", lower)]
+    keyword_positions = [m.start() for m in SEQUENCE_SCANNER.scan(raw_html).finditer("combat_keyword")]
     for idx, event in enumerate(sequence):
         if event.get("kind") != "combat":
             continue
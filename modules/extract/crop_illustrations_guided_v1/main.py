@@ -11,7 +11,7 @@ This works because:
 """
 
 import argparse
-import base64
+import io
 import json
 import os
 import shutil
@@ -26,6 +26,8 @@ from PIL import Image
 import re
 
 from modules.common import ensure_dir, save_jsonl, read_jsonl
+from modules.common.prepared_image import bytes_to_data_uri, image_data_uri
+from modules.common.spatial_index import BoxIndex
 
 try:
     from modules.common.openai_client import OpenAI
@@ -224,10 +226,17 @@ def _autocrop_whitespace(img: Image.Image, white_threshold: int = 252) -> Tuple[
 
 
 def _encode_image(path: str) -> str:
-    with open(path, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode("utf-8")
-    ext = os.path.splitext(path)[1].lower().lstrip(".") or "jpeg"
-    return f"data:image/{ext};base64,{b64}"
+    return image_data_uri(path)
+
+
+def _crop_data_uri(page_img: Image.Image, box: Tuple[int, int, int, int]) -> str:
+    """JPEG data URI of a crop of a page image opened from disk (cached by image hash + box)."""
+    source = getattr(page_img, "filename", None)
+    if source and os.path.exists(source):
+        return image_data_uri(source, crop_box=box, fmt="JPEG", quality=92)
+    buf = io.BytesIO()
+    page_img.crop(box).convert("RGB").save(buf, format="JPEG", quality=92)
+    return bytes_to_data_uri(buf.getvalue(), "image/jpeg")
 
 
 def _call_vlm_boxes(
@@ -522,13 +531,8 @@ def _refine_boxes_with_vlm(
         if x1 <= x0 or y1 <= y0:
             refined.append(box)
             continue
-        crop = page_img.crop((x0, y0, x1, y1))
         try:
-            import tempfile
-            with tempfile.TemporaryDirectory() as tmpdir:
-                tmp_path = Path(tmpdir) / "crop.jpg"
-                crop.save(tmp_path, format="JPEG", quality=92)
-                image_data = _encode_image(str(tmp_path))
+            image_data = _crop_data_uri(page_img, (x0, y0, x1, y1))
         except Exception:
             refined.append(box)
             continue
@@ -552,7 +556,7 @@ def _refine_boxes_with_vlm(
         if not vlm_boxes:
             refined.append(box)
             continue
-        w, h = crop.size
+        w, h = x1 - x0, y1 - y0
         px = _normalize_box(vlm_boxes[0], w, h)
         if not px:
             refined.append(box)
@@ -648,13 +652,8 @@ def _validate_crop_with_vlm(
         if x1 <= x0 or y1 <= y0:
             validated.append(box)
             continue
-        crop = page_img.crop((x0, y0, x1, y1))
         try:
-            import tempfile
-            with tempfile.TemporaryDirectory() as tmpdir:
-                tmp_path = Path(tmpdir) / "crop.jpg"
-                crop.save(tmp_path, format="JPEG", quality=92)
-                image_data = _encode_image(str(tmp_path))
+            image_data = _crop_data_uri(page_img, (x0, y0, x1, y1))
         except Exception:
             validated.append(box)
             continue
@@ -2035,11 +2034,18 @@ def _dedupe_boxes(
     if not boxes:
         return boxes
     kept: List[Dict[str, int]] = []
+    # Any duplicate (IoU > 0 or centers within center_threshold) touches the box grown by
+    # center_threshold, so only grid neighbours need the exact checks.
+    index = BoxIndex.for_boxes([(b["x0"], b["y0"], b["x1"], b["y1"]) for b in boxes]) if iou_threshold > 0 else None
     for box in boxes:
         duplicate = False
         cx = (box["x0"] + box["x1"]) / 2.0
         cy = (box["y0"] + box["y1"]) / 2.0
-        for prev in kept:
+        if index is not None:
+            candidates = [kept[k] for k in index.query((box["x0"], box["y0"], box["x1"], box["y1"]), pad=center_threshold)]
+        else:
+            candidates = kept
+        for prev in candidates:
             if _box_iou(box, prev) >= iou_threshold:
                 duplicate = True
                 break
@@ -2054,6 +2060,8 @@ def _dedupe_boxes(
                     duplicate = True
                     break
         if not duplicate:
+            if index is not None:
+                index.add(len(kept), (box["x0"], box["y0"], box["x1"], box["y1"]))
             kept.append(box)
     return kept
 
@@ -2071,11 +2079,14 @@ def _prune_contained_boxes(
         h = max(0, b["y1"] - b["y0"])
         areas.append(float(w * h))
     keep = [True] * len(boxes)
+    index = BoxIndex.for_boxes([(b["x0"], b["y0"], b["x1"], b["y1"]) for b in boxes])
+    index.extend((i, (b["x0"], b["y0"], b["x1"], b["y1"])) for i, b in enumerate(boxes))
     for i, a in enumerate(boxes):
         if not keep[i]:
             continue
         ax0, ay0, ax1, ay1 = a["x0"], a["y0"], a["x1"], a["y1"]
-        for j, b in enumerate(boxes):
+        for j in index.query((ax0, ay0, ax1, ay1)):
+            b = boxes[j]
             if i == j or not keep[j]:
                 continue
             bx0, by0, bx1, by1 = b["x0"], b["y0"], b["x1"], b["y1"]
@@ -1,6 +1,5 @@
 # ruff: noqa: E402
 import argparse
-import base64
 import os
 import difflib
 import sys
@@ -31,9 +30,13 @@ os.environ.setdefault("OMP_NUM_THREADS", "1")
 os.environ.setdefault("KMP_AFFINITY", "disabled")
 os.environ.setdefault("KMP_INIT_AT_FORK", "FALSE")
 
-from modules.common import render_pdf, run_ocr, run_ocr_with_word_data, ensure_dir, save_json, save_jsonl, ProgressLogger
+from modules.common import render_pdf, run_ocr, run_tesseract_page, ensure_dir, save_json, save_jsonl, ProgressLogger
 from modules.common.utils import english_wordlist, append_jsonl
-from modules.common.text_quality import spell_garble_metrics
+from modules.common.prepared_image import image_data_uri
+from modules.common.pagelines_store import PackWriter
+from modules.common.pdf_session import get_pdf_session
+from modules.common.layout import column_splits_from_mask, infer_column_spans
+from modules.common.text_quality import spell_garble_metrics, spell_garble_metrics_batch
 from modules.common.image_utils import (
     sample_spread_decision, split_spread_at_gutter, deskew_image,
     reduce_noise, should_apply_noise_reduction,
@@ -52,221 +55,6 @@ def _normalize_line_for_match(s: str) -> str:
     return " ".join((s or "").strip().lower().split())
 
 
-def _tesseract_line_confidences_for_text(text: str, data: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Derive per-line confidences aligned to `split_lines(text)`, from pytesseract word data.
-
-    Returns:
-        {
-          "line_confidences": List[Optional[float]],  # 0..1
-          "page_confidence": Optional[float],         # 0..1
-          "match_rate": float,                        # 0..1
-        }
-    """
-    try:
-        texts = data.get("text") or []
-        confs = data.get("conf") or []
-        blocks = data.get("block_num") or []
-        pars = data.get("par_num") or []
-        lines = data.get("line_num") or []
-    except Exception:
-        return {"line_confidences": [], "page_confidence": None, "match_rate": 0.0}
-
-    if not texts or not confs:
-        return {"line_confidences": [], "page_confidence": None, "match_rate": 0.0}
-
-    line_groups: Dict[Any, Dict[str, Any]] = {}
-    all_word_confs: List[float] = []
-
-    for i in range(min(len(texts), len(confs), len(blocks), len(pars), len(lines))):
-        w = (texts[i] or "").strip()
-        if not w:
-            continue
-        try:
-            c = float(confs[i])
-        except Exception:
-            continue
-        if c < 0:
-            continue
-        c01 = max(0.0, min(1.0, c / 100.0))
-        all_word_confs.append(c01)
-
-        key = (blocks[i], pars[i], lines[i])
-        if key not in line_groups:
-            line_groups[key] = {"words": [], "confs": []}
-        line_groups[key]["words"].append(w)
-        line_groups[key]["confs"].append(c01)
-
-    if not all_word_confs or not line_groups:
-        return {"line_confidences": [], "page_confidence": None, "match_rate": 0.0}
-
-    # Preserve insertion order (dict is ordered) for "data lines"
-    data_lines = []
-    for grp in line_groups.values():
-        wds = grp["words"]
-        cs = grp["confs"]
-        if not wds or not cs:
-            continue
-        data_lines.append({
-            "text": " ".join(wds),
-            "conf": sum(cs) / len(cs),
-            "norm": _normalize_line_for_match(" ".join(wds)),
-        })
-
-    ocr_lines = split_lines(text)
-    if not ocr_lines:
-        return {
-            "line_confidences": [],
-            "page_confidence": sum(all_word_confs) / len(all_word_confs),
-            "match_rate": 0.0,
-        }
-
-    # Map each OCR line to the best-matching data-derived line.
-    from difflib import SequenceMatcher
-
-    line_confidences: List[Optional[float]] = []
-    matched = 0
-    for ln in ocr_lines:
-        n = _normalize_line_for_match(ln)
-        if not n:
-            line_confidences.append(None)
-            continue
-        best = None
-        best_ratio = 0.0
-        for dl in data_lines:
-            if not dl["norm"]:
-                continue
-            r = SequenceMatcher(None, n, dl["norm"], autojunk=False).ratio()
-            if r > best_ratio:
-                best_ratio = r
-                best = dl
-        if best is not None and best_ratio >= 0.6:
-            line_confidences.append(float(best["conf"]))
-            matched += 1
-        else:
-            line_confidences.append(None)
-
-    return {
-        "line_confidences": line_confidences,
-        "page_confidence": sum(all_word_confs) / len(all_word_confs),
-        "match_rate": matched / max(1, len([line for line in ocr_lines if line.strip()])),
-    }
-
-
-def _tesseract_line_bboxes_for_text(text: str, data: Dict[str, Any], image_w: int, image_h: int) -> Dict[str, Any]:
-    """
-    Derive per-line bboxes aligned to `split_lines(text)`, from pytesseract word data.
-
-    Returns:
-        {
-          "line_bboxes": List[Optional[List[float]]],  # normalized [x0,y0,x1,y1]
-          "match_rate": float,                        # 0..1
-        }
-    """
-    try:
-        texts = data.get("text") or []
-        lefts = data.get("left") or []
-        tops = data.get("top") or []
-        widths = data.get("width") or []
-        heights = data.get("height") or []
-        blocks = data.get("block_num") or []
-        pars = data.get("par_num") or []
-        lines = data.get("line_num") or []
-    except Exception:
-        return {"line_bboxes": [], "match_rate": 0.0}
-
-    if not texts or not lefts or not widths or image_w <= 0 or image_h <= 0:
-        return {"line_bboxes": [], "match_rate": 0.0}
-
-    line_groups: Dict[Any, Dict[str, Any]] = {}
-    for i in range(
-        min(len(texts), len(lefts), len(tops), len(widths), len(heights), len(blocks), len(pars), len(lines))
-    ):
-        w = (texts[i] or "").strip()
-        if not w:
-            continue
-        try:
-            x = float(lefts[i])
-            y = float(tops[i])
-            ww = float(widths[i])
-            hh = float(heights[i])
-        except Exception:
-            continue
-        if ww <= 0 or hh <= 0:
-            continue
-        key = (blocks[i], pars[i], lines[i])
-        grp = line_groups.setdefault(key, {"words": [], "bbox": None})
-        grp["words"].append(w)
-        x0 = x
-        y0 = y
-        x1 = x + ww
-        y1 = y + hh
-        if grp["bbox"] is None:
-            grp["bbox"] = [x0, y0, x1, y1]
-        else:
-            bb = grp["bbox"]
-            bb[0] = min(bb[0], x0)
-            bb[1] = min(bb[1], y0)
-            bb[2] = max(bb[2], x1)
-            bb[3] = max(bb[3], y1)
-
-    if not line_groups:
-        return {"line_bboxes": [], "match_rate": 0.0}
-
-    data_lines = []
-    for grp in line_groups.values():
-        words = grp.get("words") or []
-        bbox = grp.get("bbox")
-        if not words or not bbox:
-            continue
-        x0, y0, x1, y1 = bbox
-        data_lines.append(
-            {
-                "text": " ".join(words),
-                "norm": _normalize_line_for_match(" ".join(words)),
-                "bbox": [
-                    max(0.0, min(1.0, x0 / image_w)),
-                    max(0.0, min(1.0, y0 / image_h)),
-                    max(0.0, min(1.0, x1 / image_w)),
-                    max(0.0, min(1.0, y1 / image_h)),
-                ],
-            }
-        )
-
-    ocr_lines = split_lines(text)
-    if not ocr_lines:
-        return {"line_bboxes": [], "match_rate": 0.0}
-
-    from difflib import SequenceMatcher
-
-    line_bboxes: List[Optional[List[float]]] = []
-    matched = 0
-    for ln in ocr_lines:
-        n = _normalize_line_for_match(ln)
-        if not n:
-            line_bboxes.append(None)
-            continue
-        best = None
-        best_ratio = 0.0
-        for dl in data_lines:
-            if not dl["norm"]:
-                continue
-            r = SequenceMatcher(None, n, dl["norm"], autojunk=False).ratio()
-            if r > best_ratio:
-                best_ratio = r
-                best = dl
-        if best is not None and best_ratio >= 0.6:
-            line_bboxes.append(list(best["bbox"]))
-            matched += 1
-        else:
-            line_bboxes.append(None)
-
-    return {
-        "line_bboxes": line_bboxes,
-        "match_rate": matched / max(1, len([line for line in ocr_lines if line.strip()])),
-    }
-
-
 def _align_bboxes_to_lines(
     target_lines: List[str],
     source_lines: List[str],
@@ -459,10 +247,7 @@ def _get_openai_client():
 
 def encode_image_base64(image_path: str) -> str:
     """Encode image file to base64 data URL."""
-    with open(image_path, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode("utf-8")
-    ext = os.path.splitext(image_path)[1].lower().lstrip(".") or "jpeg"
-    return f"data:image/{ext};base64,{b64}"
+    return image_data_uri(image_path)
 
 
 def inline_vision_escalate(image_path: str, model: str = "gpt-4.1",
@@ -1055,23 +840,7 @@ def infer_columns_from_lines(raw_lines, min_lines=6, min_gap=0.12, min_side=6):
     - min_gap: 0.08 -> 0.12 (12% of page width, was 8%)
     - min_side: 4 -> 6 (require at least 6 lines per column, was 4)
     """
-    if not raw_lines or len(raw_lines) < min_lines:
-        return []
-    centers = sorted(((ln.get("bbox", [0, 0, 1, 1])[0] + ln.get("bbox", [0, 0, 1, 1])[2]) / 2.0)
-                     for ln in raw_lines)
-    gaps = [centers[i + 1] - centers[i] for i in range(len(centers) - 1)]
-    if not gaps:
-        return []
-    max_gap = max(gaps)
-    gap_idx = gaps.index(max_gap)
-    if max_gap < min_gap:
-        return []
-    left = gap_idx + 1
-    right = len(centers) - left
-    if left < min_side or right < min_side:
-        return []
-    split = (centers[gap_idx] + centers[gap_idx + 1]) / 2.0
-    return [[0.0, split], [split, 1.0]]
+    return infer_column_spans(raw_lines, min_lines=min_lines, min_gap=min_gap, min_side=min_side)
 
 
 def reflow_hyphenated(lines):
@@ -1389,7 +1158,10 @@ def call_apple(pdf_path: str, page: int, lang: str, fast: bool, helper_path: Pat
 
 def extract_pdf_text(pdf_path: str, page_num: int) -> str:
     """
-    Extract embedded text directly from PDF page using pdfplumber.
+    Extract embedded text directly from a PDF page.
+
+    Reads through the process-wide `PdfSession` for the PDF, so the document is opened once per
+    stage and text already swept into the `pdf_inventory.jsonl` sidecar is not re-extracted.
 
     Args:
         pdf_path: Path to the PDF file
@@ -1399,15 +1171,12 @@ def extract_pdf_text(pdf_path: str, page_num: int) -> str:
         Extracted text as string, or empty string if no text or error occurs.
     """
     try:
-        import pdfplumber
-        with pdfplumber.open(pdf_path) as pdf:
-            # pdfplumber uses 0-indexed pages internally
-            page_idx = page_num - 1
-            if page_idx < 0 or page_idx >= len(pdf.pages):
-                return ""
-            page = pdf.pages[page_idx]
-            text = page.extract_text()
-            return text or ""
+        if not pdf_path or page_num < 1 or not os.path.isfile(pdf_path):
+            return ""
+        session = get_pdf_session(pdf_path)
+        if page_num > session.page_count:
+            return ""
+        return session.page_text(page_num)
     except Exception:
         # Return empty on any error (missing pdfplumber, corrupted PDF, no text layer, etc.)
         return ""
@@ -1426,30 +1195,22 @@ def run_tesseract(image_path: str, lang: str = "en", psm: int = 3, oem: int = 3)
     """
     result = {}
     try:
-        tess_text, tess_data = run_ocr_with_word_data(
+        # One recognition; text, line confidences and bboxes share the same line structure.
+        page = run_tesseract_page(
             image_path,
             lang="eng" if lang == "en" else lang,
             psm=psm,
             oem=oem,
         )
-        result["tesseract"] = tess_text
-        if tess_data:
-            conf_info = _tesseract_line_confidences_for_text(tess_text, tess_data)
-            if conf_info.get("line_confidences"):
-                result["tesseract_confidences"] = conf_info["line_confidences"]
-            if conf_info.get("page_confidence") is not None:
-                result["tesseract_page_confidence"] = conf_info["page_confidence"]
-            result["tesseract_confidence_match_rate"] = conf_info.get("match_rate", 0.0)
-            try:
-                from PIL import Image
-                with Image.open(image_path) as _img:
-                    w, h = _img.size
-                bbox_info = _tesseract_line_bboxes_for_text(tess_text, tess_data, w, h)
-                if bbox_info.get("line_bboxes"):
-                    result["tesseract_line_bboxes"] = bbox_info["line_bboxes"]
-                result["tesseract_bbox_match_rate"] = bbox_info.get("match_rate", 0.0)
-            except Exception:
-                pass
+        result["tesseract"] = page.text
+        if page.lines:
+            result["tesseract_confidences"] = page.line_confidences()
+            if page.page_confidence is not None:
+                result["tesseract_page_confidence"] = page.page_confidence
+            result["tesseract_confidence_match_rate"] = 1.0
+            if page.width and page.height:
+                result["tesseract_line_bboxes"] = page.line_bboxes()
+                result["tesseract_bbox_match_rate"] = 1.0
     except Exception as ex:
         result["tesseract_error"] = str(ex)
     return result
@@ -1704,9 +1465,9 @@ def fuse_characters(
         if vocab is not None:
             return vocab
         try:
-            from modules.common.text_quality import load_default_wordlist
+            from modules.common.text_quality import default_vocab
 
-            vocab = load_default_wordlist()
+            vocab = default_vocab()
         except Exception:
             vocab = set()
         return vocab
@@ -2084,10 +1845,9 @@ def compute_engine_spell_quality(
     metrics_by_engine: Dict[str, Any] = {}
     quality_by_engine: Dict[str, float] = {}
 
-    for eng, lines in (engine_lines_by_engine or {}).items():
-        if not isinstance(lines, list):
-            continue
-        m = spell_garble_metrics(lines)
+    engines = [(eng, lines) for eng, lines in (engine_lines_by_engine or {}).items() if isinstance(lines, list)]
+    batch = spell_garble_metrics_batch([lines for _, lines in engines])
+    for (eng, _lines), m in zip(engines, batch):
         try:
             total_words = int(m.get("dictionary_total_words", 0))
         except Exception:
@@ -2506,42 +2266,14 @@ def align_and_vote(primary_lines, alt_lines, distance_drop=0.35, enable_char_fus
 def detect_column_splits(image, min_lines: int = 30, min_spread: float = 0.25):
     """
     Heuristic column detection:
-    - If enough lines and x-center spread is wide, k-means (k=2) on x-centers of text pixels.
+    - If enough lines and x-center spread is wide, k-means (k=2) on x positions of text pixels.
     - Otherwise fall back to single column.
     Returns list of (x0, x1) normalized fractions.
     """
-    gray = image.convert("L")
-    arr = np.array(gray)
+    arr = np.array(image.convert("L"))
     # detect text pixels via Otsu-ish threshold
-    thresh = arr.mean()
-    mask = (arr < thresh).astype(np.uint8)
-    # find text pixels positions
-    ys, xs = np.nonzero(mask)
-    if xs.size < min_lines * 10:  # not enough pixels, treat as single column
-        return [(0.0, 1.0)]
-    x_norm = xs / float(arr.shape[1])
-    spread = x_norm.max() - x_norm.min()
-    if spread < min_spread:
-        return [(0.0, 1.0)]
-    # k-means k=2 on x
-    c1, c2 = x_norm.min(), x_norm.max()
-    for _ in range(6):
-        left = x_norm[np.abs(x_norm - c1) <= np.abs(x_norm - c2)]
-        right = x_norm[np.abs(x_norm - c2) < np.abs(x_norm - c1)]
-        if left.size > 0:
-            c1 = left.mean()
-        if right.size > 0:
-            c2 = right.mean()
-    if c1 > c2:
-        c1, c2 = c2, c1
-    # split at midpoint between centroids
-    split = (c1 + c2) / 2.0
-    # require both sides to have enough pixels
-    left_ct = (x_norm < split).sum()
-    right_ct = (x_norm >= split).sum()
-    if left_ct < min_lines or right_ct < min_lines:
-        return [(0.0, 1.0)]
-    return [(0.0, split), (split, 1.0)]
+    mask = arr < arr.mean()
+    return column_splits_from_mask(mask, min_lines=min_lines, min_spread=min_spread)
 
 
 def main():
@@ -2720,6 +2452,15 @@ def main():
     image_paths = render_pdf(args.pdf, images_dir, dpi=args.dpi,
                              start_page=args.start, end_page=args.end)
 
+    # One sweep of the PDF text layer for the whole page range (served from the sidecar on reruns).
+    if "pdftext" in args.engines and image_paths:
+        try:
+            get_pdf_session(args.pdf).inventory(
+                pages=range(args.start, args.start + len(image_paths)), text=True
+            )
+        except Exception:
+            pass
+
     # Warmup easyocr once to surface model download or init failures before the page loop
     if "easyocr" in args.engines and image_paths:
         warmup_easyocr(image_paths[0], easyocr_langs, easyocr_state, gpu=easyocr_gpu)
@@ -2753,6 +2494,7 @@ def main():
     inline_escalation_budget = args.inline_escalation_budget if args.inline_escalation else 0
     quality_report = []
     index = {}
+    pack = PackWriter(ocr_dir)
     page_rows = []
     output_page_number = 0
 
@@ -3651,6 +3393,7 @@ def main():
             page_path = os.path.join(pages_dir, page_filename)
             save_json(page_path, page_payload)
             index[page_key] = page_path
+            pack.add(page_key, page_payload)
             page_rows.append(page_payload)
 
             if args.write_engine_dumps:
@@ -3705,6 +3448,8 @@ def main():
     jsonl_path = os.path.join(ocr_dir, "pages_raw.jsonl")
     jsonl_root_path = os.path.join(args.outdir, "pages_raw.jsonl")
     save_json(index_path, index)
+    pack.bind_legacy_index(index_path)
+    pack.close()
     save_json(report_path, quality_report)
     save_jsonl(jsonl_path, page_rows)
     save_jsonl(jsonl_root_path, page_rows)
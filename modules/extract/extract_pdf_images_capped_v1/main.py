@@ -10,6 +10,7 @@ from PIL import Image
 from pdf2image import convert_from_path
 
 from modules.common import ensure_dir, save_json, save_jsonl, ProgressLogger
+from modules.common.pdf_session import PdfSession
 
 Image.MAX_IMAGE_PIXELS = None
 
@@ -18,18 +19,6 @@ def _utc() -> str:
     return datetime.utcnow().isoformat() + "Z"
 
 
-def _load_pdf_reader(pdf_path: str):
-    try:
-        from pypdf import PdfReader
-        return PdfReader(pdf_path)
-    except Exception:
-        try:
-            from PyPDF2 import PdfReader
-            return PdfReader(pdf_path)
-        except Exception:
-            return None
-
-
 def _log_pdfinfo_warnings(pdf_path: str, logger: ProgressLogger):
     pdfinfo = shutil.which("pdfinfo")
     if not pdfinfo:
@@ -56,58 +45,10 @@ def _log_pdfinfo_warnings(pdf_path: str, logger: ProgressLogger):
     )
 
 
-def _resolve_obj(obj):
-    try:
-        return obj.get_object()
-    except Exception:
-        return obj
-
-
-def _extract_max_image_dpi_from_xobject(xobject, page_w_in: float, page_h_in: float) -> Optional[float]:
-    max_dpi = None
-    if not xobject:
-        return None
-
-    for _, ref in xobject.items():
-        obj = _resolve_obj(ref)
-        subtype = obj.get("/Subtype") if hasattr(obj, "get") else None
-
-        if subtype == "/Image":
-            width = obj.get("/Width")
-            height = obj.get("/Height")
-            if not width or not height or page_w_in <= 0 or page_h_in <= 0:
-                continue
-            dpi_x = float(width) / page_w_in
-            dpi_y = float(height) / page_h_in
-            img_dpi = max(dpi_x, dpi_y)
-            if max_dpi is None or img_dpi > max_dpi:
-                max_dpi = img_dpi
-        elif subtype == "/Form":
-            resources = obj.get("/Resources") if hasattr(obj, "get") else None
-            nested = None
-            if resources and hasattr(resources, "get"):
-                nested = resources.get("/XObject")
-            nested_dpi = _extract_max_image_dpi_from_xobject(nested, page_w_in, page_h_in)
-            if nested_dpi is not None and (max_dpi is None or nested_dpi > max_dpi):
-                max_dpi = nested_dpi
-
-    return max_dpi
-
-
-def _page_max_image_dpi(page) -> Optional[float]:
-    try:
-        media_box = page.mediabox
-        page_w_in = float(media_box.width) / 72.0
-        page_h_in = float(media_box.height) / 72.0
-    except Exception:
+def _page_area_in2(row: Dict[str, Any]) -> Optional[float]:
+    if not row.get("width_pts") or not row.get("height_pts"):
         return None
-
-    resources = page.get("/Resources") if hasattr(page, "get") else None
-    xobject = None
-    if resources and hasattr(resources, "get"):
-        xobject = resources.get("/XObject")
-
-    return _extract_max_image_dpi_from_xobject(xobject, page_w_in, page_h_in)
+    return (float(row["width_pts"]) / 72.0) * (float(row["height_pts"]) / 72.0)
 
 
 def _build_manifest_row(page: int, page_number: int, image_path: str, run_id: Optional[str]) -> Dict[str, Any]:
@@ -268,8 +209,26 @@ def main() -> None:
     images_dir = os.path.join(args.outdir, "images")
     ensure_dir(images_dir)
 
-    reader = _load_pdf_reader(args.pdf)
-    if reader is None:
+    # One open PDF for the stage; page sizes and image DPI come from the shared inventory sweep.
+    session = PdfSession(args.pdf)
+    try:
+        total_pages = session.page_count
+    except Exception:
+        total_pages = None
+    start_page = args.start
+    end_page = args.end or total_pages or args.start
+    if total_pages and end_page > total_pages:
+        end_page = total_pages
+
+    total = max(0, end_page - start_page + 1)
+
+    sampled_pages: List[int] = _sample_pages(total_pages, sample_count) if total_pages else []
+    inventory: Dict[int, Dict[str, Any]] = {}
+    try:
+        inventory = session.inventory(sorted(set(sampled_pages) | set(range(start_page, end_page + 1))))
+    except Exception:
+        inventory = {}
+    if not any(row.get("width_pts") for row in inventory.values()):
         logger.log(
             "extract",
             "warning",
@@ -278,29 +237,13 @@ def main() -> None:
             schema_version="page_image_v1",
         )
 
-    total_pages = len(reader.pages) if reader else None
-    start_page = args.start
-    end_page = args.end or total_pages or args.start
-    if total_pages and end_page > total_pages:
-        end_page = total_pages
-
-    total = max(0, end_page - start_page + 1)
-
-    sampled_pages: List[int] = []
     line_heights: List[float] = []
     sample_meta: List[Dict[str, Any]] = []
     if total_pages:
-        sampled_pages = _sample_pages(total_pages, sample_count)
         for page_idx in sampled_pages:
-            page_obj = reader.pages[page_idx - 1] if reader else None
-            max_source_dpi = _page_max_image_dpi(page_obj) if page_obj else None
-            area_in2 = None
-            if page_obj is not None:
-                try:
-                    media_box = page_obj.mediabox
-                    area_in2 = (float(media_box.width) / 72.0) * (float(media_box.height) / 72.0)
-                except Exception:
-                    area_in2 = None
+            page_inv = inventory.get(page_idx) or {}
+            max_source_dpi = page_inv.get("max_image_dpi")
+            area_in2 = _page_area_in2(page_inv)
             sample_dpi = min(baseline_dpi, int(max_source_dpi)) if max_source_dpi else baseline_dpi
             images = convert_from_path(args.pdf, dpi=sample_dpi, first_page=page_idx, last_page=page_idx)
             if not images:
@@ -403,16 +346,9 @@ def main() -> None:
 
     page_number = 0
     for page_idx in range(start_page, end_page + 1):
-        max_source_dpi = None
-        area_in2 = None
-        if reader is not None and 0 <= page_idx - 1 < len(reader.pages):
-            page_obj = reader.pages[page_idx - 1]
-            max_source_dpi = _page_max_image_dpi(page_obj)
-            try:
-                media_box = page_obj.mediabox
-                area_in2 = (float(media_box.width) / 72.0) * (float(media_box.height) / 72.0)
-            except Exception:
-                area_in2 = None
+        page_inv = inventory.get(page_idx) or {}
+        max_source_dpi = page_inv.get("max_image_dpi")
+        area_in2 = _page_area_in2(page_inv)
 
         render_dpi = _choose_render_dpi(max_source_dpi, dpi_cap)
         if target_dpi:
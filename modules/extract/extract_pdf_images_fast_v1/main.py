@@ -10,6 +10,7 @@ import numpy as np
 from PIL import Image
 
 from modules.common import ensure_dir, save_json, save_jsonl, ProgressLogger
+from modules.common.pdf_session import PdfSession, page_xobjects, resolve_obj
 
 Image.MAX_IMAGE_PIXELS = None
 
@@ -68,76 +69,6 @@ def _sample_pages(page_count: int, sample_count: int) -> List[int]:
     return sorted({int(round(1 + i * step)) for i in range(sample_count)})
 
 
-def _load_pdf_reader(pdf_path: str):
-    """Load PDF reader (pypdf or PyPDF2)."""
-    try:
-        from pypdf import PdfReader
-        return PdfReader(pdf_path)
-    except Exception:
-        try:
-            from PyPDF2 import PdfReader
-            return PdfReader(pdf_path)
-        except Exception:
-            return None
-
-
-def _resolve_obj(obj):
-    """Resolve indirect PDF objects."""
-    try:
-        return obj.get_object()
-    except Exception:
-        return obj
-
-
-def _extract_max_image_dpi_from_xobject(xobject, page_w_in: float, page_h_in: float) -> Optional[float]:
-    """Extract maximum image DPI from XObject resources."""
-    max_dpi = None
-    if not xobject:
-        return None
-
-    for _, ref in xobject.items():
-        obj = _resolve_obj(ref)
-        subtype = obj.get("/Subtype") if hasattr(obj, "get") else None
-
-        if subtype == "/Image":
-            width = obj.get("/Width")
-            height = obj.get("/Height")
-            if not width or not height or page_w_in <= 0 or page_h_in <= 0:
-                continue
-            dpi_x = float(width) / page_w_in
-            dpi_y = float(height) / page_h_in
-            img_dpi = max(dpi_x, dpi_y)
-            if max_dpi is None or img_dpi > max_dpi:
-                max_dpi = img_dpi
-        elif subtype == "/Form":
-            resources = obj.get("/Resources") if hasattr(obj, "get") else None
-            nested = None
-            if resources and hasattr(resources, "get"):
-                nested = resources.get("/XObject")
-            nested_dpi = _extract_max_image_dpi_from_xobject(nested, page_w_in, page_h_in)
-            if nested_dpi is not None and (max_dpi is None or nested_dpi > max_dpi):
-                max_dpi = nested_dpi
-
-    return max_dpi
-
-
-def _page_max_image_dpi(page) -> Optional[float]:
-    """Get maximum embedded image DPI for a page."""
-    try:
-        media_box = page.mediabox
-        page_w_in = float(media_box.width) / 72.0
-        page_h_in = float(media_box.height) / 72.0
-    except Exception:
-        return None
-
-    resources = page.get("/Resources") if hasattr(page, "get") else None
-    xobject = None
-    if resources and hasattr(resources, "get"):
-        xobject = resources.get("/XObject")
-
-    return _extract_max_image_dpi_from_xobject(xobject, page_w_in, page_h_in)
-
-
 def _extract_image_from_xobject(xobject, page_w_pts: float, page_h_pts: float) -> Optional[Tuple[Image.Image, Dict[str, Any]]]:
     """
     Extract the largest image from XObject resources.
@@ -151,7 +82,7 @@ def _extract_image_from_xobject(xobject, page_w_pts: float, page_h_pts: float) -
     image_xobject_count = 0
 
     for name, ref in xobject.items():
-        obj = _resolve_obj(ref)
+        obj = resolve_obj(ref)
         subtype = obj.get("/Subtype") if hasattr(obj, "get") else None
 
         if subtype == "/Image":
@@ -304,7 +235,9 @@ def main() -> None:
         images_native_dir = os.path.join(args.outdir, "images_native")
         ensure_dir(images_native_dir)
 
-    reader = _load_pdf_reader(args.pdf)
+    # One open PDF for the stage; page sizes and image DPI come from the shared inventory sweep.
+    session = PdfSession(args.pdf)
+    reader = session.reader
     if reader is None:
         logger.log(
             "extract",
@@ -322,6 +255,7 @@ def main() -> None:
         end_page = total_pages
 
     total = max(0, end_page - start_page + 1)
+    inventory = session.inventory(range(start_page, end_page + 1))
 
     logger.log(
         "extract",
@@ -346,23 +280,14 @@ def main() -> None:
         t0 = time.time()
         page_obj = reader.pages[page_idx - 1]
 
-        # Get page dimensions
-        try:
-            media_box = page_obj.mediabox
-            page_w_pts = float(media_box.width)
-            page_h_pts = float(media_box.height)
-        except Exception:
-            page_w_pts = None
-            page_h_pts = None
-
-        # Get embedded image DPI
-        max_source_dpi = _page_max_image_dpi(page_obj)
+        # Page dimensions and embedded image DPI from the inventory
+        page_inv = inventory.get(page_idx) or {}
+        page_w_pts = page_inv.get("width_pts")
+        page_h_pts = page_inv.get("height_pts")
+        max_source_dpi = page_inv.get("max_image_dpi")
 
         # Attempt fast extraction
-        resources = page_obj.get("/Resources") if hasattr(page_obj, "get") else None
-        xobject = None
-        if resources and hasattr(resources, "get"):
-            xobject = resources.get("/XObject")
+        xobject = page_xobjects(page_obj)
 
         result = _extract_image_from_xobject(xobject, page_w_pts, page_h_pts) if page_w_pts and page_h_pts else None
 
@@ -6,17 +6,23 @@ import re
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from datetime import datetime
 from html.parser import HTMLParser
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+from modules.common import llm_cache
 from modules.common.utils import read_jsonl, ensure_dir, append_jsonl, ProgressLogger
 
 try:
     from PIL import Image
+    from modules.common.page_packing import compose_tile, ink_ratio, split_marked_output
+    from modules.common.prepared_image import image_data_uri
 except Exception:  # pragma: no cover - optional dependency
     Image = None
+    compose_tile = ink_ratio = split_marked_output = None
+    image_data_uri = None
 
 try:
     from modules.common.openai_client import OpenAI
@@ -102,22 +108,15 @@ def build_system_prompt(hints: Optional[str]) -> str:
     return SYSTEM_PROMPT + "\n\nRecipe hints:\n" + hints.strip() + "\n"
 
 
-def _resize_image_bytes(image_bytes: bytes, max_long_side: int, mime: str) -> tuple:
-    """Resize image if either dimension exceeds max_long_side. Returns (bytes, mime, resized_flag)."""
-    if Image is None or max_long_side <= 0:
-        return image_bytes, mime, False
-    img = Image.open(io.BytesIO(image_bytes))
-    w, h = img.size
-    long_side = max(w, h)
-    if long_side <= max_long_side:
-        return image_bytes, mime, False
-    scale = max_long_side / long_side
-    new_w = int(w * scale)
-    new_h = int(h * scale)
-    img = img.resize((new_w, new_h), Image.LANCZOS)
-    buf = io.BytesIO()
-    img.save(buf, format="JPEG", quality=85)
-    return buf.getvalue(), "image/jpeg", True
+def _page_data_uri(image_path: str, max_long_side: int) -> str:
+    """
+    Data URI for a page image, downscaled to max_long_side (JPEG q85) when larger.
+    Goes through the shared prepared-image cache so retries and re-runs reuse the encoding.
+    """
+    if image_data_uri is not None:
+        return image_data_uri(image_path, max_long_side=max(0, max_long_side), fmt="JPEG", quality=85)
+    mime = "image/jpeg" if image_path.lower().endswith((".jpg", ".jpeg")) else "image/png"
+    return f"data:{mime};base64,{base64.b64encode(Path(image_path).read_bytes()).decode('utf-8')}"
 
 
 def _is_blank_page(image_bytes: bytes, threshold: float = 0.99) -> bool:
@@ -381,9 +380,10 @@ def _call_vision_model(
 
 
 def _ocr_with_fallback(
-    image_bytes: bytes,
+    image_bytes: Optional[bytes],
     image_path: str,
     *,
+    data_uri: Optional[str] = None,
     model: str,
     retry_model: Optional[str],
     system_prompt: str,
@@ -399,11 +399,13 @@ def _ocr_with_fallback(
     The retry can use either the same model (preserving the legacy second
     attempt) or a stronger provider-specific model when `retry_model` is set.
     Returns stripped raw HTML, sanitized HTML, metadata, metadata tag/warning,
-    and the model that produced the kept output.
+    and the model that produced the kept output. Pass `data_uri` to send an already
+    prepared image instead of `image_bytes`.
     """
-    mime = "image/jpeg" if image_path.lower().endswith((".jpg", ".jpeg")) else "image/png"
-    b64 = base64.b64encode(image_bytes).decode("utf-8")
-    data_uri = f"data:{mime};base64,{b64}"
+    if data_uri is None:
+        mime = "image/jpeg" if image_path.lower().endswith((".jpg", ".jpeg")) else "image/png"
+        b64 = base64.b64encode(image_bytes).decode("utf-8")
+        data_uri = f"data:{mime};base64,{b64}"
 
     model_sequence = [model, retry_model or model]
     last_raw = ""
@@ -413,19 +415,22 @@ def _ocr_with_fallback(
     last_meta_warning = None
     last_model_used = None
 
-    for selected_model in model_sequence:
+    for attempt, selected_model in enumerate(model_sequence):
+        # A same-model retry must reach the provider, not get the empty reply back from the memo.
+        reuse = llm_cache.fresh() if attempt else nullcontext()
         try:
-            raw, _usage, _request_id = _call_vision_model(
-                selected_model,
-                system_prompt,
-                user_text,
-                data_uri,
-                temperature,
-                max_output_tokens,
-                openai_client=openai_client,
-                gemini_client=gemini_client,
-                anthropic_client=anthropic_client,
-            )
+            with reuse:
+                raw, _usage, _request_id = _call_vision_model(
+                    selected_model,
+                    system_prompt,
+                    user_text,
+                    data_uri,
+                    temperature,
+                    max_output_tokens,
+                    openai_client=openai_client,
+                    gemini_client=gemini_client,
+                    anthropic_client=anthropic_client,
+                )
         except Exception as exc:
             raise RuntimeError(f"OCR failed on page image {image_path}: {exc}") from exc
         raw = _extract_code_fence(raw)
@@ -443,6 +448,74 @@ def _ocr_with_fallback(
     return last_raw, last_cleaned, last_meta, last_meta_tag, last_meta_warning, last_model_used
 
 
+PACKED_USER_TEXT = (
+    "This image contains {n} separate scanned book pages laid out on a grid. Each page sits below a black bar "
+    "labelled PAGE 1 to PAGE {n}. Transcribe every page on its own, in label order. Before each page write its "
+    "marker on its own line, exactly <!-- PAGE k --> where k is the label, then that page's HTML. The FIRST line "
+    "after each marker MUST be that page's <meta name=\"ocr-metadata\" data-ocr-quality=\"0.0-1.0\" "
+    "data-ocr-integrity=\"0.0-1.0\" data-continuation-risk=\"0.0-1.0\"> tag. Never merge text across pages "
+    "and do not transcribe the PAGE labels."
+)
+# Pages with less ink than this carry no text, so an empty packed result is acceptable.
+PACK_MIN_TEXT_INK = 0.002
+# Packed pages read back below this quality are redone as single-page requests.
+PACK_MIN_QUALITY = 0.5
+# Output budget of a packed request: the per-page budget times the pages in the tile, up to this cap.
+PACK_MAX_OUTPUT_TOKENS = 16384
+_MARKER_LEAK_RE = re.compile(r">\s*PAGE \d+\s*<")
+
+
+def _verify_packed_page(cleaned: str, meta: Dict[str, float], ink: float) -> Optional[str]:
+    """Reason a page read from a packed tile must be redone on its own, or None to keep it."""
+    if ink >= PACK_MIN_TEXT_INK and not cleaned.strip():
+        return "empty_html"
+    if _MARKER_LEAK_RE.search(cleaned):
+        return "marker_in_html"
+    quality = meta.get("ocr_quality")
+    if quality is not None and quality < PACK_MIN_QUALITY:
+        return "low_quality"
+    return None
+
+
+def packed_output_tokens(per_page: int, pages: int) -> int:
+    """max_output_tokens for a tile of `pages` pages; never less than one page's budget."""
+    return max(per_page, min(per_page * pages, PACK_MAX_OUTPUT_TOKENS))
+
+
+def plan_work_units(
+    work: List[Tuple[int, dict]],
+    inks: Dict[int, float],
+    *,
+    max_pages: int,
+    max_ink: float,
+    min_ink: float = 0.0,
+) -> List[Tuple[int, ...]]:
+    """
+    Group work items into request units, in page order. Pages whose ink ratio is within
+    [min_ink, max_ink] are packed `max_pages` at a time (a pack is placed at its first page);
+    every other page, and a lone leftover sparse page, is its own unit. Units are tuples of
+    indexes into `work`.
+    """
+    units: List[Tuple[int, ...]] = []
+    pack: List[int] = []
+    pack_slot: Optional[int] = None
+    for pos, (idx, _page) in enumerate(work):
+        ink = inks.get(idx)
+        if max_pages > 1 and ink is not None and min_ink <= ink <= max_ink:
+            if not pack:
+                pack_slot = len(units)
+                units.append(())
+            pack.append(pos)
+            if len(pack) >= max_pages:
+                units[pack_slot] = tuple(pack)
+                pack = []
+            continue
+        units.append((pos,))
+    if pack:
+        units[pack_slot] = tuple(pack)
+    return units
+
+
 def resolve_manifest_path(args) -> Path:
     if args.pages:
         return Path(args.pages)
@@ -480,6 +553,15 @@ def main() -> None:
     parser.add_argument("--blank-threshold", dest="blank_threshold", type=float, default=0.99,
                         help="Fraction of near-white pixels to consider blank")
     parser.add_argument("--blank_threshold", dest="blank_threshold", type=float, default=0.99)
+    parser.add_argument("--pack-sparse-pages", dest="pack_sparse_pages", action="store_true",
+                        help="OCR low-ink pages several to a request as one tiled image (verified; falls back per page)")
+    parser.add_argument("--pack_sparse_pages", dest="pack_sparse_pages", action="store_true")
+    parser.add_argument("--pack-max-pages", dest="pack_max_pages", type=int, default=4,
+                        help="Max pages per packed tile")
+    parser.add_argument("--pack_max_pages", dest="pack_max_pages", type=int, default=4)
+    parser.add_argument("--pack-max-ink", dest="pack_max_ink", type=float, default=0.03,
+                        help="Max dark-pixel fraction for a page to count as sparse")
+    parser.add_argument("--pack_max_ink", dest="pack_max_ink", type=float, default=0.03)
     parser.add_argument("--force", action="store_true", help="Overwrite existing output")
     parser.add_argument("--resume", action="store_true", help="Skip pages already written (default)")
     parser.set_defaults(resume=True)
@@ -562,10 +644,9 @@ def main() -> None:
                 raise SystemExit(f"Missing image for page: {page}")
 
             page_number = page.get("page_number")
-            image_bytes = Path(image_path).read_bytes()
 
             # A6: Blank page detection
-            if args.skip_blank_pages and _is_blank_page(image_bytes, args.blank_threshold):
+            if args.skip_blank_pages and _is_blank_page(Path(image_path).read_bytes(), args.blank_threshold):
                 return {
                     "schema_version": "page_html_v1",
                     "module_id": "ocr_ai_gpt51_v1",
@@ -584,9 +665,7 @@ def main() -> None:
                 }
 
             # A1: Image downsampling
-            mime = "image/jpeg" if image_path.lower().endswith((".jpg", ".jpeg")) else "image/png"
-            if args.max_long_side > 0:
-                image_bytes, mime, _resized = _resize_image_bytes(image_bytes, args.max_long_side, mime)
+            data_uri = _page_data_uri(image_path, args.max_long_side)
 
             meta = {}
             meta_tag = None
@@ -594,8 +673,9 @@ def main() -> None:
             cleaned = ""
             user_text = "Return HTML only. FIRST line MUST be: <meta name=\"ocr-metadata\" data-ocr-quality=\"0.0-1.0\" data-ocr-integrity=\"0.0-1.0\" data-continuation-risk=\"0.0-1.0\">"
             raw, cleaned, meta, meta_tag, meta_warning, _model_used = _ocr_with_fallback(
-                image_bytes,
+                None,
                 image_path,
+                data_uri=data_uri,
                 model=args.model,
                 retry_model=args.retry_model,
                 system_prompt=system_prompt,
@@ -607,6 +687,12 @@ def main() -> None:
                 anthropic_client=anthropic_client,
             )
 
+            return _page_row(page, raw, cleaned, meta, meta_tag, meta_warning)
+
+        def _page_row(page, raw, cleaned, meta, meta_tag, meta_warning):
+            """page_html_v1 row for one page's OCR output."""
+            image_path = page.get("image")
+            page_number = page.get("page_number")
             empty_msg = None
             if not cleaned.strip():
                 empty_msg = f"Empty HTML output for page {page_number}"
@@ -644,6 +730,88 @@ def main() -> None:
             row["raw_html"] = raw
             return row
 
+        pack_stats = {"packed_tiles": 0, "packed_pages": 0, "pack_fallback_pages": 0, "requests": 0}
+        stats_lock = threading.Lock()
+        tiles_dir = Path(args.outdir) / "packed_tiles"
+
+        def _count(**deltas):
+            with stats_lock:
+                for key, value in deltas.items():
+                    pack_stats[key] += value
+
+        def _process_pack(members):
+            """OCR several sparse pages from one tiled image; redo them singly if the tile fails checks."""
+            first = members[0][1]
+            tile_id = f"tile-{first.get('page_number') or members[0][0]:04d}"
+            labels = list(range(1, len(members) + 1))
+            reason = None
+            packed_rows = []
+            try:
+                tile = compose_tile([page.get("image") for _idx, page, _ink in members], str(tiles_dir / f"{tile_id}.jpg"))
+                _count(requests=1)
+                raw, _usage, _request_id = _call_vision_model(
+                    args.model,
+                    system_prompt,
+                    PACKED_USER_TEXT.format(n=len(members)),
+                    _page_data_uri(tile["path"], 0),
+                    args.temperature,
+                    packed_output_tokens(args.max_output_tokens, len(members)),
+                    openai_client=openai_client,
+                    gemini_client=gemini_client,
+                    anthropic_client=anthropic_client,
+                )
+                chunks = split_marked_output(_extract_code_fence(raw), labels)
+                if chunks is None:
+                    reason = "page_markers"
+            except Exception as exc:
+                chunks, reason = None, f"request_failed: {exc}"
+            if chunks is not None:
+                pages_in_tile = [page.get("page_number") for _idx, page, _ink in members]
+                for label, (idx, page, ink) in zip(labels, members):
+                    raw_page, meta, meta_tag, meta_warning = _extract_ocr_metadata(chunks[label])
+                    cleaned = sanitize_html(raw_page)
+                    reason = _verify_packed_page(cleaned, meta, ink)
+                    if reason:
+                        reason = f"page {page.get('page_number')}: {reason}"
+                        break
+                    row = _page_row(page, raw_page, cleaned, meta, meta_tag, meta_warning)
+                    row["packed_tile"] = {"tile_id": tile_id, "position": label, "pages": pages_in_tile}
+                    packed_rows.append((idx, row))
+            if reason is None:
+                _count(packed_tiles=1, packed_pages=len(members))
+                return packed_rows
+            logger.log(
+                "extract", "running", current=completed_count, total=total,
+                message=f"Packed tile {tile_id} failed verification ({reason}); OCR {len(members)} pages singly",
+                artifact=str(out_path), module_id="ocr_ai_gpt51_v1",
+                schema_version="page_html_v1",
+            )
+            _count(pack_fallback_pages=len(members))
+            return [(idx, _process_single(page, idx)) for idx, page, _ink in members]
+
+        def _process_single(page, idx):
+            row = _process_one_page(page, idx)
+            if row.get("ocr_empty_reason") != "blank_page_detected":
+                _count(requests=1)
+            return row
+
+        def _process_unit(unit):
+            """Rows for one request unit: a single page or a packed tile of sparse pages."""
+            if len(unit) == 1:
+                idx, page = work[unit[0]]
+                return [(idx, _process_single(page, idx))]
+            return _process_pack([(work[pos][0], work[pos][1], inks[work[pos][0]]) for pos in unit])
+
+        def _log_row(row):
+            logger.log(
+                "extract", "running", current=completed_count, total=total,
+                message=f"OCR HTML for page {row.get('page_number')}"
+                + (" [blank]" if row.get("ocr_empty_reason") == "blank_page_detected" else "")
+                + (" [packed]" if row.get("packed_tile") else ""),
+                artifact=str(out_path), module_id="ocr_ai_gpt51_v1",
+                schema_version="page_html_v1",
+            )
+
         # --- Build work list (skip completed pages) ---
         work = []
         for idx, page in enumerate(rows, start=1):
@@ -658,61 +826,84 @@ def main() -> None:
                 continue
             work.append((idx, page))
 
+        inks: Dict[int, float] = {}
+        if args.pack_sparse_pages and Image is not None:
+            for idx, page in work:
+                image_path = page.get("image")
+                if image_path and os.path.exists(image_path):
+                    inks[idx] = ink_ratio(image_path)
+        units = plan_work_units(
+            work,
+            inks,
+            max_pages=args.pack_max_pages,
+            max_ink=args.pack_max_ink,
+            # Near-blank pages stay single so --skip-blank-pages can drop them without a request.
+            min_ink=PACK_MIN_TEXT_INK if args.skip_blank_pages else 0.0,
+        )
+
         # --- Execute: parallel or sequential ---
         concurrency = max(1, args.concurrency)
         write_lock = threading.Lock()
         completed_count = total - len(work)  # already-done pages
 
-        if concurrency <= 1:
-            # Sequential (original behavior)
-            for idx, page in work:
-                row = _process_one_page(page, idx)
+        # Rows are written in page order as soon as every earlier page is done, so a streamed
+        # downstream stage (and a resumed run) sees a clean prefix of the book. A failed unit
+        # is dropped from the order so finished pages after it are still written.
+        pending: Dict[int, dict] = {}
+        order = [idx for idx, _page in work]
+        next_pos = 0
+
+        def _flush_ready():
+            nonlocal next_pos, completed_count
+            while next_pos < len(order) and order[next_pos] in pending:
+                row = pending.pop(order[next_pos])
                 append_jsonl(str(out_path), row)
+                next_pos += 1
                 completed_count += 1
-                logger.log(
-                    "extract", "running", current=completed_count, total=total,
-                    message=f"OCR HTML for page {page.get('page_number')}"
-                    + (" [blank]" if row.get("ocr_empty_reason") == "blank_page_detected" else ""),
-                    artifact=str(out_path), module_id="ocr_ai_gpt51_v1",
-                    schema_version="page_html_v1",
-                )
+                _log_row(row)
+
+        if concurrency <= 1:
+            for unit in units:
+                for idx, row in _process_unit(unit):
+                    pending[idx] = row
+                _flush_ready()
         else:
             # A2: Parallel execution
-            results = []
             errors = []
 
             def _submit_with_delay(executor, fn, items, delay_ms):
-                """Submit work items with optional delay between submissions for rate limiting."""
+                """Submit work units with optional delay between submissions for rate limiting."""
                 futures = {}
-                for i, (idx, page) in enumerate(items):
-                    f = executor.submit(fn, page, idx)
-                    futures[f] = (idx, page)
+                for i, unit in enumerate(items):
+                    f = executor.submit(fn, unit)
+                    futures[f] = unit
                     if delay_ms > 0 and i < len(items) - 1:
                         time.sleep(delay_ms / 1000.0)
                 return futures
 
             rate_delay_ms = 200 if concurrency > 5 else 0
             with ThreadPoolExecutor(max_workers=concurrency) as executor:
-                futures = _submit_with_delay(executor, _process_one_page, work, rate_delay_ms)
+                futures = _submit_with_delay(executor, _process_unit, units, rate_delay_ms)
                 for future in as_completed(futures):
-                    idx, page = futures[future]
+                    unit = futures[future]
                     try:
-                        row = future.result()
-                        results.append((idx, row))
+                        unit_rows = future.result()
                         with write_lock:
-                            completed_count += 1
-                            logger.log(
-                                "extract", "running", current=completed_count, total=total,
-                                message=f"OCR HTML for page {page.get('page_number')}"
-                                + (" [blank]" if row.get("ocr_empty_reason") == "blank_page_detected" else ""),
-                                artifact=str(out_path), module_id="ocr_ai_gpt51_v1",
-                                schema_version="page_html_v1",
-                            )
+                            for idx, row in unit_rows:
+                                pending[idx] = row
+                            _flush_ready()
                     except Exception as exc:
-                        errors.append((page.get("page_number"), str(exc)))
+                        failed = [work[pos][1].get("page_number") for pos in unit]
+                        errors.append((failed[0] if len(failed) == 1 else failed, str(exc)))
+                        # Keep writing the pages after the gap: the stage fails anyway, and a
+                        # resumed run then re-sends only the failed unit.
+                        with write_lock:
+                            failed_idx = {work[pos][0] for pos in unit}
+                            order[:] = [idx for idx in order if idx not in failed_idx]
+                            _flush_ready()
                         logger.log(
-                            "extract", "failed", current=idx, total=total,
-                            message=f"OCR failed on page {page.get('page_number')}: {exc}",
+                            "extract", "failed", current=work[unit[0]][0], total=total,
+                            message=f"OCR failed on page {', '.join(str(p) for p in failed)}: {exc}",
                             artifact=str(out_path), module_id="ocr_ai_gpt51_v1",
                             schema_version="page_html_v1",
                         )
@@ -720,11 +911,6 @@ def main() -> None:
             if errors:
                 raise RuntimeError(f"OCR failed on {len(errors)} page(s): {errors}")
 
-            # Write results sorted by original page order
-            results.sort(key=lambda x: x[0])
-            for _idx, row in results:
-                append_jsonl(str(out_path), row)
-
         logger.log(
             "extract",
             "done",
@@ -734,7 +920,7 @@ def main() -> None:
             artifact=str(out_path),
             module_id="ocr_ai_gpt51_v1",
             schema_version="page_html_v1",
-            extra={"summary_metrics": {"pages_processed_count": total}},
+            extra={"summary_metrics": {"pages_processed_count": total, **(pack_stats if args.pack_sparse_pages else {})}},
         )
     except Exception as exc:
         logger = ProgressLogger(state_path=args.state_file, progress_path=args.progress_file, run_id=args.run_id)
@@ -1,7 +1,8 @@
 import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterator, List
 
 from PIL import Image
 
@@ -11,6 +12,7 @@ from modules.common.image_utils import (
     split_spread_at_gutter,
     find_gutter_position,
     deskew_image,
+    image_size,
     # should_apply_noise_reduction,  # Unused - noise reduction disabled
     # reduce_noise,  # Unused - noise reduction disabled
 )
@@ -57,6 +59,103 @@ def _build_manifest_row(
     return row
 
 
+def _split_page(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Split (if a spread) and deskew one page; runs in a worker process."""
+    page_idx = job["page"]
+    images_dir = job["images_dir"]
+    images_native_dir = job["images_native_dir"]
+    pil_img = Image.open(job["image"])
+    pil_img_native = Image.open(job["image_native"]) if job.get("image_native") else None
+
+    w_px, h_px = pil_img.size
+    is_landscape = (w_px / max(h_px, 1)) > 1.1
+
+    if job["is_spread_group"] and is_landscape:
+        page_gutter_frac, _, page_variance, page_continuity = find_gutter_position(pil_img)
+
+        # Variance-based gutter selection:
+        # 1. If detection passed margin checks (continuity=1.0), trust it
+        # 2. If detection is very close to center (within 3%), trust it
+        # 3. Otherwise, use group gutter
+        distance_from_center = abs(page_gutter_frac - 0.5)
+
+        # Passed margin checks - binding extends top-to-bottom including margins
+        if page_continuity >= 1.0:
+            actual_gutter = page_gutter_frac
+            gutter_source = f"per-page (passed margin checks, var={page_variance:.3f})"
+        # Very close to center - trust it
+        elif distance_from_center <= 0.03:
+            actual_gutter = page_gutter_frac
+            gutter_source = f"per-page (near center, dist={distance_from_center:.3f})"
+        else:
+            # Use group gutter
+            actual_gutter = job["gutter_position"]
+            gutter_source = f"group gutter (per-page={page_gutter_frac:.3f} rejected)"
+
+        center_px = int(0.5 * w_px)
+        actual_px = int(actual_gutter * w_px)
+        diff_from_center_px = actual_px - center_px
+        gutter_message = (
+            f"Page {page_idx} gutter: {actual_gutter:.3f} ({gutter_source}), "
+            f"detected: {page_gutter_frac:.3f} (variance: {page_variance:.3f}, "
+            f"continuity: {page_continuity:.1f}), center diff: {diff_from_center_px:+d}px"
+        )
+
+        left_img, right_img = split_spread_at_gutter(pil_img, actual_gutter)
+        left_img = deskew_image(left_img)
+        right_img = deskew_image(right_img)
+        # Noise reduction disabled - was destroying text on low-contrast/mostly-blank pages
+        # The morphological operations eroded small text features
+
+        left_path = os.path.join(images_dir, f"page-{page_idx:03d}L.png")
+        right_path = os.path.join(images_dir, f"page-{page_idx:03d}R.png")
+        left_img.save(left_path)
+        right_img.save(right_path)
+
+        # Split native image if available
+        left_native_path = None
+        right_native_path = None
+        if pil_img_native and images_native_dir:
+            left_native, right_native = split_spread_at_gutter(pil_img_native, actual_gutter)
+            left_native = deskew_image(left_native)
+            right_native = deskew_image(right_native)
+            left_native_path = os.path.join(images_native_dir, f"page-{page_idx:03d}L.png")
+            right_native_path = os.path.join(images_native_dir, f"page-{page_idx:03d}R.png")
+            left_native.save(left_native_path)
+            right_native.save(right_native_path)
+
+        return {
+            "gutter_message": gutter_message,
+            "outputs": [("L", left_path, left_native_path), ("R", right_path, right_native_path)],
+        }
+
+    pil_img = deskew_image(pil_img)
+    # Noise reduction disabled - see above comment
+    out_path = os.path.join(images_dir, f"page-{page_idx:03d}.png")
+    pil_img.save(out_path)
+
+    # Process native image if available
+    out_native_path = None
+    if pil_img_native and images_native_dir:
+        pil_img_native = deskew_image(pil_img_native)
+        out_native_path = os.path.join(images_native_dir, f"page-{page_idx:03d}.png")
+        pil_img_native.save(out_native_path)
+    return {"gutter_message": None, "outputs": [(None, out_path, out_native_path)]}
+
+
+def _run_jobs(jobs: List[Dict[str, Any]], workers: int) -> Iterator[Dict[str, Any]]:
+    """Results in job order; pages are processed in a process pool when workers != 1."""
+    if workers <= 0:
+        workers = min(os.cpu_count() or 1, 8)
+    workers = min(workers, len(jobs))
+    if workers <= 1:
+        for job in jobs:
+            yield _split_page(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_split_page, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Split page images from a page_image_v1 manifest.")
     parser.add_argument("--pages", required=True, help="Path to page_image_v1 manifest JSONL")
@@ -68,6 +167,8 @@ def main() -> None:
     parser.add_argument("--state-file", help="Path to pipeline_state.json")
     parser.add_argument("--run-id", help="Run identifier for logging")
     parser.add_argument("--out", default="pages_split_manifest.jsonl", help="Output manifest filename")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Worker processes for split/deskew (0 = auto, 1 = in-process)")
     args = parser.parse_args()
 
     logger = ProgressLogger(state_path=args.state_file, progress_path=args.progress_file, run_id=args.run_id)
@@ -101,8 +202,7 @@ def main() -> None:
     size_groups: Dict[tuple, List[str]] = {}
     page_sizes: Dict[str, tuple] = {}
     for path in image_paths:
-        img = Image.open(path)
-        w, h = img.size
+        w, h = image_size(path)
         page_sizes[path] = (w, h)
         key = _size_group_key(w, h, args.ratio_bucket, args.size_bucket)
         size_groups.setdefault(key, []).append(path)
@@ -142,152 +242,50 @@ def main() -> None:
         extra={"group_count": len(size_groups)},
     )
 
-    output_page_number = 0
-    manifest_rows: List[Dict[str, Any]] = []
-
+    jobs = []
     for row in rows:
-        page_idx = row.get("page")
-        original_page_number = row.get("original_page_number") or page_idx
         img_path = row["image"]
+        w_px, h_px = page_sizes[img_path]
+        group_key = _size_group_key(w_px, h_px, args.ratio_bucket, args.size_bucket)
+        group_decision = group_decisions.get(group_key) or {"is_spread": False, "gutter_position": 0.5, "confidence": 0.0}
         img_native_path = row.get("image_native")
-        pil_img = Image.open(img_path)
-        pil_img_native = Image.open(img_native_path) if img_native_path and os.path.exists(img_native_path) else None
+        jobs.append({
+            "page": row.get("page"),
+            "image": img_path,
+            "image_native": img_native_path if img_native_path and os.path.exists(img_native_path) else None,
+            "is_spread_group": group_decision.get("is_spread", False),
+            "gutter_position": group_decision.get("gutter_position", 0.5),
+            "images_dir": images_dir,
+            "images_native_dir": images_native_dir,
+        })
 
-        group_key = _size_group_key(pil_img.size[0], pil_img.size[1], args.ratio_bucket, args.size_bucket)
-        group_decision = group_decisions.get(group_key) or {"is_spread": False, "gutter_position": 0.5, "confidence": 0.0}
-        is_spread_group = group_decision.get("is_spread", False)
-        gutter_position = group_decision.get("gutter_position", 0.5)
-
-        w_px, h_px = pil_img.size
-        is_landscape = (w_px / max(h_px, 1)) > 1.1
-
-        source = row_by_path.get(img_path, {}).get("source")
-        if is_spread_group and is_landscape:
-            page_gutter_frac, _, page_variance, page_continuity = find_gutter_position(pil_img)
-
-            # Variance-based gutter selection:
-            # 1. If detection passed margin checks (continuity=1.0), trust it
-            # 2. If detection is very close to center (within 3%), trust it
-            # 3. Otherwise, use group gutter
-            distance_from_center = abs(page_gutter_frac - 0.5)
-
-            # Passed margin checks - binding extends top-to-bottom including margins
-            if page_continuity >= 1.0:
-                actual_gutter = page_gutter_frac
-                gutter_source = f"per-page (passed margin checks, var={page_variance:.3f})"
-            # Very close to center - trust it
-            elif distance_from_center <= 0.03:
-                actual_gutter = page_gutter_frac
-                gutter_source = f"per-page (near center, dist={distance_from_center:.3f})"
-            else:
-                # Use group gutter
-                actual_gutter = gutter_position
-                gutter_source = f"group gutter (per-page={page_gutter_frac:.3f} rejected)"
-
-            center_px = int(0.5 * w_px)
-            actual_px = int(actual_gutter * w_px)
-            diff_from_center_px = actual_px - center_px
+    output_page_number = 0
+    manifest_rows: List[Dict[str, Any]] = []
 
+    for row, result in zip(rows, _run_jobs(jobs, args.workers)):
+        page_idx = row.get("page")
+        original_page_number = row.get("original_page_number") or page_idx
+        source = row_by_path.get(row["image"], {}).get("source")
+        if result.get("gutter_message"):
             logger.log(
                 "extract",
                 "running",
                 current=output_page_number,
                 total=total_progress,
-                message=(
-                    f"Page {page_idx} gutter: {actual_gutter:.3f} ({gutter_source}), "
-                    f"detected: {page_gutter_frac:.3f} (variance: {page_variance:.3f}, "
-                    f"continuity: {page_continuity:.1f}), center diff: {diff_from_center_px:+d}px"
-                ),
-            )
-
-            left_img, right_img = split_spread_at_gutter(pil_img, actual_gutter)
-            left_img = deskew_image(left_img)
-            right_img = deskew_image(right_img)
-            # Noise reduction disabled - was destroying text on low-contrast/mostly-blank pages
-            # The morphological operations eroded small text features
-            # if should_apply_noise_reduction(left_img):
-            #     left_img = reduce_noise(left_img, method="morphological", kernel_size=2)
-            # if should_apply_noise_reduction(right_img):
-            #     right_img = reduce_noise(right_img, method="morphological", kernel_size=2)
-
-            left_path = os.path.join(images_dir, f"page-{page_idx:03d}L.png")
-            right_path = os.path.join(images_dir, f"page-{page_idx:03d}R.png")
-            left_img.save(left_path)
-            right_img.save(right_path)
-
-            # Split native image if available
-            left_native_path = None
-            right_native_path = None
-            if pil_img_native and images_native_dir:
-                left_native, right_native = split_spread_at_gutter(pil_img_native, actual_gutter)
-                left_native = deskew_image(left_native)
-                right_native = deskew_image(right_native)
-                # Noise reduction disabled - see above comment
-                # if should_apply_noise_reduction(left_native):
-                #     left_native = reduce_noise(left_native, method="morphological", kernel_size=2)
-                # if should_apply_noise_reduction(right_native):
-                #     right_native = reduce_noise(right_native, method="morphological", kernel_size=2)
-
-                left_native_path = os.path.join(images_native_dir, f"page-{page_idx:03d}L.png")
-                right_native_path = os.path.join(images_native_dir, f"page-{page_idx:03d}R.png")
-                left_native.save(left_native_path)
-                right_native.save(right_native_path)
-
-            output_page_number += 1
-            manifest_rows.append(
-                _build_manifest_row(
-                    page=page_idx,
-                    page_number=output_page_number,
-                    original_page_number=original_page_number,
-                    image_path=left_path,
-                    spread_side="L",
-                    run_id=args.run_id,
-                    source=source,
-                    image_native=left_native_path,
-                )
+                message=result["gutter_message"],
             )
+        for side, out_image, out_native in result["outputs"]:
             output_page_number += 1
             manifest_rows.append(
                 _build_manifest_row(
                     page=page_idx,
                     page_number=output_page_number,
                     original_page_number=original_page_number,
-                    image_path=right_path,
-                    spread_side="R",
-                    run_id=args.run_id,
-                    source=source,
-                    image_native=right_native_path,
-                )
-            )
-        else:
-            pil_img = deskew_image(pil_img)
-            # Noise reduction disabled - see above comment
-            # if should_apply_noise_reduction(pil_img):
-            #     pil_img = reduce_noise(pil_img, method="morphological", kernel_size=2)
-            out_path = os.path.join(images_dir, f"page-{page_idx:03d}.png")
-            pil_img.save(out_path)
-
-            # Process native image if available
-            out_native_path = None
-            if pil_img_native and images_native_dir:
-                pil_img_native = deskew_image(pil_img_native)
-                # Noise reduction disabled - see above comment
-                # if should_apply_noise_reduction(pil_img_native):
-                #     pil_img_native = reduce_noise(pil_img_native, method="morphological", kernel_size=2)
-                out_native_path = os.path.join(images_native_dir, f"page-{page_idx:03d}.png")
-                pil_img_native.save(out_native_path)
-
-            output_page_number += 1
-            manifest_rows.append(
-                _build_manifest_row(
-                    page=page_idx,
-                    page_number=output_page_number,
-                    original_page_number=original_page_number,
-                    image_path=out_path,
-                    spread_side=None,
+                    image_path=out_image,
+                    spread_side=side,
                     run_id=args.run_id,
                     source=source,
-                    image_native=out_native_path,
+                    image_native=out_native,
                 )
             )
 
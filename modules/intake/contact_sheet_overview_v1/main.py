@@ -2,9 +2,9 @@ import argparse
 import json
 from pathlib import Path
 from typing import List
-import base64
 from modules.common.utils import read_jsonl, ensure_dir, save_jsonl
 from modules.common.openai_client import OpenAI
+from modules.common.prepared_image import image_data_uri
 def parse_json_relaxed(text: str):
     try:
         return json.loads(text)
@@ -46,9 +46,7 @@ def summarize_manifest(manifest_path: Path):
 
 
 def encode_image(p: Path) -> str:
-    mime = "image/jpeg" if p.suffix.lower() in {".jpg", ".jpeg"} else "image/png"
-    b64 = base64.b64encode(p.read_bytes()).decode("utf-8")
-    return f"data:{mime};base64,{b64}"
+    return image_data_uri(str(p))
 
 
 def prompt_overview_per_sheet(client: OpenAI, sheet_img: Path, tile_map: List[dict], model: str, vision_detail: str) -> dict:
@@ -1,12 +1,11 @@
 import argparse
-import json
 
 from modules.common.utils import save_json
+from modules.common.pagelines_store import open_pagelines
 
 
-def load_page_text(path):
-    page = json.load(open(path, "r", encoding="utf-8"))
-    text = "\n".join([line.get("text", "") for line in page.get("lines", [])])
+def load_page_text(page):
+    text = "\n".join([line.get("text", "") for line in (page or {}).get("lines", [])])
     return text
 
 
@@ -18,15 +17,15 @@ def main():
     ap.add_argument("--threshold", type=float, default=0.4, help="Jaccard threshold (lower means more divergent)")
     args = ap.parse_args()
 
-    idx_a = json.load(open(args.ocr_index_a, "r", encoding="utf-8"))
-    idx_b = json.load(open(args.ocr_index_b, "r", encoding="utf-8"))
+    idx_a = open_pagelines(args.ocr_index_a)
+    idx_b = open_pagelines(args.ocr_index_b)
 
     divergent = []
-    for page in idx_a:
+    for page, page_a in idx_a.iter_pages():
         if page not in idx_b:
             continue
-        text_a = load_page_text(idx_a[str(page)])
-        text_b = load_page_text(idx_b[str(page)])
+        text_a = load_page_text(page_a)
+        text_b = load_page_text(idx_b.get_page(page))
         tokens_a = set(text_a.split())
         tokens_b = set(text_b.split())
         if not tokens_a or not tokens_b:
@@ -1,9 +1,8 @@
 import argparse
-import json
 import os
-from pathlib import Path
 
 from modules.common.utils import ensure_dir, save_jsonl, ProgressLogger
+from modules.common.pagelines_store import open_pagelines
 
 
 def join_lines(lines):
@@ -24,12 +23,13 @@ def main():
 
     logger = ProgressLogger(state_path=args.state_file, progress_path=args.progress_file, run_id=args.run_id)
 
-    index = json.load(open(args.index, "r", encoding="utf-8"))
+    store = open_pagelines(args.index)
     rows = []
-    total = len(index)
-    for i, (page_str, path) in enumerate(sorted(index.items(), key=lambda kv: int(kv[0]))):
-        page_path = Path(path)
-        data = json.load(open(page_path, "r", encoding="utf-8"))
+    total = len(store)
+    for i, page_str in enumerate(sorted(store.keys(), key=int)):
+        data = store.get_page(page_str)
+        if data is None:
+            raise FileNotFoundError(f"pagelines page {page_str} missing for {args.index}")
         lines = data.get("lines", [])
         if not args.preserve_numeric_lines:
             text = join_lines(lines)
@@ -58,6 +58,7 @@ def main():
                    message=f"page {row['page']}", artifact=args.out,
                    module_id="pagelines_to_clean_v1", schema_version="clean_page_v1")
 
+    store.close()
     ensure_dir(os.path.dirname(args.out) or ".")
     save_jsonl(args.out, rows)
     logger.log("pagelines_to_clean", "done", current=total, total=total,
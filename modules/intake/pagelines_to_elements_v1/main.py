@@ -15,6 +15,8 @@ from pathlib import Path
 from typing import List, Dict
 
 from modules.common.utils import ensure_dir, save_jsonl, read_jsonl, ProgressLogger
+from modules.common.pagelines_store import open_pagelines
+from modules.common.layout import BookLines, assign_columns, paragraph_breaks, reading_order, sort_lines_by_columns
 from datetime import datetime, timezone
 from schemas import UnstructuredElement, ElementCore, CodexMetadata, ElementLayout
 
@@ -38,78 +40,12 @@ def extract_page_number(page_key: str) -> int:
     return int(page_key.lstrip("0") or "0")
 
 
-def cluster_columns(lines: List[Dict], gap: float = 0.12, min_per_col: int = 4) -> Dict[int, int]:
-    """
-    Heuristic column clustering:
-    - if spread in x-centers > 0.2, run 2-means on x-centers and assign cols.
-    - else fall back to largest-gap split.
-    Returns mapping line_idx -> column_idx (0 or 1). Defaults to single column if confidence low.
-    """
-    centers = []
-    for i, ln in enumerate(lines):
-        bbox = ln.get("bbox")
-        if not bbox or len(bbox) < 4:
-            continue
-        x_center = (bbox[0] + bbox[2]) / 2.0
-        centers.append((i, x_center))
-    if not centers:
-        return {}
-    centers.sort(key=lambda x: x[1])
-    xs = [c for _, c in centers]
-    spread = max(xs) - min(xs)
-    # k-means with k=2 when spread is large
-    if spread > 0.2 and len(xs) >= 2:
-        c1, c2 = min(xs), max(xs)
-        for _ in range(5):
-            left = [c for c in xs if abs(c - c1) <= abs(c - c2)]
-            right = [c for c in xs if abs(c - c2) < abs(c - c1)]
-            if left:
-                c1 = sum(left) / len(left)
-            if right:
-                c2 = sum(right) / len(right)
-        left_ids = [idx for idx, c in centers if abs(c - c1) <= abs(c - c2)]
-        right_ids = [idx for idx, c in centers if abs(c - c2) < abs(c - c1)]
-        if len(left_ids) >= min_per_col and len(right_ids) >= min_per_col:
-            col_assign = {idx: 0 for idx in left_ids}
-            col_assign.update({idx: 1 for idx in right_ids})
-            return col_assign
-    # fallback: largest gap
-    gaps = []
-    for a, b in zip(centers, centers[1:]):
-        gaps.append((b[1] - a[1], a, b))
-    if gaps:
-        max_gap, left, right = max(gaps, key=lambda g: g[0])
-        if max_gap >= gap:
-            split_at = right[1]
-            left_ids = [idx for idx, c in centers if c < split_at]
-            right_ids = [idx for idx, c in centers if c >= split_at]
-            if len(left_ids) >= min_per_col and len(right_ids) >= min_per_col:
-                col_assign = {idx: 0 for idx in left_ids}
-                col_assign.update({idx: 1 for idx in right_ids})
-                return col_assign
-    return {idx: 0 for idx, _ in centers}
-
-
 def sort_lines_preserving_columns(lines: List[Dict]) -> List[Dict]:
     """
     Sort lines by detected column (left→right) then top→bottom within each column.
     Falls back to original order if no bbox is present.
     """
-    if not lines:
-        return lines
-    col_assign = cluster_columns(lines)
-    if not col_assign:
-        return lines
-
-    def key_fn(item_tuple):
-        idx, ln = item_tuple
-        bbox = ln.get("bbox") or [0, 0, 0, 0]
-        y_top = bbox[1]
-        col = col_assign.get(idx, 0)
-        return (col, y_top)
-
-    sorted_items = sorted(list(enumerate(lines)), key=key_fn)
-    return [ln for _, ln in sorted_items]
+    return sort_lines_by_columns(lines)
 
 
 def main():
@@ -271,8 +207,10 @@ def main():
         pages_data = {f"__jsonl_row_{i}__": page_data for i, page_data in enumerate(page_rows)}
     elif args.index:
         # Load from index file (traditional path)
-        index = load_index(args.index)
-        pages_data = {}
+        store = open_pagelines(args.index)
+        index = {page_key: f"__store_{page_key}__" for page_key in store.keys()}
+        pages_data = {index[page_key]: page for page_key, page in store.iter_pages()}
+        store.close()
     else:
         raise SystemExit("Must provide either pagelines_final.jsonl input or index file")
     
@@ -290,8 +228,8 @@ def main():
     page_items = []
     for page_key, path in index.items():
         # Check if we're reading from JSONL (unified artifact) or individual files
-        if path.startswith("__jsonl_row_"):
-            # Reading from unified JSONL artifact
+        if path in pages_data:
+            # Reading from unified JSONL artifact or the page-lines store
             data = pages_data[path]
         else:
             # Reading from individual page files (traditional path)
@@ -306,9 +244,16 @@ def main():
             return pn
         return extract_page_number(page_key)
 
-    for page_key, data in sorted(page_items, key=sort_key):
-        lines = data.get("lines", [])
-        lines = sort_lines_preserving_columns(lines)
+    # Column assignment and reading order for the whole book in one vectorized pass.
+    ordered_items = sorted(page_items, key=sort_key)
+    page_lines = [data.get("lines", []) for _, data in ordered_items]
+    book = BookLines.from_pages(page_lines)
+    book_columns = assign_columns(book)
+    book_order = reading_order(page_lines, book, book_columns)
+    book_paragraphs = paragraph_breaks(book, book_columns) if args.columns_debug else None
+
+    for page_idx, (page_key, data) in enumerate(ordered_items):
+        lines = [page_lines[page_idx][i] for i in book_order[page_idx]]
         
         # Prefer canonical page_number from payload; fall back to legacy page_key
         page_num = data.get("page_number")
@@ -326,12 +271,14 @@ def main():
         
         # debug column stats
         if args.columns_debug:
-            col_assign = cluster_columns(lines)
-            num_cols = 1 if not col_assign else max(col_assign.values()) + 1
+            on_page = book.page == page_idx
+            page_cols = book_columns[on_page]
+            num_cols = 1 if not page_cols.size else int(page_cols.max()) + 1
             debug_rows.append({
                 "page": page_key,  # Keep original key for debug
                 "num_columns": num_cols,
                 "line_count": len(lines),
+                "paragraph_starts": int(book_paragraphs[on_page].sum()),
                 "sample_first_lines": [ln.get("text", "") for ln in lines[:5]],
             })
         seq_page = 0
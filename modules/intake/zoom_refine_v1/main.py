@@ -1,11 +1,11 @@
 import argparse
 import json
-import base64
 from pathlib import Path
 from typing import List
 
 from modules.common.utils import ensure_dir, read_jsonl, save_jsonl
 from modules.common.openai_client import OpenAI
+from modules.common.prepared_image import image_data_uri
 def choose_recipe(plan):
     book_type = plan.get("book_type") or "other"
     signals = set(plan.get("signals", []))
@@ -35,9 +35,7 @@ def build_display_to_image(manifest_path: Path) -> dict:
 
 
 def encode_image_file(path: Path, detail: str):
-    mime = "image/jpeg" if path.suffix.lower() in {".jpg", ".jpeg"} else "image/png"
-    b64 = base64.b64encode(path.read_bytes()).decode("utf-8")
-    return {"type": "image_url", "image_url": {"url": f"data:{mime};base64,{b64}", "detail": detail}}
+    return {"type": "image_url", "image_url": {"url": image_data_uri(str(path)), "detail": detail}}
 
 
 def verify_tables(plan, source_dir: Path, manifest_path: Path, model: str, vision_detail: str, max_verify: int = 8):
@@ -123,9 +121,7 @@ def main():
             for fname in plan.get("zoom_requests", [])[: args.max_zoom_pages]:
                 fp = src_dir / fname
                 if fp.exists():
-                    mime = "image/jpeg" if fp.suffix.lower() in {".jpg", ".jpeg"} else "image/png"
-                    b64 = base64.b64encode(fp.read_bytes()).decode("utf-8")
-                    contents.append({"type": "image_url", "image_url": {"url": f"data:{mime};base64,{b64}", "detail": args.vision_detail}})
+                    contents.append(encode_image_file(fp, args.vision_detail))
         # If no images found, fall back to text-only context
         user_content = contents if contents else json.dumps({"zoom_requests": plan.get("zoom_requests", []), "signals": plan.get("signals", [])})
         if args.mock_output:
@@ -10,10 +10,13 @@ import argparse
 import json
 import os
 import re
+import time
 from collections import defaultdict
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
+from modules.common.batch_planner import BatchPlanner, TruncatedOutput, estimate_tokens, run_batches
 from modules.common.openai_client import OpenAI
+from modules.common.table_rescue import RateLimiter
 from modules.common.utils import read_jsonl, save_jsonl, ensure_dir, ProgressLogger
 from schemas import ElementCore, HeaderCandidate
 
@@ -219,68 +222,80 @@ Elements ({num_elements} total):
     return prompt
 
 
+def empty_classifications(elements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fallback rows for a batch the model could not classify."""
+    return [
+        {
+            "seq": elem["seq"],
+            "macro_header": "none",
+            "game_section_header": False,
+            "claimed_section_number": None,
+            "confidence": 0.0
+        }
+        for elem in elements
+    ]
+
+
 def call_classify_llm(client: OpenAI, model: str, elements: List[Dict[str, Any]], 
                       cyoa_profile: Dict, max_tokens: int) -> List[Dict[str, Any]]:
-    """Call AI to classify a batch of elements."""
+    """
+    Call AI to classify a batch of elements.
+
+    `max_tokens` is the reply budget for this batch (see BatchPlanner.output_tokens). Raises
+    TruncatedOutput when the reply was cut off so the caller can re-split the batch.
+    """
     prompt = create_batch_prompt(elements, cyoa_profile)
-    
-    # Calculate reasonable max_tokens: ~50 tokens per element for JSON response
-    # Use the provided max_tokens as an upper bound, but calculate a reasonable lower bound
-    num_elements = len(elements)
-    calculated_max = min(max_tokens, max(200, num_elements * 50 + 100))  # At least 200, or 50 per element + buffer
-    
+
+    kwargs = dict(
+        model=model,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        response_format={"type": "json_object"},
+    )
+    # gpt-5 requires max_completion_tokens and does not allow temperature=0
+    if model.startswith("gpt-5"):
+        kwargs["max_completion_tokens"] = max_tokens
+        kwargs["temperature"] = 1
+    else:
+        kwargs["max_tokens"] = max_tokens
+        kwargs["temperature"] = 0.0
+
+    completion = client.chat.completions.create(**kwargs)
+    choice = completion.choices[0]
+    if getattr(choice, "finish_reason", None) == "length":
+        raise TruncatedOutput(f"reply hit max_tokens={max_tokens} for {len(elements)} elements")
+
+    # Parse response
     try:
-        kwargs = dict(
-            model=model,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"},
-        )
-        # gpt-5 requires max_completion_tokens and does not allow temperature=0
-        if model.startswith("gpt-5"):
-            kwargs["max_completion_tokens"] = calculated_max
-            kwargs["temperature"] = 1
-        else:
-            kwargs["max_tokens"] = calculated_max
-            kwargs["temperature"] = 0.0
+        payload = json.loads(choice.message.content or "")
+    except json.JSONDecodeError as e:
+        raise TruncatedOutput(f"unparseable reply for {len(elements)} elements: {e}") from e
 
-        completion = client.chat.completions.create(**kwargs)
-        
-        
-        # Parse response
-        response_text = completion.choices[0].message.content
-        payload = json.loads(response_text)
-        
-        # Extract elements array
-        if isinstance(payload, dict) and "elements" in payload:
-            return payload["elements"]
-        else:
-            return []
-            
-    except Exception as e:
-        print(f"Error calling LLM for batch: {e}")
-        # Return empty classifications for this batch
-        return [
-            {
-                "seq": elem["seq"],
-                "macro_header": "none",
-                "game_section_header": False,
-                "claimed_section_number": None,
-                "confidence": 0.0
-            }
-            for elem in elements
-        ]
+    # Extract elements array
+    if isinstance(payload, dict) and "elements" in payload:
+        return payload["elements"]
+    return []
 
 
-def batch_elements(elements: List[Dict[str, Any]], batch_size: int) -> List[List[Dict[str, Any]]]:
-    """Split elements into batches of specified size."""
-    batches = []
-    for i in range(0, len(elements), batch_size):
-        batch = elements[i:i + batch_size]
-        batches.append(batch)
-    return batches
+def plan_classify_batches(elements: List[Dict[str, Any]], model: str, batch_size: int,
+                          max_tokens: int) -> Tuple[BatchPlanner, List[List[Dict[str, Any]]]]:
+    """
+    Token-budget batches: each batch's prompt fits the model context and its expected reply
+    (~50 tokens per element) fits `max_tokens`; `batch_size` caps the element count.
+    """
+    planner = BatchPlanner(
+        model=model,
+        base_prompt_tokens=estimate_tokens(SYSTEM_PROMPT + create_batch_prompt([], CYOA_PROFILE), model),
+        output_tokens_per_item=50,
+        max_output_tokens=max_tokens,
+        max_items=batch_size,
+    )
+    batches = planner.plan(
+        elements, lambda elem: estimate_tokens(json.dumps(elem, separators=(',', ':')), model) + 1
+    )
+    return planner, batches
 
 
 def aggregate_results(results_forward: List[Dict], results_backward: List[Dict]) -> Dict[int, Dict]:
@@ -372,9 +387,13 @@ def main():
     parser.add_argument("--model", default="gpt-4.1-nano",
                        help="OpenAI model to use (gpt-4.1-nano is fastest and cheapest for this task)")
     parser.add_argument("--batch_size", type=int, default=75,
-                       help="Number of elements per batch (50-100 recommended). Smaller sizes create too many API calls and are very slow.")
+                       help="Max elements per batch; batches are also capped by prompt/reply token budget.")
     parser.add_argument("--max_tokens", type=int, default=4000,
-                       help="Max tokens for AI response")
+                       help="Max tokens for an AI response (batch replies are sized to fit)")
+    parser.add_argument("--concurrency", type=int, default=4,
+                       help="Parallel batch requests across both passes (1=sequential)")
+    parser.add_argument("--rate-limit", "--rate_limit", dest="rate_limit", type=float, default=0.0,
+                       help="Max batch requests started per second (0=unlimited)")
     parser.add_argument("--redundancy", default="forward_backward",
                        choices=["none", "forward_backward", "multiple_calls"],
                        help="Redundancy strategy")
@@ -425,10 +444,15 @@ def main():
     
     # Initialize OpenAI client with timeout
     client = OpenAI(timeout=60.0)  # 60 second timeout per request
-    
-    # Batch elements
-    batches = batch_elements(elements, args.batch_size)
+
+    # Batch elements by measured prompt size and the model's output budget
+    planner, batches = plan_classify_batches(elements, args.model, args.batch_size, args.max_tokens)
     total_batches = len(batches)
+    run_backward = args.redundancy in ["forward_backward", "multiple_calls"]
+    jobs = [("forward", i, batch) for i, batch in enumerate(batches)]
+    if run_backward:
+        # Reverse batches and elements within each batch
+        jobs += [("backward", i, list(reversed(batch))) for i, batch in enumerate(reversed(batches))]
 
     logger.log(
         "portionize",
@@ -439,122 +463,71 @@ def main():
         module_id="classify_headers_v1",
         extra={"action": "start", "phase": "forward", "total_batches": total_batches},
     )
-    
-    print(f"Processing {total_elements} elements in {total_batches} batches of ~{args.batch_size}")
-    print(f"Estimated time: ~{total_batches * 6} seconds for forward pass", flush=True)
-    
-    # Forward pass
-    forward_results = []
-    for batch_idx, batch in enumerate(batches):
-        print(f"\n[Forward] Batch {batch_idx + 1}/{total_batches} ({len(batch)} elements)...", flush=True)
-        logger.log(
-            "portionize",
-            "running",
-            current=batch_idx * args.batch_size,
-            total=total_elements,
-            message=f"Forward pass: batch {batch_idx + 1}/{total_batches}",
-            module_id="classify_headers_v1",
-            extra={
-                "action": "start",
-                "phase": "forward",
-                "batch": batch_idx + 1,
-                "total_batches": total_batches,
-                "batch_size": len(batch),
-            },
-        )
-        
-        import time
-        start_time = time.time()
-        batch_results = call_classify_llm(
-            client, args.model, batch, CYOA_PROFILE, args.max_tokens
-        )
-        
-        # Post-process: boost numeric-only lines as candidates (safety net for high recall)
-        # Pass all elements for context checking (to detect rules sections)
-        batch_results = boost_numeric_candidates(batch, batch_results, all_elements=elements)
-        
-        elapsed = time.time() - start_time
-        forward_results.extend(batch_results)
-        
-        print(f"  ✓ Batch {batch_idx + 1}/{total_batches}: classified {len(batch_results)} elements in {elapsed:.1f}s", flush=True)
+
+    print(f"Processing {total_elements} elements in {total_batches} batches of <= {max(len(b) for b in batches) if batches else 0} "
+          f"({'forward+backward' if run_backward else 'forward'}, concurrency={args.concurrency})", flush=True)
+
+    started = time.time()
+    classified = {"forward": 0, "backward": 0}
+
+    def _call(batch):
+        return call_classify_llm(client, args.model, batch, CYOA_PROFILE, planner.output_tokens(len(batch)))
+
+    def _fallback(batch, exc):
+        print(f"Error calling LLM for batch: {exc}")
+        # Return empty classifications for this batch
+        return empty_classifications(batch)
+
+    def _on_split(batch, depth):
+        print(f"  Reply truncated for {len(batch)} elements; re-splitting (depth {depth})", flush=True)
+
+    def _on_done(done, job_idx, batch_results):
+        phase, batch_idx, batch = jobs[job_idx]
+        classified[phase] += len(batch)
+        print(f"  ✓ {phase.capitalize()} batch {batch_idx + 1}/{total_batches}: classified {len(batch_results)} elements", flush=True)
         logger.log(
             "portionize",
             "running",
-            current=(batch_idx + 1) * args.batch_size,
+            current=classified["forward"],
             total=total_elements,
-            message=f"Forward batch {batch_idx + 1}/{total_batches} done",
+            message=f"{phase.capitalize()} batch {batch_idx + 1}/{total_batches} done ({done}/{len(jobs)} requests)",
             module_id="classify_headers_v1",
             extra={
                 "action": "finish",
-                "phase": "forward",
+                "phase": phase,
                 "batch": batch_idx + 1,
                 "total_batches": total_batches,
                 "batch_size": len(batch),
                 "output_count": len(batch_results),
-                "duration_ms": int(elapsed * 1000),
+                "duration_ms": int((time.time() - started) * 1000),
             },
         )
-    
-    # Backward pass (if redundancy enabled)
+
+    job_results = run_batches(
+        [batch for _, _, batch in jobs],
+        _call,
+        fallback=_fallback,
+        concurrency=args.concurrency,
+        rate_limiter=RateLimiter(args.rate_limit),
+        on_done=_on_done,
+        on_split=_on_split,
+    )
+
+    forward_results = []
     backward_results = []
-    if args.redundancy in ["forward_backward", "multiple_calls"]:
-        print("Running backward pass for redundancy...")
-        # Reverse batches and elements within each batch
-        reversed_batches = [list(reversed(batch)) for batch in reversed(batches)]
-        
-        for batch_idx, batch in enumerate(reversed_batches):
-            logger.log(
-                "portionize",
-                "running",
-                current=batch_idx,
-                total=total_batches,
-                message=f"Backward pass: batch {batch_idx + 1}/{total_batches}",
-                module_id="classify_headers_v1",
-                extra={
-                    "action": "start",
-                    "phase": "backward",
-                    "batch": batch_idx + 1,
-                    "total_batches": total_batches,
-                    "batch_size": len(batch),
-                },
-            )
-            
-            import time
-            start_time = time.time()
-            batch_results = call_classify_llm(
-                client, args.model, batch, CYOA_PROFILE, args.max_tokens
-            )
-            
-            # Post-process: boost numeric-only lines as candidates (safety net for high recall)
-            # Pass all elements for context checking (to detect rules sections)
-            batch_results = boost_numeric_candidates(batch, batch_results, all_elements=elements)
-            
+    for (phase, _, batch), batch_results in zip(jobs, job_results):
+        # Post-process: boost numeric-only lines as candidates (safety net for high recall)
+        # Pass all elements for context checking (to detect rules sections)
+        batch_results = boost_numeric_candidates(batch, batch_results, all_elements=elements)
+        if phase == "forward":
+            forward_results.extend(batch_results)
+        else:
             # Reverse results back to original order
-            batch_results_reversed = list(reversed(batch_results))
-            backward_results.extend(batch_results_reversed)
-            elapsed = time.time() - start_time
-            print(f"  Backward batch {batch_idx + 1}/{total_batches}: classified {len(batch_results)} elements")
-            logger.log(
-                "portionize",
-                "running",
-                current=batch_idx + 1,
-                total=total_batches,
-                message=f"Backward batch {batch_idx + 1}/{total_batches} done",
-                module_id="classify_headers_v1",
-                extra={
-                    "action": "finish",
-                    "phase": "backward",
-                    "batch": batch_idx + 1,
-                    "total_batches": total_batches,
-                    "batch_size": len(batch),
-                    "output_count": len(batch_results),
-                    "duration_ms": int(elapsed * 1000),
-                },
-            )
-    else:
+            backward_results.extend(reversed(batch_results))
+    if not run_backward:
         # No redundancy - use forward results as-is
         backward_results = forward_results
-    
+
     # Aggregate results
     logger.log(
         "portionize",
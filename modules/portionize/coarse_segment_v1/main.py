@@ -9,8 +9,10 @@ LLM call to classify macro sections (frontmatter/gameplay/endmatter) and output
 import argparse
 import json
 import os
+from contextlib import nullcontext
 from typing import List, Dict, Optional, Tuple
 
+from modules.common import llm_cache
 from modules.common.openai_client import OpenAI
 from modules.common.utils import read_jsonl, save_json, ProgressLogger
 
@@ -336,8 +338,11 @@ def main():
     
     for attempt in range(args.max_retries + 1):
         model = retry_model if attempt > 0 else args.model
+        # A retry after a rejected reply must reach the provider, not get that reply back from the memo.
+        reuse = llm_cache.fresh() if attempt else nullcontext()
         try:
-            result = call_llm_classify(client, model, pages, prompt)
+            with reuse:
+                result = call_llm_classify(client, model, pages, prompt)
             is_valid, errors = validate_ranges(result, total_pages)
             
             if is_valid:
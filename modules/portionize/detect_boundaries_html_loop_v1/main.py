@@ -5,7 +5,6 @@ Coverage guard + HTML-only repair loop for missing section headers.
 Pattern: detect -> validate -> repair -> re-detect until coverage met or retries exhausted.
 """
 import argparse
-import base64
 import hashlib
 import json
 import os
@@ -22,6 +21,7 @@ except Exception as exc:  # pragma: no cover
 else:
     _OPENAI_IMPORT_ERROR = None
 
+from modules.common.prepared_image import image_data_uri
 from modules.common.utils import read_jsonl, save_jsonl, ensure_dir, ProgressLogger
 from modules.adapter.html_to_blocks_v1.main import parse_blocks
 from modules.portionize.detect_boundaries_html_v1.main import (
@@ -211,11 +211,9 @@ def _repair_html(
             {"type": "input_text", "text": html},
         ]
         if image_path:
-            mime = "image/jpeg" if image_path.lower().endswith((".jpg", ".jpeg")) else "image/png"
-            b64 = Path(image_path).read_bytes()
             content.append({
                 "type": "input_image",
-                "image_url": f"data:{mime};base64,{base64.b64encode(b64).decode('utf-8')}",
+                "image_url": image_data_uri(image_path),
             })
         resp = client.responses.create(
             model=model,
@@ -236,12 +234,10 @@ def _repair_html(
             {"role": "user", "content": html},
         ]
         if image_path:
-            mime = "image/jpeg" if image_path.lower().endswith((".jpg", ".jpeg")) else "image/png"
-            b64 = Path(image_path).read_bytes()
             messages.append({
                 "role": "user",
                 "content": [
-                    {"type": "image_url", "image_url": {"url": f"data:{mime};base64,{base64.b64encode(b64).decode('utf-8')}"}}
+                    {"type": "image_url", "image_url": {"url": image_data_uri(image_path)}}
                 ],
             })
         resp = client.chat.completions.create(
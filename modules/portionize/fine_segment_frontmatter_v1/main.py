@@ -9,8 +9,10 @@ then uses LLM to identify logical portions (title, copyright, TOC, rules, etc.).
 import argparse
 import json
 import os
+from contextlib import nullcontext
 from typing import List, Dict, Optional
 
+from modules.common import llm_cache
 from modules.common.openai_client import OpenAI
 from modules.common.utils import read_jsonl, save_json, ProgressLogger
 
@@ -274,8 +276,11 @@ def main():
     
     for attempt in range(args.max_retries + 1):
         model = retry_model if attempt > 0 else args.model
+        # A retry after a rejected reply must reach the provider, not get that reply back from the memo.
+        reuse = llm_cache.fresh() if attempt else nullcontext()
         try:
-            result = call_llm_segment(client, model, pages, prompt)
+            with reuse:
+                result = call_llm_segment(client, model, pages, prompt)
             is_valid, errors = validate_portions(result, frontmatter_pages)
             
             if is_valid:
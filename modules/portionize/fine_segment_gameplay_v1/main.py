@@ -20,6 +20,7 @@ import tempfile
 from itertools import product
 from typing import List, Dict, Optional, Set, Tuple
 
+from modules.common import llm_cache
 from modules.common.utils import read_jsonl, save_json, save_jsonl, ProgressLogger
 
 
@@ -410,8 +411,8 @@ def call_backfill_code(boundaries_path: str, elements_path: str, missing_ids: Li
 
 def call_backfill_llm(boundaries_path: str, elements_path: str, missing_ids: List[str],
                       expected_range: Tuple[int, int], model: str = "gpt-4.1-mini", 
-                      run_id: Optional[str] = None) -> List[Dict]:
-    """Call backfill_missing_sections_llm_v1 (LLM escalation)."""
+                      run_id: Optional[str] = None, fresh: bool = False) -> List[Dict]:
+    """Call backfill_missing_sections_llm_v1 (LLM escalation); `fresh` bypasses LLM reply reuse."""
     if not missing_ids:
         return []
     
@@ -439,7 +440,8 @@ def call_backfill_llm(boundaries_path: str, elements_path: str, missing_ids: Lis
         if run_id:
             cmd.extend(["--run-id", run_id])
         
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd=os.getcwd())
+        env = llm_cache.fresh_env() if fresh else None
+        result = subprocess.run(cmd, capture_output=True, text=True, cwd=os.getcwd(), env=env)
         if result.returncode != 0:
             print(f"[backfill_llm] Error: {result.stderr[:500]}")
             return []
@@ -820,7 +822,8 @@ def main():
                 # Step 3b: LLM escalation (all attempts, with stronger model on retry)
                 if missing_ids:
                     model_to_use = retry_model if attempt > 1 else args.model
-                    llm_backfilled = call_backfill_llm(boundaries_path, elements_path, missing_ids, expected_range, model_to_use, args.run_id)
+                    llm_backfilled = call_backfill_llm(boundaries_path, elements_path, missing_ids, expected_range,
+                                                       model_to_use, args.run_id, fresh=attempt > 1)
                     if llm_backfilled:
                         boundaries.extend(llm_backfilled)
                         save_jsonl(boundaries_path, boundaries)
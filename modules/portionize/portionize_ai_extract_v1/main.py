@@ -1,9 +1,11 @@
 import argparse
 import json
 import os
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from modules.common import llm_cache
 from modules.common.openai_client import OpenAI
 from tqdm import tqdm
 
@@ -413,7 +415,8 @@ def main():
                 for attempt in range(attempts):
                     try:
                         model_used = args.model if attempt == 0 else args.retry_model
-                        gameplay_data = call_extract_llm(client, model_used, raw_text, args.max_tokens)
+                        with llm_cache.fresh() if attempt else nullcontext():
+                            gameplay_data = call_extract_llm(client, model_used, raw_text, args.max_tokens)
                         break
                     except Exception as e:
                         last_err = e
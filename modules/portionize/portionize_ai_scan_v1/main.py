@@ -3,6 +3,7 @@ import json
 import os
 from typing import List, Dict
 
+from modules.common import llm_cache
 from modules.common.openai_client import OpenAI
 from modules.common.utils import read_jsonl, save_jsonl, ensure_dir, ProgressLogger
 from modules.common.macro_section import macro_section_for_page, page_num_from_element_id
@@ -162,7 +163,8 @@ Please identify ALL Fighting Fantasy gameplay section boundaries."""
         print(f"[ai_scan] First 300 chars: {response_text[:300]}")
         # Retry with stronger model; if it fails again, fall back to empty list
         try:
-            response_text = _once(retry_model)
+            with llm_cache.fresh():
+                response_text = _once(retry_model)
             payload = json.loads(response_text)
         except Exception as e2:
             print(f"[ai_scan] Retry failed: {e2}. Proceeding with empty boundaries.")
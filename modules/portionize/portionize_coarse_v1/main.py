@@ -3,9 +3,11 @@ import json
 import os
 from typing import List, Dict
 
+from modules.common import llm_cache
 from modules.common.openai_client import OpenAI
 from tqdm import tqdm
 
+from modules.common.prepared_image import image_data_uri
 from modules.common.utils import read_jsonl, append_jsonl, ensure_dir, ProgressLogger
 from modules.common.macro_section import macro_section_for_page
 from schemas import PortionHypothesis
@@ -37,6 +39,8 @@ def call_llm(client: OpenAI, model: str, batch: List[Dict], priors: List[Dict])
         content.append({"type": "text", "text": f"[PAGE {p['page']}]\n{page_text}"})
         if p.get("image_b64"):
             content.append({"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{p['image_b64']}"}})
+        elif p.get("image") and os.path.exists(p["image"]):
+            content.append({"type": "image_url", "image_url": {"url": image_data_uri(p["image"])}})
     if priors:
         prior_txt = json.dumps(priors, ensure_ascii=False)
         content.append({"type": "text", "text": "Prior locked portions near these pages:\n" + prior_txt})
@@ -84,13 +88,6 @@ def main():
     if not pages:
         raise SystemExit("No pages to process after applying range filter.")
 
-    from base64 import b64encode
-    for p in pages:
-        if "image" in p and p["image"] and os.path.exists(p["image"]):
-            if "image_b64" not in p:
-                with open(p["image"], "rb") as f:
-                    p["image_b64"] = b64encode(f.read()).decode("utf-8")
-
     client = OpenAI()
     logger = ProgressLogger(state_path=args.state_file, progress_path=args.progress_file, run_id=args.run_id)
     out_dir = os.path.dirname(args.out)
@@ -122,7 +119,8 @@ def main():
 
             spans = call_llm(client, args.model, batch, priors)
             if not spans and args.boost_model:
-                spans = call_llm(client, args.boost_model, batch, priors)
+                with llm_cache.fresh():
+                    spans = call_llm(client, args.boost_model, batch, priors)
 
             page_nums = [p["page"] for p in batch]
             for span in spans:
@@ -19,6 +19,61 @@ def clean_lines(text: str):
     return lines
 
 
+def detect_page_headers(p, fuzzy: bool = True, max_per_page: int = 12, coarse_segments=None):
+    """Numeric header hypotheses (portion_hyp_v1 dicts) for one cleaned page."""
+    raw_lines = clean_lines(p.get("clean_text") or p.get("raw_text") or "")
+    candidates = []
+    for i, line in enumerate(raw_lines):
+        trimmed = line.strip()
+        tokens = []
+        for m in NUM_TOKEN_RE.finditer(trimmed):
+            try:
+                sid = int(m.group(1))
+            except Exception:
+                continue
+            if not (1 <= sid <= 400):
+                continue
+            tokens.append((sid, m.start(), m.end()))
+        if not tokens:
+            continue
+
+        for sid, s, e in tokens:
+            at_start = s == len(trimmed) - len(trimmed.lstrip())
+            standalone = len(trimmed) <= 4 or re.fullmatch(r"\d{1,3}", trimmed)
+            confidence = 0.8 if standalone else (0.75 if at_start else 0.65)
+            if not standalone and at_start and fuzzy and re.match(r"^\d{1,3}\D{0,2}", trimmed):
+                confidence = max(confidence, 0.7)
+
+            # We rely on later guards to filter page numbers; keep detection permissive here.
+
+            candidates.append({
+                "sid": sid,
+                "conf": confidence,
+                "page": p["page"],
+                "source": "numeric_header_inline" if not (standalone or at_start) else ("numeric_header_fuzzy" if confidence < 0.75 else "numeric_header"),
+                "notes": None if (standalone or at_start) else "inline_number",
+            })
+
+    candidates.sort(key=lambda c: (-c["conf"], c["sid"]))
+    hypos = []
+    for c in candidates[:max_per_page]:
+        hypos.append(PortionHypothesis(
+            portion_id=str(c["sid"]),
+            page_start=c["page"],
+            page_end=c["page"],
+            title=None,
+            type="section",
+            confidence=c["conf"],
+            notes=c["notes"],
+            source_window=[c["page"]],
+            source_pages=[c["page"]],
+            raw_text=None,
+            macro_section=macro_section_for_page(c["page"], coarse_segments),
+            source=[c["source"]],
+        ).dict())
+    return hypos
+
+
 def main():
     parser = argparse.ArgumentParser(description="Numeric header detector (1-400) over cleaned pages; tolerant of inline/fused numbers.")
     parser.add_argument("--pages", required=True, help="pages_clean.jsonl")
@@ -45,55 +100,8 @@ def main():
 
     hypos = []
     for p in pages:
-        raw_lines = clean_lines(p.get("clean_text") or p.get("raw_text") or "")
-        candidates = []
-        for i, line in enumerate(raw_lines):
-            trimmed = line.strip()
-            tokens = []
-            for m in NUM_TOKEN_RE.finditer(trimmed):
-                try:
-                    sid = int(m.group(1))
-                except Exception:
-                    continue
-                if not (1 <= sid <= 400):
-                    continue
-                tokens.append((sid, m.start(), m.end()))
-            if not tokens:
-                continue
-
-            for sid, s, e in tokens:
-                at_start = s == len(trimmed) - len(trimmed.lstrip())
-                standalone = len(trimmed) <= 4 or re.fullmatch(r"\d{1,3}", trimmed)
-                confidence = 0.8 if standalone else (0.75 if at_start else 0.65)
-                if not standalone and at_start and args.fuzzy and re.match(r"^\d{1,3}\D{0,2}", trimmed):
-                    confidence = max(confidence, 0.7)
-
-                # We rely on later guards to filter page numbers; keep detection permissive here.
-
-                candidates.append({
-                    "sid": sid,
-                    "conf": confidence,
-                    "page": p["page"],
-                    "source": "numeric_header_inline" if not (standalone or at_start) else ("numeric_header_fuzzy" if confidence < 0.75 else "numeric_header"),
-                    "notes": None if (standalone or at_start) else "inline_number",
-                })
-
-        candidates.sort(key=lambda c: (-c["conf"], c["sid"]))
-        for c in candidates[: args.max_per_page]:
-            hypos.append(PortionHypothesis(
-                portion_id=str(c["sid"]),
-                page_start=c["page"],
-                page_end=c["page"],
-                title=None,
-                type="section",
-                confidence=c["conf"],
-                notes=c["notes"],
-                source_window=[c["page"]],
-                source_pages=[c["page"]],
-                raw_text=None,
-                macro_section=macro_section_for_page(c["page"], coarse_segments),
-                source=[c["source"]],
-            ).dict())
+        hypos.extend(detect_page_headers(p, fuzzy=args.fuzzy, max_per_page=args.max_per_page,
+                                         coarse_segments=coarse_segments))
 
     ensure_dir(os.path.dirname(args.out) or ".")
     save_jsonl(args.out, hypos)
@@ -10,8 +10,10 @@ Uses strong constraints to ensure proper ordering and conservatively marks uncer
 import argparse
 import json
 import os
+from contextlib import nullcontext
 from typing import Dict, List, Any
 
+from modules.common import llm_cache
 from modules.common.openai_client import OpenAI
 from modules.common.utils import read_jsonl, save_json, ensure_dir, ProgressLogger
 from schemas import HeaderCandidate, SectionsStructured, ElementCore
@@ -458,7 +460,9 @@ def main():
     model_used = args.model
     while attempt <= args.max_retries and structure is None:
         try:
-            structure = call_structure_llm(client, model_used, prompt, args.max_tokens)
+            # A retry after an unparseable reply must reach the provider, not get that reply back from the memo.
+            with llm_cache.fresh() if attempt else nullcontext():
+                structure = call_structure_llm(client, model_used, prompt, args.max_tokens)
         except Exception as e:
             last_err = e
             attempt += 1
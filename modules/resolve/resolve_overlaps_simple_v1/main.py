@@ -1,14 +1,11 @@
 import argparse
 from typing import List, Dict
 
+from modules.common.spatial_index import IntervalIndex
 from modules.common.utils import read_jsonl, save_jsonl, ProgressLogger
 from schemas import ResolvedPortion
 
 
-def overlaps(a_start, a_end, b_start, b_end):
-    return not (a_end < b_start or b_end < a_start)
-
-
 def main():
     parser = argparse.ArgumentParser(description="Resolve overlapping portion hypotheses by confidence (greedy).")
     parser.add_argument("--input", required=True, help="portion_hyp.jsonl")
@@ -23,19 +20,18 @@ def main():
     hyps.sort(key=lambda h: (-h.get("confidence", 0), -(h.get("page_end", 0) - h.get("page_start", 0)), h.get("page_start", 0)))
 
     accepted: List[Dict] = []
+    accepted_spans = IntervalIndex()
     logger = ProgressLogger(state_path=args.state_file, progress_path=args.progress_file, run_id=args.run_id)
 
     for idx, h in enumerate(hyps, start=1):
         ps, pe = h.get("page_start"), h.get("page_end")
-        if ps is None or pe is None:
-            continue
-        conflict = any(overlaps(ps, pe, a["page_start"], a["page_end"]) for a in accepted)
-        if conflict:
-            continue
-        accepted.append(h)
-        logger.log("resolve", "running", current=idx, total=len(hyps),
-                   message=f"accept {ps}-{pe}", artifact=args.out,
-                   module_id="resolve_overlaps_simple_v1", schema_version="resolved_portion_v1")
+        if ps is not None and pe is not None and not accepted_spans.any_overlap(ps, pe):
+            accepted.append(h)
+            accepted_spans.add(ps, pe, h)
+        if idx % 50 == 0:
+            logger.log("resolve", "running", current=idx, total=len(hyps),
+                       message=f"accepted {len(accepted)} of {idx}", artifact=args.out,
+                       module_id="resolve_overlaps_simple_v1", schema_version="resolved_portion_v1")
 
     resolved = []
     for h in accepted:
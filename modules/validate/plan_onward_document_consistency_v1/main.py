@@ -28,6 +28,7 @@ from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from bs4 import BeautifulSoup
 
+from modules.common.genealogy_table_model import SUBGROUP_CLASS, load_sidecar, page_tables_for_row
 from modules.common.openai_client import OpenAI
 from modules.common.run_registry import resolve_output_root
 from modules.common.utils import ProgressLogger, ensure_dir, read_jsonl, save_json, save_jsonl
@@ -243,8 +244,7 @@ def _load_page_rows(path: str) -> Dict[int, Dict[str, Any]]:
 
 
 def _page_profile(page_row: Dict[str, Any]) -> Dict[str, Any]:
-    html = page_row.get("html") or page_row.get("raw_html") or ""
-    soup = BeautifulSoup(html, "html.parser")
+    page = page_tables_for_row(page_row)
     metrics = analyze_page_row(page_row)
 
     signatures = Counter()
@@ -253,30 +253,27 @@ def _page_profile(page_row: Dict[str, Any]) -> Dict[str, Any]:
     left_column_rows: List[str] = []
     suspicious_rows: List[Dict[str, Any]] = []
 
-    for heading in soup.find_all(["h2", "h3"]):
-        text = _normalize_text(heading.get_text(" ", strip=True))
+    for block in page.blocks:
+        if block.tag not in {"h2", "h3"}:
+            continue
+        text = _normalize_text(block.text)
         if _is_heading_like_text(text):
             external_headings.append(text)
 
-    for table in soup.find_all("table"):
-        signature = _table_header_signature(table)
+    for table in page.tables:
+        signature = table.signature()
         if signature:
             signatures["|".join(signature)] += 1
-        for row in table.find_all("tr"):
-            cells = _row_cells(row)
+        for row in table.rows:
+            cells = [_normalize_text(text) for text in row.texts()]
             if not cells:
                 continue
-            if "genealogy-subgroup-heading" in (row.get("class") or []):
+            if SUBGROUP_CLASS in row.classes:
                 text = cells[0]
                 if _heading_fragment_count(text) >= 2:
                     concatenated_subgroups.append(text)
             elif len(cells) == 1 and _is_heading_like_text(cells[0]):
-                colspan = row.find(["th", "td"]).get("colspan") if row.find(["th", "td"]) else None
-                try:
-                    numeric_colspan = int(colspan) if colspan is not None else 1
-                except (TypeError, ValueError):
-                    numeric_colspan = 1
-                if numeric_colspan <= 2:
+                if row.cells[0].colspan <= 2:
                     left_column_rows.append(cells[0])
 
             reason = _row_semantic_note_reason(cells)
@@ -1156,6 +1153,7 @@ def main() -> None:
 
     manifest_rows = list(read_jsonl(args.chapters))
     page_rows_by_number = _load_page_rows(args.pages)
+    load_sidecar(args.pages)
     dossier = build_document_dossier(
         manifest_rows,
         page_rows_by_number,
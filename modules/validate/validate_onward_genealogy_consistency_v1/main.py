@@ -16,6 +16,7 @@ from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from bs4 import BeautifulSoup
 
+from modules.common.genealogy_table_model import SUBGROUP_CLASS, load_sidecar, page_tables_for_row, spaced
 from modules.common.utils import ProgressLogger, ensure_dir, read_jsonl, save_json, save_jsonl
 
 
@@ -202,17 +203,18 @@ def analyze_chapter_row(manifest_row: Dict[str, Any], flag_threshold: int) -> Op
 
 
 def analyze_page_row(page_row: Dict[str, Any]) -> PageMetrics:
-    html = page_row.get("html") or page_row.get("raw_html") or ""
-    soup = BeautifulSoup(html, "html.parser")
-    table_count = len(soup.find_all("table"))
-    subgroup_row_count = len(soup.select("tr.genealogy-subgroup-heading"))
+    page = page_tables_for_row(page_row)
+    table_count = len(page.tables)
+    subgroup_row_count = sum(
+        1 for table in page.tables for row in table.rows if SUBGROUP_CLASS in row.classes
+    )
     external_family_heading_count = sum(
-        1 for heading in soup.find_all(["h2", "h3"]) if _heading_has_genealogy_drift(heading.get_text("\n", strip=True))
+        1 for block in page.blocks if block.tag in {"h2", "h3"} and _heading_has_genealogy_drift(block.text)
     )
     residual_boygirl_header_count = sum(
         1
-        for cell in soup.find_all("th")
-        if "BOY/GIRL" in cell.get_text(" ", strip=True).upper()
+        for cell in page.cells()
+        if cell.header and "BOY/GIRL" in spaced(cell.text).upper()
     )
 
     reasons: List[str] = []
@@ -451,6 +453,7 @@ def main() -> None:
 
     manifest_rows = list(read_jsonl(args.chapters))
     page_rows_by_number = _load_page_rows(args.pages)
+    load_sidecar(args.pages)
     primary_report, detail_report = build_report(
         manifest_rows,
         page_rows_by_number,
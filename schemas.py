@@ -227,6 +227,7 @@ class PageHtml(BaseModel):
     printed_page_number_text: Optional[str] = None
     printed_page_number_inferred: Optional[bool] = None
     images: Optional[List[Dict[str, Any]]] = None
+    packed_tile: Optional[Dict[str, Any]] = None  # set when OCRed as part of a packed multi-page tile
 
 
 class HtmlBlock(BaseModel):
@@ -436,6 +437,8 @@ class DocWebBundleEntry(BaseModel):
     printed_pages: List[int] = Field(default_factory=list)
     printed_page_start: Optional[int] = None
     printed_page_end: Optional[int] = None
+    input_hash: Optional[str] = None  # sha256 of the inputs the entry file was rendered from
+    block_count: Optional[int] = None  # provenance blocks the entry has in provenance/blocks.jsonl
 
     @field_validator("entry_id")
     @classmethod
@@ -776,6 +779,8 @@ class LLMCallUsage(BaseModel):
     prompt_tokens: int
     completion_tokens: int
     cached: bool = False
+    deduped: bool = False  # reused from an identical earlier request in the same run
+    coalesced: bool = False  # shared the reply of an identical request already in flight
     request_ms: Optional[float] = None
     request_id: Optional[str] = None
     cost: Optional[float] = None
@@ -1185,11 +1190,13 @@ class OptionsConfig(BaseModel):
     no_validate: bool = False
     allow_run_id_reuse: bool = False
     dump_plan: bool = False
+    blob_store: bool = False
 
 
 class InstrumentationConfig(BaseModel):
     enabled: bool = False
     price_table: Optional[str] = None
+    profile_stages: Optional[str] = None  # "all" or comma-separated stage ids
 
 
 class RunConfig(BaseModel):
@@ -1207,3 +1214,39 @@ class RunConfig(BaseModel):
     execution: ExecutionConfig = Field(default_factory=ExecutionConfig)
     options: OptionsConfig = Field(default_factory=OptionsConfig)
     instrumentation: InstrumentationConfig = Field(default_factory=InstrumentationConfig)
+
+
+class ProviderLimit(BaseModel):
+    concurrency: Optional[int] = None  # requests in flight across the whole batch
+    rpm: Optional[float] = None  # request starts per minute across the whole batch
+
+
+class BatchRunEntry(BaseModel):
+    config: str  # path to a RunConfig YAML
+    priority: int = 0  # higher starts first
+    extra_args: List[str] = Field(default_factory=list)  # appended to the driver command
+
+
+class BatchConfig(BaseModel):
+    """
+    Several RunConfigs executed concurrently by `tools/run_manager.py execute-batch`,
+    sharing provider limits and the LLM response cache.
+    """
+    name: str
+    max_parallel_runs: int = 2
+    provider_limits: Dict[str, ProviderLimit] = Field(default_factory=dict)
+    response_cache: Optional[str] = "output/cache/llm_responses"  # null or "off" disables
+    output_dir: Optional[str] = None  # default: output/batches/<name>
+    runs: List[BatchRunEntry]
+
+    @field_validator("runs", mode="before")
+    def runs_from_paths(cls, v):
+        if isinstance(v, list):
+            return [{"config": item} if isinstance(item, str) else item for item in v]
+        return v
+
+    @field_validator("max_parallel_runs")
+    def positive_parallel_runs(cls, v):
+        if v < 1:
+            raise ValueError("max_parallel_runs must be at least 1")
+        return v
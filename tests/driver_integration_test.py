@@ -288,5 +288,42 @@ class DriverIntegrationTests(unittest.TestCase):
             self.assertEqual(first_mtime, second_mtime)
 
 
+    def test_rerun_of_completed_stage_bypasses_llm_memo(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            # A probe module that records whether the driver asked it to skip the LLM run memo.
+            probe_dir = tmp_path / "registry" / "env_probe_v1"
+            probe_dir.mkdir(parents=True)
+            probe_script = probe_dir / "main.py"
+            probe_script.write_text(
+                "import argparse, json, os\n"
+                "p = argparse.ArgumentParser(); p.add_argument('--outdir')\n"
+                "a, _ = p.parse_known_args()\n"
+                "open(os.environ['PROBE_LOG'], 'a').write(json.dumps(os.environ.get('CODEX_LLM_FRESH')) + '\\n')\n"
+                "open(os.path.join(a.outdir, 'probe.jsonl'), 'w').write(json.dumps({'ok': 1}) + '\\n')\n",
+                encoding="utf-8",
+            )
+            (probe_dir / "module.yaml").write_text(
+                f"module_id: env_probe_v1\nstage: extract\nentrypoint: {probe_script}\n", encoding="utf-8")
+            (tmp_path / "sample.md").write_text("Probe.", encoding="utf-8")
+            recipe_path = tmp_path / "recipe.yaml"
+            recipe_path.write_text(json.dumps({
+                "run_id": "memo-probe",
+                "input": {"text_glob": str(tmp_path / "*.md")},
+                "output_dir": str(tmp_path / "run"),
+                "stages": [{"id": "probe", "stage": "extract", "module": "env_probe_v1", "out": "probe.jsonl"}],
+            }), encoding="utf-8")
+
+            log_path = tmp_path / "probe.log"
+            base_cmd = [sys.executable, "driver.py", "--recipe", str(recipe_path), "--registry", str(tmp_path / "registry")]
+            env = dict(os.environ, PROBE_LOG=str(log_path))
+            env.pop("CODEX_LLM_FRESH", None)
+            repo_root = str(Path(__file__).resolve().parents[1])
+            for extra in ([], ["--allow-run-id-reuse", "--skip-done"], ["--allow-run-id-reuse"]):
+                result = subprocess.run(base_cmd + extra, cwd=repo_root, env=env)
+                self.assertEqual(result.returncode, 0)
+            # First run uses the memo; the --skip-done run does not run the stage; the rerun is fresh.
+            self.assertEqual([json.loads(line) for line in log_path.read_text().splitlines()], [None, "1"])
+
 if __name__ == "__main__":
     unittest.main()
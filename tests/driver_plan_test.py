@@ -156,10 +156,10 @@ class DriverPlanTests(unittest.TestCase):
             with open(path, "w", encoding="utf-8") as f:
                 f.write("old\n")
             self.assertTrue(os.path.exists(path))
-            cleanup_artifact(path, force=True)
+            self.assertTrue(cleanup_artifact(path, force=True))
             self.assertFalse(os.path.exists(path))
             # no-op when file missing
-            cleanup_artifact(path, force=True)
+            self.assertFalse(cleanup_artifact(path, force=True))
 
     def test_build_command_injects_state_and_progress_flags(self):
         stage_conf = {
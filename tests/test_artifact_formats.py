@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from driver import build_plan, copy_key_artifact_to_root
+from modules.common.utils import (
+    append_jsonl,
+    artifact_base_name,
+    artifact_format,
+    read_jsonl,
+    save_jsonl,
+    with_artifact_format,
+    write_artifact_preview,
+)
+from validate_artifact import _iter_artifact_rows
+
+ROWS = [
+    {"page": 1, "html": "<p>a</p>", "raw_html": "<p>a</p>", "lines": [{"text": "a", "bbox": [0, 0, 1, 1]}]},
+    {"page": 2, "html": "<p>b</p>", "raw_html": None, "meta": {"blank": False}},
+]
+
+
+@pytest.mark.parametrize("name", ["rows.jsonl", "rows.jsonl.zst", "rows.parquet"])
+def test_roundtrip_and_projection(tmp_path, name):
+    if name.endswith(".zst"):
+        pytest.importorskip("zstandard")
+    if name.endswith(".parquet"):
+        pytest.importorskip("pyarrow")
+    path = str(tmp_path / name)
+    save_jsonl(path, ROWS)
+    assert list(read_jsonl(path)) == ROWS
+    assert list(read_jsonl(path, fields=["page", "meta"])) == [{"page": 1}, {"page": 2, "meta": {"blank": False}}]
+    assert list(read_jsonl(path, fields=())) == [{}, {}]
+    assert list(read_jsonl(path, fields=["missing"])) == [{}, {}]
+    assert list(_iter_artifact_rows(path)) == ROWS
+
+
+def test_zstd_append_spans_frames(tmp_path):
+    pytest.importorskip("zstandard")
+    path = str(tmp_path / "events.jsonl.zst")
+    save_jsonl(path, ROWS[:1])
+    append_jsonl(path, ROWS[1])
+    append_jsonl(path, {"page": 3})
+    assert [r["page"] for r in read_jsonl(path)] == [1, 2, 3]
+
+
+def test_parquet_rejects_append(tmp_path):
+    with pytest.raises(ValueError):
+        append_jsonl(str(tmp_path / "rows.parquet"), {"page": 1})
+
+
+def test_format_names():
+    assert artifact_format("a/pages_html.jsonl") == "jsonl"
+    assert artifact_format("a/pages_html.jsonl.zst") == "jsonl.zst"
+    assert artifact_format("a/pages_html.parquet") == "parquet"
+    assert artifact_base_name("x/pagelines_final.jsonl.zst") == "pagelines_final.jsonl"
+    assert artifact_base_name("x/elements_core.parquet") == "elements_core.jsonl"
+    assert with_artifact_format("pages_html.jsonl", "jsonl.zst") == "pages_html.jsonl.zst"
+    assert with_artifact_format("gamebook.json", "parquet") == "gamebook.json"
+    with pytest.raises(ValueError):
+        with_artifact_format("pages_html.jsonl", "csv")
+
+
+def test_build_plan_applies_recipe_and_stage_artifact_format():
+    registry = {
+        "m_extract": {"module_id": "m_extract", "stage": "extract", "entrypoint": "extract.py"},
+        "m_clean": {"module_id": "m_clean", "stage": "clean", "entrypoint": "clean.py"},
+    }
+    recipe = {
+        "artifact_format": "jsonl.zst",
+        "stages": [
+            {"id": "extract", "stage": "extract", "module": "m_extract", "out": "pages_html.jsonl"},
+            {"id": "clean", "stage": "clean", "module": "m_clean", "needs": ["extract"], "artifact_format": "jsonl"},
+        ],
+    }
+    plan = build_plan(recipe, registry)
+    assert plan["nodes"]["extract"]["artifact_name"] == "pages_html.jsonl.zst"
+    assert plan["nodes"]["clean"]["artifact_name"] == "pages_clean.jsonl"
+
+    recipe["artifact_format"] = "csv"
+    with pytest.raises(SystemExit):
+        build_plan(recipe, registry)
+
+
+def test_preview_and_copy_to_root_for_compressed_key_artifact(tmp_path):
+    pytest.importorskip("zstandard")
+    run_dir = tmp_path / "run"
+    module_dir = run_dir / "05_reduce_ir_v1"
+    module_dir.mkdir(parents=True)
+    path = str(module_dir / "elements_core.jsonl.zst")
+    save_jsonl(path, ROWS)
+
+    preview = write_artifact_preview(path, limit=1)
+    with open(preview, encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == ROWS[:1]
+    assert write_artifact_preview(str(tmp_path / "plain.jsonl")) is None
+
+    copy_key_artifact_to_root(path, str(run_dir), "elements_core.jsonl.zst")
+    assert list(read_jsonl(str(run_dir / "elements_core.jsonl.zst"))) == ROWS
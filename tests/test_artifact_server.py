@@ -0,0 +1,125 @@
+import http.client
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from modules.common.artifact_api import ArtifactReader, RunIndex, tail_jsonl
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tools"))
+
+import artifact_server  # noqa: E402
+
+
+def _write_jsonl(path: Path, rows, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+
+def test_read_rows_pages_and_projects(tmp_path):
+    path = tmp_path / "pages_html.jsonl"
+    _write_jsonl(path, [{"page_number": n, "html": "x" * 50, "confidence": n / 10} for n in range(1, 8)])
+    reader = ArtifactReader()
+
+    page = reader.read_rows(str(path), offset=2, limit=3, fields=["page_number"])
+    assert page["rows"] == [{"page_number": 3}, {"page_number": 4}, {"page_number": 5}]
+    assert (page["total"], page["next_offset"]) == (7, 5)
+    assert reader.read_rows(str(path), offset=5, limit=3)["next_offset"] is None
+
+    # Appended rows extend the cached index; a trailing partial line is not served yet.
+    _write_jsonl(path, [{"page_number": 8}], mode="a")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"page_number": 9')
+    page = reader.read_rows(str(path), offset=6, limit=10, fields=["page_number"])
+    assert page["rows"] == [{"page_number": 7}, {"page_number": 8}]
+    assert page["total"] == 8
+
+
+def test_tail_jsonl_resumes_from_offset(tmp_path):
+    path = tmp_path / "pipeline_events.jsonl"
+    _write_jsonl(path, [{"i": 1}, {"i": 2}])
+    rows, offset = tail_jsonl(str(path))
+    assert rows == [{"i": 1}, {"i": 2}]
+    _write_jsonl(path, [{"i": 3}], mode="a")
+    assert tail_jsonl(str(path), offset) == ([{"i": 3}], path.stat().st_size)
+    # Rewritten (shorter) file is read from the start.
+    _write_jsonl(path, [{"i": 9}])
+    assert tail_jsonl(str(path), offset)[0] == [{"i": 9}]
+
+
+def test_run_index_merges_registry_incrementally(tmp_path):
+    _write_jsonl(tmp_path / "run_manifest.jsonl", [
+        {"run_id": "a", "path": "runs/a", "recipe": "recipe-ff"},
+        {"run_id": "b", "path": "runs/b", "recipe": "recipe-onward"},
+    ])
+    _write_jsonl(tmp_path / "run_health.jsonl", [{"run_id": "a", "document": "Deathtrap"}])
+    index = RunIndex(str(tmp_path))
+    assert [r["run_id"] for r in index.query()["runs"]] == ["b", "a"]
+    assert [r["run_id"] for r in index.query(document="Deathtrap")["runs"]] == ["a"]
+
+    _write_jsonl(tmp_path / "run_assessments.jsonl", [{"run_id": "b", "status": "known_good"}], mode="a")
+    _write_jsonl(tmp_path / "run_manifest.jsonl", [{"run_id": "c", "path": "runs/c"}], mode="a")
+    result = index.query(status="known_good")
+    assert [r["run_id"] for r in result["runs"]] == ["b"]
+    assert index.query(limit=1)["next_offset"] == 1
+    assert index.get("c")["path"] == "runs/c"
+
+
+@pytest.fixture
+def server(tmp_path):
+    output_root = tmp_path / "output"
+    run_dir = output_root / "runs" / "r1"
+    run_dir.mkdir(parents=True)
+    _write_jsonl(output_root / "run_manifest.jsonl", [{"run_id": "r1", "path": "runs/r1"}])
+    _write_jsonl(run_dir / "pipeline_events.jsonl", [{"stage": "extract", "status": "running"}])
+    _write_jsonl(run_dir / "pages.jsonl", [{"page": n, "text": str(n)} for n in range(5)])
+    srv = artifact_server.make_server("127.0.0.1", 0, str(tmp_path), str(output_root))
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv, run_dir
+    srv.shutdown()
+    srv.server_close()
+
+
+def _get(srv, path, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", srv.server_address[1], timeout=5)
+    conn.request("GET", path, headers=headers or {})
+    return conn, conn.getresponse()
+
+
+def test_server_paginates_artifacts_and_streams_events(server):
+    srv, run_dir = server
+    _, res = _get(srv, "/api/artifact?path=output/runs/r1/pages.jsonl&offset=1&limit=2&fields=page")
+    assert res.status == 200
+    assert json.loads(res.read()) == {
+        "path": "output/runs/r1/pages.jsonl", "offset": 1, "limit": 2, "total": 5,
+        "rows": [{"page": 1}, {"page": 2}], "next_offset": 3,
+    }
+    _, res = _get(srv, "/api/artifact?path=../outside.jsonl")
+    assert res.status == 400
+
+    _, res = _get(srv, "/api/runs")
+    assert [r["run_id"] for r in json.loads(res.read())["runs"]] == ["r1"]
+
+    _, res = _get(srv, "/api/runs/r1/events?follow=0")
+    assert res.getheader("Content-Type") == "text/event-stream"
+    body = res.read().decode("utf-8")
+    size = (run_dir / "pipeline_events.jsonl").stat().st_size
+    assert body.startswith(f"id: {size}\nevent: events\n")
+
+    # Resuming from the last id only sends newly appended events.
+    _write_jsonl(run_dir / "pipeline_events.jsonl", [{"stage": "extract", "status": "done"}], mode="a")
+    _, res = _get(srv, "/api/runs/r1/events?follow=0", headers={"Last-Event-ID": str(size)})
+    data = [line for line in res.read().decode("utf-8").splitlines() if line.startswith("data: ")]
+    assert [json.loads(line[6:]) for line in data] == [[{"stage": "extract", "status": "done"}]]
+
+
+def test_server_serves_static_files(server):
+    srv, _ = server
+    _, res = _get(srv, "/output/runs/r1/pages.jsonl")
+    assert res.status == 200
+    assert len(res.read().splitlines()) == 5
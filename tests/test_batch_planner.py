@@ -0,0 +1,91 @@
+import json
+import threading
+from types import SimpleNamespace
+
+from modules.common.batch_planner import BatchPlanner, TruncatedOutput, model_token_limits, run_batches
+from modules.portionize.classify_headers_v1.main import call_classify_llm, plan_classify_batches
+
+
+def test_plan_respects_prompt_output_and_item_caps():
+    planner = BatchPlanner(model="gpt-4.1-nano", output_tokens_per_item=50, max_output_tokens=1100, max_items=30)
+    # Reply budget allows (1100 - 100) // 50 = 20 items per batch.
+    batches = planner.plan(list(range(45)), lambda _: 1)
+    assert [len(b) for b in batches] == [20, 20, 5]
+    assert planner.output_tokens(20) == 1100 and planner.output_tokens(1) == 200
+
+    # A small context forces prompt-sized batches, and order is kept.
+    small = BatchPlanner(model="unknown", context_limit=4000, context_fill=1.0, max_output_tokens=1000)
+    batches = small.plan(list(range(10)), lambda _: 1000)
+    assert [len(b) for b in batches] == [3, 3, 3, 1]
+    assert sum(batches, []) == list(range(10))
+    assert model_token_limits("gpt-4.1-mini") == model_token_limits("gpt-4.1")
+
+
+def test_run_batches_resplits_truncated_batches_and_keeps_order():
+    calls = []
+    lock = threading.Lock()
+
+    def call(batch):
+        with lock:
+            calls.append(len(batch))
+        if len(batch) > 2:
+            raise TruncatedOutput("too long")
+        if batch == [7]:
+            raise RuntimeError("boom")
+        return [x * 10 for x in batch]
+
+    results = run_batches(
+        [[1, 2, 3, 4, 5], [6, 7]],
+        call,
+        fallback=lambda batch, exc: [-x for x in batch],
+        concurrency=2,
+    )
+    assert results == [[10, 20, 30, 40, 50], [60, 70]]
+    assert sorted(calls) == [1, 2, 2, 2, 3, 5]  # 5 -> 2 + 3 -> 2 + (1 + 2)
+
+    results = run_batches([[6], [7]], call, fallback=lambda batch, exc: [-x for x in batch])
+    assert results == [[60], [-7]]
+
+
+class _FakeClient:
+    """Chat client that truncates replies for batches larger than `max_ok` elements."""
+
+    def __init__(self, max_ok):
+        self.max_ok = max_ok
+        self.sizes = []
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        prompt = kwargs["messages"][1]["content"]
+        elements = json.loads(prompt.rsplit("total):\n", 1)[1])
+        self.sizes.append(len(elements))
+        rows = [
+            {"seq": e["seq"], "macro_header": "none", "game_section_header": e["text"].isdigit(),
+             "claimed_section_number": int(e["text"]) if e["text"].isdigit() else None, "confidence": 0.9}
+            for e in elements
+        ]
+        content = json.dumps({"elements": rows})
+        finish = "stop"
+        if len(elements) > self.max_ok:
+            content, finish = content[: len(content) // 2], "length"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish)])
+
+
+def test_classify_headers_resplits_instead_of_empty_results():
+    elements = [{"seq": i, "page": 1, "text": str(i) if i % 3 == 0 else f"line {i}"} for i in range(12)]
+    planner, batches = plan_classify_batches(elements, "gpt-4.1-nano", batch_size=75, max_tokens=4000)
+    assert batches == [elements]
+
+    client = _FakeClient(max_ok=4)
+    results = run_batches(
+        batches,
+        lambda batch: call_classify_llm(client, "gpt-4.1-nano", batch, {
+            "expected_macro_sections": ["cover", "game_sections"],
+            "game_section_hint": {"numeric_range": [1, 400]},
+        }, planner.output_tokens(len(batch))),
+        fallback=lambda batch, exc: [],
+    )
+    rows = results[0]
+    assert [r["seq"] for r in rows] == list(range(12))
+    assert [r["claimed_section_number"] for r in rows if r["game_section_header"]] == [0, 3, 6, 9]
+    assert client.sizes[0] == 12 and max(client.sizes[1:]) <= 6
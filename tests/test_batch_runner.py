@@ -0,0 +1,170 @@
+import json
+import os
+import sys
+import threading
+import time
+
+import yaml
+
+from modules.common import batch_runner, llm_cache, provider_quota
+from modules.common.openai_client import OpenAI
+from modules.common.utils import read_jsonl
+from schemas import BatchConfig
+
+FAKE_DRIVER = """
+import json, os, sys, time
+run_dir = sys.argv[1]
+os.makedirs(run_dir, exist_ok=True)
+time.sleep(0.2)
+calls = [{"provider": "openai", "cached": False, "prompt_tokens": 10, "completion_tokens": 5},
+         {"provider": "openai", "cached": True, "prompt_tokens": 10, "completion_tokens": 5}]
+json.dump({"recipe_path": "r.yaml", "totals": {"wall_seconds": 0.2, "cost": 0.5},
+           "stages": [{"id": "ocr", "status": "done", "llm_calls": calls}],
+           "env_cache": os.environ.get("CODEX_LLM_CACHE_DIR")}, open(os.path.join(run_dir, "instrumentation.json"), "w"))
+sys.exit(int(os.environ.get("FAIL_" + os.path.basename(run_dir), "0")))
+"""
+
+
+def _write_config(tmp_path, name, recipe="r.yaml"):
+    run_dir = tmp_path / "runs" / name
+    run_dir.mkdir(parents=True)
+    path = run_dir / "config.yaml"
+    path.write_text(yaml.safe_dump({"run_id": name, "recipe": recipe, "output_dir": str(run_dir)}), encoding="utf-8")
+    return str(path)
+
+
+def test_plan_batch_orders_by_priority_then_longest(tmp_path):
+    configs = [_write_config(tmp_path, n, recipe=f"{n}.yaml") for n in ("short", "long", "new", "urgent")]
+    history = [
+        {"recipe_path": "configs/recipes/short.yaml", "totals": {"wall_seconds": 60}},
+        {"recipe_path": "configs/recipes/long.yaml", "totals": {"wall_seconds": 3000}},
+        {"recipe_path": "configs/recipes/long.yaml", "totals": {"wall_seconds": 4000}},
+        {"recipe_path": "configs/recipes/urgent.yaml", "totals": {"wall_seconds": 10}},
+    ]
+    batch = BatchConfig(name="b", runs=configs[:3] + [{"config": configs[3], "priority": 5}])
+    runs = batch_runner.plan_batch(batch, history=history)
+    assert [r["run_id"] for r in runs] == ["urgent", "new", "long", "short"]
+    assert runs[2]["estimate_seconds"] == 3500
+
+
+def test_batch_env_shares_limits_and_cache(tmp_path):
+    batch = BatchConfig(name="b", runs=[], provider_limits={"openai": {"concurrency": 4}}, response_cache=str(tmp_path / "c"))
+    env = batch_runner.batch_env(batch, str(tmp_path), base_env={})
+    assert json.loads(env[provider_quota.LIMITS_ENV]) == {"openai": {"concurrency": 4}}
+    assert env[provider_quota.QUOTA_DIR_ENV] == os.path.join(str(tmp_path), "provider_quota")
+    assert env[llm_cache.CACHE_DIR_ENV] == str(tmp_path / "c")
+    off = BatchConfig(name="b", runs=[], response_cache="off")
+    assert llm_cache.CACHE_DIR_ENV not in batch_runner.batch_env(off, str(tmp_path), base_env={})
+
+
+def test_run_batch_runs_concurrently_and_reports(tmp_path, monkeypatch):
+    script = tmp_path / "fake_driver.py"
+    script.write_text(FAKE_DRIVER, encoding="utf-8")
+    configs = [_write_config(tmp_path, n) for n in ("a", "b", "c")]
+    monkeypatch.setattr(batch_runner, "driver_command", lambda run: [sys.executable, str(script), run["run_dir"]])
+    batch = BatchConfig(name="b", runs=configs, max_parallel_runs=3, output_dir=str(tmp_path / "batch"),
+                        response_cache=str(tmp_path / "cache"))
+    runs = batch_runner.plan_batch(batch, history=[])
+    report = batch_runner.run_batch(batch, runs, base_env=dict(os.environ, FAIL_c="2"), poll_seconds=0.05)
+    assert report["runs_done"] == 2 and report["runs_failed"] == 1
+    assert report["llm_totals"]["calls"] == 6 and report["llm_totals"]["cached_calls"] == 3
+    assert report["llm_totals"]["cost"] == 1.5
+    assert report["cache_hit_rate"] == 0.5
+    # All three ran at the same time, so the batch took about as long as one run.
+    assert report["wall_seconds"] < report["run_seconds_total"]
+    assert os.path.exists(tmp_path / "batch" / batch_runner.BATCH_REPORT_MD)
+    instr = json.load(open(tmp_path / "runs" / "a" / "instrumentation.json"))
+    assert instr["env_cache"] == str(tmp_path / "cache")
+
+
+def test_provider_quota_caps_concurrency_across_holders(tmp_path, monkeypatch):
+    monkeypatch.setenv(provider_quota.LIMITS_ENV, json.dumps({"openai": {"concurrency": 2}}))
+    monkeypatch.setenv(provider_quota.QUOTA_DIR_ENV, str(tmp_path))
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def worker():
+        with provider_quota.acquire("openai"):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] == 2
+    # Providers without limits are not throttled.
+    with provider_quota.acquire("google"):
+        pass
+
+
+def test_provider_quota_spaces_requests_by_rpm(tmp_path, monkeypatch):
+    monkeypatch.setenv(provider_quota.LIMITS_ENV, json.dumps({"openai": {"rpm": 600}}))
+    monkeypatch.setenv(provider_quota.QUOTA_DIR_ENV, str(tmp_path))
+    start = time.time()
+    for _ in range(3):
+        with provider_quota.acquire("openai"):
+            pass
+    assert time.time() - start >= 0.19
+
+
+class _FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        from openai.types.chat import ChatCompletion
+
+        self.calls += 1
+        return ChatCompletion.model_validate({
+            "id": f"resp-{self.calls}", "object": "chat.completion", "created": 0, "model": kwargs["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "hello"}}],
+            "usage": {"prompt_tokens": 7, "completion_tokens": 3, "total_tokens": 10},
+        })
+
+
+def test_openai_client_serves_repeat_requests_from_shared_cache(tmp_path, monkeypatch):
+    sink = tmp_path / "sink.jsonl"
+    monkeypatch.setenv("INSTRUMENT_SINK", str(sink))
+    monkeypatch.setenv(llm_cache.CACHE_DIR_ENV, str(tmp_path / "cache"))
+    fake = _FakeCompletions()
+
+    def make_client():
+        client = OpenAI(api_key="test")
+        client.chat.completions._client = type("C", (), {"chat": type("Ch", (), {"completions": fake})()})()
+        return client
+
+    request = {"model": "gpt-test", "messages": [{"role": "user", "content": "hi"}]}
+    first = make_client().chat.completions.create(**request)
+    second = make_client().chat.completions.create(**request)
+    make_client().chat.completions.create(**request, temperature=0.7)
+    assert fake.calls == 2
+    assert second.choices[0].message.content == first.choices[0].message.content == "hello"
+    events = list(read_jsonl(str(sink)))
+    assert [e["cached"] for e in events] == [False, True, False]
+    assert events[1]["cost"] == 0.0 and events[1]["prompt_tokens"] == 7
+
+
+def test_plan_batch_prefers_cost_model_forecast(tmp_path):
+    configs = []
+    for name, pages in (("small", 2), ("big", 20)):
+        input_dir = tmp_path / f"in-{name}"
+        input_dir.mkdir()
+        for n in range(pages):
+            (input_dir / f"p{n}.md").write_text("text", encoding="utf-8")
+        recipe = tmp_path / f"{name}.yaml"
+        recipe.write_text(yaml.safe_dump({
+            "input": {"text_glob": str(input_dir / "*.md")},
+            "stages": [{"id": "extract_text", "stage": "extract", "module": "extract_text_v1"}],
+        }), encoding="utf-8")
+        configs.append(_write_config(tmp_path, name, recipe=str(recipe)))
+    history = [{"units": {"pages": 10}, "stages": [
+        {"id": "extract_text", "module_id": "extract_text_v1", "status": "done", "wall_seconds": 5.0}]}]
+    runs = batch_runner.plan_batch(BatchConfig(name="b", runs=configs), history=history)
+    assert [(r["run_id"], r["estimate_seconds"], r["estimate_source"]) for r in runs] == [
+        ("big", 10.0, "forecast"), ("small", 1.0, "forecast")]
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+from driver import copy_key_artifact_to_root
+from modules.common import blob_store
+from modules.common.run_registry import record_run_assessment
+
+
+def _make_run(output_root: Path, run_id: str, payload: bytes) -> Path:
+    images = output_root / "runs" / run_id / "01_extract_pdf_images_fast_v1" / "images"
+    images.mkdir(parents=True)
+    (images / "page-001.png").write_bytes(payload)
+    (images / "page-002.png").write_bytes(payload + b"-2")
+    (images.parent / "pages.jsonl").write_text('{"page": 1}\n', encoding="utf-8")
+    return images.parent
+
+
+def test_dedupe_tree_shares_identical_rasters_across_runs(tmp_path):
+    output_root = tmp_path / "output"
+    run_a = _make_run(output_root, "run-a", b"raster")
+    run_b = _make_run(output_root, "run-b", b"raster")
+
+    first = blob_store.dedupe_tree(str(run_a), str(output_root), run_id="run-a", mode="hardlink")
+    second = blob_store.dedupe_tree(str(run_b), str(output_root), run_id="run-b", mode="hardlink")
+
+    assert first["files"] == 2 and first["saved_bytes"] == 0
+    assert second["files"] == 2 and second["saved_bytes"] == len(b"raster") + len(b"raster-2")
+    a_page = run_a / "images" / "page-001.png"
+    b_page = run_b / "images" / "page-001.png"
+    assert os.stat(a_page).st_ino == os.stat(b_page).st_ino
+    assert b_page.read_bytes() == b"raster"
+    # Non-image artifacts are left alone by default.
+    assert os.stat(run_a / "pages.jsonl").st_nlink == 1
+
+    digest = blob_store.file_digest(str(a_page))
+    assert Path(blob_store.blob_path(str(output_root), digest)).exists()
+
+
+def test_detach_tree_protects_blobs_from_in_place_rewrites(tmp_path):
+    output_root = tmp_path / "output"
+    run_a = _make_run(output_root, "run-a", b"raster")
+    blob_store.dedupe_tree(str(run_a), str(output_root), run_id="run-a", mode="hardlink")
+    page = run_a / "images" / "page-001.png"
+    digest = blob_store.file_digest(str(page))
+
+    assert blob_store.detach_tree(str(run_a)) == 2
+    with open(page, "wb") as f:
+        f.write(b"rewritten")
+    assert Path(blob_store.blob_path(str(output_root), digest)).read_bytes() == b"raster"
+
+
+def test_copy_key_artifact_to_root_links_through_store(tmp_path):
+    output_root = tmp_path / "output"
+    run_dir = output_root / "runs" / "run-a"
+    module_dir = run_dir / "05_reduce_ir_v1"
+    module_dir.mkdir(parents=True)
+    src = module_dir / "elements_core.jsonl"
+    src.write_text('{"id": "e1"}\n', encoding="utf-8")
+
+    copy_key_artifact_to_root(str(src), str(run_dir), "elements_core.jsonl",
+                              blob_output_root=str(output_root), run_id="run-a")
+    root_copy = run_dir / "elements_core.jsonl"
+    assert root_copy.read_text(encoding="utf-8") == '{"id": "e1"}\n'
+    # The module artifact itself stays private and writable.
+    assert os.stat(src).st_nlink == 1
+
+
+def test_gc_removes_orphans_but_keeps_known_good_blobs(tmp_path):
+    output_root = tmp_path / "output"
+    run_good = _make_run(output_root, "run-good", b"good")
+    run_bad = _make_run(output_root, "run-bad", b"bad")
+    blob_store.dedupe_tree(str(run_good), str(output_root), run_id="run-good", mode="hardlink")
+    blob_store.dedupe_tree(str(run_bad), str(output_root), run_id="run-bad", mode="hardlink")
+    record_run_assessment(run_id="run-good", scope="all", status="known_good", summary="reviewed",
+                          output_root=str(output_root))
+
+    # Both run folders go away; only the known-good run's blobs should survive.
+    shutil.rmtree(run_good.parent)
+    shutil.rmtree(run_bad.parent)
+
+    report = blob_store.gc(str(output_root), dry_run=True)
+    assert report["blobs_removed"] == 2 and report["protected_runs"] == ["run-good"]
+    assert blob_store.gc(str(output_root))["blobs_removed"] == 2
+
+    remaining = sorted(
+        name for _d, _s, files in os.walk(blob_store.blob_root(str(output_root)))
+        for name in files if name != blob_store.BLOB_INDEX_FILENAME
+    )
+    assert remaining == sorted(hashlib.sha256(p).hexdigest() for p in (b"good", b"good-2"))
+    assert blob_store.gc(str(output_root))["blobs_removed"] == 0
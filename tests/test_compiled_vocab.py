@@ -0,0 +1,66 @@
+import random
+
+import modules.common.text_quality as tq
+from modules.common.vocab import CompiledVocab, compile_vocab, plural_forms
+
+WORDS = ["skill", "stamina", "luck", "story", "box", "day", "fly", "go", "a", "ox", "you", "are", "following", "start", "to", "peter", "out"]
+
+
+def _set_accepts(word, vocab):
+    if word in vocab:
+        return True
+    if word.endswith("ies") and len(word) > 4 and (word[:-3] + "y") in vocab:
+        return True
+    if word.endswith("es") and len(word) > 3 and word[:-2] in vocab:
+        return True
+    if word.endswith("s") and len(word) > 3 and word[:-1] in vocab:
+        return True
+    return False
+
+
+def test_compiled_vocab_matches_set_rules(tmp_path):
+    path = compile_vocab(WORDS + ["Capital", "naïve", ""], str(tmp_path / "v.cvocab"))
+    vocab = CompiledVocab.load(path)
+    assert len(vocab) == len(WORDS)
+    assert "skill" in vocab and "skills" not in vocab and "Capital" not in vocab
+
+    probes = set(WORDS)
+    for w in WORDS:
+        probes.update(plural_forms(w))
+        probes.update([w + "x", w[:-1], w + "ies", w[:-1] + "ies", w + "es", w + "s"])
+    probes.update(["ies", "oxes", "goes", "gos", "days", "dies", "flies", "stories", "boxes", "zzz"])
+    flags = vocab.lookup_many(sorted(probes))
+    for w in sorted(probes):
+        assert vocab.accepts(w) == _set_accepts(w, set(WORDS)), w
+        assert (w in vocab) == (w in WORDS), w
+        assert bool(flags[w]) == vocab.accepts(w), w
+
+
+def test_batch_metrics_match_per_page_set_metrics():
+    rng = random.Random(5)
+    vocab_words = set(WORDS)
+    compiled = CompiledVocab.from_words(vocab_words)
+    pool = WORDS + ["skills", "stories", "sxrll", "y0u", "4re", "f0110win9", "qwrtp", "flies", "Luck,", "45.", "1st"]
+    pages = [[" ".join(rng.choice(pool) for _ in range(12)) for _ in range(4)] for _ in range(25)]
+    expected = [tq.spell_garble_metrics(lines, vocab=vocab_words) for lines in pages]
+    assert tq.spell_garble_metrics_batch(pages, vocab=compiled) == expected
+    assert [tq.spell_garble_metrics(lines, vocab=compiled) for lines in pages] == expected
+
+
+def test_default_vocab_is_compiled_once(tmp_path, monkeypatch):
+    monkeypatch.setenv(tq.VOCAB_CACHE_ENV, str(tmp_path))
+    monkeypatch.setenv("CODEX_WORDLIST_PATH", str(tmp_path / "words.txt"))
+    (tmp_path / "words.txt").write_text("Apple\nbanana/S\ncherry\n")
+    tq.load_default_wordlist.cache_clear()
+    tq.default_vocab.cache_clear()
+    try:
+        path = tq.default_vocab_path()
+        assert tq.build_default_vocab() == path
+        mtime = (tmp_path / path.split("/")[-1]).stat().st_mtime_ns
+        vocab = tq.default_vocab()
+        assert "apple" in vocab and vocab.accepts("bananas") and "skill" in vocab
+        assert tq.build_default_vocab() == path
+        assert (tmp_path / path.split("/")[-1]).stat().st_mtime_ns == mtime
+    finally:
+        tq.load_default_wordlist.cache_clear()
+        tq.default_vocab.cache_clear()
@@ -0,0 +1,104 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import yaml
+
+from modules.common import cost_model
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _stage(sid, module_id, wall, calls=0, cost=0.0, status="done"):
+    return {"id": sid, "module_id": module_id, "status": status, "wall_seconds": wall,
+            "llm_totals": {"calls": calls, "cost": cost}}
+
+
+def _plan(edges):
+    nodes = {sid: {"id": sid, "module": f"m_{sid}", "needs": needs} for sid, needs in edges.items()}
+    return {"nodes": nodes, "topo": list(edges)}
+
+
+def test_cost_model_uses_median_per_page_rates():
+    history = [
+        {"units": {"pages": 10}, "stages": [_stage("ocr", "ocr_v1", 20, calls=10, cost=1.0)]},
+        {"units": {"pages": 100}, "stages": [_stage("ocr", "ocr_v1", 300, calls=100, cost=10.0)]},
+        {"units": {"pages": 50}, "stages": [_stage("ocr", "ocr_v1", 5000, status="failed"),
+                                            _stage("ocr", "ocr_v1", 125, calls=50, cost=5.0)]},
+        {"stages": [_stage("ocr", "ocr_v1", 1)]},  # no page count: ignored
+    ]
+    model = cost_model.build_cost_model(history)
+    assert model["ocr_v1"]["samples"] == 3
+    assert model["ocr_v1"]["wall_seconds_per_page"] == 2.5
+    assert model["ocr_v1"]["calls_per_page"] == 1.0
+    assert model["ocr_v1"]["cost_per_page"] == 0.1
+
+
+def test_run_page_count_falls_back_to_page_artifact(tmp_path):
+    artifact = tmp_path / "pages.jsonl"
+    artifact.write_text("".join(json.dumps({"page_number": n}) + "\n" for n in (1, 2, 2, 3)), encoding="utf-8")
+    instr = {"stages": [{"schema_version_output": "page_html_v1", "artifact": str(artifact)}]}
+    assert cost_model.run_page_count(instr) == 3
+
+
+def test_critical_path_follows_longest_chain():
+    plan = _plan({"a": [], "b": ["a"], "c": ["a"], "d": ["b", "c"]})
+    path, seconds = cost_model.critical_path(plan, {"a": 1, "b": 10, "c": 2, "d": 3})
+    assert path == ["a", "b", "d"] and seconds == 14
+    path, seconds = cost_model.critical_path(plan, {"a": 1, "b": 10, "c": 2, "d": 3}, stage_ids=["c", "d"])
+    assert path == ["c", "d"] and seconds == 5
+
+
+def test_forecast_plan_scales_by_pages_and_lists_unmodeled():
+    plan = _plan({"a": [], "b": ["a"]})
+    model = {"m_a": {"samples": 2, "wall_seconds_per_page": 2.0, "calls_per_page": 1.0, "cost_per_page": 0.01}}
+    forecast = cost_model.forecast_plan(plan, model, pages=40)
+    assert forecast["stages"]["a"] == {"wall_seconds": 80.0, "calls": 40.0, "cost": 0.4, "samples": 2}
+    assert forecast["unmodeled"] == ["b"]
+    assert forecast["totals"]["wall_seconds"] == 80.0
+    assert forecast["critical_path"] == ["a"]
+    error = cost_model.forecast_error(forecast["stages"]["a"], {"wall_seconds": 100.0, "calls": 40, "cost": 0.5})
+    assert error["wall_seconds"] == 20.0 and error["wall_seconds_pct"] == 25.0
+
+
+
+def test_run_forecast_error_ignores_skipped_and_failed_stages():
+    forecast = {"stages": {sid: {"wall_seconds": 10.0, "calls": 2.0, "cost": 0.1} for sid in ("a", "b", "c")}}
+    stages = [
+        _stage("a", "m_a", 12.0, calls=2, cost=0.1),
+        _stage("b", "m_b", 0.0, status="skipped"),
+        _stage("c", "m_c", 1.0, status="failed"),
+    ]
+    error = cost_model.run_forecast_error(forecast, stages)
+    assert error["wall_seconds"] == 2.0 and error["wall_seconds_pct"] == 20.0
+    assert cost_model.run_forecast_error(forecast, stages[1:]) is None
+
+def test_driver_dump_plan_includes_forecast(tmp_path):
+    runs_root = tmp_path / "output" / "runs"
+    past = runs_root / "past-run"
+    past.mkdir(parents=True)
+    (past / "instrumentation.json").write_text(json.dumps({
+        "units": {"pages": 2},
+        "stages": [_stage("extract_text", "extract_text_v1", 4.0, calls=0)],
+    }), encoding="utf-8")
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    for n in range(3):
+        (input_dir / f"p{n}.md").write_text("text", encoding="utf-8")
+    recipe = {
+        "run_id": "forecast-check",
+        "input": {"text_glob": str(input_dir / "*.md")},
+        "output_dir": str(runs_root),
+        "stages": [{"id": "extract_text", "stage": "extract", "module": "extract_text_v1"}],
+    }
+    recipe_path = tmp_path / "recipe.yaml"
+    recipe_path.write_text(yaml.safe_dump(recipe), encoding="utf-8")
+    result = subprocess.run(
+        [sys.executable, "driver.py", "--recipe", str(recipe_path), "--registry", "modules", "--dump-plan"],
+        cwd=str(ROOT), capture_output=True, text=True, check=True,
+    )
+    forecast = json.loads(result.stdout[result.stdout.index("{"):])["forecast"]
+    assert forecast["pages"] == 3 and forecast["history_runs"] == 1
+    assert forecast["stages"]["extract_text"]["wall_seconds"] == 6.0
+    assert forecast["critical_path"] == ["extract_text"]
@@ -73,3 +73,57 @@ def test_detect_duplicate_pages_smoke(tmp_path: Path):
     assert len(lines) == 2
     report = json.loads(report_path.read_text(encoding="utf-8"))
     assert report["duplicate_pages"] == 1
+
+
+def test_similarity_floor_skips_without_changing_winner():
+    a = _tokenize("alpha beta gamma delta epsilon")
+    b = _tokenize("zeta eta theta iota kappa")
+    text_a, text_b = " ".join(a), " ".join(b)
+    exact = _similarity(a, b, text_a, text_b)
+    assert _similarity(a, b, text_a, text_b, floor=0.99) <= 0.99
+    assert _similarity(a, b, text_a, text_b, floor=0.0) == exact
+
+
+def test_whole_book_lsh_finds_far_apart_duplicate(tmp_path: Path):
+    import random
+    import sys
+
+    from modules.adapter.detect_duplicate_pages_v1.main import main as run
+
+    rng = random.Random(7)
+    vocab = [f"word{i}" for i in range(2000)]
+
+    def page(num, words):
+        return {"schema_version": "page_html_v1", "page_number": num, "original_page_number": num,
+                "html": "<p>" + " ".join(words) + "</p>"}
+
+    bodies = [[rng.choice(vocab) for _ in range(150)] for _ in range(40)]
+    pages = [page(i + 1, body) for i, body in enumerate(bodies)]
+    # Page 38 rescans page 5 with a couple of OCR slips.
+    rescan = list(bodies[4])
+    rescan[10] = "w0rd"
+    pages[37] = page(38, rescan)
+
+    in_path = tmp_path / "pages.jsonl"
+    in_path.write_text("".join(json.dumps(p) + "\n" for p in pages), encoding="utf-8")
+    report_path = tmp_path / "duplicate_pages.json"
+
+    def detect(*extra):
+        old_argv = sys.argv
+        sys.argv = ["detect_duplicate_pages_v1", "--pages", str(in_path), "--out", str(tmp_path / "out.jsonl"),
+                    "--report-out", str(report_path), *extra]
+        try:
+            run()
+        finally:
+            sys.argv = old_argv
+        return json.loads(report_path.read_text(encoding="utf-8"))
+
+    report = detect()
+    assert report["candidate_mode"] == "lsh"
+    assert [(d["page_number"], d["duplicate_of_page"]) for d in report["duplicates"]] == [(38, 5)]
+    # Random unrelated pages should rarely be LSH candidates at all.
+    assert report["lsh_candidates_checked"] < 10
+
+    legacy = detect("--max-lookback", "3", "--max-page-gap", "3")
+    assert legacy["candidate_mode"] == "window"
+    assert legacy["duplicate_pages"] == 0
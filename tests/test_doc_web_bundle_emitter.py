@@ -0,0 +1,120 @@
+import json
+
+from modules.common import doc_web_bundle_emitter as emitter
+
+SOURCE_BLOCKS = {
+    f"p{page:03d}-b1": {
+        "source_page_number": page,
+        "source_printed_page_number": page - 2,
+        "block_kind": "paragraph",
+        "text_quote": f"Page {page}.",
+    }
+    for page in range(10, 14)
+}
+
+
+def _entries():
+    return [
+        {
+            "filename": f"chapter-{n:03d}.html",
+            "title": f"Chapter {n}",
+            "body_html": f'<h2 data-source-block-ids="p{9 + n:03d}-b1">Chapter {n}</h2>'
+                         f'<p data-source-block-ids="p{10 + n:03d}-b1">Page {10 + n}.</p>',
+            "chapter_index": n,
+            "page_start": 7 + n,
+            "page_end": 8 + n,
+            "kind": "chapter",
+            "source_pages": [9 + n, 10 + n],
+            "source_printed_pages": [7 + n, 8 + n],
+        }
+        for n in (1, 2, 3)
+    ]
+
+
+def _emit(html_dir, entries, workers):
+    return emitter.emit_doc_web_bundle(
+        html_dir=html_dir,
+        manifest_path=html_dir.parent / "chapters_manifest.jsonl",
+        entries=entries,
+        index_entries=[{"label": e["title"], "file": e["filename"]} for e in entries],
+        book_title="Book",
+        book_author="",
+        source_artifact="input/book.pdf",
+        source_block_index=SOURCE_BLOCKS,
+        images_subdir=None,
+        run_id="run-1",
+        module_id="build_chapter_html_v1",
+        workers=workers,
+    )
+
+
+def _bundle(html_dir):
+    files = {p.name: p.read_text(encoding="utf-8") for p in sorted(html_dir.glob("*.html"))}
+    blocks = [
+        {k: v for k, v in json.loads(line).items() if k != "created_at"}
+        for line in (html_dir / "provenance" / "blocks.jsonl").read_text(encoding="utf-8").splitlines()
+    ]
+    return files, blocks
+
+
+def test_pool_and_in_process_emission_write_the_same_bundle(tmp_path):
+    _emit(tmp_path / "serial" / "html", _entries(), workers=1)
+    _emit(tmp_path / "pool" / "html", _entries(), workers=3)
+    assert _bundle(tmp_path / "serial" / "html") == _bundle(tmp_path / "pool" / "html")
+    files, blocks = _bundle(tmp_path / "pool" / "html")
+    assert [b["block_id"] for b in blocks][:3] == [
+        "blk-chapter-001-0001", "blk-chapter-001-0002", "blk-chapter-002-0001"]
+    manifest = json.loads((tmp_path / "pool" / "html" / "manifest.json").read_text(encoding="utf-8"))
+    assert f'content="{manifest["entries"][0]["input_hash"]}"' in files["chapter-001.html"]
+    assert not list((tmp_path / "pool").rglob(".tmp-*"))
+
+
+def test_unchanged_entries_are_skipped_and_changed_ones_rewritten(tmp_path, monkeypatch):
+    html_dir = tmp_path / "html"
+    _emit(html_dir, _entries(), workers=1)
+    before = _bundle(html_dir)
+
+    emitted = []
+    emit_entry = emitter._emit_entry
+    monkeypatch.setattr(emitter, "_emit_entry", lambda job: emitted.append(job["entry_id"]) or emit_entry(job))
+    _emit(html_dir, _entries(), workers=1)
+    assert emitted == []
+    assert _bundle(html_dir) == before
+
+    # Retitling chapter 2 changes its own file and its neighbours' navigation links.
+    entries = _entries()
+    entries[1]["title"] = "Chapter Two"
+    _emit(html_dir, entries, workers=1)
+    assert emitted == ["chapter-001", "chapter-002", "chapter-003"]
+
+    emitted.clear()
+    entries[2]["body_html"] = entries[2]["body_html"].replace("Page 13.", "Page thirteen.")
+    (html_dir / "chapter-001.html").write_text("stale", encoding="utf-8")
+    _emit(html_dir, entries, workers=1)
+    assert emitted == ["chapter-001", "chapter-003"]
+    files, blocks = _bundle(html_dir)
+    assert "Page thirteen." in files["chapter-003.html"]
+    assert [b["block_id"] for b in blocks] == [b["block_id"] for b in before[1]]
+
+
+def test_entries_missing_provenance_are_rendered_again(tmp_path, monkeypatch):
+    html_dir = tmp_path / "html"
+    _emit(html_dir, _entries(), workers=1)
+    before = _bundle(html_dir)
+    assert len(before[1]) == 6
+
+    emitted = []
+    emit_entry = emitter._emit_entry
+    monkeypatch.setattr(emitter, "_emit_entry", lambda job: emitted.append(job["entry_id"]) or emit_entry(job))
+    blocks_path = html_dir / "provenance" / "blocks.jsonl"
+    lines = blocks_path.read_text(encoding="utf-8").splitlines(keepends=True)
+    blocks_path.write_text("".join(lines[:3]), encoding="utf-8")
+    _emit(html_dir, _entries(), workers=1)
+    assert emitted == ["chapter-002", "chapter-003"]  # the kept rows end partway through chapter 2
+    assert _bundle(html_dir) == before
+
+    emitted.clear()
+    blocks_path.unlink()
+    _emit(html_dir, _entries(), workers=1)
+    assert emitted == ["chapter-001", "chapter-002", "chapter-003"]
+    assert _bundle(html_dir) == before
@@ -0,0 +1,62 @@
+import json
+
+from modules.common import genealogy_table_model as gtm
+from modules.validate.validate_onward_genealogy_consistency_v1.main import analyze_page_row
+
+PAGE_HTML = """
+<h2>SMITH FAMILY</h2>
+<table data-source-block-ids="p012-b2">
+  <thead><tr><th>NAME</th><th>BORN</th><th>MARRIED</th><th>SPOUSE</th><th>BOY/GIRL</th><th>DIED</th></tr></thead>
+  <tbody>
+    <tr class="genealogy-subgroup-heading"><th colspan="6">John's Children</th></tr>
+    <tr><td>Ann</td><td>May 2, 1901</td><td></td><td></td><td>2</td><td></td></tr>
+    <tr><td>JONES FAMILY</td></tr>
+    <tr><td>TOTAL DESCENDANTS</td><td>14</td></tr>
+  </tbody>
+</table>
+<p>Ann moved west.</p>
+"""
+
+
+def test_page_tables_models_rows_roles_and_sources():
+    page = gtm.page_tables(PAGE_HTML)
+    assert len(page.tables) == 1
+    table = page.tables[0]
+    assert table.signature() == gtm.FUSED_HEADERS and table.is_genealogy()
+    assert [row.role for row in table.rows] == ["header", "subgroup", "data", "family", "summary"]
+    assert [row.section for row in table.body_rows()] == ["tbody"] * 4
+    assert table.rows[1].cells[0].colspan == 6 and table.rows[1].cells[0].header
+    assert table.source_block_ids == ["p012-b2"]
+    assert [(b.tag, b.text, b.in_table) for b in page.blocks] == [
+        ("h2", "SMITH FAMILY", False), ("p", "Ann moved west.", False)]
+    assert gtm.page_tables(PAGE_HTML) is page  # parsed once per process
+    assert gtm.PageTables.from_dict(json.loads(json.dumps(page.to_dict()))) == page
+
+
+def test_sidecar_serves_matching_pages_without_parsing(tmp_path, monkeypatch):
+    pages_path = tmp_path / "pages_html.jsonl"
+    rows = [{"page_number": 12, "printed_page_number": 10, "html": PAGE_HTML}]
+    sidecar = gtm.write_sidecar(str(pages_path), rows)
+    assert sidecar == str(tmp_path / "pages_html.tables.jsonl")
+    saved = [json.loads(line) for line in open(sidecar, encoding="utf-8")]
+    assert saved[0]["schema_version"] == "genealogy_page_tables_v1" and saved[0]["page_number"] == 12
+
+    monkeypatch.setattr(gtm, "_cache", {})
+    assert gtm.load_sidecar(str(pages_path)) == 1
+    parsed = []
+    build = gtm.tables_from_soup
+    monkeypatch.setattr(gtm, "tables_from_soup", lambda soup, sha1: parsed.append(sha1) or build(soup, sha1))
+    page = gtm.page_tables_for_row(rows[0])
+    assert parsed == [] and page.page_number == 12 and page.printed_page_number == 10
+    # An edited page no longer matches its sidecar row and is parsed again.
+    gtm.page_tables_for_row({"page_number": 12, "html": PAGE_HTML.replace("Ann", "Anne")})
+    assert len(parsed) == 1
+
+
+def test_analyze_page_row_reads_the_table_model():
+    metrics = analyze_page_row({"page_number": 12, "html": PAGE_HTML + "<table><tr><td>x</td></tr></table>"})
+    assert metrics.table_count == 2
+    assert metrics.subgroup_row_count == 1
+    assert metrics.external_family_heading_count == 1
+    assert metrics.residual_boygirl_header_count == 1
+    assert metrics.reasons == ["residual_boygirl_headers", "external_family_headings"]
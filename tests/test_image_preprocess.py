@@ -0,0 +1,67 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from modules.common.image_utils import detect_skew_angle, find_gutter_position, image_size
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _text_page(width=850, height=1100):
+    img = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(img)
+    for y in range(80, height - 80, 28):
+        draw.rectangle([70, y, width - 70, y + 9], fill=0)
+    return img
+
+
+def _spread(width=1700, height=1100, gutter=850):
+    img = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(img)
+    for y in range(80, height - 80, 28):
+        draw.rectangle([70, y, gutter - 60, y + 9], fill=0)
+        draw.rectangle([gutter + 60, y, width - 70, y + 9], fill=0)
+    # Binding shadow running top to bottom.
+    draw.rectangle([gutter - 3, 0, gutter + 3, height], fill=150)
+    return img
+
+
+def test_detect_skew_angle_on_rotated_page():
+    page = _text_page()
+    assert detect_skew_angle(page) == 0.0
+    rotated = page.rotate(1.0, resample=Image.BICUBIC, expand=False, fillcolor=255)
+    assert detect_skew_angle(rotated) == -1.0
+
+
+def test_find_gutter_position_finds_binding_shadow():
+    gutter_frac, _, _, continuity = find_gutter_position(_spread(gutter=800))
+    assert abs(gutter_frac - 800 / 1700) < 0.01
+    assert continuity == 1.0
+
+
+def test_image_size_reads_header(tmp_path):
+    path = tmp_path / "page.png"
+    Image.fromarray(np.zeros((30, 40), dtype=np.uint8)).save(path)
+    assert image_size(str(path)) == (40, 30)
+
+
+def test_split_pages_from_manifest_keeps_order_with_workers(tmp_path):
+    rows = []
+    for page in range(1, 5):
+        path = tmp_path / f"src-{page:03d}.png"
+        _spread().save(path)
+        rows.append({"page": page, "image": str(path)})
+    manifest = tmp_path / "pages.jsonl"
+    manifest.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+    outdir = tmp_path / "out"
+    subprocess.check_call([sys.executable, "-m", "modules.extract.split_pages_from_manifest_v1.main",
+                           "--pages", str(manifest), "--outdir", str(outdir), "--workers", "2"], cwd=ROOT)
+    out_rows = [json.loads(line) for line in (outdir / "pages_split_manifest.jsonl").read_text().splitlines()]
+    assert [(r["page_number"], r["original_page_number"], r["spread_side"]) for r in out_rows] == [
+        (n, (n + 1) // 2, "L" if n % 2 else "R") for n in range(1, 9)
+    ]
+    assert all(Path(r["image"]).exists() for r in out_rows)
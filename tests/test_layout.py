@@ -0,0 +1,172 @@
+import random
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from modules.common.layout import (
+    BookLines,
+    assign_columns,
+    cluster_columns,
+    column_splits_from_mask,
+    infer_column_spans,
+    paragraph_breaks,
+    reading_order,
+    sort_lines_by_columns,
+)
+
+
+def _reference_cluster_columns(lines, gap=0.12, min_per_col=4):
+    # Pre-vectorization pagelines_to_elements_v1.cluster_columns, kept for parity checks.
+    centers = []
+    for i, ln in enumerate(lines):
+        bbox = ln.get("bbox")
+        if not bbox or len(bbox) < 4:
+            continue
+        centers.append((i, (bbox[0] + bbox[2]) / 2.0))
+    if not centers:
+        return {}
+    centers.sort(key=lambda x: x[1])
+    xs = [c for _, c in centers]
+    if max(xs) - min(xs) > 0.2 and len(xs) >= 2:
+        c1, c2 = min(xs), max(xs)
+        for _ in range(5):
+            left = [c for c in xs if abs(c - c1) <= abs(c - c2)]
+            right = [c for c in xs if abs(c - c2) < abs(c - c1)]
+            if left:
+                c1 = sum(left) / len(left)
+            if right:
+                c2 = sum(right) / len(right)
+        left_ids = [idx for idx, c in centers if abs(c - c1) <= abs(c - c2)]
+        right_ids = [idx for idx, c in centers if abs(c - c2) < abs(c - c1)]
+        if len(left_ids) >= min_per_col and len(right_ids) >= min_per_col:
+            out = {idx: 0 for idx in left_ids}
+            out.update({idx: 1 for idx in right_ids})
+            return out
+    gaps = [(b[1] - a[1], a, b) for a, b in zip(centers, centers[1:])]
+    if gaps:
+        max_gap, _, right = max(gaps, key=lambda g: g[0])
+        if max_gap >= gap:
+            left_ids = [idx for idx, c in centers if c < right[1]]
+            right_ids = [idx for idx, c in centers if c >= right[1]]
+            if len(left_ids) >= min_per_col and len(right_ids) >= min_per_col:
+                out = {idx: 0 for idx in left_ids}
+                out.update({idx: 1 for idx in right_ids})
+                return out
+    return {idx: 0 for idx, _ in centers}
+
+
+def _reference_infer_columns(raw_lines, min_lines=6, min_gap=0.12, min_side=6):
+    if not raw_lines or len(raw_lines) < min_lines:
+        return []
+    centers = sorted((ln.get("bbox", [0, 0, 1, 1])[0] + ln.get("bbox", [0, 0, 1, 1])[2]) / 2.0 for ln in raw_lines)
+    gaps = [centers[i + 1] - centers[i] for i in range(len(centers) - 1)]
+    max_gap = max(gaps)
+    gap_idx = gaps.index(max_gap)
+    if max_gap < min_gap or gap_idx + 1 < min_side or len(centers) - gap_idx - 1 < min_side:
+        return []
+    split = (centers[gap_idx] + centers[gap_idx + 1]) / 2.0
+    return [[0.0, split], [split, 1.0]]
+
+
+def _random_page(rng):
+    kind = rng.choice(["single", "two", "narrow", "sparse", "nobbox"])
+    lines = []
+    for i in range(rng.randint(0, 40)):
+        if kind == "nobbox" or (kind == "sparse" and rng.random() < 0.3):
+            lines.append({"text": f"line {i}"})
+            continue
+        if kind == "two":
+            x0 = rng.choice([0.05, 0.55]) + rng.uniform(-0.02, 0.02)
+            width = rng.uniform(0.3, 0.4)
+        elif kind == "narrow":
+            x0 = rng.uniform(0.3, 0.45)
+            width = rng.uniform(0.05, 0.2)
+        else:
+            x0 = rng.uniform(0.0, 0.2)
+            width = rng.uniform(0.2, 0.8)
+        y0 = round(rng.uniform(0.0, 0.95), 2)
+        lines.append({"text": f"line {i}", "bbox": [x0, y0, min(x0 + width, 1.0), y0 + 0.02]})
+    return lines
+
+
+def test_batch_columns_match_per_page_reference():
+    rng = random.Random(7)
+    pages = [_random_page(rng) for _ in range(200)]
+    book = BookLines.from_pages(pages)
+    cols = assign_columns(book)
+    order = reading_order(pages, book, cols)
+    for p, lines in enumerate(pages):
+        expected = _reference_cluster_columns(lines)
+        mask = book.page == p
+        assert dict(zip(book.line[mask].tolist(), cols[mask].tolist())) == expected
+        assert cluster_columns(lines) == expected
+        ref_order = sorted(range(len(lines)), key=lambda i: (expected.get(i, 0), (lines[i].get("bbox") or [0, 0, 0, 0])[1]))
+        assert order[p] == (ref_order if expected else list(range(len(lines))))
+        assert sort_lines_by_columns(lines) == [lines[i] for i in order[p]]
+
+
+def test_infer_column_spans_matches_reference():
+    rng = random.Random(3)
+    for _ in range(200):
+        lines = [ln for ln in _random_page(rng) if "bbox" in ln]
+        assert infer_column_spans(lines) == _reference_infer_columns(lines)
+
+
+def test_column_splits_from_mask_two_columns():
+    img = Image.new("L", (400, 300), 255)
+    draw = ImageDraw.Draw(img)
+    for y in range(10, 290, 12):
+        draw.rectangle([20, y, 180, y + 6], fill=0)
+        draw.rectangle([220, y, 380, y + 6], fill=0)
+    arr = np.array(img)
+    spans = column_splits_from_mask(arr < arr.mean())
+    assert len(spans) == 2 and 0.45 < spans[0][1] < 0.55
+    single = Image.new("L", (400, 300), 255)
+    ImageDraw.Draw(single).rectangle([160, 10, 240, 290], fill=0)
+    arr = np.array(single)
+    assert column_splits_from_mask(arr < arr.mean()) == [(0.0, 1.0)]
+
+
+def _reference_pixel_splits(mask, min_lines=30, min_spread=0.25):
+    ys, xs = np.nonzero(mask)
+    if xs.size < min_lines * 10:
+        return [(0.0, 1.0)]
+    x_norm = xs / float(mask.shape[1])
+    if x_norm.max() - x_norm.min() < min_spread:
+        return [(0.0, 1.0)]
+    c1, c2 = x_norm.min(), x_norm.max()
+    for _ in range(6):
+        left = x_norm[np.abs(x_norm - c1) <= np.abs(x_norm - c2)]
+        right = x_norm[np.abs(x_norm - c2) < np.abs(x_norm - c1)]
+        if left.size > 0:
+            c1 = left.mean()
+        if right.size > 0:
+            c2 = right.mean()
+    c1, c2 = min(c1, c2), max(c1, c2)
+    split = (c1 + c2) / 2.0
+    if (x_norm < split).sum() < min_lines or (x_norm >= split).sum() < min_lines:
+        return [(0.0, 1.0)]
+    return [(0.0, split), (split, 1.0)]
+
+
+def test_column_splits_from_mask_matches_pixel_reference():
+    rng = np.random.default_rng(5)
+    for _ in range(20):
+        mask = rng.random((120, 300)) < rng.uniform(0.01, 0.2)
+        mask[:, : rng.integers(0, 100)] = False
+        got = column_splits_from_mask(mask)
+        ref = _reference_pixel_splits(mask)
+        assert len(got) == len(ref)
+        assert np.allclose(np.asarray(got, dtype=float), np.asarray(ref, dtype=float), atol=1e-9)
+
+
+def test_paragraph_breaks_flags_gaps_and_column_starts():
+    lines = [
+        {"bbox": [0.1, 0.10, 0.4, 0.12]},
+        {"bbox": [0.1, 0.13, 0.4, 0.15]},
+        {"bbox": [0.1, 0.25, 0.4, 0.27]},  # vertical gap
+        {"bbox": [0.14, 0.28, 0.4, 0.30]},  # indent
+    ]
+    book = BookLines.from_pages([lines])
+    cols = assign_columns(book)
+    assert paragraph_breaks(book, cols).tolist() == [True, False, True, True]
@@ -0,0 +1,131 @@
+import threading
+import time
+
+from modules.common import llm_cache
+from modules.common.openai_client import OpenAI
+from modules.common.utils import read_jsonl
+
+REQUEST = {"model": "gpt-test", "messages": [{"role": "user", "content": "page 12"}]}
+
+
+class _SlowCompletions:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def create(self, **kwargs):
+        from openai.types.chat import ChatCompletion
+
+        with self.lock:
+            self.calls += 1
+            n = self.calls
+        time.sleep(self.delay)
+        return ChatCompletion.model_validate({
+            "id": f"resp-{n}", "object": "chat.completion", "created": 0, "model": kwargs["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": f"answer {n}"}}],
+            "usage": {"prompt_tokens": 7, "completion_tokens": 3, "total_tokens": 10},
+        })
+
+
+def _client(fake):
+    client = OpenAI(api_key="test")
+    client.chat.completions._client = type("C", (), {"chat": type("Ch", (), {"completions": fake})()})()
+    return client
+
+
+def test_concurrent_identical_requests_share_one_call(tmp_path, monkeypatch):
+    sink = tmp_path / "sink.jsonl"
+    monkeypatch.setenv("INSTRUMENT_SINK", str(sink))
+    fake = _SlowCompletions(delay=0.3)
+    barrier = threading.Barrier(4)
+    answers = []
+
+    def worker():
+        barrier.wait()
+        answers.append(_client(fake).chat.completions.create(**REQUEST).choices[0].message.content)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert fake.calls == 1
+    assert answers == ["answer 1"] * 4
+    events = list(read_jsonl(str(sink)))
+    assert sorted(e["coalesced"] for e in events) == [False, True, True, True]
+    assert all(e["cost"] == 0.0 for e in events if e["coalesced"])
+
+
+def test_run_memo_dedupes_sequential_requests(tmp_path, monkeypatch):
+    sink = tmp_path / "sink.jsonl"
+    monkeypatch.setenv("INSTRUMENT_SINK", str(sink))
+    monkeypatch.setenv(llm_cache.RUN_MEMO_ENV, str(tmp_path / "memo"))
+    fake = _SlowCompletions()
+    first = _client(fake).chat.completions.create(**REQUEST)
+    second = _client(fake).chat.completions.create(**REQUEST)
+    _client(fake).chat.completions.create(**REQUEST, temperature=0.7)
+    assert fake.calls == 2
+    assert second.choices[0].message.content == first.choices[0].message.content
+    events = list(read_jsonl(str(sink)))
+    assert [(e["deduped"], e["cached"]) for e in events] == [(False, False), (True, False), (False, False)]
+    assert events[1]["prompt_tokens"] == 7
+
+
+def test_fresh_skips_reuse_and_refreshes_memo(tmp_path, monkeypatch):
+    monkeypatch.setenv(llm_cache.RUN_MEMO_ENV, str(tmp_path / "memo"))
+    replies = iter(["", "retried"])
+
+    def call():
+        return llm_cache.call("test", "chat", REQUEST, lambda: next(replies))
+
+    assert call() == ("", None)
+    with llm_cache.fresh():
+        assert call() == ("retried", None)
+    assert call() == ("retried", "deduped")
+
+
+def test_waiters_retry_when_the_leader_fails():
+    started = threading.Event()
+    calls = []
+
+    def send():
+        calls.append(1)
+        if len(calls) == 1:
+            started.set()
+            time.sleep(0.2)
+            raise RuntimeError("boom")
+        return "ok"
+
+    results, errors = [], []
+
+    def leader():
+        try:
+            llm_cache.call("test", "chat", REQUEST, send)
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    t = threading.Thread(target=leader)
+    t.start()
+    started.wait()
+    results.append(llm_cache.call("test", "chat", REQUEST, send))
+    t.join()
+    assert len(errors) == 1
+    assert results == [("ok", None)]
+
+
+def test_fresh_env_makes_subprocess_requests_fresh(tmp_path, monkeypatch):
+    monkeypatch.setenv(llm_cache.RUN_MEMO_ENV, str(tmp_path / "memo"))
+    replies = iter(["rejected", "retried"])
+
+    def call():
+        return llm_cache.call("test", "chat", REQUEST, lambda: next(replies))
+
+    assert call() == ("rejected", None)
+    env = llm_cache.fresh_env({})
+    assert env == {llm_cache.FRESH_ENV: "1"}
+    monkeypatch.setenv(llm_cache.FRESH_ENV, env[llm_cache.FRESH_ENV])
+    assert call() == ("retried", None)
+    monkeypatch.delenv(llm_cache.FRESH_ENV)
+    assert call() == ("retried", "deduped")
@@ -0,0 +1,157 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from modules.common.utils import read_jsonl
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tools"))
+
+import choices_loop_runner  # noqa: E402
+import header_loop_runner  # noqa: E402
+
+
+def _write_jsonl(path: Path, rows):
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+
+
+def _pages():
+    # Sections 1..400 spread over 100 pages, with a page-range running head on each page.
+    pages = []
+    for page in range(1, 101):
+        sids = range((page - 1) * 4 + 1, page * 4 + 1)
+        text = f"{sids[0]}-{sids[-1]}\n" + "\n".join(f"{sid}\nYou walk on. Turn to {sid % 400 + 1}." for sid in sids)
+        pages.append({"page": page, "clean_text": text})
+    return pages
+
+
+def test_header_state_redetects_only_changed_pages():
+    state = header_loop_runner.HeaderLoopState()
+    pages = _pages()
+    hypos, present_clean, dirty = state.detect(pages)
+    assert dirty == 100 and 400 in present_clean
+
+    pages[10] = {**pages[10], "clean_text": pages[10]["clean_text"] + "\n999 smudge"}
+    again, _, dirty = state.detect(pages)
+    assert dirty == 1
+    assert len(again) == len(hypos)
+
+
+def test_header_loop_matches_module_outputs_and_logs_attempts(tmp_path, monkeypatch):
+    pages_path = tmp_path / "pages_clean.jsonl"
+    _write_jsonl(pages_path, _pages())
+    pagelines = tmp_path / "page-001.json"
+    pagelines.write_text(json.dumps({"lines": [{"text": "1"}]}), encoding="utf-8")
+    index_path = tmp_path / "pagelines_index.json"
+    index_path.write_text(json.dumps({"1": str(pagelines)}), encoding="utf-8")
+    sink = tmp_path / "instrumentation_calls.jsonl"
+
+    monkeypatch.setenv("INSTRUMENT_SINK", str(sink))
+    monkeypatch.setenv("INSTRUMENT_STAGE", "header_loop")
+    monkeypatch.setattr(sys, "argv", [
+        "header_loop_runner.py",
+        "--pages-clean", str(pages_path),
+        "--headers", str(tmp_path / "headers.jsonl"),
+        "--headers-dedup", str(tmp_path / "headers_dedup.jsonl"),
+        "--missing", str(tmp_path / "missing.jsonl"),
+        "--pagelines-index", str(index_path),
+        "--quality", str(tmp_path / "quality.json"),
+        "--images-dir", str(tmp_path),
+        "--outdir", str(tmp_path),
+    ])
+    header_loop_runner.main()
+
+    # Same artifacts as the standalone detect + dedupe modules.
+    subprocess.check_call([sys.executable, "-m", "modules.portionize.portionize_headers_numeric_v1.main",
+                           "--pages", str(pages_path), "--out", str(tmp_path / "ref_headers.jsonl")], cwd=ROOT)
+    subprocess.check_call([sys.executable, "-m", "modules.adapter.portion_hyp_dedupe_v1.main",
+                           "--input", str(tmp_path / "ref_headers.jsonl"),
+                           "--out", str(tmp_path / "ref_dedup.jsonl")], cwd=ROOT)
+    assert list(read_jsonl(str(tmp_path / "headers_dedup.jsonl"))) == list(read_jsonl(str(tmp_path / "ref_dedup.jsonl")))
+    assert list(read_jsonl(str(tmp_path / "missing.jsonl"))) == []
+
+    events = list(read_jsonl(str(sink)))
+    assert [e["schema_version"] for e in events] == ["instrumentation_attempt_v1"]
+    assert events[0]["stage_id"] == "header_loop"
+    assert set(events[0]["step_seconds"]) == {"detect", "dedupe", "coverage"}
+    assert events[0]["dirty"] == {"pages": 100, "ocr_pages": 1}
+
+
+def test_choices_loop_rechecks_only_escalated_sections(tmp_path, monkeypatch):
+    portions = [
+        {"portion_id": "1", "raw_text": "Go north. Turn to 2."},
+        {"portion_id": "2", "raw_text": "A dead end."},
+        {"portion_id": "3", "raw_text": "Turn to 1.", "choices": [{"text": "Turn to 999", "target": "999"}]},
+    ]
+    portions_path = tmp_path / "portions.jsonl"
+    _write_jsonl(portions_path, portions)
+    out_path = tmp_path / "portions_out.jsonl"
+
+    escalated = []
+
+    def fake_escalate(client, rows, missing_ids, model):
+        escalated.append(list(missing_ids))
+        for row in rows:
+            if row["portion_id"] in missing_ids:
+                row["end_game"] = True
+                row["choices"] = []
+                row["targets"] = []
+                row["is_gameplay"] = False
+        return list(missing_ids)
+
+    import modules.common.openai_client as openai_client
+    monkeypatch.setattr(openai_client, "OpenAI", lambda *a, **k: object())
+    monkeypatch.setattr(choices_loop_runner, "escalate_sections", fake_escalate)
+    monkeypatch.delenv("INSTRUMENT_SINK", raising=False)
+    monkeypatch.setattr(sys, "argv", [
+        "choices_loop_runner.py",
+        "--portions", str(portions_path),
+        "--out", str(out_path),
+        "--missing", str(tmp_path / "missing.jsonl"),
+        "--invalid", str(tmp_path / "invalid.jsonl"),
+        "--retries", "3",
+    ])
+    choices_loop_runner.main()
+
+    assert escalated == [["2"], []]
+    rows = list(read_jsonl(str(out_path)))
+    assert [r.get("targets") for r in rows] == [["2"], [], None]
+    # Out-of-range target keeps the invalid report non-empty through the retry limit.
+    assert [r["section_id"] for r in read_jsonl(str(tmp_path / "invalid.jsonl"))] == ["3"]
+    assert list(read_jsonl(str(tmp_path / "missing.jsonl"))) == []
+
+
+@pytest.mark.parametrize("script_name", ["header_loop_runner.py", "choices_loop_runner.py"])
+def test_loop_runners_import_without_repo_on_path(script_name):
+    script = ROOT / "tools" / script_name
+    subprocess.check_call([sys.executable, str(script), "--help"], cwd="/", stdout=subprocess.DEVNULL)
+
+
+def test_instrumentation_md_lists_loop_attempts(tmp_path):
+    from driver import _render_instrumentation_md
+
+    run_data = {
+        "run_id": "run-x",
+        "stages": [{
+            "id": "header_loop",
+            "status": "done",
+            "llm_totals": {},
+            "extra": {"loop_attempts": [{
+                "schema_version": "instrumentation_attempt_v1",
+                "loop": "header_loop",
+                "attempt": 1,
+                "step_seconds": {"detect": 0.5, "resolver": 12.0},
+                "wall_seconds": 12.5,
+                "dirty": {"pages": 3},
+                "remaining": 2,
+            }]},
+        }],
+    }
+    md_path = tmp_path / "instrumentation.md"
+    _render_instrumentation_md(run_data, str(md_path))
+    text = md_path.read_text(encoding="utf-8")
+    assert "## Loop attempts" in text
+    assert "| 1 | 12.50 | detect 0.50s, resolver 12.00s | pages=3 | 2 |" in text
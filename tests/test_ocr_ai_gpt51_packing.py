@@ -0,0 +1,125 @@
+import json
+import sys
+
+import pytest
+
+from PIL import Image, ImageDraw
+
+import modules.extract.ocr_ai_gpt51_v1.main as ocr
+from modules.common.page_packing import compose_tile, ink_ratio, page_marker, split_marked_output
+
+META = '<meta name="ocr-metadata" data-ocr-quality="0.95" data-ocr-integrity="0.95" data-continuation-risk="0.1">'
+
+
+def _page(path, lines):
+    img = Image.new("RGB", (600, 900), "white")
+    draw = ImageDraw.Draw(img)
+    for i in range(lines):
+        draw.rectangle((60, 60 + i * 14, 540, 68 + i * 14), fill="black")
+    img.save(path)
+    return str(path)
+
+
+def test_compose_tile_and_split_markers(tmp_path):
+    paths = [_page(tmp_path / f"p{i}.png", 2) for i in range(3)]
+    tile = compose_tile(paths, str(tmp_path / "tile.jpg"), cell_width=300)
+    assert [c["label"] for c in tile["cells"]] == [1, 2, 3]
+    assert Image.open(tile["path"]).size == (tile["width"], tile["height"])
+    assert ink_ratio(paths[0]) < 0.03 < ink_ratio(_page(tmp_path / "dense.png", 50))
+
+    reply = f"{page_marker(1)}\n<p>a</p>\n{page_marker(2)}\n<p>b</p>"
+    assert split_marked_output(reply, [1, 2]) == {1: "<p>a</p>", 2: "<p>b</p>"}
+    assert split_marked_output(reply, [1, 2, 3]) is None
+    assert split_marked_output(reply.replace("PAGE 2", "PAGE 1"), [1, 2]) is None
+
+
+def test_plan_work_units_packs_sparse_pages_in_order():
+    work = [(i, {"page_number": i}) for i in range(1, 8)]
+    inks = {1: 0.01, 2: 0.2, 3: 0.01, 4: 0.01, 5: 0.2, 6: 0.01, 7: 0.0}
+    units = ocr.plan_work_units(work, inks, max_pages=3, max_ink=0.03, min_ink=0.002)
+    assert units == [(0, 2, 3), (1,), (4,), (5,), (6,)]
+
+
+def test_packed_output_budget_scales_with_pages_up_to_the_cap():
+    assert ocr.packed_output_tokens(4096, 1) == 4096
+    assert ocr.packed_output_tokens(4096, 3) == 12288
+    assert ocr.packed_output_tokens(4096, 8) == ocr.PACK_MAX_OUTPUT_TOKENS
+    assert ocr.packed_output_tokens(32768, 4) == 32768
+
+
+def _run(tmp_path, monkeypatch, reply_for_tile):
+    pages = []
+    for n in range(1, 6):
+        lines = 60 if n == 3 else 2  # page 3 is a dense text page
+        pages.append({"page": n, "page_number": n, "image": _page(tmp_path / f"page-{n:03d}.png", lines)})
+    manifest = tmp_path / "pages.jsonl"
+    manifest.write_text("".join(json.dumps(p) + "\n" for p in pages))
+    calls = []
+
+    def fake_call(model, system_prompt, user_text, data_uri, temperature, max_output_tokens, **kwargs):
+        if user_text.startswith("This image contains"):
+            n = int(user_text.split()[3])
+            assert max_output_tokens == ocr.packed_output_tokens(4096, n) == 4096 * n
+            calls.append(("tile", n))
+            return reply_for_tile(n), None, None
+        calls.append(("page", None))
+        return f"{META}\n<p>Single page text.</p>", None, None
+
+    monkeypatch.setattr(ocr, "_call_vision_model", fake_call)
+    monkeypatch.setattr(ocr, "OpenAI", lambda *a, **k: object())
+    monkeypatch.setattr(sys, "argv", [
+        "ocr", "--pages", str(manifest), "--outdir", str(tmp_path), "--model", "gpt-5.1",
+        "--pack-sparse-pages", "--pack-max-pages", "4", "--progress-file", str(tmp_path / "events.jsonl"),
+    ])
+    ocr.main()
+    rows = [json.loads(line) for line in (tmp_path / "pages_html.jsonl").read_text().splitlines()]
+    events = [json.loads(line) for line in (tmp_path / "events.jsonl").read_text().splitlines()]
+    assert events[-1]["extra"]["summary_metrics"]["requests"] == len(calls)
+    return rows, calls
+
+
+def test_sparse_pages_share_one_request(tmp_path, monkeypatch):
+    def reply(n):
+        return "\n".join(f"{page_marker(k)}\n{META}\n<h2>Chapter {k}</h2>" for k in range(1, n + 1))
+
+    rows, calls = _run(tmp_path, monkeypatch, reply)
+    assert calls == [("tile", 4), ("page", None)]
+    assert [r["page_number"] for r in rows] == [1, 2, 3, 4, 5]
+    packed = [r for r in rows if r.get("packed_tile")]
+    assert [r["html"].strip() for r in packed] == [f"<h2>Chapter {k}</h2>" for k in range(1, 5)]
+    assert packed[0]["packed_tile"] == {"tile_id": "tile-0001", "position": 1, "pages": [1, 2, 4, 5]}
+    assert packed[0]["ocr_quality"] == 0.95
+    assert "packed_tile" not in rows[2]
+
+
+def test_unverified_tile_falls_back_to_single_pages(tmp_path, monkeypatch):
+    def reply(n):
+        # One page comes back empty although it has text.
+        return "\n".join(f"{page_marker(k)}\n{META}\n" + ("" if k == 2 else f"<p>{k}</p>") for k in range(1, n + 1))
+
+    rows, calls = _run(tmp_path, monkeypatch, reply)
+    assert calls == [("tile", 4)] + [("page", None)] * 5
+    assert [r["page_number"] for r in rows] == [1, 2, 3, 4, 5]
+    assert all("packed_tile" not in r and r["html"].strip() == "<p>Single page text.</p>" for r in rows)
+
+
+def test_pages_after_a_failed_page_are_still_written(tmp_path, monkeypatch):
+    pages = [{"page": n, "page_number": n, "image": _page(tmp_path / f"page-{n:03d}.png", 2)} for n in range(1, 6)]
+    manifest = tmp_path / "pages.jsonl"
+    manifest.write_text("".join(json.dumps(p) + "\n" for p in pages))
+
+    def fake_call(model, system_prompt, user_text, data_uri, temperature, max_output_tokens, **kwargs):
+        if data_uri == pages[2]["image"]:
+            raise RuntimeError("provider error")
+        return f"{META}\n<p>Single page text.</p>", None, None
+
+    monkeypatch.setattr(ocr, "_page_data_uri", lambda image_path, max_long_side: image_path)
+    monkeypatch.setattr(ocr, "_call_vision_model", fake_call)
+    monkeypatch.setattr(ocr, "OpenAI", lambda *a, **k: object())
+    monkeypatch.setattr(sys, "argv", [
+        "ocr", "--pages", str(manifest), "--outdir", str(tmp_path), "--model", "gpt-5.1", "--concurrency", "3",
+    ])
+    with pytest.raises(RuntimeError, match="OCR failed on 1 page"):
+        ocr.main()
+    rows = [json.loads(line) for line in (tmp_path / "pages_html.jsonl").read_text().splitlines()]
+    assert sorted(r["page_number"] for r in rows) == [1, 2, 4, 5]
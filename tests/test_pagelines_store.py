@@ -0,0 +1,127 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from modules.common.pagelines_store import (
+    PACK_INDEX_NAME,
+    LegacyPageLines,
+    PackWriter,
+    PageLinesPack,
+    open_pagelines,
+    overlay_writer,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _page(n, text):
+    return {"schema_version": "pagelines_v1", "page": n, "lines": [{"text": text, "source": "tesseract"}]}
+
+
+def _write_legacy(ocr_dir: Path, pages):
+    pages_dir = ocr_dir / "pages"
+    pages_dir.mkdir(parents=True, exist_ok=True)
+    index = {}
+    for key, page in pages.items():
+        path = pages_dir / f"page-{int(key):03d}.json"
+        path.write_text(json.dumps(page), encoding="utf-8")
+        index[key] = str(path)
+    index_path = ocr_dir / "pagelines_index.json"
+    index_path.write_text(json.dumps(index), encoding="utf-8")
+    return index_path
+
+
+def _write_run(ocr_dir: Path, pages):
+    index_path = _write_legacy(ocr_dir, pages)
+    with PackWriter(str(ocr_dir)) as pack:
+        for key, page in pages.items():
+            pack.add(key, page)
+        pack.bind_legacy_index(str(index_path))
+    return index_path
+
+
+def test_pack_round_trip_and_random_access(tmp_path):
+    pages = {str(n): _page(n, f"{n} Turn to {n + 1}.") for n in range(1, 6)}
+    index_path = _write_run(tmp_path, pages)
+
+    store = open_pagelines(str(index_path))
+    assert isinstance(store, PageLinesPack)
+    assert store.keys() == ["1", "2", "3", "4", "5"]
+    assert store.get_page(4) == pages["4"]
+    assert store.get_page("9") is None
+    assert dict(store.iter_pages()) == pages
+    store.close()
+    # Data file is plain JSONL.
+    data_file = [p for p in os.listdir(tmp_path) if p.endswith(".pack")]
+    assert len(data_file) == 1
+    assert len((tmp_path / data_file[0]).read_text(encoding="utf-8").splitlines()) == 5
+
+
+def test_overlay_stores_only_changed_pages(tmp_path):
+    base_dir = tmp_path / "ocr_ensemble"
+    pages = {str(n): _page(n, f"page {n}") for n in range(1, 4)}
+    base_index = _write_run(base_dir, pages)
+    base_size = sum(p.stat().st_size for p in base_dir.glob("*.pack"))
+
+    source = open_pagelines(str(base_index))
+    esc_dir = tmp_path / "ocr_ensemble_gpt4v"
+    escalated = _page(2, "page 2 reread")
+    esc_index = _write_legacy(esc_dir, {"1": pages["1"], "2": escalated, "3": pages["3"]})
+    pack = overlay_writer(str(esc_dir), source)
+    pack.carry("1", pages["1"])
+    pack.add("2", escalated)
+    pack.carry("3", pages["3"])
+    pack.bind_legacy_index(str(esc_index))
+    pack.close()
+
+    overlay = open_pagelines(str(esc_index))
+    assert overlay.own_keys() == ["2"]
+    assert [p for _, p in overlay.iter_pages()] == [pages["1"], escalated, pages["3"]]
+    assert overlay.record_id("1") == source.record_id("1")
+    assert sum(p.stat().st_size for p in esc_dir.glob("*.pack")) < base_size
+    overlay.close()
+    source.close()
+
+
+def test_append_keeps_existing_offsets(tmp_path):
+    with PackWriter(str(tmp_path)) as pack:
+        pack.add("1", _page(1, "one"))
+    reader = PageLinesPack(str(tmp_path))
+    first = reader.record_id("1")
+    with PackWriter(str(tmp_path), append=True) as pack:
+        pack.add("2", _page(2, "two"))
+        pack.add("1", _page(1, "one again"))
+    assert reader.get_page("1") == _page(1, "one")
+    fresh = PageLinesPack(str(tmp_path))
+    assert fresh.keys() == ["1", "2"]
+    assert fresh.get_page("1") == _page(1, "one again")
+    assert fresh.record_id("1")[1] > first[1]
+    reader.close()
+    fresh.close()
+
+
+def test_stale_pack_falls_back_to_legacy_files(tmp_path):
+    pages = {"1": _page(1, "old")}
+    index_path = _write_run(tmp_path, pages)
+    # A module that only knows the legacy layout rewrites the index and page files.
+    _write_legacy(tmp_path, {"1": _page(1, "new"), "2": _page(2, "added")})
+
+    store = open_pagelines(str(index_path))
+    assert isinstance(store, LegacyPageLines)
+    assert store.get_page("1") == _page(1, "new")
+    assert store.keys() == ["1", "2"]
+    assert open_pagelines(str(tmp_path / PACK_INDEX_NAME)).get_page("1") == _page(1, "old")
+
+
+def test_pagelines_to_clean_reads_pack(tmp_path):
+    pages = {str(n): _page(n, str(n * 10)) for n in (2, 1, 10)}
+    index_path = _write_run(tmp_path, pages)
+    for path in (tmp_path / "pages").iterdir():
+        path.unlink()
+    out = tmp_path / "pages_clean.jsonl"
+    subprocess.check_call([sys.executable, "-m", "modules.intake.pagelines_to_clean_v1.main",
+                           "--index", str(index_path), "--out", str(out)], cwd=ROOT)
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [(r["page"], r["clean_text"]) for r in rows] == [(1, "10"), (2, "20"), (10, "100")]
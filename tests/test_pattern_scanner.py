@@ -0,0 +1,75 @@
+import re
+
+from modules.adapter.edgecase_scanner_v1.main import EDGECASE_SCANNER
+from modules.common.pattern_scanner import PatternScanner, ScanPattern
+from modules.enrich.extract_combat_v1.main import OUTCOME_SCANNER
+from modules.enrich.extract_inventory_v1.main import INVENTORY_SCANNER
+from modules.enrich.extract_stat_checks_v1.main import STAT_CHECK_SCANNER
+from modules.enrich.extract_stat_modifications_v1.main import STAT_MOD_SCANNER
+from modules.enrich.sequence_order_v1.main import SEQUENCE_SCANNER
+
+SAMPLES = [
+    "If you win, turn to 45. If you lose, turn to 12.",
+    "Test your Luck. If you are Lucky, turn to 100; if you are Unlucky, turn to 212.",
+    "Roll one die. If you roll 1-3, turn to 7. Otherwise lose 2 STAMINA points.",
+    "Roll two dice and add your SKILL. If the total is greater, turn to 300.",
+    "<a id=\"12\"></a><p>You may Escape by turning to 88. Your possessions are taken.</p>",
+    "As soon as you defeat the ORC, turn to 66. If your STAMINA is reduced to zero, turn to 2.",
+    "If you have the Silver Key and the Gold Ring, you may TURN TO 150.",
+    "FIGHT THE TROLL. IF YOU KILL IT, TURN TO 9. If you are killed, your adventure ends.",
+    "You find a Silver Key and 3 Gold Pieces. Add the Rope to your Backpack. The dagger is yours.",
+    "The chest contains a potion. You drop the shield. You take the map out of your pack.",
+    "Your possessions are taken. Later you recover all of your possessions; the rest of your possessions are here.",
+    "Have you got the Amulet? If you have, turn to 40. If you have not, turn to 80. Have you drunk the potion?",
+    "If the lantern is in your backpack, turn to 5. If you do not have it, turn to 6. Put it in your bag.",
+    "Reduce your SKILL by 2 and lose 1 LUCK. Gain 4 STAMINA and 2 LUCK. Restore your Stamina by 3.",
+    "Roll one die and lose 2 STAMINA points for each. Roll two dice; each one reduces your SKILL by one.",
+    "Add one to each of your SKILL, STAMINA and LUCK scores. Roll one die and add 2 to the total, "
+    "then reduce your STAMINA by 1 for each. Roll two dice and deduct the number from your STAMINA.",
+    "You seize the torch, putting the coin in your pocket; put the ring in your pocket. Your sword is taken from you.",
+    "All your possessions are lost. You are stripped of all your possessions, deprived of your possessions, "
+    "and your possessions have been confiscated. All your possessions are here; your possessions are returned.",
+    "You drink the potion, using the rope to climb. Put them in your sack, then put them in your backpack.",
+    "Roll one die, add 1 to the number, and reduce your STAMINA score by the total.",
+    "DIRT ROADı nothing to see here",
+    "",
+]
+
+
+def _span(match):
+    return None if match is None else (match.start(), match.end(), match.groups())
+
+
+def test_keywords_are_required_and_tuples_mean_any_of():
+    scanner = PatternScanner([
+        ScanPattern("turn", re.compile(r"turn to (\d+)", re.IGNORECASE), ("turn",)),
+        ScanPattern("fight", re.compile(r"(fight|battle) the (\w+)", re.IGNORECASE), (("fight", "battle"), "the")),
+        ScanPattern("any", re.compile(r"\d+")),
+    ])
+    scan = scanner.scan("Battle the GOBLIN, then TURN TO 7")
+    assert scan.present == {"battle", "the", "turn"}
+    assert scan.search("turn").group(1) == "7"
+    assert scan.search("fight").group(2) == "GOBLIN"
+    assert not scanner.scan("Nothing here 12").possible("fight")
+    assert [m.name for m in scan.matches()] == ["fight", "turn", "any"]
+    assert scanner.scan("Battle the GOBLIN, then TURN TO 7") is scan
+    assert scan.finditer("any") is scan.finditer("any")
+
+
+def test_prefilter_follows_ignorecase_folding():
+    scanner = PatternScanner([ScanPattern("dirt", re.compile(r"dirt", re.IGNORECASE), ("dirt",))])
+    assert scanner.scan("DıRT").search("dirt") is not None
+    assert scanner.scan("STRASSE").possible("dirt") is False
+
+
+def test_adopted_scanners_match_plain_regex():
+    for scanner in (EDGECASE_SCANNER, SEQUENCE_SCANNER, OUTCOME_SCANNER, STAT_CHECK_SCANNER,
+                    INVENTORY_SCANNER, STAT_MOD_SCANNER):
+        for text in SAMPLES:
+            scan = scanner.scan(text)
+            for name, pattern in scanner.patterns.items():
+                subject = text.lower() if pattern.lower else text
+                assert _span(scan.search(name)) == _span(pattern.regex.search(subject)), (name, text)
+                assert [_span(m) for m in scan.finditer(name)] == [
+                    _span(m) for m in pattern.regex.finditer(subject)
+                ], (name, text)
@@ -0,0 +1,51 @@
+import shutil
+
+import modules.common.pdf_session as pdf_session
+from modules.common.pdf_session import PdfSession, INVENTORY_FILENAME
+from modules.common.utils import read_jsonl
+from modules.extract.extract_ocr_ensemble_v1.main import extract_pdf_text
+
+PDF = "testdata/tbotb-mini.pdf"
+
+
+def test_inventory_sweep_writes_sidecar(tmp_path):
+    with PdfSession(PDF, cache_dir=str(tmp_path)) as session:
+        rows = session.inventory(text=True)
+    assert sorted(rows) == [1, 2, 3]
+    path = tmp_path / session.sha256 / INVENTORY_FILENAME
+    saved = list(read_jsonl(str(path)))
+    assert [r["page"] for r in saved] == [1, 2, 3]
+    for row in saved:
+        assert row["schema_version"] == "pdf_inventory_v1"
+        assert row["page_count"] == 3
+        assert row["width_pts"] > 0 and row["height_pts"] > 0
+        assert row["image_xobject_count"] == 0 and row["max_image_dpi"] is None
+        assert row["text_chars"] == len(row["text"].strip())
+    assert any(r["text_chars"] for r in saved)
+
+
+def test_cached_inventory_skips_reopening_pdf(tmp_path, monkeypatch):
+    with PdfSession(PDF, cache_dir=str(tmp_path)) as session:
+        expected = session.page_text(2)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("PDF reopened")
+
+    monkeypatch.setattr(pdf_session, "load_pdf_reader", fail)
+    monkeypatch.setattr(PdfSession, "_plumber_doc", fail)
+    fresh = PdfSession(PDF, cache_dir=str(tmp_path))
+    assert fresh.page_count == 3
+    assert fresh.page_text(2) == expected
+
+
+def test_extract_pdf_text_uses_shared_session(tmp_path, monkeypatch):
+    monkeypatch.setenv(pdf_session.PDF_INVENTORY_ENV, str(tmp_path))
+    monkeypatch.setattr(pdf_session, "_sessions", {})
+    pdf = tmp_path / "book.pdf"
+    shutil.copy(PDF, pdf)
+    first = extract_pdf_text(str(pdf), 1)
+    assert first.strip()
+    assert len(pdf_session._sessions) == 1
+    assert extract_pdf_text(str(pdf), 1) == first
+    assert len(pdf_session._sessions) == 1
+    assert extract_pdf_text(str(pdf), 99) == ""
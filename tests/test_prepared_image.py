@@ -0,0 +1,82 @@
+import base64
+import io
+import shutil
+
+from PIL import Image
+
+from modules.common.prepared_image import PreparedImageCache
+
+
+def _page(path, size=(400, 600), color="white"):
+    img = Image.new("RGB", size, color)
+    img.paste((0, 0, 0), (50, 50, 150, 120))
+    img.save(path)
+    return str(path)
+
+
+def _decode(uri):
+    header, b64 = uri.split(",", 1)
+    return header, Image.open(io.BytesIO(base64.b64decode(b64)))
+
+
+def test_untouched_image_is_sent_as_file_bytes(tmp_path):
+    path = _page(tmp_path / "page-001.png")
+    cache = PreparedImageCache()
+    uri = cache.data_uri(path, max_long_side=1000)
+    with open(path, "rb") as f:
+        assert uri == "data:image/png;base64," + base64.b64encode(f.read()).decode("utf-8")
+
+    # Same bytes under another name share the entry (keyed by content hash).
+    copy = tmp_path / "copy.png"
+    shutil.copy(path, copy)
+    assert cache.data_uri(str(copy), max_long_side=1000) == uri
+    assert cache.stats()["hits"] == 1
+
+
+def test_crop_and_downscale_are_reencoded_and_cached_on_disk(tmp_path):
+    path = _page(tmp_path / "page-001.png")
+    cache_dir = tmp_path / "cache"
+    first = PreparedImageCache(cache_dir=str(cache_dir))
+    prepared = first.prepare(path, crop_box=(0, 0, 400, 300), max_long_side=200, fmt="jpeg", quality=80)
+    header, img = _decode(prepared.uri)
+    assert header == "data:image/jpeg;base64"
+    assert img.size == (prepared.width, prepared.height) == (200, 150)
+    assert prepared.pixel_box == (0, 0, 400, 300)
+    assert len(list(cache_dir.rglob("*.jpeg"))) == 1
+
+    # A fresh process (new cache object) reuses the encoded file instead of re-encoding.
+    second = PreparedImageCache(cache_dir=str(cache_dir))
+    again = second.prepare(path, crop_box=(0, 0, 400, 300), max_long_side=200, fmt="JPEG", quality=80)
+    assert again == prepared
+    assert second.stats()["disk_hits"] == 1
+
+
+def test_changed_image_is_prepared_again(tmp_path):
+    path = _page(tmp_path / "page-001.png")
+    cache = PreparedImageCache()
+    before = cache.data_uri(path, crop_box=(0, 0, 100, 100))
+    _page(tmp_path / "page-001.png", color="gray")
+    assert cache.data_uri(path, crop_box=(0, 0, 100, 100)) != before
+
+
+def test_memory_and_disk_tiers_are_bounded(tmp_path):
+    paths = [_page(tmp_path / f"page-{i}.png", size=(300 + i, 300)) for i in range(4)]
+    cache = PreparedImageCache(cache_dir=str(tmp_path / "cache"), max_entries=2, max_disk_bytes=1)
+    for path in paths:
+        cache.data_uri(path, crop_box=(0, 0, 200, 200))
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["misses"] == 4
+    assert len(list((tmp_path / "cache").rglob("*.png"))) <= 1
+
+
+def test_ocr_page_data_uri_downscales_large_pages(tmp_path, monkeypatch):
+    import modules.common.prepared_image as prepared_image
+    from modules.extract.ocr_ai_gpt51_v1.main import _page_data_uri
+
+    monkeypatch.setattr(prepared_image, "_default_cache", PreparedImageCache())
+
+    path = _page(tmp_path / "page-001.png", size=(1000, 2000))
+    header, img = _decode(_page_data_uri(path, 500))
+    assert header == "data:image/jpeg;base64"
+    assert img.size == (250, 500)
+    assert _page_data_uri(path, 0).startswith("data:image/png;base64,")
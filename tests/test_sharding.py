@@ -0,0 +1,102 @@
+import json
+import os
+import sys
+
+import pytest
+
+from driver import build_plan, run_sharded_stage
+from modules.common import sharding
+from modules.common.utils import ProgressLogger, read_jsonl, save_jsonl
+
+STAGE_SCRIPT = """
+import argparse, json, os
+p = argparse.ArgumentParser()
+p.add_argument("--pages"); p.add_argument("--outdir"); p.add_argument("--out")
+p.add_argument("--state-file"); p.add_argument("--progress-file")
+a = p.parse_args()
+rows = [json.loads(l) for l in open(a.pages) if l.strip()]
+with open(os.environ["CALLS_LOG"], "a") as f:
+    f.write(json.dumps([r["page_number"] for r in rows]) + "\\n")
+if any(r["page_number"] == int(os.environ.get("FAIL_PAGE", "0")) for r in rows):
+    raise SystemExit(3)
+os.makedirs(os.path.join(a.outdir, "raw"), exist_ok=True)
+with open(a.out, "w") as f:
+    for r in rows:
+        raw = os.path.join(a.outdir, "raw", "page-%03d.txt" % r["page_number"])
+        open(raw, "w").write(r["text"])
+        f.write(json.dumps({"page_number": r["page_number"], "text": r["text"].upper(), "raw_path": raw}) + "\\n")
+"""
+
+
+def test_normalize_shard_conf():
+    assert sharding.normalize_shard_conf(None, "s") is None
+    assert sharding.normalize_shard_conf({"by": "page", "size": 5}, "s") == {
+        "by": "page", "size": 5, "workers": sharding.DEFAULT_SHARD_WORKERS, "input": None,
+    }
+    for bad in ({"by": "section", "size": 5}, {"size": 0}, {"size": 5, "workers": 0}, {"size": 5, "bogus": 1}, 7):
+        with pytest.raises(SystemExit):
+            sharding.normalize_shard_conf(bad, "s")
+
+
+def test_split_by_page_keeps_page_rows_together():
+    rows = [{"page_number": 1}, {"page_number": 2}, {"note": "x"}, {"page_number": 2},
+            {"page_number": 3}, {"page": 4}, {"page_number": 5}]
+    shards = sharding.split_by_page(rows, 2)
+    assert [[r.get("page_number", r.get("page")) for r in s] for s in shards] == [[1, 2, None, 2], [3, 4], [5]]
+
+
+def test_build_plan_carries_shard_conf():
+    registry = {"m_pages": {"module_id": "m_pages", "stage": "adapter", "entrypoint": "m.py"}}
+    recipe = {"stages": [{"id": "blocks", "stage": "adapter", "module": "m_pages", "shard": {"size": 10, "workers": 2}}]}
+    plan = build_plan(recipe, registry)
+    assert plan["nodes"]["blocks"]["shard"]["size"] == 10
+    recipe["stages"][0]["shard"] = {"by": "chapter", "size": 10}
+    with pytest.raises(SystemExit):
+        build_plan(recipe, registry)
+
+
+def _calls(path):
+    return [json.loads(line) for line in open(path)] if os.path.exists(path) else []
+
+
+def test_sharded_stage_merges_in_page_order_and_resumes(tmp_path, monkeypatch):
+    script = tmp_path / "stage.py"
+    script.write_text(STAGE_SCRIPT, encoding="utf-8")
+    pages = tmp_path / "pages.jsonl"
+    save_jsonl(str(pages), [{"page_number": i, "text": f"page {i}"} for i in range(1, 8)])
+    module_dir = tmp_path / "run" / "03_stage"
+    module_dir.mkdir(parents=True)
+    artifact = str(module_dir / "pages_out.jsonl")
+    state, progress = str(tmp_path / "run" / "pipeline_state.json"), str(tmp_path / "run" / "pipeline_events.jsonl")
+    cmd = [sys.executable, str(script), "--pages", str(pages), "--outdir", str(module_dir), "--out", artifact,
+           "--state-file", state, "--progress-file", progress]
+    conf = sharding.normalize_shard_conf({"size": 3, "workers": 2}, "stage")
+    logger = ProgressLogger(state_path=state, progress_path=progress, run_id="r")
+    calls_log = str(tmp_path / "calls.log")
+
+    def run(**env):
+        full_env = dict(os.environ, CALLS_LOG=calls_log, **env)
+        return run_sharded_stage("stage", "m", cmd, str(tmp_path), full_env, conf, {"pages": str(pages)},
+                                 artifact, state, progress, logger)
+
+    assert run(FAIL_PAGE="5").returncode == 3
+    assert sorted(_calls(calls_log)) == [[1, 2, 3], [4, 5, 6], [7]]
+    assert not os.path.exists(artifact)
+
+    os.remove(calls_log)
+    assert run().returncode == 0
+    assert _calls(calls_log) == [[4, 5, 6]]
+    rows = list(read_jsonl(artifact))
+    assert [r["page_number"] for r in rows] == list(range(1, 8))
+    assert rows[4]["text"] == "PAGE 5"
+    for r in rows:
+        assert r["raw_path"] == str(module_dir / "raw" / f"page-{r['page_number']:03d}.txt")
+        assert os.path.exists(r["raw_path"])
+    marker = json.load(open(module_dir / "shards" / "0002" / sharding.SHARD_MARKER))
+    assert marker["pages"] == [4, 6] and marker["rows_out"] == 3
+
+    os.remove(calls_log)
+    assert run().returncode == 0
+    assert _calls(calls_log) == []
+    events = [json.loads(line) for line in open(progress)]
+    assert any("shard 2/3" in (e.get("message") or "") for e in events)
@@ -0,0 +1,121 @@
+import random
+
+from modules.adapter.merge_coarse_fine_v1.main import merge_portions
+from modules.common.spatial_index import BoxIndex, IntervalIndex
+from modules.extract.crop_illustrations_guided_v1.main import _box_iou, _dedupe_boxes, _prune_contained_boxes
+
+
+def _overlaps(a_start, a_end, b_start, b_end):
+    return not (a_end < b_start or b_end < a_start)
+
+
+def test_interval_index_matches_pairwise_scan():
+    rng = random.Random(7)
+    spans = [(s, s + rng.randint(-1, 12), i) for i, s in enumerate(rng.randint(0, 200) for _ in range(300))]
+    index = IntervalIndex(spans[:150])
+    for s, e, i in spans[150:]:
+        index.add(s, e, i)
+    assert len(index) == 300
+    for _ in range(200):
+        qs = rng.randint(-5, 210)
+        qe = qs + rng.randint(0, 15)
+        expected = {i for s, e, i in spans if _overlaps(s, e, qs, qe)}
+        assert set(index.overlapping(qs, qe)) == expected
+        assert index.any_overlap(qs, qe) == bool(expected)
+        covered = {p for s, e, _ in spans for p in range(s, e + 1)}
+        assert index.covered_length(qs, qe) == len(covered & set(range(qs, qe + 1)))
+
+
+def test_greedy_acceptance_matches_pairwise_scan():
+    rng = random.Random(3)
+    hyps = [(s, s + rng.randint(0, 6)) for s in (rng.randint(1, 120) for _ in range(400))]
+    accepted_ref = []
+    for ps, pe in hyps:
+        if not any(_overlaps(ps, pe, a, b) for a, b in accepted_ref):
+            accepted_ref.append((ps, pe))
+    index, accepted = IntervalIndex(), []
+    for ps, pe in hyps:
+        if not index.any_overlap(ps, pe):
+            accepted.append((ps, pe))
+            index.add(ps, pe)
+    assert accepted == accepted_ref
+
+
+def test_merge_portions_uncovered_ratio():
+    fine = [{"page_start": 1, "page_end": 3}, {"page_start": 3, "page_end": 5}, {"page_start": 9, "page_end": 9}]
+    coarse = [
+        {"page_start": 4, "page_end": 9, "title": "half"},   # 6, 7, 8 uncovered
+        {"page_start": 2, "page_end": 9, "title": "most"},   # 6, 7, 8 uncovered of 8
+        {"page_start": 7, "page_end": 6, "title": "empty"},
+    ]
+    titles = {p.get("title") for p in merge_portions(fine, coarse, uncovered_thresh=0.5)}
+    assert titles == {None, "half"}
+
+
+def _random_boxes(rng, n):
+    boxes = []
+    for _ in range(n):
+        x0, y0 = rng.randint(0, 900), rng.randint(0, 1200)
+        w, h = rng.randint(1, 300), rng.randint(1, 300)
+        boxes.append({"x0": x0, "y0": y0, "x1": x0 + w, "y1": y0 + h})
+        if rng.random() < 0.3:  # near-duplicate
+            d = rng.randint(-4, 4)
+            boxes.append({"x0": x0 + d, "y0": y0 - d, "x1": x0 + w + d, "y1": y0 + h})
+    return boxes
+
+
+def _dedupe_reference(boxes, iou_threshold, center_threshold, size_ratio_threshold):
+    kept = []
+    for box in boxes:
+        cx, cy = (box["x0"] + box["x1"]) / 2.0, (box["y0"] + box["y1"]) / 2.0
+        duplicate = False
+        for prev in kept:
+            if _box_iou(box, prev) >= iou_threshold:
+                duplicate = True
+                break
+            pcx, pcy = (prev["x0"] + prev["x1"]) / 2.0, (prev["y0"] + prev["y1"]) / 2.0
+            if abs(cx - pcx) <= center_threshold and abs(cy - pcy) <= center_threshold:
+                w, h = max(1, box["x1"] - box["x0"]), max(1, box["y1"] - box["y0"])
+                pw, ph = max(1, prev["x1"] - prev["x0"]), max(1, prev["y1"] - prev["y0"])
+                if abs(w - pw) / max(w, pw) <= size_ratio_threshold and abs(h - ph) / max(h, ph) <= size_ratio_threshold:
+                    duplicate = True
+                    break
+        if not duplicate:
+            kept.append(box)
+    return kept
+
+
+def _prune_reference(boxes, contain_ratio, min_area_ratio):
+    areas = [float(max(0, b["x1"] - b["x0"]) * max(0, b["y1"] - b["y0"])) for b in boxes]
+    keep = [True] * len(boxes)
+    for i, a in enumerate(boxes):
+        if not keep[i]:
+            continue
+        for j, b in enumerate(boxes):
+            if i == j or not keep[j]:
+                continue
+            ix0, iy0 = max(a["x0"], b["x0"]), max(a["y0"], b["y0"])
+            ix1, iy1 = min(a["x1"], b["x1"]), min(a["y1"], b["y1"])
+            if ix1 <= ix0 or iy1 <= iy0 or areas[j] <= 0:
+                continue
+            if (ix1 - ix0) * (iy1 - iy0) / areas[j] >= contain_ratio and areas[i] >= areas[j] * min_area_ratio:
+                keep[i] = False
+                break
+    return [b for k, b in zip(keep, boxes) if k]
+
+
+def test_box_dedupe_and_prune_match_pairwise_scan():
+    rng = random.Random(11)
+    for _ in range(20):
+        boxes = _random_boxes(rng, 60)
+        assert _dedupe_boxes(boxes, 0.9, 8, 0.03) == _dedupe_reference(boxes, 0.9, 8, 0.03)
+        assert _dedupe_boxes(boxes) == _dedupe_reference(boxes, 0.95, 10, 0.02)
+        assert _prune_contained_boxes(boxes, 0.9, 1.5) == _prune_reference(boxes, 0.9, 1.5)
+
+
+def test_box_index_query_touches_padded_box():
+    index = BoxIndex(cell_size=10)
+    index.extend([("a", (0, 0, 5, 5)), ("b", (20, 20, 30, 30)), ("c", (8, 0, 6, 3))])
+    assert index.query((5, 5, 19, 19)) == ["a"]
+    assert index.query((5, 5, 19, 19), pad=1) == ["a", "b"]
+    assert index.query((7, 1, 7, 1)) == ["c"]
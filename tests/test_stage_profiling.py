@@ -0,0 +1,83 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from driver import _render_instrumentation_md
+from modules.common import profiling
+
+
+def test_parse_profile_stages_all_and_list():
+    topo = ["extract", "clean", "build"]
+    assert profiling.parse_profile_stages("all", topo) == set(topo)
+    assert profiling.parse_profile_stages("clean, build", topo) == {"clean", "build"}
+    assert profiling.parse_profile_stages(None, topo) == set()
+    with pytest.raises(SystemExit):
+        profiling.parse_profile_stages("clean,bogus", topo)
+
+
+def test_cprofile_wrap_writes_prof_collapsed_and_summary(tmp_path):
+    script = tmp_path / "busy.py"
+    script.write_text(
+        "def leaf(n):\n"
+        "    return sum(i * i for i in range(n))\n"
+        "def mid():\n"
+        "    return [leaf(20000) for _ in range(20)]\n"
+        "mid()\n",
+        encoding="utf-8",
+    )
+    cmd = [sys.executable, str(script)]
+    wrapped, meta = profiling.wrap_command(cmd, str(tmp_path / "01_busy"), "run-x", "busy", prefer_sampling=False)
+    assert wrapped[1:3] == ["-m", "cProfile"]
+    subprocess.run(wrapped, check=True)
+
+    summary = profiling.finalize_profile(meta, top_n=5)
+    assert summary["run_id"] == "run-x"
+    assert summary["stage_id"] == "busy"
+    assert summary["profiler"] == "cProfile"
+    assert 0 < len(summary["top_functions"]) <= 5
+
+    collapsed = open(meta["paths"]["collapsed"], encoding="utf-8").read().splitlines()
+    assert collapsed
+    assert any("leaf (busy.py:1)" in line and "mid (busy.py:3)" in line for line in collapsed)
+    for line in collapsed:
+        stack, _, value = line.rpartition(" ")
+        assert stack and int(value) > 0
+
+    with open(meta["paths"]["summary"], encoding="utf-8") as f:
+        assert json.load(f)["stage_id"] == "busy"
+
+
+def test_summarize_collapsed_counts_leaf_frames(tmp_path):
+    path = tmp_path / "stacks.collapsed"
+    path.write_text("main;a;b 30\nmain;a 10\nmain;c 5\n", encoding="utf-8")
+    rows = profiling.summarize_collapsed(str(path), top_n=2, sample_rate=10)
+    assert [r["function"] for r in rows] == ["b", "a"]
+    assert rows[0]["self_seconds"] == 3.0
+    assert rows[1]["cumulative_seconds"] == 4.0
+
+
+def test_instrumentation_md_includes_profile_table(tmp_path):
+    run_data = {
+        "run_id": "run-x",
+        "stages": [{
+            "id": "busy",
+            "status": "done",
+            "llm_totals": {},
+            "extra": {"profile": {
+                "run_id": "run-x",
+                "stage_id": "busy",
+                "profiler": "cProfile",
+                "prof_path": "01_busy/profile_run-x_busy.prof",
+                "collapsed_path": "01_busy/profile_run-x_busy.collapsed",
+                "top_functions": [{"function": "leaf (busy.py:1)", "self_seconds": 1.5, "cumulative_seconds": 2.0}],
+            }},
+        }],
+    }
+    md_path = tmp_path / "instrumentation.md"
+    _render_instrumentation_md(run_data, str(md_path))
+    text = md_path.read_text(encoding="utf-8")
+    assert "## Stage profiles" in text
+    assert "### busy (cProfile, run run-x)" in text
+    assert "| `leaf (busy.py:1)` | 1.500 | 2.000 |" in text
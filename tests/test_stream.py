@@ -0,0 +1,163 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from driver import build_plan
+from modules.common import stream
+from modules.common.utils import read_jsonl
+
+
+def _page(n):
+    return {"page": n, "page_number": n, "html": f"<p>Page {n} text</p>"}
+
+
+def _slow_writer(path, rows, delay=0.02, status="done"):
+    def run():
+        with open(path, "w", encoding="utf-8") as f:
+            for row in rows:
+                line = json.dumps(row)
+                # Split each row across two writes so readers see partial lines.
+                f.write(line[:5])
+                f.flush()
+                time.sleep(delay)
+                f.write(line[5:] + "\n")
+                f.flush()
+        stream.mark_complete(path, status)
+
+    t = threading.Thread(target=run)
+    t.start()
+    return t
+
+
+def test_tail_rows_reads_until_complete(tmp_path):
+    path = str(tmp_path / "pages.jsonl")
+    writer = _slow_writer(path, [_page(n) for n in range(1, 6)])
+    rows = list(stream.tail_rows(path, poll_seconds=0.01, timeout=10))
+    writer.join()
+    assert [r["page_number"] for r in rows] == [1, 2, 3, 4, 5]
+
+
+def test_tail_rows_raises_when_producer_failed(tmp_path):
+    path = str(tmp_path / "pages.jsonl")
+    writer = _slow_writer(path, [_page(1)], status="failed")
+    with pytest.raises(stream.StreamError):
+        list(stream.tail_rows(path, poll_seconds=0.01, timeout=10))
+    writer.join()
+
+
+def test_iter_rows_without_stream_env_reads_file(tmp_path, monkeypatch):
+    monkeypatch.delenv(stream.STREAM_ENV, raising=False)
+    path = str(tmp_path / "pages.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(_page(1)) + "\n")
+    assert not stream.is_streamed(path)
+    assert [r["page"] for r in stream.iter_rows(path)] == [1]
+
+
+def test_iter_rows_stamps_streamed_rows(tmp_path, monkeypatch):
+    path = str(tmp_path / "pages.jsonl")
+    monkeypatch.setenv(stream.STREAM_ENV, json.dumps({path: {"schema": "page_html_v1", "module_id": "ocr", "run_id": "r1"}}))
+    writer = _slow_writer(path, [_page(1), {"page": 2, "error": "boom"}, _page(3)])
+    rows = list(stream.iter_rows(path, poll_seconds=0.01))
+    writer.join()
+    assert [r["page"] for r in rows] == [1, 3]
+    assert rows[0]["schema_version"] == "page_html_v1"
+    assert rows[0]["module_id"] == "ocr" and rows[0]["run_id"] == "r1"
+
+
+def test_streamed_consumer_module_matches_batch_output(tmp_path):
+    pages = [_page(n) for n in range(1, 5)]
+    batch_in = tmp_path / "batch.jsonl"
+    batch_in.write_text("".join(json.dumps(p) + "\n" for p in pages), encoding="utf-8")
+    stream_in = str(tmp_path / "streamed.jsonl")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def run_blocks(pages_path, out_name, env):
+        return subprocess.Popen([sys.executable, "-m", "modules.adapter.html_to_blocks_v1.main",
+                                 "--pages", pages_path, "--outdir", str(tmp_path), "--out", out_name],
+                                cwd=root, env=env)
+
+    assert run_blocks(str(batch_in), "batch_blocks.jsonl", dict(os.environ)).wait() == 0
+    env = dict(os.environ, **{stream.STREAM_ENV: json.dumps({stream_in: {}})})
+    # The consumer starts before the producer has written anything.
+    proc = run_blocks(stream_in, "streamed_blocks.jsonl", env)
+    writer = _slow_writer(stream_in, pages)
+    writer.join()
+    assert proc.wait(timeout=60) == 0
+
+    def load(name):
+        return [{k: v for k, v in r.items() if k != "created_at"} for r in read_jsonl(str(tmp_path / name))]
+
+    assert load("streamed_blocks.jsonl") == load("batch_blocks.jsonl")
+
+
+def test_build_plan_validates_stream_edges():
+    registry = {
+        "ocr": {"module_id": "ocr", "stage": "extract", "entrypoint": "m.py", "output_schema": "page_html_v1"},
+        "blocks": {"module_id": "blocks", "stage": "adapter", "entrypoint": "m.py", "streaming_input": True},
+        "batch": {"module_id": "batch", "stage": "adapter", "entrypoint": "m.py"},
+    }
+
+    def plan(consumer, **extra):
+        stages = [
+            {"id": "ocr", "stage": "extract", "module": "ocr", "out": "pages.jsonl", **extra},
+            {"id": "c", "stage": "adapter", "module": consumer, "needs": ["ocr"], "stream": ["ocr"]},
+        ]
+        return build_plan({"stages": stages}, registry)
+
+    assert plan("blocks")["nodes"]["c"]["stream_from"] == ["ocr"]
+    with pytest.raises(SystemExit):
+        plan("batch")
+    with pytest.raises(SystemExit):
+        plan("blocks", out="pages.jsonl.zst")
+    with pytest.raises(SystemExit):
+        plan("blocks", shard={"size": 5})
+    with pytest.raises(SystemExit):
+        build_plan({"stages": [
+            {"id": "ocr", "stage": "extract", "module": "ocr"},
+            {"id": "c", "stage": "adapter", "module": "blocks", "stream": ["other"]},
+        ]}, registry)
+
+
+def _write_rows(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("".join(json.dumps(r) + "\n" for r in rows))
+
+
+def _swap_on_first_check(monkeypatch, path, complete):
+    """Replace the file (and optionally mark it complete) just before the reader's rewrite check."""
+    same_file = stream._same_file
+    swapped = []
+
+    def racing(fd_stat, p):
+        if not swapped:
+            swapped.append(p)
+            if complete:
+                stream.mark_complete(p, "done")
+            tmp = p + ".tmp"
+            _write_rows(tmp, [_page(1)])
+            os.replace(tmp, p)
+        return same_file(fd_stat, p)
+
+    monkeypatch.setattr(stream, "_same_file", racing)
+
+
+def test_tail_rows_finishes_when_completed_file_is_stamped_mid_poll(tmp_path, monkeypatch):
+    path = str(tmp_path / "pages.jsonl")
+    _write_rows(path, [_page(1), _page(2)])
+    _swap_on_first_check(monkeypatch, path, complete=True)
+    rows = list(stream.tail_rows(path, poll_seconds=0.01, timeout=10))
+    assert [r["page_number"] for r in rows] == [1, 2]
+
+
+def test_tail_rows_raises_when_incomplete_file_is_rewritten(tmp_path, monkeypatch):
+    path = str(tmp_path / "pages.jsonl")
+    _write_rows(path, [_page(1), _page(2)])
+    _swap_on_first_check(monkeypatch, path, complete=False)
+    with pytest.raises(stream.StreamError, match="rewritten"):
+        list(stream.tail_rows(path, poll_seconds=0.01, timeout=10))
@@ -0,0 +1,90 @@
+import json
+import sys
+import threading
+import time
+
+from PIL import Image
+
+from modules.common.table_rescue import PageImageCache, RateLimiter, run_rescue_jobs
+
+GENEALOGY_TABLE = (
+    "<table><tr><th>NAME</th><th>BORN</th><th>MARRIED</th><th>SPOUSE</th>"
+    "<th>BOY</th><th>GIRL</th><th>DIED</th></tr>"
+    "<tr><td>Ann</td><td>1901</td><td>1920</td><td>Bob</td><td>1</td><td>2</td><td></td></tr></table>"
+)
+
+
+def test_run_rescue_jobs_overlaps_and_keeps_order():
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def worker(job):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.05 if job % 2 else 0.01)
+        with lock:
+            active["now"] -= 1
+        return job * 10
+
+    seen = []
+    results = run_rescue_jobs(list(range(6)), worker, concurrency=3,
+                              on_done=lambda done, job, result: seen.append(done))
+    assert results == [0, 10, 20, 30, 40, 50]
+    assert active["peak"] > 1
+    assert seen == [1, 2, 3, 4, 5, 6]
+
+
+def test_rate_limiter_spaces_request_starts():
+    limiter = RateLimiter(50)
+    started = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    assert time.monotonic() - started >= 0.05
+    RateLimiter(0).acquire()
+
+
+def test_page_image_cache_encodes_each_crop_once(tmp_path):
+    path = tmp_path / "page.png"
+    Image.new("RGB", (40, 100), "white").save(path)
+    cache = PageImageCache()
+
+    first, meta = cache.crop(str(path), 0.0, 0.42)
+    again, _ = cache.crop(str(path), 0.0, 0.42)
+    assert first == again and first.startswith("data:image/png;base64,")
+    assert meta["pixel_box"] == [0, 0, 40, 42]
+    assert cache.full_image(str(path)) == cache.full_image(str(path))
+    assert cache.stats()["hits"] == 2
+
+
+def test_onward_rescue_runs_concurrently_and_reports_in_page_order(tmp_path, monkeypatch):
+    from modules.adapter.table_rescue_onward_tables_v1 import main as onward
+
+    rows = []
+    for pn in range(1, 5):
+        image = tmp_path / f"page-{pn:03d}.png"
+        Image.new("RGB", (10, 10), "white").save(image)
+        rows.append({"page_number": pn, "image": str(image), "html": GENEALOGY_TABLE})
+    pages = tmp_path / "pages.jsonl"
+    pages.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+
+    calls = []
+
+    def fake_call_ocr(model, prompt, image_data, temperature, max_tokens, timeout_seconds, user_text=None):
+        calls.append(image_data)
+        time.sleep(0.02)
+        return GENEALOGY_TABLE, None, f"req-{len(calls)}"
+
+    monkeypatch.setattr(onward, "_call_ocr", fake_call_ocr)
+    monkeypatch.setattr(sys, "argv", [
+        "table_rescue_onward_tables_v1", "--pages", str(pages), "--outdir", str(tmp_path),
+        "--concurrency", "3",
+    ])
+    onward.main()
+
+    report = [json.loads(line) for line in (tmp_path / "table_rescue_onward_report.jsonl").read_text().splitlines()]
+    assert [r["page_number"] for r in report] == [1, 2, 3, 4]
+    assert all(r["rescued"] for r in report)
+    assert len(calls) == 4
+    out = [json.loads(line) for line in (tmp_path / "pages_html_onward_tables.jsonl").read_text().splitlines()]
+    assert [r["page_number"] for r in out] == [1, 2, 3, 4]
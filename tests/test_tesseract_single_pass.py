@@ -0,0 +1,59 @@
+from PIL import Image
+
+import modules.common.ocr as ocr
+from modules.extract.extract_ocr_ensemble_v1.main import run_tesseract
+
+HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"
+ROWS = [
+    (1, 1, 0, 0, 0, 0, 0, 0, 800, 1000, -1, ""),
+    (2, 1, 1, 0, 0, 0, 100, 100, 600, 60, -1, ""),
+    (3, 1, 1, 1, 0, 0, 100, 100, 600, 60, -1, ""),
+    (4, 1, 1, 1, 1, 0, 100, 100, 400, 20, -1, ""),
+    (5, 1, 1, 1, 1, 1, 100, 100, 150, 20, 96.5, "Turn"),
+    (5, 1, 1, 1, 1, 2, 260, 102, 40, 18, 90.5, "to"),
+    (4, 1, 1, 1, 2, 0, 100, 140, 200, 20, -1, ""),
+    (5, 1, 1, 1, 2, 1, 100, 140, 200, 20, 80.0, "42."),
+    (5, 1, 1, 1, 2, 2, 320, 140, 10, 20, 95.0, " "),
+    (3, 1, 1, 2, 0, 0, 100, 300, 400, 20, -1, ""),
+    (4, 1, 1, 2, 1, 0, 100, 300, 400, 20, -1, ""),
+    (5, 1, 1, 2, 1, 1, 100, 300, 400, 20, 50.0, "SKILL"),
+]
+TSV = "\n".join([HEADER] + ["\t".join(str(v) for v in row) for row in ROWS]) + "\n"
+
+
+def test_page_text_lines_and_boxes_share_structure():
+    page = ocr.page_from_word_data(ocr.parse_tesseract_tsv(TSV))
+    assert page.text == "Turn to\n42.\n\nSKILL\n"
+    assert len(page.lines) == len(page.text.splitlines())
+    assert page.line_confidences() == [0.935, 0.8, None, 0.5]
+    assert (page.width, page.height) == (800, 1000)
+    assert page.line_bboxes()[0] == [100 / 800, 100 / 1000, 300 / 800, 120 / 1000]
+    assert page.line_bboxes()[2] is None
+    assert abs(page.page_confidence - (96.5 + 90.5 + 80.0 + 50.0) / 400) < 1e-9
+
+    # The API's TSV has no header row.
+    assert ocr.parse_tesseract_tsv(TSV.split("\n", 1)[1]) == ocr.parse_tesseract_tsv(TSV)
+
+
+def test_ensemble_runs_tesseract_once_per_page(tmp_path, monkeypatch):
+    image = tmp_path / "page-001.png"
+    Image.new("RGB", (800, 1000), "white").save(image)
+    calls = []
+
+    def fake_image_to_data(img, lang=None, config=None, **kwargs):
+        calls.append(config)
+        return TSV
+
+    def fail(*args, **kwargs):
+        raise AssertionError("second Tesseract pass")
+
+    monkeypatch.setattr(ocr, "tesserocr", None)
+    monkeypatch.setattr(ocr.pytesseract, "image_to_data", fake_image_to_data)
+    monkeypatch.setattr(ocr.pytesseract, "image_to_string", fail)
+
+    result = run_tesseract(str(image), lang="en", psm=4, oem=3)
+    assert calls == ["--psm 4 --oem 3"]
+    assert result["tesseract"].splitlines() == ["Turn to", "42.", "", "SKILL"]
+    assert result["tesseract_confidences"] == [0.935, 0.8, None, 0.5]
+    assert result["tesseract_line_bboxes"][3] == [0.125, 0.3, 0.625, 0.32]
+    assert result["tesseract_confidence_match_rate"] == 1.0
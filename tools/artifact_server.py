@@ -0,0 +1,176 @@
+import argparse
+import json
+import os
+import sys
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+
+if "tools" in os.path.dirname(__file__):
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules.common.artifact_api import ArtifactReader, RunIndex, tail_jsonl
+from modules.common.run_registry import resolve_output_root
+
+MAX_ROWS_PER_PAGE = 1000
+EVENTS_POLL_SECONDS = 0.5
+EVENTS_KEEPALIVE_SECONDS = 15.0
+
+
+class ArtifactRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Static files from the repo root (so docs/pipeline-visibility.html keeps working) plus:
+      GET /api/health
+      GET /api/artifact?path=<repo-relative>&offset=0&limit=100&fields=a,b
+      GET /api/runs?document=&recipe=&status=&q=&offset=0&limit=50
+      GET /api/runs/<run_id>
+      GET /api/runs/<run_id>/events   (text/event-stream; resumes from Last-Event-ID or ?from=)
+    """
+
+    reader: ArtifactReader
+    runs: RunIndex
+    root: Path
+    poll_seconds = EVENTS_POLL_SECONDS
+
+    def log_message(self, format, *args):  # noqa: A002 - signature from BaseHTTPRequestHandler
+        if os.environ.get("ARTIFACT_SERVER_VERBOSE"):
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if not parsed.path.startswith("/api/"):
+            return super().do_GET()
+        params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        parts = [p for p in parsed.path.split("/") if p][1:]
+        try:
+            if parts == ["health"]:
+                return self._send_json({"ok": True})
+            if parts == ["artifact"]:
+                return self._artifact(params)
+            if parts == ["runs"]:
+                return self._send_json(self.runs.query(
+                    document=params.get("document"),
+                    recipe=params.get("recipe"),
+                    status=params.get("status"),
+                    q=params.get("q"),
+                    offset=int(params.get("offset", 0)),
+                    limit=min(int(params.get("limit", 50)), MAX_ROWS_PER_PAGE),
+                ))
+            if len(parts) == 2 and parts[0] == "runs":
+                entry = self.runs.get(parts[1])
+                if entry is None:
+                    return self._send_error(404, f"unknown run: {parts[1]}")
+                return self._send_json(entry)
+            if len(parts) == 3 and parts[0] == "runs" and parts[2] == "events":
+                return self._events(parts[1], params)
+        except ValueError as e:
+            return self._send_error(400, str(e))
+        except FileNotFoundError as e:
+            return self._send_error(404, str(e))
+        return self._send_error(404, f"unknown endpoint: {parsed.path}")
+
+    def _resolve(self, rel_path: str) -> Path:
+        target = (self.root / rel_path.lstrip("/")).resolve(strict=False)
+        if target != self.root and self.root not in target.parents:
+            raise ValueError(f"path outside repo root: {rel_path}")
+        if not target.is_file():
+            raise FileNotFoundError(rel_path)
+        return target
+
+    def _artifact(self, params):
+        if not params.get("path"):
+            raise ValueError("path is required")
+        path = self._resolve(params["path"])
+        fields = [f for f in params.get("fields", "").split(",") if f] or None
+        page = self.reader.read_rows(
+            str(path),
+            offset=int(params.get("offset", 0)),
+            limit=min(int(params.get("limit", 100)), MAX_ROWS_PER_PAGE),
+            fields=fields,
+        )
+        page["path"] = params["path"]
+        self._send_json(page)
+
+    def _run_dir(self, run_id: str) -> Path:
+        entry = self.runs.get(run_id) or {}
+        if entry.get("path"):
+            return (Path(self.runs.output_root) / entry["path"]).resolve(strict=False)
+        return Path(self.runs.output_root) / "runs" / run_id
+
+    def _events(self, run_id: str, params):
+        events_path = self._run_dir(run_id) / "pipeline_events.jsonl"
+        offset = int(self.headers.get("Last-Event-ID") or params.get("from") or 0)
+        follow = params.get("follow", "1") != "0"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        last_write = time.monotonic()
+        try:
+            while True:
+                rows, offset = tail_jsonl(str(events_path), offset)
+                if rows:
+                    # One SSE message per batch; the id is the byte offset to resume from.
+                    self.wfile.write(f"id: {offset}\nevent: events\ndata: {json.dumps(rows)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    last_write = time.monotonic()
+                if not follow:
+                    return
+                if time.monotonic() - last_write >= EVENTS_KEEPALIVE_SECONDS:
+                    self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+                    last_write = time.monotonic()
+                time.sleep(self.poll_seconds)
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def _send_json(self, payload, status: int = 200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str):
+        self._send_json({"error": message}, status=status)
+
+
+def make_server(host: str, port: int, root: str, output_root: str) -> ThreadingHTTPServer:
+    root_path = Path(root).resolve()
+    handler = type("BoundArtifactRequestHandler", (ArtifactRequestHandler,), {
+        "reader": ArtifactReader(),
+        "runs": RunIndex(output_root),
+        "root": root_path,
+    })
+    server = ThreadingHTTPServer((host, port), partial(handler, directory=str(root_path)))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the pipeline dashboard with paginated artifact reads and live run events.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--root", default=os.path.abspath(os.path.join(os.path.dirname(__file__), "..")),
+                        help="Directory served as / (default: repo root)")
+    parser.add_argument("--output-root", help="Run registry root (default: resolved like driver.py)")
+    args = parser.parse_args()
+
+    output_root = args.output_root or resolve_output_root(cwd=args.root)
+    server = make_server(args.host, args.port, args.root, output_root)
+    print(f"Serving {args.root} on http://{args.host}:{args.port}/docs/pipeline-visibility.html (registry: {output_root})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
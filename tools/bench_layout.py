@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+
+if "tools" in os.path.dirname(__file__):
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules.common.layout import BookLines, assign_columns, cluster_columns, reading_order, sort_lines_by_columns
+from modules.common.utils import read_jsonl
+
+
+def synthetic_book(pages: int, lines_per_page: int, seed: int = 1):
+    rng = random.Random(seed)
+    book = []
+    for p in range(pages):
+        two_col = p % 3 == 0
+        lines = []
+        for i in range(lines_per_page):
+            x0 = (0.55 if two_col and i % 2 else 0.05) + rng.uniform(-0.01, 0.01)
+            width = 0.38 if two_col else rng.uniform(0.6, 0.9)
+            y0 = (i // (2 if two_col else 1)) / lines_per_page
+            lines.append({"text": f"p{p} l{i}", "bbox": [x0, y0, x0 + width, y0 + 0.015]})
+        book.append(lines)
+    return book
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark per-page vs whole-book column/reading-order layout.")
+    ap.add_argument("--pagelines", help="pagelines JSONL (e.g. pagelines_final.jsonl); default: synthetic book")
+    ap.add_argument("--pages", type=int, default=300)
+    ap.add_argument("--lines-per-page", type=int, default=60)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    if args.pagelines:
+        pages = [row.get("lines") or [] for row in read_jsonl(args.pagelines)]
+    else:
+        pages = synthetic_book(args.pages, args.lines_per_page)
+
+    def per_page():
+        for lines in pages:
+            cluster_columns(lines)
+            sort_lines_by_columns(lines)
+
+    def whole_book():
+        book = BookLines.from_pages(pages)
+        reading_order(pages, book, assign_columns(book))
+
+    per_page_s = _best_of(per_page, args.repeat)
+    book_s = _best_of(whole_book, args.repeat)
+    print(json.dumps({
+        "pages": len(pages),
+        "lines": sum(len(p) for p in pages),
+        "lines_with_bbox": len(BookLines.from_pages(pages)),
+        "per_page_seconds": round(per_page_s, 4),
+        "whole_book_seconds": round(book_s, 4),
+        "speedup": round(per_page_s / book_s, 2) if book_s else None,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+
+if "tools" in os.path.dirname(__file__):
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules.common import blob_store
+from modules.common.run_registry import resolve_output_root
+
+
+def _print(payload):
+    print(json.dumps(payload, ensure_ascii=False, indent=2))
+
+
+def _output_root(args, run_dir: str | None = None) -> str:
+    if args.output_root:
+        return str(Path(args.output_root).resolve(strict=False))
+    return resolve_output_root(run_dir=run_dir, cwd=os.getcwd())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the shared content-addressed blob store (output/blobs).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Deduplicate an existing run folder into the blob store.")
+    ingest_parser.add_argument("--run-dir", required=True)
+    ingest_parser.add_argument("--run-id", help="Defaults to the run folder name")
+    ingest_parser.add_argument("--output-root")
+    ingest_parser.add_argument("--ext", action="append", default=[],
+                               help="File extension to ingest (repeatable; default: page image types)")
+    ingest_parser.add_argument("--mode", choices=["auto", "reflink", "hardlink", "copy"], default="auto")
+
+    gc_parser = subparsers.add_parser("gc", help="Delete blobs no longer referenced by any run (known_good runs pin theirs).")
+    gc_parser.add_argument("--output-root")
+    gc_parser.add_argument("--dry-run", action="store_true")
+
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        run_dir = str(Path(args.run_dir).resolve(strict=False))
+        if not os.path.isdir(run_dir):
+            parser.error(f"run dir not found: {run_dir}")
+        output_root = _output_root(args, run_dir)
+        extensions = tuple(args.ext) or blob_store.IMAGE_EXTENSIONS
+        summary = blob_store.dedupe_tree(
+            run_dir,
+            output_root,
+            run_id=args.run_id or os.path.basename(run_dir.rstrip(os.sep)),
+            extensions=extensions,
+            mode=args.mode,
+        )
+        _print({"output_root": output_root, "run_dir": run_dir, **summary})
+        return
+
+    if args.command == "gc":
+        _print(blob_store.gc(_output_root(args), dry_run=args.dry_run))
+        return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+
+if "tools" in os.path.dirname(__file__):
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules.common.text_quality import build_default_vocab, load_default_wordlist
+from modules.common.vocab import CompiledVocab, compile_vocab
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile the spell/garble word list into a memory-mapped vocabulary (.cvocab)."
+    )
+    parser.add_argument("--cache-dir", help="Directory for the default artifact (default: CODEX_VOCAB_DIR or output/cache/vocab)")
+    parser.add_argument("--words", help="Compile this newline-delimited word list instead of the default source")
+    parser.add_argument("--out", help="Output path (required with --words)")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the artifact exists")
+    args = parser.parse_args()
+
+    t0 = time.time()
+    if args.words:
+        if not args.out:
+            parser.error("--out is required with --words")
+        with open(args.words, "r", encoding="utf-8", errors="ignore") as f:
+            words = [line.split("/", 1)[0].strip().lower() for line in f]
+        path = compile_vocab(words, args.out, source=os.path.abspath(args.words))
+    else:
+        path = build_default_vocab(cache_dir=args.cache_dir, force=args.force)
+        if not path:
+            parser.error("vocabulary cache is off (CODEX_VOCAB_DIR=off); pass --cache-dir")
+    vocab = CompiledVocab.load(path)
+    print(json.dumps({
+        "path": path,
+        "words": len(vocab),
+        "bytes": os.path.getsize(path),
+        "source_words": None if args.words else len(load_default_wordlist()),
+        "seconds": round(time.time() - t0, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
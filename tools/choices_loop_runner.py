@@ -1,14 +1,22 @@
 import argparse
-import json
-import subprocess
+import os
 import sys
+import time
 from pathlib import Path
+from typing import Dict, Set
 
 
-def run(cmd):
-    rc = subprocess.call(cmd)
-    if rc != 0:
-        raise SystemExit(f"Command failed: {' '.join(cmd)} rc={rc}")
+if "tools" in os.path.dirname(__file__):
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules.common.utils import log_loop_attempt, save_jsonl
+from modules.enrich.choices_coverage_guard_v1.main import check_row
+from modules.enrich.escalate_choices_llm_v1.main import escalate_sections
+from modules.enrich.infer_choices_regex_v1.main import infer_row_choices, load_portions, save_portions
+
+
+def _section_id(row) -> str:
+    return str(row.get("section_id") or row.get("portion_id"))
 
 
 def main():
@@ -29,67 +37,59 @@ def main():
     args = ap.parse_args()
 
     Path(args.out).parent.mkdir(parents=True, exist_ok=True)
-    current = args.portions
-
-    def ensure_jsonl(path):
-        if path.endswith(".jsonl"):
-            return path
-        data = json.load(open(path, "r", encoding="utf-8"))
-        rows = list(data.values()) if isinstance(data, dict) else data
-        out_path = path.replace(".json", ".jsonl")
-        with open(out_path, "w", encoding="utf-8") as f:
-            for r in rows:
-                f.write(json.dumps(r) + "\n")
-        return out_path
+    rows, fmt = load_portions(args.portions)
+
+    # Sections are processed in memory; after the first attempt only sections the escalation
+    # step touched are re-inferred and re-validated.
+    findings: Dict[int, tuple] = {}
+    dirty: Set[int] = set(range(len(rows)))
+    client = None
 
     for attempt in range(1, args.retries + 1):
         print(f"[choices-loop] attempt {attempt}/{args.retries}")
-        # regex detect (overwrites choices if missing; keeps existing)
-        run([
-            sys.executable,
-            "-m", "modules.enrich.infer_choices_regex_v1.main",
-            "--portions", current,
-            "--out", args.out,
-            "--min-target", str(args.min_target),
-            "--max-target", str(args.max_target),
-        ])
-        current = args.out
+        steps: Dict[str, float] = {}
+        dirty_count = len(dirty)
+
+        # regex detect (fills choices only where missing; keeps existing)
+        t0 = time.perf_counter()
+        for idx in sorted(dirty):
+            infer_row_choices(rows[idx], args.min_target, args.max_target)
+        steps["infer"] = time.perf_counter() - t0
+
         # validate
-        run([
-            sys.executable,
-            "-m", "modules.enrich.choices_coverage_guard_v1.main",
-            "--portions", current,
-            "--out-missing", args.missing,
-            "--out-invalid", args.invalid,
-            "--min-target", str(args.min_target),
-            "--max-target", str(args.max_target),
-            "--include-text",
-        ])
-        missing = list(open(args.missing, "r", encoding="utf-8"))
-        invalid = list(open(args.invalid, "r", encoding="utf-8"))
-        print(f"[choices-loop] missing_count={len(missing)} invalid_count={len(invalid)}")
+        t0 = time.perf_counter()
+        for idx in sorted(dirty):
+            findings[idx] = check_row(rows[idx], args.min_target, args.max_target, include_text=True)
+        missing = [findings[i][0] for i in range(len(rows)) if findings[i][0]]
+        invalid = [findings[i][1] for i in range(len(rows)) if findings[i][1]]
+        save_jsonl(args.missing, missing)
+        save_jsonl(args.invalid, invalid)
+        steps["validate"] = time.perf_counter() - t0
+
+        print(f"[choices-loop] missing_count={len(missing)} invalid_count={len(invalid)} dirty_sections={dirty_count}")
+        remaining = len(missing) + len(invalid)
         if len(missing) == 0 and len(invalid) == 0:
+            log_loop_attempt("choices_loop", attempt, steps, dirty={"sections": dirty_count}, remaining=remaining)
+            save_portions(rows, fmt, args.out)
             print("[choices-loop] done")
             return
         if attempt == args.retries:
+            log_loop_attempt("choices_loop", attempt, steps, dirty={"sections": dirty_count}, remaining=remaining)
             break
+
         # escalate missing choices
-        run([
-            sys.executable,
-            "-m", "modules.enrich.escalate_choices_llm_v1.main",
-            "--portions", current,
-            "--missing", args.missing,
-            "--out", args.out,
-            "--model", args.model,
-            "--max-sections", str(args.max_sections),
-        ])
-        current = args.out
-
-    # Ensure final output is jsonl for driver stamping
-    final = ensure_jsonl(current)
-    if final != args.out:
-        Path(args.out).unlink(missing_ok=True)
-        Path(final).rename(args.out)
+        t0 = time.perf_counter()
+        if client is None:
+            from modules.common.openai_client import OpenAI
+            client = OpenAI()
+        missing_ids = [row["section_id"] for row in missing][: args.max_sections]
+        updated = set(escalate_sections(client, rows, missing_ids, args.model))
+        dirty = {i for i, row in enumerate(rows) if _section_id(row) in updated}
+        steps["escalate"] = time.perf_counter() - t0
+        log_loop_attempt("choices_loop", attempt, steps, dirty={"sections": dirty_count}, remaining=remaining)
+
+    # Final output is jsonl for driver stamping
+    save_jsonl(args.out, rows)
 
     print("[choices-loop] reached retry limit; missing/invalid remain")
 
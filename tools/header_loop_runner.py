@@ -1,9 +1,25 @@
 import argparse
-import json
 import os
 import subprocess
 import sys
-from typing import List
+import time
+from typing import Any, Dict, List, Set, Tuple
+
+
+if "tools" in os.path.dirname(__file__):
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules.adapter.header_coverage_guard_v1.main import (
+    header_ids,
+    missing_rows,
+    page_clean_numbers,
+    page_ocr_numbers,
+    write_bundles,
+)
+from modules.adapter.portion_hyp_dedupe_v1.main import dedupe_hypotheses
+from modules.common.pagelines_store import open_pagelines
+from modules.common.utils import log_loop_attempt, read_jsonl, save_jsonl
+from modules.portionize.portionize_headers_numeric_v1.main import detect_page_headers
 
 
 def run(cmd: List[str]):
@@ -12,6 +28,60 @@ def run(cmd: List[str]):
         raise SystemExit(f"Command failed: {' '.join(cmd)} rc={rc}")
 
 
+class HeaderLoopState:
+    """
+    In-memory detect/coverage results carried across attempts. Pages are keyed by their
+    page number and text, so after the resolver rewrites pages_clean only changed pages are
+    re-detected; OCR pagelines are keyed by their store record (pack offset or file stat).
+    """
+
+    def __init__(self):
+        self.page_hypos: Dict[Tuple[Any, str], List[Dict[str, Any]]] = {}
+        self.page_numbers: Dict[Tuple[Any, str], Set[int]] = {}
+        self.ocr_numbers: Dict[Tuple[str, int, int], Set[int]] = {}
+
+    @staticmethod
+    def _page_key(page: Dict[str, Any]) -> Tuple[Any, str]:
+        return page.get("page"), page.get("clean_text") or page.get("raw_text") or ""
+
+    def detect(self, pages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Set[int], int]:
+        keys = [self._page_key(p) for p in pages]
+        dirty = 0
+        for page, key in zip(pages, keys):
+            if key in self.page_hypos:
+                continue
+            self.page_hypos[key] = detect_page_headers(page)
+            self.page_numbers[key] = page_clean_numbers(page)
+            dirty += 1
+        live = set(keys)
+        for key in [k for k in self.page_hypos if k not in live]:
+            self.page_hypos.pop(key, None)
+            self.page_numbers.pop(key, None)
+        hypos = [h for key in keys for h in self.page_hypos[key]]
+        present_clean: Set[int] = set()
+        for key in keys:
+            present_clean |= self.page_numbers[key]
+        return hypos, present_clean, dirty
+
+    def ocr_presence(self, index_path: str) -> Tuple[Set[int], int]:
+        present: Set[int] = set()
+        live = set()
+        dirty = 0
+        with open_pagelines(index_path) as store:
+            for page_key in store.keys():
+                key = store.record_id(page_key)
+                if key is None:
+                    continue
+                live.add(key)
+                if key not in self.ocr_numbers:
+                    self.ocr_numbers[key] = page_ocr_numbers(store.get_page(page_key))
+                    dirty += 1
+                present |= self.ocr_numbers[key]
+        for key in [k for k in self.ocr_numbers if k not in live]:
+            del self.ocr_numbers[key]
+        return present, dirty
+
+
 def main():
     ap = argparse.ArgumentParser(description="Iterative header resolve loop: detect → dedupe → coverage → resolver until done or retries hit.")
     ap.add_argument("--pages-clean", required=True, help="pages_clean_withnums.jsonl")
@@ -30,35 +100,44 @@ def main():
     ap.add_argument("--inputs", nargs="*", help="(ignored; driver compatibility)")
     args = ap.parse_args()
 
+    state = HeaderLoopState()
     for attempt in range(1, args.retries + 1):
         print(f"[header-loop] attempt {attempt}/{args.retries}")
+        steps: Dict[str, float] = {}
 
-        # Detect
-        run([sys.executable, "-m", "modules.portionize.portionize_headers_numeric_v1.main",
-             "--pages", args.pages_clean, "--out", args.headers])
+        # Detect (only pages whose text changed since the last attempt)
+        t0 = time.perf_counter()
+        pages = list(read_jsonl(args.pages_clean))
+        pages.sort(key=lambda p: p.get("page", 0))
+        hypos, present_clean, dirty_pages = state.detect(pages)
+        save_jsonl(args.headers, hypos)
+        steps["detect"] = time.perf_counter() - t0
 
         # Dedupe
-        run([sys.executable, "-m", "modules.adapter.portion_hyp_dedupe_v1.main",
-             "--input", args.headers, "--out", args.headers_dedup])
+        t0 = time.perf_counter()
+        deduped = dedupe_hypotheses(hypos)
+        save_jsonl(args.headers_dedup, deduped)
+        steps["dedupe"] = time.perf_counter() - t0
 
         # Coverage
-        cov_cmd = [sys.executable, "-m", "modules.adapter.header_coverage_guard_v1.main",
-                   "--headers", args.headers_dedup,
-                   "--pages-clean", args.pages_clean,
-                   "--ocr-index", args.pagelines_index,
-                   "--out", args.missing,
-                   "--note", f"loop attempt {attempt}"]
+        t0 = time.perf_counter()
+        note = f"loop attempt {attempt}"
+        present_ocr, dirty_ocr = state.ocr_presence(args.pagelines_index)
+        missing = missing_rows(header_ids(deduped), present_clean, present_ocr, note=note)
+        save_jsonl(args.missing, missing)
         if args.bundle_dir:
-            cov_cmd += ["--bundle-dir", args.bundle_dir]
-        run(cov_cmd)
+            write_bundles(args.bundle_dir, missing, note=note)
+        steps["coverage"] = time.perf_counter() - t0
+        dirty = {"pages": dirty_pages, "ocr_pages": dirty_ocr}
 
-        missing = list(open(args.missing, "r", encoding="utf-8"))
-        print(f"[header-loop] missing count={len(missing)}")
-        if len(missing) == 0 or (len(missing) == 1 and '"section_id": 169' in (missing[0] if missing else "")):
+        print(f"[header-loop] missing count={len(missing)} dirty_pages={dirty_pages}")
+        if len(missing) == 0 or (len(missing) == 1 and missing[0]["section_id"] == 169):
+            log_loop_attempt("header_loop", attempt, steps, dirty=dirty, remaining=len(missing))
             print("[header-loop] done")
             return
 
-        # Resolver
+        # Resolver (escalates OCR and rewrites pages_clean; changed pages are re-detected next attempt)
+        t0 = time.perf_counter()
         run([
             sys.executable,
             "-m", "modules.adapter.missing_header_resolver_v1.main",
@@ -73,6 +152,8 @@ def main():
             "--pages-clean-out", args.pages_clean,
             "--record-hash", os.path.join(args.outdir, "pagelines_hash.json"),
         ])
+        steps["resolver"] = time.perf_counter() - t0
+        log_loop_attempt("header_loop", attempt, steps, dirty=dirty, remaining=len(missing))
 
     print("[header-loop] reached retry limit; missing remains")
 
@@ -9,6 +9,7 @@ if "tools" in os.path.dirname(__file__):
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from schemas import RunConfig, ExecutionConfig, OptionsConfig, InstrumentationConfig
+from modules.common import batch_runner
 
 def create_run(name: str):
     """Generates a template run config file."""
@@ -84,6 +85,31 @@ def execute_run(name: str, extra_args: Optional[list] = None):
     sys.stdout.flush()
     os.execvp(sys.executable, cmd)
 
+def execute_batch(path: str, plan_only: bool = False):
+    """Runs every config of a batch file concurrently under shared provider limits."""
+    if not os.path.exists(path):
+        print(f"Error: Batch file {path} not found.")
+        sys.exit(1)
+    try:
+        batch = batch_runner.load_batch(path)
+        runs = batch_runner.plan_batch(batch)
+    except Exception as e:
+        print(f"Validation Error in {path}:")
+        print(e)
+        sys.exit(1)
+
+    print(f"Batch '{batch.name}': {len(runs)} runs, {batch.max_parallel_runs} at a time.")
+    for run in runs:
+        est = run["estimate_seconds"]
+        print(f"  {run['run_id']}: priority {run['priority']}, estimate {'unknown' if est is None else f'{est:.0f}s'}")
+    if plan_only:
+        return
+    sys.stdout.flush()
+    report = batch_runner.run_batch(batch, runs)
+    print(f"Batch report: {os.path.join(batch_runner.batch_dir(batch), batch_runner.BATCH_REPORT_MD)}")
+    if report["runs_failed"]:
+        sys.exit(1)
+
 def main():
     parser = argparse.ArgumentParser(description="Manage pipeline runs.")
     subparsers = parser.add_subparsers(dest="command", help="Commands")
@@ -98,12 +124,19 @@ def main():
     # Allow extra args to be passed to driver.py
     exec_parser.add_argument("extra", nargs=argparse.REMAINDER, help="Additional arguments for driver.py")
     
+    # execute-batch
+    batch_parser = subparsers.add_parser("execute-batch", help="Execute several run configurations concurrently.")
+    batch_parser.add_argument("batch", help="Path to a batch YAML (name, runs, max_parallel_runs, provider_limits).")
+    batch_parser.add_argument("--plan", action="store_true", help="Print the launch order and estimates without running.")
+
     args = parser.parse_args()
     
     if args.command == "create-run":
         create_run(args.name)
     elif args.command == "execute-run":
         execute_run(args.name, args.extra)
+    elif args.command == "execute-batch":
+        execute_batch(args.batch, args.plan)
     else:
         parser.print_help()
 